@@ -13,18 +13,23 @@ ITEMS_DB_PATH = "assets/json/items_db.json"
 CARD_IMAGES_DIR = "assets/images/card"
 MONSTER_CHAR_DIR = "assets/images/monster_char"
 CACHE_DIR = "assets/features_cache"
-STATIC_LIB_FILE = os.path.join(CACHE_DIR, "ratio_based_library.pkl")
-MONSTER_LIB_FILE = os.path.join(CACHE_DIR, "monster_library.pkl")
-USER_MEMORY_FILE = os.path.join(CACHE_DIR, "user_memory_library.pkl")
+# 特征库为 memmap 紧凑格式 (core/comparators/packed_library.py)
+STATIC_LIB_FILE = os.path.join(CACHE_DIR, "ratio_based_library.orblib")
+MONSTER_LIB_FILE = os.path.join(CACHE_DIR, "monster_library.orblib")
+USER_MEMORY_FILE = os.path.join(CACHE_DIR, "user_memory_library.orblib")
+LEGACY_USER_MEMORY_FILE = os.path.join(CACHE_DIR, "user_memory_library.pkl") # 旧版 pickle，仅用于一次性迁移
 
 # 算法参数对齐 Rust
 ORB_RATIO = 0.75
 ORB_MATCH_THRESHOLD = 0.05 # 匹配门槛
+ORB_SHORTLIST_K = 5 # 索引投票后精确打分的候选模板数
 
 
 # OCR 配置
 OCR_CONFIDENCE_THRESHOLD = 0.8  # OCR 结果置信度
 FUZZY_MATCH_THRESHOLD = 60      # 模糊匹配门槛 (0-100)
+OCR_CACHE_SIZE = 64             # OCR 结果缓存条数（按名字区域二值化缩略图的哈希）
+OCR_CACHE_TTL = 30.0            # OCR 结果缓存过期时间 (秒)
 
 # 详情框内部裁剪比例 (根据你之前发的那张棕色框截图)
 # 名字通常在详情框顶部的 15% 区域
@@ -37,9 +37,9 @@ class MSSCapturer(BaseCapturer):
         
         try:
             img = self.sct.grab(monitor)
-            # Convert to numpy array (BGRA -> BGR)
-            frame = np.array(img)
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            # Wrap the raw BGRA buffer without copying, then convert (BGRA -> BGR)
+            # in a single pass; the returned frame is owned by the caller
+            frame = cv2.cvtColor(np.asarray(img), cv2.COLOR_BGRA2BGR)
             return frame
         except Exception as e:
             logger.warning(f"MSS capture failed: {e}")
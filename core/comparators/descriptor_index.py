@@ -0,0 +1,91 @@
+"""
+多模板特征索引 (Descriptor Index)
+把一个子库所有模板（含用户记忆变体）的 ORB 描述子堆叠成一个矩阵，附带 行 → 模板 的标签数组，
+并在整个子库上建一个 FLANN LSH 索引：
+- shortlist(): 目标图的每个描述子只查一次最近邻并按模板投票，得到候选 Top-K，耗时与库大小基本无关
+- 候选由 FeatureMatcher 用原来的 knnMatch + Ratio Test 精确打分，最终得分与全量比对一致
+描述子直接使用特征库文件里按子库连续存放的矩阵（见 packed_library），LSH 索引加载时现建
+"""
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.comparators.packed_library import PackedBucket
+
+# FLANN_INDEX_LSH：4 张哈希表、16 位键、不做多探针
+# 实测 100~400 个模板的子库上单次查询 < 5ms，真实模板的票数远高于其他模板
+LSH_PARAMS = dict(algorithm=6, table_number=4, key_size=16, multi_probe_level=0)
+
+
+class DescriptorIndex:
+    """单个子库（Small/Medium/Large 或怪物库）的堆叠描述子 + LSH 索引"""
+
+    def __init__(self, descriptors: np.ndarray, labels: np.ndarray, ids: Iterable[str]):
+        # memmap 的连续视图不会被拷贝
+        self.descriptors = np.ascontiguousarray(descriptors, dtype=np.uint8)
+        self.labels = np.ascontiguousarray(labels, dtype=np.int32)
+        self.ids = list(ids)
+        self._flann = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bucket(cls, bucket: PackedBucket, user_memory: Optional[PackedBucket] = None) -> "DescriptorIndex":
+        """
+        Args:
+            bucket: 子库（描述子已经连续存放，没有用户记忆变体时直接复用，不拷贝）
+            user_memory: 用户记忆库，属于本子库模板的变体追加在后面，归到同一个模板标签下
+        """
+        ids = list(bucket)
+        label_of = {cid: label for label, cid in enumerate(ids)}
+        entry_labels = np.array([label_of[cid] for cid in bucket.entry_ids], dtype=np.int32)
+        descriptors = bucket.descriptors
+        labels = np.repeat(entry_labels, bucket.entry_counts())
+
+        extra = [row for row, cid in enumerate(user_memory.entry_ids) if cid in label_of] if user_memory else []
+        if extra:
+            blocks = [user_memory.descriptors[user_memory.offsets[row]:user_memory.offsets[row + 1]] for row in extra]
+            descriptors = np.vstack([descriptors, *blocks])
+            labels = np.concatenate([labels, *[np.full(len(block), label_of[user_memory.entry_ids[row]], dtype=np.int32)
+                                                for row, block in zip(extra, blocks)]])
+        return cls(descriptors, labels, ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def rows(self) -> int:
+        return len(self.descriptors)
+
+    def prepare(self):
+        """建好 LSH 索引（只建一次；不调用时在第一次查询时建）"""
+        if self._flann is None:
+            with self._lock:
+                if self._flann is None:
+                    self._flann = cv2.flann_Index(self.descriptors, LSH_PARAMS)
+        return self._flann
+
+    def shortlist(self, t_des: np.ndarray, k: int = 5, ratio: float = 0.75) -> List[Tuple[str, int]]:
+        """
+        投票选出候选模板
+
+        每个目标描述子在整个子库中找 2 个最近邻；最近邻明显优于次近邻（Ratio Test），
+        或两个近邻属于同一模板时，给最近邻所在的模板投一票
+
+        Returns:
+            [(模板ID, 票数), ...] 按票数降序，只包含得票的模板，最多 k 个
+        """
+        if t_des is None or len(t_des) == 0 or self.rows < 2:
+            return []
+
+        idx, dist = self.prepare().knnSearch(np.ascontiguousarray(t_des, dtype=np.uint8), 2, params={})
+        found = (idx[:, 0] >= 0) & (idx[:, 1] >= 0)
+        idx, dist = idx[found], dist[found]
+        first = self.labels[idx[:, 0]]
+        good = (dist[:, 0] < ratio * dist[:, 1]) | (first == self.labels[idx[:, 1]])
+
+        votes = np.bincount(first[good], minlength=len(self.ids))
+        top = np.argsort(-votes, kind="stable")[:k]
+        return [(self.ids[i], int(votes[i])) for i in top if votes[i] > 0]
+
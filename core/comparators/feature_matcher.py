@@ -1,154 +1,216 @@
 import os
 import cv2
 import pickle
-import json
+import threading
 import time
 import numpy as np
 from loguru import logger
 import config
 
+from data_manager.game_catalog import get_game_catalog
+from core.comparators.descriptor_index import DescriptorIndex
+from core.comparators.library_builder import LibraryBuilder, is_current
+from core.comparators.packed_library import open_library, pack_bucket, write_library
+
+SIZE_BUCKETS = ('Large', 'Medium', 'Small')
+# 写入特征库文件头：提取参数变化时旧缓存自动失效并重建
+ORB_PARAMS = {"nfeatures": 500}
+IMAGE_EXTS = ('.png', '.jpg', '.webp') # 同名时按此优先级
+
+
+def _image_paths(directory):
+    """目录下的图片 {文件名(不含扩展名): 路径}，一次 scandir，不逐个 exists"""
+    paths, ranks = {}, {}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return paths
+    for entry in entries:
+        stem, ext = os.path.splitext(entry.name)
+        ext = ext.lower()
+        if ext in IMAGE_EXTS and entry.is_file():
+            rank = IMAGE_EXTS.index(ext)
+            if rank < ranks.get(stem, len(IMAGE_EXTS)):
+                paths[stem], ranks[stem] = entry.path, rank
+    return paths
+
+
+def card_image_sources():
+    """物品卡图，按 items_db 中的尺寸分到子库：{尺寸: [(物品ID, 路径), ...]}"""
+    sources = {size: [] for size in SIZE_BUCKETS}
+    db = get_game_catalog().load_json(config.ITEMS_DB_PATH)
+    if db is None:
+        logger.critical(f"FeatureMatcher: 无法读取数据库文件 {config.ITEMS_DB_PATH}")
+        return sources
+
+    paths = _image_paths(config.CARD_IMAGES_DIR)
+    seen = set()
+    for item in db:
+        item_id = item.get('id', '').strip()
+        size_cat = item.get('size', '').split('/')[0].strip() # 'Small' / 'Medium' / 'Large'
+        path = paths.get(item_id)
+        if not path or size_cat not in sources or item_id in seen:
+            continue
+        seen.add(item_id)
+        sources[size_cat].append((item_id, path))
+    return sources
+
+
+def monster_image_sources():
+    """怪物角色图：{'Monster': [(文件名ID, 路径), ...]}"""
+    if not os.path.exists(config.MONSTER_CHAR_DIR):
+        logger.error(f"FeatureMatcher: 怪物图片目录不存在: {config.MONSTER_CHAR_DIR}")
+        return {'Monster': []}
+    return {'Monster': sorted(_image_paths(config.MONSTER_CHAR_DIR).items())}
+
 class FeatureMatcher:
-    def __init__(self):
+    def __init__(self, progress=None):
+        """
+        Args:
+            progress: 特征库构建进度回调 progress(库名, 已完成, 总数)，只在需要提取特征时调用
+        """
         # 对齐 Rust 版 nfeatures=500
         logger.debug("FeatureMatcher: 正在初始化 ORB 引擎 (nfeatures=500)...")
-        self.orb = cv2.ORB_create(nfeatures=500)
-        self.bf = cv2.BFMatcher(cv2.NORM_HAMMING)
+        # ✅ ORB/BFMatcher 实例不保证线程安全：识别线程池中每个线程各用一份
+        self._local = threading.local()
         
-        # 恢复按形状分类的子库
-        self.static_lib = {'Large': {}, 'Medium': {}, 'Small': {}}
-        self.monster_lib = {} # 怪物特征库
-        self.user_memory = {} 
+        # 恢复按形状分类的子库（PackedBucket：memmap 视图，lib[cid] -> {'orb_des', 'kp_count'}）
+        empty = pack_bucket([])
+        self.static_lib = {size: empty for size in SIZE_BUCKETS}
+        self.monster_lib = empty # 怪物特征库
+        self.user_memory = empty # 同一 ID 可有多个变体，见 variants()
+        self._libraries = {} # 文件路径 -> PackedLibrary（持有映射）
+        self._progress = progress
+        # ✅ 每个子库一份堆叠描述子索引：先投票选出候选，再逐个精确打分
+        self.static_index = {}
+        self.monster_index = None
         
         os.makedirs(config.CACHE_DIR, exist_ok=True)
         self._load_all_libraries()
+        self._build_indexes()
+
+    @property
+    def orb(self):
+        orb = getattr(self._local, "orb", None)
+        if orb is None:
+            orb = self._local.orb = cv2.ORB_create(**ORB_PARAMS)
+        return orb
+
+    @property
+    def bf(self):
+        bf = getattr(self._local, "bf", None)
+        if bf is None:
+            bf = self._local.bf = cv2.BFMatcher(cv2.NORM_HAMMING)
+        return bf
 
     def _load_all_libraries(self):
         logger.info("FeatureMatcher: 正在加载特征数据库...")
+        start_time = time.perf_counter()
         
-        # 1. 加载静态库 (Items)
-        if os.path.exists(config.STATIC_LIB_FILE):
-            try:
-                with open(config.STATIC_LIB_FILE, "rb") as f:
-                    self.static_lib = pickle.load(f)
-                
-                # 检查数据结构
-                if 'Small' not in self.static_lib:
-                    logger.warning("FeatureMatcher: 检测到旧版结构，准备重构静态库...")
-                    self._build_static_library()
-                else:
-                    l_count = len(self.static_lib['Large'])
-                    m_count = len(self.static_lib['Medium'])
-                    s_count = len(self.static_lib['Small'])
-                    logger.success(f"FeatureMatcher: Item特征库加载成功 (L:{l_count}, M:{m_count}, S:{s_count})")
-            except Exception as e:
-                logger.error(f"FeatureMatcher: 加载静态特征库失败: {e}")
-                self._build_static_library()
-        else:
-            logger.info("FeatureMatcher: 静态库不存在，开始初次构建...")
-            self._build_static_library()
+        # 1. 加载静态库 (Items)：卡图有新增/变化时增量更新
+        buckets = self._sync_library(config.STATIC_LIB_FILE, "Item", card_image_sources())
+        if buckets:
+            self.static_lib = {size: buckets[size] for size in SIZE_BUCKETS}
+            l_count = len(self.static_lib['Large'])
+            m_count = len(self.static_lib['Medium'])
+            s_count = len(self.static_lib['Small'])
+            logger.success(f"FeatureMatcher: Item特征库加载成功 (L:{l_count}, M:{m_count}, S:{s_count})")
 
         # 2. 加载怪物库 (Monsters)
-        if os.path.exists(config.MONSTER_LIB_FILE):
-             try:
-                with open(config.MONSTER_LIB_FILE, "rb") as f:
-                    self.monster_lib = pickle.load(f)
-                logger.success(f"FeatureMatcher: Monster特征库加载成功 ({len(self.monster_lib)} monsters)")
-             except Exception as e:
-                logger.error(f"FeatureMatcher: 加载怪物特征库失败: {e}")
-                self._build_monster_library()
+        buckets = self._sync_library(config.MONSTER_LIB_FILE, "Monster", monster_image_sources())
+        if buckets:
+            self.monster_lib = buckets['Monster']
+            logger.success(f"FeatureMatcher: Monster特征库加载成功 ({len(self.monster_lib)} monsters)")
+
+        # 3. 加载用户记忆库（无法重建；旧版 pickle 只迁移一次）
+        lib = open_library(config.USER_MEMORY_FILE, ORB_PARAMS, required=('Memory',))
+        if lib is not None:
+            self._libraries[config.USER_MEMORY_FILE] = lib
+            buckets = lib.buckets
         else:
-             self._build_monster_library()
-
-        # 3. 加载用户记忆库
-        if os.path.exists(config.USER_MEMORY_FILE):
-            try: 
-                with open(config.USER_MEMORY_FILE, "rb") as f: 
-                    self.user_memory = pickle.load(f)
-                logger.success(f"FeatureMatcher: 用户记忆库加载成功 (包含 {len(self.user_memory)} 个条目)")
-            except Exception as e:
-                logger.error(f"FeatureMatcher: 加载用户记忆库失败: {e}")
-                self.user_memory = {}
-
-    def _build_static_library(self):
-        start_time = time.perf_counter()
-        logger.info("FeatureMatcher: 开始扫描数据库并提取 ORB 特征点...")
-        
-        self.static_lib = {'Large': {}, 'Medium': {}, 'Small': {}}
+            buckets = self._migrate_user_memory()
+            if buckets:
+                buckets = self._write_and_open(config.USER_MEMORY_FILE, buckets)
+        if buckets:
+            self.user_memory = buckets['Memory']
+            logger.success(f"FeatureMatcher: 用户记忆库加载成功 (包含 {len(self.user_memory)} 个条目)")
+
+        logger.debug(f"FeatureMatcher: 特征库加载完成, 耗时: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+    def _sync_library(self, path, label, sources):
+        """
+        映射特征库文件，并与源图片对比（只做 stat）：
+        有新增/变化/删除时增量重建，文件不存在或版本过期时全量重建
+
+        Returns:
+            {子库名: PackedBucket}；没有任何源图片且没有旧库时返回 None
+        """
+        lib = open_library(path, ORB_PARAMS, required=sources.keys())
+        stamps = lib.header.get("meta", {}).get("sources") if lib is not None else None
+        if lib is not None and (stamps is not None and is_current(sources, stamps) or not any(sources.values())):
+            self._libraries[path] = lib
+            return lib.buckets
+        if not any(sources.values()):
+            logger.error(f"FeatureMatcher: 没有找到 {label} 源图片，无法构建特征库")
+            return None
+
+        logger.info(f"FeatureMatcher: {label} 特征库{'需要更新' if lib is not None else '不存在或已过期'}，开始构建...")
+        builder = LibraryBuilder(ORB_PARAMS, progress=lambda done, total: self._report_progress(label, done, total))
+        buckets, stamps = builder.build(sources, lib.buckets if lib is not None else None, stamps)
+        if lib is not None:
+            self._libraries.pop(path, None)
+            lib.close()
+        return self._write_and_open(path, buckets, {"sources": stamps})
+
+    def _write_and_open(self, path, buckets, meta=None):
+        """写入特征库并重新映射；写入失败时直接使用内存中的子库"""
         try:
-            with open(config.ITEMS_DB_PATH, 'r', encoding='utf-8') as f:
-                db = json.load(f)
-        except Exception as e:
-            logger.critical(f"FeatureMatcher: 无法读取数据库文件 {config.ITEMS_DB_PATH}: {e}")
-            return
+            write_library(path, buckets, ORB_PARAMS, meta)
+            lib = open_library(path, ORB_PARAMS, required=buckets.keys())
+        except OSError as e:
+            logger.error(f"FeatureMatcher: 写入特征库失败 {path}: {e}")
+            lib = None
+        if lib is None:
+            return buckets
+        self._libraries[path] = lib
+        return lib.buckets
 
-        process_count = 0
-        for item in db:
-            item_id = item.get('id', '').strip()
-            size_cat = item.get('size', '').split('/')[0].strip() # 'Small' / 'Medium' / 'Large'
-            
-            path = self._find_img_path(item_id)
-            if not path or size_cat not in self.static_lib: 
-                continue
-            
-            img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
-            if img is None: 
-                logger.warning(f"FeatureMatcher: 无法加载图片 -> {path}")
-                continue
-
-            kp, des = self.orb.detectAndCompute(img, None)
-            if des is not None:
-                self.static_lib[size_cat][item_id] = {
-                    'orb_des': des, 
-                    'kp_count': len(kp)
-                }
-                process_count += 1
-        
-        with open(config.STATIC_LIB_FILE, "wb") as f:
-            pickle.dump(self.static_lib, f)
-            
-        cost = time.perf_counter() - start_time
-        logger.success(f"FeatureMatcher: 特征库构建完成! 处理了 {process_count} 张卡牌，耗时: {cost:.2f}s")
-    
-    def _build_monster_library(self):
-        """构建怪物特征库"""
+    def _report_progress(self, label, done, total):
+        if self._progress:
+            self._progress(label, done, total)
+
+    def _build_indexes(self):
+        """为每个子库建堆叠描述子索引（直接复用 memmap 中的连续描述子矩阵）"""
         start_time = time.perf_counter()
-        logger.info("FeatureMatcher: 开始构建怪物特征库...")
-        self.monster_lib = {}
-        
-        if not os.path.exists(config.MONSTER_CHAR_DIR):
-            logger.error(f"FeatureMatcher: 怪物图片目录不存在: {config.MONSTER_CHAR_DIR}")
-            return
+        self.static_index = {size: DescriptorIndex.from_bucket(lib, self.user_memory)
+                             for size, lib in self.static_lib.items()}
+        self.monster_index = DescriptorIndex.from_bucket(self.monster_lib)
+        for index in [*self.static_index.values(), self.monster_index]:
+            index.prepare()
+        rows = sum(index.rows for index in self.static_index.values())
+        logger.success(f"FeatureMatcher: 特征索引构建完成 ({rows} 个描述子), 耗时: {time.perf_counter()-start_time:.2f}s")
 
-        count = 0
-        
-        for filename in os.listdir(config.MONSTER_CHAR_DIR):
-            if filename.lower().endswith(('.webp', '.png', '.jpg')):
-                path = os.path.join(config.MONSTER_CHAR_DIR, filename)
-                name_id = os.path.splitext(filename)[0] # 文件名作为ID
-                
-                # 能够读取中文路径
-                img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
-                if img is None: continue
-                
-                kp, des = self.orb.detectAndCompute(img, None)
-                if des is not None:
-                    self.monster_lib[name_id] = {
-                        'orb_des': des,
-                        'kp_count': len(kp)
-                    }
-                    count += 1
-        
-        with open(config.MONSTER_LIB_FILE, "wb") as f:
-            pickle.dump(self.monster_lib, f)
-            
-        logger.success(f"FeatureMatcher: 怪物库构建完成 ({count} units), 耗时: {time.perf_counter()-start_time:.2f}s")
+    def _ratio_score(self, t_des, num_target_kp, src):
+        """对齐旧代码：knnMatch + Ratio Test，按较少的特征点数归一化"""
+        matches = self.bf.knnMatch(t_des, src['orb_des'], k=2)
+        good = sum(1 for m_n in matches
+                   if len(m_n) == 2 and m_n[0].distance < config.ORB_RATIO * m_n[1].distance)
+        denom = max(1, min(num_target_kp, src['kp_count']))
+        return float(good) / denom
 
-    def _find_img_path(self, item_id):
-        for ext in ['.png', '.jpg', '.webp']:
-            p = os.path.join(config.CARD_IMAGES_DIR, f"{item_id}{ext}")
-            if os.path.exists(p): 
-                return p
-        return None
+    def _migrate_user_memory(self):
+        """把旧版 pickle 用户记忆库 {ID: [{'orb_des', 'kp_count'}, ...]} 转成紧凑格式"""
+        if not os.path.exists(config.LEGACY_USER_MEMORY_FILE):
+            return None
+        try:
+            with open(config.LEGACY_USER_MEMORY_FILE, "rb") as f:
+                legacy = pickle.load(f)
+        except Exception as e:
+            logger.error(f"FeatureMatcher: 读取旧版用户记忆库失败: {e}")
+            return None
+        entries = [(cid, src['orb_des'], src['kp_count']) for cid, sources in legacy.items() for src in sources]
+        logger.info(f"FeatureMatcher: 旧版用户记忆库已迁移 ({len(entries)} 个变体)")
+        return {'Memory': pack_bucket(entries)}
 
     def match_monster_character(self, target_img):
         """匹配怪物角色图片"""
@@ -162,17 +224,9 @@ class FeatureMatcher:
             return []
 
         final_res = []
-        for name, static_data in self.monster_lib.items():
-            matches = self.bf.knnMatch(t_des, static_data['orb_des'], k=2)
-            good = 0
-            for m_n in matches:
-                if len(m_n) == 2:
-                    m, n = m_n
-                    if m.distance < config.ORB_RATIO * n.distance:
-                        good += 1
-            
-            denom = max(1, min(num_target_kp, static_data['kp_count']))
-            score = float(good) / denom
+        candidates = self.monster_index.shortlist(t_des, config.ORB_SHORTLIST_K, config.ORB_RATIO)
+        for name, _votes in candidates:
+            score = self._ratio_score(t_des, num_target_kp, self.monster_lib[name])
             if score >= config.ORB_MATCH_THRESHOLD:
                final_res.append((name, score))
 
@@ -186,7 +240,7 @@ class FeatureMatcher:
 
     def match(self, target_img, size_cat):
         """ 
-        全量比对指定尺寸子库：完全对齐 Rust 旧逻辑 
+        比对指定尺寸子库：索引投票选出候选，候选的打分完全对齐 Rust 旧逻辑
         """
         match_start = time.perf_counter()
         
@@ -207,35 +261,22 @@ class FeatureMatcher:
 
         final_res = []
         lib = self.static_lib[size_cat] 
-        logger.debug(f"FeatureMatcher: 正在比对 [{size_cat}] 库中的 {len(lib)} 个模板...")
         
-        # 2. 全量暴力匹配
-        for cid, static_data in lib.items():
-            sources = [static_data]
-            if cid in self.user_memory:
-                sources.extend(self.user_memory[cid])
+        # 2. 整个子库一次索引查询，投票选出候选模板
+        candidates = self.static_index[size_cat].shortlist(t_des, config.ORB_SHORTLIST_K, config.ORB_RATIO)
+        logger.debug(f"FeatureMatcher: [{size_cat}] 库 {len(lib)} 个模板中选出候选: "
+                     f"{[(cid[:8], votes) for cid, votes in candidates]}")
+        
+        # 3. 候选精确打分（含用户记忆变体）
+        for cid, _votes in candidates:
+            sources = [lib[cid], *self.user_memory.variants(cid)]
             
-            best_score = 0
-            for src in sources:
-                # 对齐旧代码：knnMatch + Ratio Test
-                matches = self.bf.knnMatch(t_des, src['orb_des'], k=2)
-                good = 0
-                for m_n in matches:
-                    if len(m_n) == 2:
-                        m, n = m_n
-                        if m.distance < config.ORB_RATIO * n.distance:
-                            good += 1
-                
-                # 对齐旧代码：归一化评分
-                denom = max(1, min(num_target_kp, src['kp_count']))
-                score = float(good) / denom
-                if score > best_score: 
-                    best_score = score
+            best_score = max(self._ratio_score(t_des, num_target_kp, src) for src in sources)
             
             if best_score >= config.ORB_MATCH_THRESHOLD:
                 final_res.append((cid, best_score))
 
-        # 3. 结果整理
+        # 4. 结果整理
         sorted_res = sorted(final_res, key=lambda x: x[1], reverse=True)[:1]
         
         duration = (time.perf_counter() - match_start) * 1000
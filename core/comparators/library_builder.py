@@ -0,0 +1,207 @@
+"""
+特征库增量构建 (Library Builder)
+对比源图片与上次构建时记录的 (大小, mtime, 内容哈希)：
+- 大小和 mtime 都没变：直接复用旧描述子，不读文件
+- 变了但内容哈希相同（例如重新下载了同一张图）：复用旧描述子，只更新记录
+- 新增或内容变化：重新提取 ORB 特征；数量较多时分发到进程池并行提取
+- 源图片已删除：从库中移除
+- 提取失败的图片只留记录，文件没变就不再重试
+进度通过回调 progress(done, total) 报告
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from core.comparators.packed_library import PackedBucket, pack_bucket
+
+# {子库名: [(模板ID, 图片路径), ...]}
+Sources = Dict[str, List[Tuple[str, str]]]
+# {子库名: {模板ID: [大小, mtime_ns, 内容哈希]}}
+SourceStamps = Dict[str, Dict[str, list]]
+
+_worker_orb = None
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def extract_features(path: str, params: dict) -> Optional[Tuple[np.ndarray, int]]:
+    """读取灰度图并提取 ORB 特征（进程池中每个进程复用一个 ORB 实例）"""
+    global _worker_orb
+    if _worker_orb is None:
+        _worker_orb = cv2.ORB_create(**params)
+    # 能够读取中文路径
+    img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        return None
+    kp, des = _worker_orb.detectAndCompute(img, None)
+    if des is None:
+        return None
+    return des, len(kp)
+
+
+def _extract_chunk(paths: List[str], params: dict) -> List[Optional[Tuple[np.ndarray, int]]]:
+    return [extract_features(path, params) for path in paths]
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def is_current(sources: Sources, stamps: SourceStamps) -> bool:
+    """只做 stat 的快速检查：模板集合和每个文件的 (大小, mtime) 都与记录一致"""
+    for bucket, items in sources.items():
+        recorded = stamps.get(bucket, {})
+        if len(recorded) != len(items):
+            return False
+        for cid, path in items:
+            stamp = recorded.get(cid)
+            if stamp is None or _stat(path) != (stamp[0], stamp[1]):
+                return False
+    return set(stamps) <= set(sources)
+
+
+class LibraryBuilder:
+    """按源图片增量构建一个特征库文件中的全部子库"""
+
+    def __init__(self, params: dict, max_workers: Optional[int] = None,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 parallel_threshold: int = 32, chunk_size: int = 16):
+        """
+        Args:
+            params: ORB 参数（与特征库文件头中的一致）
+            max_workers: 进程数，默认 CPU 核数 - 1（至少 1）
+            progress: 进度回调 progress(已完成, 需要提取的总数)
+            parallel_threshold: 需要提取的图片少于该数量时在当前进程内完成（省去进程启动开销）
+            chunk_size: 每个进程任务处理的图片数
+        """
+        self.params = params
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.progress = progress
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self.stats = {}
+
+    def build(self, sources: Sources, previous: Optional[Dict[str, PackedBucket]] = None,
+              stamps: Optional[SourceStamps] = None) -> Tuple[Dict[str, PackedBucket], SourceStamps]:
+        """
+        Args:
+            sources: 当前的源图片
+            previous: 上次构建的子库（可以是 memmap 视图，复用的描述子会被拷贝出来）
+            stamps: 上次构建记录的源图片信息
+
+        Returns:
+            (新的子库, 新的源图片记录)
+        """
+        start = time.perf_counter()
+        previous = previous or {}
+        stamps = stamps or {}
+        new_stamps: SourceStamps = {}
+        reused: Dict[Tuple[str, str], Tuple[np.ndarray, int]] = {}
+        pending: List[Tuple[str, str, str]] = []   # (子库, 模板ID, 路径)
+        hashed = 0
+
+        for bucket, items in sources.items():
+            old_bucket = previous.get(bucket)
+            old_stamps = stamps.get(bucket, {})
+            new_stamps[bucket] = {}
+            for cid, path in items:
+                stat = _stat(path)
+                if stat is None:
+                    continue
+                old = old_stamps.get(cid)
+                have_old = old_bucket is not None and cid in old_bucket
+                unchanged = old is not None and (old[0], old[1]) == stat
+                if unchanged and not have_old:
+                    # 上次提取失败（读图失败或没有特征点）且文件没变：不再重试
+                    new_stamps[bucket][cid] = old
+                    continue
+                if unchanged:
+                    digest = old[2]
+                else:
+                    digest = file_digest(path)
+                    hashed += 1
+                    have_old = have_old and old is not None and old[2] == digest
+                new_stamps[bucket][cid] = [stat[0], stat[1], digest]
+                if have_old:
+                    entry = old_bucket[cid]
+                    reused[(bucket, cid)] = (np.array(entry['orb_des']), entry['kp_count'])
+                else:
+                    pending.append((bucket, cid, path))
+
+        extracted = self._extract_all(pending)
+
+        buckets = {}
+        for bucket, items in sources.items():
+            entries = []
+            for cid, _path in items:
+                features = reused.get((bucket, cid)) or extracted.get((bucket, cid))
+                if features is None:
+                    # 读图失败或没有特征点：只留源图片记录，文件变化后才重试
+                    continue
+                entries.append((cid, features[0], features[1]))
+            buckets[bucket] = pack_bucket(entries)
+
+        self.stats = {
+            "total": sum(len(items) for items in sources.values()),
+            "reused": len(reused),
+            "extracted": len(extracted),
+            "hashed": hashed,
+            "seconds": time.perf_counter() - start,
+        }
+        logger.info(f"LibraryBuilder: 复用 {len(reused)} 个, 重新提取 {len(extracted)}/{len(pending)} 个, "
+                    f"耗时 {self.stats['seconds']:.2f}s")
+        return buckets, new_stamps
+
+    def _extract_all(self, pending: List[Tuple[str, str, str]]) -> Dict[Tuple[str, str], Tuple[np.ndarray, int]]:
+        results = {}
+        total = len(pending)
+        if total == 0:
+            return results
+        self._report(0, total)
+
+        if total < self.parallel_threshold or self.max_workers <= 1:
+            for done, (bucket, cid, path) in enumerate(pending, 1):
+                features = extract_features(path, self.params)
+                if features is not None:
+                    results[(bucket, cid)] = features
+                self._report(done, total)
+            return results
+
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, total, self.chunk_size)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(_extract_chunk, [path for _, _, path in chunk], self.params): chunk
+                       for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    features_list = future.result()
+                except Exception as e:
+                    logger.error(f"LibraryBuilder: 特征提取进程异常: {e}")
+                    features_list = [None] * len(chunk)
+                for (bucket, cid, _path), features in zip(chunk, features_list):
+                    if features is not None:
+                        results[(bucket, cid)] = features
+                done += len(chunk)
+                self._report(done, total)
+        return results
+
+    def _report(self, done: int, total: int):
+        if self.progress:
+            try:
+                self.progress(done, total)
+            except Exception as e:
+                logger.debug(f"LibraryBuilder: 进度回调异常: {e}")
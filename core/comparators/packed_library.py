@@ -0,0 +1,211 @@
+"""
+紧凑特征库 (Packed Descriptor Library)
+替代 pickle 的特征库磁盘格式：每个子库一块连续的 uint8 描述子矩阵 + 偏移表 + 特征点数表，
+整个文件 np.memmap 映射，启动时只解析一个很小的 JSON 头，比对时直接切片视图（不拷贝）
+
+文件布局：
+    MAGIC (8B) | 格式版本 uint32 | 头长度 uint32 | JSON 头 | 对齐填充 | 数据区
+JSON 头记录格式版本、提取参数、附加信息和各子库的 ID 表以及数组在数据区的位置；
+版本号或提取参数不一致时视为过期缓存，由调用方重建
+"""
+import json
+import os
+import struct
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+MAGIC = b"BZORBLIB"
+FORMAT_VERSION = 1
+DESCRIPTOR_SIZE = 32    # ORB 描述子 256 bit
+_ALIGN = 64
+_PREFIX = struct.Struct("<8sII")
+_ARRAYS = ("descriptors", "offsets", "kp_counts")
+
+# (模板ID, 描述子矩阵, 特征点数)
+Entry = Tuple[str, np.ndarray, int]
+
+
+class PackedBucket(Mapping):
+    """
+    一个子库的只读视图
+
+    同一个 ID 可以有多条记录（用户记忆的多个变体）：
+    - lib[cid] 返回第一条记录 {'orb_des': 视图, 'kp_count': n}，与旧版 dict 结构一致
+    - variants(cid) 返回该 ID 的全部记录
+    """
+
+    def __init__(self, ids: List[str], descriptors: np.ndarray, offsets: np.ndarray, kp_counts: np.ndarray):
+        self.entry_ids = ids
+        self.descriptors = descriptors
+        self.offsets = offsets
+        self.kp_counts = kp_counts
+        self._rows_by_id: Dict[str, List[int]] = {}
+        for row, cid in enumerate(ids):
+            self._rows_by_id.setdefault(cid, []).append(row)
+
+    def _entry(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return {'orb_des': self.descriptors[start:end], 'kp_count': int(self.kp_counts[row])}
+
+    def __getitem__(self, cid: str) -> dict:
+        return self._entry(self._rows_by_id[cid][0])
+
+    def __iter__(self):
+        return iter(self._rows_by_id)
+
+    def __len__(self) -> int:
+        return len(self._rows_by_id)
+
+    def variants(self, cid: str) -> List[dict]:
+        return [self._entry(row) for row in self._rows_by_id.get(cid, [])]
+
+    def entry_counts(self) -> np.ndarray:
+        """每条记录的描述子行数"""
+        return np.diff(self.offsets)
+
+
+class PackedLibrary:
+    """一个特征库文件（包含若干子库），整体 memmap"""
+
+    def __init__(self, path: str, header: dict, buckets: Dict[str, PackedBucket], mapping: Optional[np.memmap]):
+        self.path = path
+        self.header = header
+        self.buckets = buckets
+        self._mapping = mapping
+
+    def __getitem__(self, name: str) -> PackedBucket:
+        return self.buckets[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.buckets
+
+    def close(self):
+        """释放映射（Windows 下覆盖被映射的文件前必须先关闭）"""
+        self.buckets = {}
+        if self._mapping is not None:
+            mmap = getattr(self._mapping, "_mmap", None)
+            self._mapping = None
+            if mmap is not None:
+                try:
+                    mmap.close()
+                except BufferError:
+                    # 还有视图在使用，交给垃圾回收释放
+                    pass
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def pack_bucket(entries: Iterable[Entry]) -> PackedBucket:
+    """把 [(模板ID, 描述子, 特征点数), ...] 打包成内存中的子库（跳过没有描述子的记录）"""
+    ids, blocks, kp_counts = [], [], []
+    for cid, des, kp_count in entries:
+        if des is None or len(des) == 0:
+            continue
+        ids.append(cid)
+        blocks.append(np.asarray(des, dtype=np.uint8).reshape(-1, DESCRIPTOR_SIZE))
+        kp_counts.append(kp_count)
+    if not blocks:
+        return _empty_bucket()
+    counts = [len(b) for b in blocks]
+    return PackedBucket(ids, np.vstack(blocks), np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+                        np.asarray(kp_counts, dtype=np.int32))
+
+
+def write_library(path: str, buckets: Dict[str, PackedBucket], params: Optional[dict] = None,
+                  meta: Optional[dict] = None):
+    """
+    写入特征库（先写临时文件再替换）
+
+    Args:
+        buckets: {子库名: PackedBucket}
+        params: 提取参数（例如 ORB nfeatures），读取时必须一致
+        meta: 附加信息（例如源图片记录），原样保存在 header["meta"]
+    """
+    # 数据区布局（相对数据区起点，全部按 64 字节对齐）
+    layout, cursor = {}, 0
+    for name, bucket in buckets.items():
+        entry = {"ids": bucket.entry_ids, "rows": len(bucket.descriptors)}
+        for key in _ARRAYS:
+            entry[key] = cursor
+            cursor = _align(cursor + getattr(bucket, key).nbytes)
+        layout[name] = entry
+
+    header = {"version": FORMAT_VERSION, "descriptor_size": DESCRIPTOR_SIZE,
+              "params": params or {}, "meta": meta or {}, "buckets": layout}
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, bucket in buckets.items():
+            for key in _ARRAYS:
+                f.seek(data_start + layout[name][key])
+                f.write(np.ascontiguousarray(getattr(bucket, key)).tobytes())
+        f.truncate(data_start + cursor)
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> Optional[dict]:
+    """只读文件头；不是特征库文件或版本不一致时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            header = json.loads(f.read(header_len).decode("utf-8"))
+    except (OSError, struct.error, ValueError):
+        return None
+    header["_data_start"] = _align(_PREFIX.size + header_len)
+    return header
+
+
+def open_library(path: str, params: Optional[dict] = None,
+                 required: Iterable[str] = ()) -> Optional[PackedLibrary]:
+    """
+    映射特征库文件
+
+    Returns:
+        文件不存在、格式版本/提取参数不一致、缺少必需子库或数据区不完整时返回 None（调用方重建）
+    """
+    if not os.path.exists(path):
+        return None
+    header = read_header(path)
+    if header is None:
+        logger.warning(f"PackedLibrary: {os.path.basename(path)} 格式版本不匹配，需要重建")
+        return None
+    if header.get("descriptor_size") != DESCRIPTOR_SIZE or header.get("params", {}) != (params or {}):
+        logger.warning(f"PackedLibrary: {os.path.basename(path)} 提取参数已变化，需要重建")
+        return None
+    if any(name not in header["buckets"] for name in required):
+        return None
+
+    data_start = header.pop("_data_start")
+    size = os.path.getsize(path)
+    mapping = np.memmap(path, dtype=np.uint8, mode="r")
+    buckets = {}
+    for name, entry in header["buckets"].items():
+        n, rows = len(entry["ids"]), entry["rows"]
+        spans = {"descriptors": rows * DESCRIPTOR_SIZE, "offsets": (n + 1) * 8, "kp_counts": n * 4}
+        if any(data_start + entry[key] + span > size for key, span in spans.items()):
+            logger.warning(f"PackedLibrary: {os.path.basename(path)} 数据不完整，需要重建")
+            return None
+
+        def view(key, dtype):
+            start = data_start + entry[key]
+            return mapping[start:start + spans[key]].view(dtype)
+
+        buckets[name] = PackedBucket(entry["ids"], view("descriptors", np.uint8).reshape(rows, DESCRIPTOR_SIZE),
+                                     view("offsets", np.int64), view("kp_counts", np.int32))
+    return PackedLibrary(path, header, buckets, mapping)
+
+
+def _empty_bucket() -> PackedBucket:
+    return PackedBucket([], np.zeros((0, DESCRIPTOR_SIZE), dtype=np.uint8),
+                        np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32))
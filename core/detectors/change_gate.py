@@ -0,0 +1,201 @@
+"""
+变化门控检测 (Change-Gated Detection)
+包装 YoloDetector：画面没有变化时直接复用上一次的检测结果；只有局部变化时，
+仅在变化区域和鼠标附近重新检测；另外按较低频率做一次整帧刷新兜底
+"""
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+
+def _box_iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _box_inside(box, rect) -> bool:
+    x, y, w, h = box
+    rx, ry, rw, rh = rect
+    return x >= rx and y >= ry and x + w <= rx + rw and y + h <= ry + rh
+
+
+class ChangeGatedDetector:
+    """
+    变化门控 + ROI 局部检测
+
+    每帧先把画面缩成 96x54 的缩略图，与上一次推理时的缩略图逐格比较：
+    - 没有格子超过阈值：跳过推理，返回上一次的检测结果
+    - 变化集中在局部（且开启 ROI 模式）：只对 变化区域 ∪ 鼠标附近 的外接矩形做检测，
+      与区域外的旧结果合并
+    - 变化范围过大 / 分辨率改变 / 到了整帧刷新时间：整帧检测
+    """
+
+    THUMB_SIZE = (96, 54)  # (宽, 高)
+
+    def __init__(self, detector, diff_threshold: int = 12, roi_enabled: bool = True,
+                 full_refresh_interval: float = 2.0, cursor_radius: float = 0.1,
+                 roi_margin: float = 0.05, roi_max_fraction: float = 0.5):
+        """
+        Args:
+            detector: 提供 detect_stream(frame) 的检测器
+            diff_threshold: 缩略图单格像素差阈值（0-255），超过即视为变化
+            roi_enabled: 是否启用 ROI 局部检测（关闭时有变化就整帧检测）
+            full_refresh_interval: 整帧刷新间隔（秒）
+            cursor_radius: 鼠标邻域半径（占画面宽度的比例）
+            roi_margin: ROI 外扩边距（占画面宽度的比例），保证变化的物体完整落在 ROI 内
+            roi_max_fraction: ROI 面积超过画面的该比例时直接整帧检测
+        """
+        self.detector = detector
+        self.diff_threshold = diff_threshold
+        self.roi_enabled = roi_enabled
+        self.full_refresh_interval = full_refresh_interval
+        self.cursor_radius = cursor_radius
+        self.roi_margin = roi_margin
+        self.roi_max_fraction = roi_max_fraction
+        self.reset()
+        self.reset_stats()
+
+    def reset(self):
+        """丢弃参考帧和缓存的检测结果（下一帧整帧检测）"""
+        self._ref_thumb = None
+        self._frame_shape = None
+        self._last_full_time = 0.0
+        self._detections: List[Dict] = []
+
+    def reset_stats(self):
+        self.stats = {"frames": 0, "skipped": 0, "full": 0, "roi": 0}
+
+    @property
+    def inferences(self) -> int:
+        return self.stats["full"] + self.stats["roi"]
+
+    @property
+    def last_detections(self) -> List[Dict]:
+        return self._detections
+
+    def detect(self, frame: np.ndarray, cursor: Optional[Tuple[int, int]] = None,
+               now: Optional[float] = None) -> List[Dict]:
+        """
+        检测一帧（接口与 detect_stream 一致）
+
+        Args:
+            frame: BGR 画面
+            cursor: 鼠标在画面中的坐标 (x, y)，不在画面内时传 None
+            now: 当前时间（秒），默认 time.monotonic()，回放测试时传入录制时间
+        """
+        now = time.monotonic() if now is None else now
+        self.stats["frames"] += 1
+        thumb = self._thumbnail(frame)
+
+        if (self._ref_thumb is None or frame.shape != self._frame_shape
+                or now - self._last_full_time >= self.full_refresh_interval):
+            return self._detect_full(frame, thumb, now)
+
+        changed = cv2.absdiff(thumb, self._ref_thumb).max(axis=2) > self.diff_threshold
+        if not changed.any():
+            self.stats["skipped"] += 1
+            return self._detections
+
+        if not self.roi_enabled:
+            return self._detect_full(frame, thumb, now)
+
+        roi = self._roi_rect(changed, cursor, frame.shape)
+        if roi is None:
+            return self._detect_full(frame, thumb, now)
+        return self._detect_roi(frame, thumb, roi)
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """先按步长抽样到约 4 倍缩略图大小再区域平均（整帧 INTER_AREA 在 4K 下要几毫秒）"""
+        step = max(1, frame.shape[1] // (self.THUMB_SIZE[0] * 4))
+        return cv2.resize(frame[::step, ::step], self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+    def _detect_full(self, frame, thumb, now) -> List[Dict]:
+        self.stats["full"] += 1
+        self._detections = self.detector.detect_stream(frame)
+        self._ref_thumb = thumb
+        self._frame_shape = frame.shape
+        self._last_full_time = now
+        return self._detections
+
+    def _roi_rect(self, changed: np.ndarray, cursor, shape) -> Optional[Tuple[int, int, int, int]]:
+        """变化格子 ∪ 鼠标邻域 的外接矩形（外扩边距后）；面积过大时返回 None"""
+        h, w = shape[:2]
+        tw, th = self.THUMB_SIZE
+        ys, xs = np.nonzero(changed)
+        x0, x1 = xs.min() * w / tw, (xs.max() + 1) * w / tw
+        y0, y1 = ys.min() * h / th, (ys.max() + 1) * h / th
+
+        if cursor is not None:
+            r = self.cursor_radius * w
+            cx, cy = cursor
+            x0, x1 = min(x0, cx - r), max(x1, cx + r)
+            y0, y1 = min(y0, cy - r), max(y1, cy + r)
+
+        margin = self.roi_margin * w
+        x0, y0 = max(0, int(x0 - margin)), max(0, int(y0 - margin))
+        x1, y1 = min(w, int(x1 + margin)), min(h, int(y1 + margin))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        if (x1 - x0) * (y1 - y0) > self.roi_max_fraction * w * h:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _roi_input(self, crop: np.ndarray, frame_shape) -> np.ndarray:
+        """
+        ROI 裁剪交给检测器之前在右侧/下方补灰边，使 letterbox 的缩放比例不超过整帧检测时的比例：
+        直接把小裁剪图 letterbox 到输入尺寸会把物体放大数倍，模型没有在这种尺度上训练过。
+        灰边补在右下方，检测框坐标仍是裁剪图坐标
+        """
+        input_shape = getattr(self.detector, "input_shape", None)
+        if not input_shape:
+            return np.ascontiguousarray(crop)
+        in_h, in_w = input_shape
+        h, w = frame_shape[:2]
+        rh, rw = crop.shape[:2]
+        full_ratio = min(in_w / w, in_h / h)
+        if min(in_w / rw, in_h / rh) <= full_ratio:
+            return np.ascontiguousarray(crop)
+
+        # 补边后较“满”的一边恰好对应整帧比例下的输入尺寸
+        if rw / in_w >= rh / in_h:
+            pad_w, pad_h = max(0, math.ceil(in_w / full_ratio - 1e-6) - rw), 0
+        else:
+            pad_w, pad_h = 0, max(0, math.ceil(in_h / full_ratio - 1e-6) - rh)
+        return cv2.copyMakeBorder(crop, 0, pad_h, 0, pad_w, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+    def _detect_roi(self, frame, thumb, roi) -> List[Dict]:
+        self.stats["roi"] += 1
+        rx, ry, rw, rh = roi
+        h, w = frame.shape[:2]
+
+        fresh = []
+        for det in self.detector.detect_stream(self._roi_input(frame[ry:ry + rh, rx:rx + rw], frame.shape)):
+            x, y, bw, bh = det['box']
+            # 贴着 ROI 内侧边缘的框是被截断的物体，交给区域外的旧结果/下次整帧刷新
+            if ((x <= 1 and rx > 0) or (y <= 1 and ry > 0)
+                    or (x + bw >= rw - 1 and rx + rw < w) or (y + bh >= rh - 1 and ry + rh < h)):
+                continue
+            det = dict(det)
+            det['box'] = [x + rx, y + ry, bw, bh]
+            fresh.append(det)
+
+        kept = [
+            det for det in self._detections
+            if not _box_inside(det['box'], roi)
+            and not any(_box_iou(det['box'], new['box']) > 0.5 for new in fresh)
+        ]
+        self._detections = kept + fresh
+        self._ref_thumb = thumb
+        logger.trace(f"[ChangeGate] ROI {roi}: 保留 {len(kept)} + 新检测 {len(fresh)}")
+        return self._detections
@@ -1,11 +1,15 @@
 import sys
 import cv2
 import time
+from collections import OrderedDict
 import numpy as np
 import onnxruntime
 from loguru import logger
 
 class YoloDetector:
+    # letterbox 布局缓存条数：全帧尺寸基本固定，ROI 裁剪几乎每帧尺寸都不同，只保留最近几种
+    LAYOUT_CACHE_SIZE = 4
+
     def __init__(self, model_path, use_gpu=True, confidence_thresh=0.5, nms_thresh=0.4, providers=None):
         """
         初始化 YOLOv8 ONNX 识别器（深度日志诊断版）。
@@ -19,6 +23,16 @@ class YoloDetector:
         self.output_names = None
         self.input_shape = (640, 640)
         self.actual_provider = None
+        self.last_timings = {}
+
+        # ✅ 持久化的预处理/推理缓冲区（稳态下每帧零分配）
+        self._canvas = None            # 640x640 letterbox 画布 (HWC, BGR, uint8)
+        self._input_tensor = None      # 复用的 NCHW float32 输入张量
+        self._layouts = OrderedDict()  # LRU {(源图高, 源图宽): (ratio, (dw, dh), 缩放区域, 灰边区域)}
+        self._canvas_key = None        # 当前画布对应的源图尺寸（尺寸变化时重刷灰边）
+        self._io_binding = None
+        self._output_buffers = None
+        self._rebind_input = False
 
         self._initialize_model(providers)
 
@@ -89,6 +103,9 @@ class YoloDetector:
             logger.debug(f"YOLO: 输入节点: {self.input_name} {self.input_shape}")
             logger.debug(f"YOLO: 输出节点: {self.output_names}")
 
+            self._allocate_buffers()
+            self._setup_io_binding()
+
         except Exception as e:
             logger.error(f"YOLO: 关键错误 - 模型初始化失败: {e}")
             raise
@@ -105,7 +122,7 @@ class YoloDetector:
         # 2. 推理
         try:
             t1 = time.perf_counter()
-            outputs = self.session.run(self.output_names, {self.input_name: input_tensor})
+            outputs = self._infer(input_tensor)
             t_inf = (time.perf_counter() - t1) * 1000
         except Exception as e:
             logger.error(f"YOLO: 推理阶段崩溃: {e}")
@@ -131,59 +148,161 @@ class YoloDetector:
         t_start = time.perf_counter()
         
         input_tensor, ratio, (dw, dh) = self._preprocess(image)
+        t_pre_end = time.perf_counter()
         try:
-            outputs = self.session.run(self.output_names, {self.input_name: input_tensor})
+            outputs = self._infer(input_tensor)
         except Exception:
             return []
+        t_inf_end = time.perf_counter()
 
         detections = self._postprocess_stream(outputs[0], ratio, (dw, dh))
         
-        t_cost = (time.perf_counter() - t_start) * 1000
+        t_end = time.perf_counter()
+        t_cost = (t_end - t_start) * 1000
+        # 最近一帧的分阶段耗时（ms），供诊断和刷新率调节使用
+        self.last_timings = {
+            "pre": (t_pre_end - t_start) * 1000,
+            "inf": (t_inf_end - t_pre_end) * 1000,
+            "post": (t_end - t_inf_end) * 1000,
+            "total": t_cost,
+        }
         # 流式检测只在 DEBUG 级别输出，不干扰主控制台
         logger.debug(f"YOLO Stream: 推理完成，耗时 {t_cost:.2f}ms, 发现 {len(detections)} 个目标")
         
         return detections
 
-    def _preprocess(self, image: np.ndarray):
-        """图像预处理逻辑。"""
-        img_h, img_w = image.shape[:2]
+    def _allocate_buffers(self):
+        """分配持久化的 letterbox 画布和输入张量（模型输入尺寸固定，只分配一次）"""
         input_h, input_w = self.input_shape
+        self._canvas = np.full((input_h, input_w, 3), 114, dtype=np.uint8)
+        self._input_tensor = np.empty((1, 3, input_h, input_w), dtype=np.float32)
+        self._scale = np.float32(1 / 255.0)
+        self._layouts = OrderedDict()
+        self._canvas_key = None
+
+    def _setup_io_binding(self):
+        """
+        使用 IO Binding 直接把复用的输入张量和预分配的输出缓冲区交给 ONNX Runtime，
+        避免 session.run 每帧拷贝输入、分配输出；不支持时回退到 session.run
+        """
+        try:
+            binding = self.session.io_binding()
+            binding.bind_cpu_input(self.input_name, self._input_tensor)
+
+            outputs = self.session.get_outputs()
+            preallocate = all(output.type == 'tensor(float)' and all(isinstance(d, int) for d in output.shape)
+                              for output in outputs)
+            output_buffers = [] if preallocate else None
+            for output in outputs:
+                if not preallocate:
+                    # 有动态形状/非 float 输出：全部交给 ORT 分配（绑定的缓冲区必须和绑定同生命周期）
+                    binding.bind_output(output.name, 'cpu')
+                    continue
+                buffer = np.empty(output.shape, dtype=np.float32)
+                binding.bind_output(output.name, 'cpu', 0, np.float32, output.shape, buffer.ctypes.data)
+                output_buffers.append(buffer)
+
+            self._io_binding = binding
+            self._output_buffers = output_buffers
+            # 非 CPU 后端的输入需要每帧重新绑定（由 ORT 拷贝到设备）
+            self._rebind_input = 'CPU' not in self.actual_provider
+            logger.debug(f"YOLO: IO Binding 已启用 | 预分配输出: {output_buffers is not None}")
+        except Exception as e:
+            logger.warning(f"YOLO: IO Binding 不可用，回退到 session.run: {e}")
+            self._io_binding = None
+            self._output_buffers = None
+
+    def _infer(self, input_tensor: np.ndarray):
+        """执行推理，返回输出列表（启用 IO Binding 时返回的是复用的缓冲区）"""
+        if self._io_binding is None or input_tensor is not self._input_tensor:
+            return self.session.run(self.output_names, {self.input_name: input_tensor})
 
+        if self._rebind_input:
+            self._io_binding.bind_cpu_input(self.input_name, self._input_tensor)
+        self.session.run_with_iobinding(self._io_binding)
+        if self._output_buffers is not None:
+            return self._output_buffers
+        return self._io_binding.copy_outputs_to_cpu()
+
+    def _letterbox_layout(self, img_h: int, img_w: int):
+        """
+        按源图尺寸缓存 letterbox 布局（LRU，最多 LAYOUT_CACHE_SIZE 条）：
+        缩放比例、填充量、画布中放置缩放图的区域视图，以及四周灰边的区域视图
+        """
+        key = (img_h, img_w)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            return layout
+
+        input_h, input_w = self.input_shape
         ratio = min(input_w / img_w, input_h / img_h)
         new_w, new_h = int(img_w * ratio), int(img_h * ratio)
         dw, dh = (input_w - new_w) / 2, (input_h - new_h) / 2
+        top, left = int(dh), int(dw)
+        canvas = self._canvas
+        region = canvas[top:top + new_h, left:left + new_w]
+        borders = (canvas[:top], canvas[top + new_h:],
+                   canvas[top:top + new_h, :left], canvas[top:top + new_h, left + new_w:])
+        layout = (ratio, (dw, dh), region, borders)
+        self._layouts[key] = layout
+        if len(self._layouts) > self.LAYOUT_CACHE_SIZE:
+            self._layouts.popitem(last=False)
+        return layout
 
-        resized_img = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-        padded_img = cv2.copyMakeBorder(resized_img, int(dh), int(dh) + (input_h - new_h) % 2,
-                                        int(dw), int(dw) + (input_w - new_w) % 2,
-                                        cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    def _preprocess(self, image: np.ndarray):
+        """
+        图像预处理逻辑（零拷贝 letterbox）：
+        直接缩放到预分配画布的对应区域，再归一化并转置（BGR->RGB, HWC->NCHW）写入复用的输入张量
+        """
+        img_h, img_w = image.shape[:2]
+        ratio, pad, region, borders = self._letterbox_layout(img_h, img_w)
 
-        blob = cv2.dnn.blobFromImage(padded_img, 1 / 255.0, (input_w, input_h), swapRB=True, crop=False)
-        return blob, ratio, (dw, dh)
+        if self._canvas_key != (img_h, img_w):
+            # 源图尺寸变化：只重刷缩放区域以外的灰边（缩放区域马上会被整体覆盖）
+            for border in borders:
+                border[:] = 114
+            self._canvas_key = (img_h, img_w)
 
-    def _postprocess(self, output, ratio, pad):
-        """带 NMS 细节统计的后处理。"""
-        output = output[0].T
-        boxes, scores, class_ids = [], [], []
-
-        for row in output:
-            confidence = row[4:].max()
-            if confidence >= self.confidence_thresh:
-                class_id = int(row[4:].argmax())
-                scores.append(float(confidence))
-                class_ids.append(class_id)
-                
-                cx, cy, w, h = row[:4]
-                x1 = int((cx - w / 2 - pad[0]) / ratio)
-                y1 = int((cy - h / 2 - pad[1]) / ratio)
-                boxes.append([x1, y1, int(w / ratio), int(h / ratio)])
+        cv2.resize(image, (region.shape[1], region.shape[0]), dst=region, interpolation=cv2.INTER_LINEAR)
 
-        logger.debug(f"YOLO NMS: 原始候选框数 {len(boxes)}")
+        for c in range(3):
+            np.multiply(self._canvas[:, :, 2 - c], self._scale, out=self._input_tensor[0, c])
+        return self._input_tensor, ratio, pad
+
+    def _decode(self, output, ratio, pad):
+        """
+        向量化解码 YOLO 输出（[1, 4+类别数, 锚点数]）：
+        一次性在类别轴上取 max，按置信度掩码过滤后再对候选框做 argmax 和坐标换算，
+        结果（顺序、取整方式）与逐行循环完全一致
+        """
+        pred = output[0]
+        class_scores = pred[4:]
+        confidences = class_scores.max(axis=0)
+        mask = confidences >= self.confidence_thresh
+        if not mask.any():
+            return [], [], []
+
+        cx, cy, w, h = pred[:4, mask]
+        class_ids = class_scores[:, mask].argmax(axis=0)
+
+        x1 = ((cx - w / 2 - pad[0]) / ratio).astype(np.int64)
+        y1 = ((cy - h / 2 - pad[1]) / ratio).astype(np.int64)
+        bw = (w / ratio).astype(np.int64)
+        bh = (h / ratio).astype(np.int64)
+        boxes = np.stack([x1, y1, bw, bh], axis=1)
+
+        return boxes.tolist(), confidences[mask].tolist(), class_ids.tolist()
+
+    def _nms(self, boxes, scores, class_ids):
+        """NMS 并组装检测结果"""
+        if not boxes:
+            return []
         indices = cv2.dnn.NMSBoxes(boxes, scores, self.confidence_thresh, self.nms_thresh)
-        
+
         detections = []
         if len(indices) > 0:
-            for i in indices.flatten():
+            for i in np.asarray(indices).flatten():
                 detections.append({
                     'class_id': class_ids[i],
                     'confidence': scores[i],
@@ -191,29 +310,13 @@ class YoloDetector:
                 })
         return detections
 
+    def _postprocess(self, output, ratio, pad):
+        """带 NMS 细节统计的后处理。"""
+        boxes, scores, class_ids = self._decode(output, ratio, pad)
+        logger.debug(f"YOLO NMS: 原始候选框数 {len(boxes)}")
+        return self._nms(boxes, scores, class_ids)
+
     def _postprocess_stream(self, output, ratio, pad):
         """流式后处理，保持极简输出。"""
-        output = output[0].T
-        boxes, scores, class_ids = [], [], []
-
-        for row in output:
-            confidence = row[4:].max()
-            if confidence >= self.confidence_thresh:
-                cx, cy, w, h = row[:4]
-                x1 = int((cx - w / 2 - pad[0]) / ratio)
-                y1 = int((cy - h / 2 - pad[1]) / ratio)
-                boxes.append([x1, y1, int(w / ratio), int(h / ratio)])
-                scores.append(float(confidence))
-                class_ids.append(int(row[4:].argmax()))
-
-        indices = cv2.dnn.NMSBoxes(boxes, scores, self.confidence_thresh, self.nms_thresh)
-        
-        detections = []
-        if len(indices) > 0:
-            for i in indices.flatten():
-                detections.append({
-                    'class_id': class_ids[i],
-                    'confidence': scores[i],
-                    'box': boxes[i]
-                })
-        return detections
\ No newline at end of file
+        boxes, scores, class_ids = self._decode(output, ratio, pad)
+        return self._nms(boxes, scores, class_ids)
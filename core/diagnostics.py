@@ -46,15 +46,17 @@ class SystemDiagnostics:
                 detector.detect_stream(img)
                 
                 # 正式侧速
-                times = []
+                times, post_times = [], []
                 for _ in range(15):
                     start = time.perf_counter()
                     detector.detect_stream(img) # 触发每一帧的耗时拆解日志
                     times.append((time.perf_counter() - start) * 1000)
+                    post_times.append(detector.last_timings.get("post", 0.0))
                 
                 avg_ms = np.mean(times)
-                results.append({"provider": p, "avg_ms": avg_ms})
-                logger.success(f"Diag: {p} 平均耗时: {avg_ms:.2f}ms")
+                post_ms = np.mean(post_times)
+                results.append({"provider": p, "avg_ms": avg_ms, "post_ms": post_ms})
+                logger.success(f"Diag: {p} 平均耗时: {avg_ms:.2f}ms (后处理 {post_ms:.2f}ms)")
             except Exception as e:
                 logger.warning(f"Diag: Provider {p} 无法运行: {e}")
                 continue
@@ -68,15 +70,16 @@ class SystemDiagnostics:
         return {
             "best_provider": best['provider'], 
             "avg_ms": best['avg_ms'], 
+            "post_ms": best['post_ms'],
             "suggested_fps": min(suggested_fps, 30),
             "all": results
         }
 
-    def benchmark_matcher(self, image_samples: dict):
-        """[任务 2] ORB 匹配可用性测试：分尺寸反馈耗时与结果"""
+    def benchmark_matcher(self, image_samples: dict, progress=None):
+        """[任务 2] ORB 匹配可用性测试：分尺寸反馈耗时与结果（progress: 特征库构建进度回调）"""
         logger.info("Diag: 开始 ORB 匹配可用性测试...")
-        # 实例化 FeatureMatcher 触发特征库加载日志
-        matcher = FeatureMatcher()
+        # 实例化 FeatureMatcher 触发特征库加载日志（卡图有变化时增量构建）
+        matcher = FeatureMatcher(progress=progress)
         report = {}
         
         for size, img in image_samples.items():
@@ -1,27 +1,131 @@
+"""
+用户配置管理 (ConfigManager)
+settings.json 的内存快照 + 变更通知：
+- settings 是只读快照，每次变更整体替换（读取方无需加锁，扫描循环读取时零 I/O）
+- refresh() 按 mtime 检查文件是否被外部修改（诊断窗口、手动编辑），检查本身有频率上限
+- 任何变更都通过 settings_changed 信号广播，只带变化的键
+"""
 import json
 import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from PySide6.QtCore import QObject, Signal
 from loguru import logger
 
-class ConfigManager:
-    def __init__(self, config_path="user_data/settings.json"):
+DEFAULT_SETTINGS = {
+    "yolo_fps": 10,
+    "best_ocr": "Windows_Native",
+    "preferred_provider": "CPUExecutionProvider",
+    "hover_delay": 200, # ms
+    "ocr_idle_unload_seconds": 300, # OCR 引擎空闲多久后卸载
+    "detail_hotkey": "" # e.g. "shift+d" or "F2"
+}
+
+
+class ConfigManager(QObject):
+    # 变化的键 -> 新值（被删除的键值为 None）
+    settings_changed = Signal(dict)
+
+    def __init__(self, config_path="user_data/settings.json", min_check_interval: float = 1.0):
+        """
+        Args:
+            config_path: 配置文件路径
+            min_check_interval: refresh() 两次检查文件 mtime 的最短间隔（秒）
+        """
+        super().__init__()
         self.path = config_path
+        self.min_check_interval = min_check_interval
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._mtime = self._stat_mtime()
+        self._last_check = time.monotonic()
         self.settings = self.load()
 
     def load(self):
         if os.path.exists(self.path):
             with open(self.path, 'r', encoding='utf-8') as f:
                 return json.load(f)
-        return {
-            "yolo_fps": 10,
-            "best_ocr": "Windows_Native",
-            "preferred_provider": "CPUExecutionProvider",
-            "hover_delay": 200, # ms
-            "detail_hotkey": "" # e.g. "shift+d" or "F2"
-        }
+        return dict(DEFAULT_SETTINGS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前配置快照（不要原地修改，修改请用 save）"""
+        return self.settings
+
+    def get(self, key: str, default=None):
+        return self.settings.get(key, default)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        文件被外部修改时重新加载
+
+        两次检查间隔不足 min_check_interval 时直接返回（不做任何 I/O）；
+        mtime 未变时只有一次 stat，不解析 JSON
+
+        Returns:
+            配置是否发生了变化
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.min_check_interval:
+            return False
+        self._last_check = now
+
+        mtime = self._stat_mtime()
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            try:
+                new_settings = self.load()
+            except (OSError, ValueError) as e:
+                # 文件可能正在被写入，保留旧配置，下次再试
+                logger.warning(f"⚠️ 用户配置重新加载失败，沿用旧配置: {e}")
+                return False
+            self._mtime = mtime
+            changed = self._replace(new_settings)
+        if changed:
+            logger.debug(f"🔄 用户配置已从文件重新加载: {list(changed)}")
+            self.settings_changed.emit(changed)
+        return bool(changed)
 
     def save(self, new_settings):
-        self.settings.update(new_settings)
-        with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(self.settings, f, indent=4, ensure_ascii=False)
-        logger.info(f"💾 用户配置已更新至: {self.path}")
\ No newline at end of file
+        with self._lock:
+            merged = dict(self.settings)
+            merged.update(new_settings)
+            self._write(merged)
+            self._mtime = self._stat_mtime()
+            changed = self._replace(merged)
+        logger.info(f"💾 用户配置已更新至: {self.path}")
+        if changed:
+            self.settings_changed.emit(changed)
+
+    def _replace(self, new_settings: Dict[str, Any]) -> Dict[str, Any]:
+        """整体替换快照，返回变化的键"""
+        old = self.settings
+        changed = {k: v for k, v in new_settings.items() if old.get(k) != v or k not in old}
+        changed.update({k: None for k in old if k not in new_settings})
+        self.settings = new_settings
+        return changed
+
+    def _write(self, settings: Dict[str, Any]):
+        """先写临时文件再替换，避免其他读取方读到写了一半的文件"""
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".settings-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _stat_mtime(self) -> Optional[tuple]:
+        """(mtime, 文件大小)：文件系统 mtime 精度较粗时，用大小辅助判断是否被修改"""
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
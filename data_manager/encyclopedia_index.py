@@ -0,0 +1,155 @@
+"""
+百科筛选索引 (Encyclopedia Index)
+物品库 / 技能库各建一次（GameCatalog 缓存），百科页面每次搜索只做集合运算：
+- 英雄、品级、尺寸、标签、隐藏标签：每个取值一个布尔掩码（numpy），ALL 取交集，ANY 取并集
+- 关键词：所有可搜索文本（名称、技能、被动、任务、描述，中英文）预先转小写，
+  建单字 + 双字倒排表；查询时先用倒排表求候选，再对候选做子串确认
+结果与逐条判断的旧逻辑完全一致（保持原始顺序）
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from data_manager.game_catalog import split_keys
+
+# 同一条记录的多段文本拼接时的分隔符（不会出现在关键词中，避免跨段误匹配）
+_SEP = "\x00"
+
+
+def _item_texts(item: Dict) -> List[str]:
+    """物品可搜索的文本（与旧版逐条判断检查的字段一致）"""
+    texts = [item.get("name", ""), item.get("name_cn", "")]
+    for field in ("skills", "skills_passive"):
+        for skill in item.get(field) or []:
+            if isinstance(skill, dict):
+                texts += [skill.get("en") or "", skill.get("cn") or ""]
+            elif isinstance(skill, str):
+                texts.append(skill)
+    # enchantments 在数据中是 {名称: 效果} 字典，旧逻辑只检查其中的 dict 元素
+    for ench in item.get("enchantments") or []:
+        if isinstance(ench, dict):
+            texts += [ench.get("en") or "", ench.get("cn") or ""]
+    for quest in item.get("quests") or []:
+        if isinstance(quest, dict):
+            texts += [quest.get(key) or "" for key in ("en_target", "cn_target", "en_reward", "cn_reward")]
+    return texts
+
+
+def _skill_texts(skill: Dict) -> List[str]:
+    """技能可搜索的文本"""
+    texts = [skill.get("name_en", ""), skill.get("name_cn", ""),
+             skill.get("description_en", ""), skill.get("description_cn", "")]
+    for desc in skill.get("descriptions", []):
+        if isinstance(desc, dict):
+            texts += [desc.get("en", ""), desc.get("cn", "")]
+    return texts
+
+
+def _first_part(raw) -> str:
+    """ "Large / 大型" -> "large"（与页面原有的 split(" / ")[0].lower() 一致）"""
+    return raw.split(" / ")[0].lower() if isinstance(raw, str) else ""
+
+
+class EncyclopediaIndex:
+    """一个数据库（物品或技能）的筛选索引，构建后只读"""
+
+    def __init__(self, records: List[Dict], is_skill: bool = False):
+        self.records = records
+        self.is_skill = is_skill
+        n = len(records)
+
+        def masks(values_per_record: Iterable[Iterable[str]]) -> Dict[str, np.ndarray]:
+            index = defaultdict(lambda: np.zeros(n, dtype=bool))
+            for i, values in enumerate(values_per_record):
+                for value in values:
+                    index[value][i] = True
+            return dict(index)
+
+        # ✅ 技能过滤掉 name_cn 为空的条目；物品排除 type 为 skill 的条目（类型选“物品”时）
+        self.base = np.array([bool(r.get("name_cn", "").strip()) for r in records], dtype=bool) if is_skill \
+            else np.ones(n, dtype=bool)
+        self.not_skill_type = np.array([r.get("type", "").lower() != "skill" for r in records], dtype=bool)
+
+        self.by_size = masks([_first_part(r.get("size", ""))] for r in records)
+        self.by_tier = masks([_first_part(r["starting_tier"])] if r.get("starting_tier") else [] for r in records)
+        self.by_hero = masks(split_keys(r.get("heroes")) for r in records)
+        self.by_tag = masks(split_keys(r.get("tags")) if isinstance(r.get("tags"), str) else []
+                            for r in records)
+        self.by_hidden_tag = masks(split_keys(r.get("hidden_tags")) if isinstance(r.get("hidden_tags"), str) else []
+                                   for r in records)
+
+        # 🔥 关键词倒排表：单字 + 双字 -> 记录下标
+        texts = _skill_texts if is_skill else _item_texts
+        self._haystacks = [_SEP.join(t.lower() for t in texts(r)) for r in records]
+        postings = defaultdict(set)
+        for i, haystack in enumerate(self._haystacks):
+            for text in haystack.split(_SEP):
+                for j, ch in enumerate(text):
+                    postings[ch].add(i)
+                    if j + 1 < len(text):
+                        postings[text[j:j + 2]].add(i)
+        self._postings = {gram: np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+                          for gram, ids in postings.items()}
+        self._none = np.zeros(n, dtype=bool)
+
+    def keyword_mask(self, keyword: str) -> np.ndarray:
+        """包含关键词（不区分大小写的子串）的记录"""
+        keyword = keyword.lower()
+        if _SEP in keyword:
+            return self._none.copy()
+        grams = {keyword} if len(keyword) == 1 else {keyword[j:j + 2] for j in range(len(keyword) - 1)}
+        lists = [self._postings.get(gram) for gram in grams]
+        if any(ids is None for ids in lists):
+            return self._none.copy()
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if len(candidates) == 0:
+                break
+
+        mask = self._none.copy()
+        if len(keyword) <= 2:
+            # 单字/双字：倒排表本身就是精确结果
+            mask[candidates] = True
+        else:
+            # 双字都出现不代表子串出现，对候选做一次确认
+            mask[[i for i in candidates if keyword in self._haystacks[i]]] = True
+        return mask
+
+    def _tag_mask(self, index: Dict[str, np.ndarray], tags: List[str], match_mode: str) -> np.ndarray:
+        masks = [index.get(tag, self._none) for tag in tags]
+        if match_mode == "all":
+            return np.logical_and.reduce(masks)
+        return np.logical_or.reduce(masks)
+
+    def query(self, keyword: str = "", item_type: str = "all", size: str = "", start_tier: str = "",
+              hero: str = "", tags: Optional[List[str]] = None, hidden_tags: Optional[List[str]] = None,
+              match_mode: str = "all") -> List[Dict]:
+        """
+        按百科页面的筛选条件查询（参数与 EncyclopediaPage.search_query 对应）
+
+        Returns:
+            匹配的记录列表（原始顺序）
+        """
+        mask = self.base.copy()
+        if keyword:
+            mask &= self.keyword_mask(keyword)
+        # 技能不需要类型和尺寸匹配（已经通过数据源筛选）
+        if not self.is_skill:
+            if item_type == "item":
+                mask &= self.not_skill_type
+            elif item_type == "skill":
+                mask &= ~self.not_skill_type
+            if size:
+                mask &= self.by_size.get(size, self._none)
+        if start_tier:
+            mask &= self.by_tier.get(start_tier, self._none)
+        if hero:
+            mask &= self.by_hero.get(hero, self._none)
+        if tags:
+            mask &= self._tag_mask(self.by_tag, tags, match_mode)
+        if hidden_tags:
+            mask &= self._tag_mask(self.by_hidden_tag, hidden_tags, match_mode)
+        return [self.records[i] for i in np.flatnonzero(mask)]
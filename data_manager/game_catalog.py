@@ -0,0 +1,215 @@
+"""
+游戏数据目录 (Game Data Catalog)
+items_db.json / skills_db.json / monsters_db.json 在进程内只解析一次，
+所有页面、窗口和服务共享同一份数据，以及按 id 建好的索引和常用的规范化字段
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+
+
+JSON_DIR = Path(__file__).parent.parent / "assets" / "json"
+ITEMS_FILE = "items_db.json"
+SKILLS_FILE = "skills_db.json"
+MONSTERS_FILE = "monsters_db.json"
+
+
+def split_keys(raw: Union[str, List, None]) -> List[str]:
+    """
+    把 "Vanessa / 凡妮莎 | Mak / 马克" 这类双语多值字段解析为英文键列表 ["Vanessa", "Mak"]
+    （heroes / tags / hidden_tags 共用；也兼容已经是列表的格式）
+    """
+    if not raw:
+        return []
+    parts = raw.split("|") if isinstance(raw, str) else raw
+    keys = []
+    for part in parts:
+        if not isinstance(part, str):
+            keys.append(str(part))
+            continue
+        key = part.split(" / ")[0].strip()
+        if key:
+            keys.append(key)
+    return keys
+
+
+def first_key(raw: Optional[str], default: str = "") -> str:
+    """ "Large / 大型" -> "large"，用于 size / starting_tier 这类单值字段"""
+    if not raw or not isinstance(raw, str):
+        return default
+    return raw.split("/")[0].strip().lower() or default
+
+
+class GameCatalog:
+    """
+    游戏数据目录（线程安全，按需加载）
+
+    返回的记录是所有调用方共享的同一个对象，调用方需要修改时请先 copy()
+    """
+
+    def __init__(self, json_dir: Union[str, Path] = JSON_DIR):
+        self.json_dir = Path(json_dir)
+        self._lock = threading.Lock()
+        self._file_locks: Dict[Path, threading.Lock] = {}
+        self._files: Dict[Path, Any] = {}
+        self._indexes: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # 原始数据
+    # ------------------------------------------------------------------
+
+    def load_json(self, path: Union[str, Path], default: Any = None) -> Any:
+        """
+        解析任意数据库文件（同一路径在进程内只解析一次）
+
+        Args:
+            path: JSON 文件路径，相对路径按当前工作目录解析
+            default: 文件不存在或解析失败时的返回值
+        """
+        key = Path(path).resolve()
+        if key in self._files:
+            return self._files[key]
+
+        with self._lock:
+            file_lock = self._file_locks.setdefault(key, threading.Lock())
+
+        # 每个文件单独加锁：并发请求同一文件时只解析一次，不同文件互不阻塞
+        with file_lock:
+            if key in self._files:
+                return self._files[key]
+            try:
+                with open(key, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                logger.debug(f"[GameCatalog] 已加载 {key.name} ({len(data)} 条)")
+            except Exception as e:
+                logger.error(f"[GameCatalog] 加载 {key} 失败: {e}")
+                return default
+            self._files[key] = data
+            return data
+
+    def items(self) -> List[Dict]:
+        """物品列表（items_db.json 原始顺序）"""
+        return self.load_json(self.json_dir / ITEMS_FILE, [])
+
+    def skills(self) -> List[Dict]:
+        """技能列表（skills_db.json 原始顺序）"""
+        return self.load_json(self.json_dir / SKILLS_FILE, [])
+
+    def monsters(self) -> Dict[str, Dict]:
+        """怪物字典 {中文名: 数据}"""
+        return self.load_json(self.json_dir / MONSTERS_FILE, {})
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+
+    def records_by_id(self, path: Union[str, Path]) -> Dict[str, Dict]:
+        """
+        {id: 记录} 索引（同一文件只构建一次）
+
+        列表格式的数据库（物品/技能）按 record['id'] 建索引；字典格式（怪物）原样返回
+        """
+        key = str(Path(path).resolve())
+        index = self._indexes.get(key)
+        if index is None:
+            data = self.load_json(path, [])
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    if isinstance(data, dict):
+                        index = data
+                    else:
+                        index = {record['id']: record for record in data if record.get('id')}
+                    self._indexes[key] = index
+        return index
+
+    def items_by_id(self) -> Dict[str, Dict]:
+        """{物品id: 记录}"""
+        return self.records_by_id(self.json_dir / ITEMS_FILE)
+
+    def skills_by_id(self) -> Dict[str, Dict]:
+        """{技能id: 记录}"""
+        return self.records_by_id(self.json_dir / SKILLS_FILE)
+
+    def get_item(self, item_id: str) -> Optional[Dict]:
+        return self.items_by_id().get(item_id)
+
+    def get_skill(self, skill_id: str) -> Optional[Dict]:
+        return self.skills_by_id().get(skill_id)
+
+    def get_record(self, record_id: str, item_type: str = "item") -> Optional[Dict]:
+        """按类型查找：item_type 为 "skill" 时查技能库，否则查物品库"""
+        if item_type == "skill":
+            return self.get_skill(record_id)
+        return self.get_item(record_id)
+
+    def encyclopedia_index(self, item_type: str = "item"):
+        """百科筛选索引（物品库 / 技能库各构建一次）：item_type 为 "skill" 时索引技能库，否则索引物品库"""
+        from data_manager.encyclopedia_index import EncyclopediaIndex
+
+        key = "encyclopedia:skill" if item_type == "skill" else "encyclopedia:item"
+        index = self._indexes.get(key)
+        if index is None:
+            records = self.skills() if item_type == "skill" else self.items()
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = EncyclopediaIndex(records, is_skill=item_type == "skill")
+                    self._indexes[key] = index
+        return index
+
+    # ------------------------------------------------------------------
+    # 规范化字段
+    # ------------------------------------------------------------------
+
+    def item_names(self) -> Dict[str, str]:
+        """{物品id: 显示名}，中文名优先，其次英文名，最后是id"""
+        names = self._indexes.get("item_names")
+        if names is None:
+            names = {
+                item_id: item.get('name_cn') or item.get('name_en') or item_id
+                for item_id, item in self.items_by_id().items()
+            }
+            self._indexes["item_names"] = names
+        return names
+
+    def item_name(self, item_id: str, default: Optional[str] = None) -> Optional[str]:
+        return self.item_names().get(item_id, default)
+
+    def size_category(self, item_id: str, default: str = "medium") -> str:
+        """物品尺寸 small / medium / large"""
+        item = self.get_item(item_id)
+        return first_key(item.get('size'), default) if item else default
+
+    @staticmethod
+    def starting_tier(record: Dict, default: str = "") -> str:
+        """起始品级 bronze / silver / gold / diamond / legendary"""
+        return first_key(record.get('starting_tier'), default)
+
+    @staticmethod
+    def hero_keys(record: Dict) -> List[str]:
+        """英雄英文名列表"""
+        return split_keys(record.get('heroes'))
+
+    @staticmethod
+    def tag_keys(record: Dict, field: str = "tags") -> List[str]:
+        """标签英文名列表（field 可为 tags / hidden_tags）"""
+        return split_keys(record.get(field))
+
+
+# 全局单例
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_game_catalog() -> GameCatalog:
+    """获取全局游戏数据目录实例"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = GameCatalog()
+    return _catalog
@@ -2,10 +2,11 @@
 野怪数据加载器 (Monster Data Loader)
 从 monsters_db.json 加载野怪数据
 """
-import json
 import os
 from typing import List, Dict, Any, Optional
 
+from data_manager.game_catalog import get_game_catalog
+
 
 class Monster:
     """野怪数据类"""
@@ -83,8 +84,8 @@ class MonsterDatabase:
             return
         
         try:
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 原始数据由共享的游戏数据目录解析（进程内只加载一次）
+            data = get_game_catalog().load_json(self.json_path, {})
             
             # 解析每个怪物
             for name_key, monster_data in data.items():
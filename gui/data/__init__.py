@@ -1,54 +1,38 @@
 # gui/data/data_loader.py
 """数据加载器 - 从JSON文件加载物品、技能、怪物数据"""
-import json
 import os
 from pathlib import Path
 from typing import Dict, List, Any
 
+from data_manager.game_catalog import get_game_catalog
+
 class DataLoader:
-    """数据加载器单例"""
+    """数据加载器单例（数据来自共享的游戏数据目录，首次访问时才解析）"""
     
     _instance = None
-    _items_db: List[Dict] = []
-    _skills_db: List[Dict] = []
-    _monsters_db: Dict[str, Dict] = {}
-    _loaded = False
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if not self._loaded:
-            self.load_all()
+    @property
+    def _items_db(self) -> List[Dict]:
+        return get_game_catalog().items()
+    
+    @property
+    def _skills_db(self) -> List[Dict]:
+        return get_game_catalog().skills()
+    
+    @property
+    def _monsters_db(self) -> Dict[str, Dict]:
+        return get_game_catalog().monsters()
     
     def load_all(self):
-        """加载所有数据"""
-        base_path = Path(__file__).parent.parent.parent / "assets" / "json"
-        
-        # 加载物品数据库
-        items_path = base_path / "items_db.json"
-        if items_path.exists():
-            with open(items_path, 'r', encoding='utf-8') as f:
-                self._items_db = json.load(f)
-                print(f"[DataLoader] Loaded {len(self._items_db)} items")
-        
-        # 加载技能数据库
-        skills_path = base_path / "skills_db.json"
-        if skills_path.exists():
-            with open(skills_path, 'r', encoding='utf-8') as f:
-                self._skills_db = json.load(f)
-                print(f"[DataLoader] Loaded {len(self._skills_db)} skills")
-        
-        # 加载怪物数据库
-        monsters_path = base_path / "monsters_db.json"
-        if monsters_path.exists():
-            with open(monsters_path, 'r', encoding='utf-8') as f:
-                self._monsters_db = json.load(f)
-                print(f"[DataLoader] Loaded {len(self._monsters_db)} monsters")
-        
-        self._loaded = True
+        """预加载所有数据"""
+        print(f"[DataLoader] Loaded {len(self._items_db)} items")
+        print(f"[DataLoader] Loaded {len(self._skills_db)} skills")
+        print(f"[DataLoader] Loaded {len(self._monsters_db)} monsters")
     
     def get_monsters_by_day(self, day: int) -> List[Dict]:
         """获取指定天数的怪物列表"""
@@ -6,10 +6,10 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 from pathlib import Path
-import json
 from gui.widgets.item_detail_card_v2 import ItemDetailCard
 from gui.widgets.flow_layout import FlowLayout
 from services.log_analyzer import LogAnalyzer
+from data_manager.game_catalog import get_game_catalog
 
 
 class CurrentItemsPage(QWidget):
@@ -30,15 +30,9 @@ class CurrentItemsPage(QWidget):
         # 初始加载
         self.refresh()
     
-    def _load_items_db(self) -> list:
-        """加载物品数据库"""
-        items_db_path = Path(__file__).parent.parent.parent / "assets" / "json" / "items_db.json"
-        try:
-            with open(items_db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载物品数据库失败: {e}")
-            return []
+    def _load_items_db(self) -> dict:
+        """加载物品数据库（{id: 记录}，与其他页面共享同一份数据）"""
+        return get_game_catalog().items_by_id()
     
     def _init_ui(self):
         """初始化UI"""
@@ -187,7 +181,7 @@ class CurrentItemsPage(QWidget):
                 template_id = item_data.get('template_id')
                 if template_id:
                     # 查找物品信息
-                    item_info = next((item for item in self.items_db if item.get('id') == template_id), None)
+                    item_info = self.items_db.get(template_id)
                     if item_info:
                         card = ItemDetailCard(
                             item_id=template_id,
@@ -220,7 +214,7 @@ class CurrentItemsPage(QWidget):
                 template_id = item_data.get('template_id')
                 if template_id:
                     # 查找物品信息
-                    item_info = next((item for item in self.items_db if item.get('id') == template_id), None)
+                    item_info = self.items_db.get(template_id)
                     if item_info:
                         card = ItemDetailCard(
                             item_id=template_id,
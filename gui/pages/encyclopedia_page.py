@@ -11,6 +11,7 @@ from pathlib import Path
 import json
 from gui.widgets.item_detail_card_v2 import ItemDetailCard
 from gui.widgets.flow_layout import FlowLayout
+from data_manager.game_catalog import get_game_catalog
 
 
 class EncyclopediaPage(QWidget):
@@ -93,24 +94,12 @@ class EncyclopediaPage(QWidget):
             json.dump(self.config, f, indent=2, ensure_ascii=False)
     
     def _load_items_db(self) -> list:
-        """加载物品数据库"""
-        items_db_path = Path(__file__).parent.parent.parent / "assets" / "json" / "items_db.json"
-        try:
-            with open(items_db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载物品数据库失败: {e}")
-            return []
+        """加载物品数据库（与其他页面共享同一份数据）"""
+        return get_game_catalog().items()
     
     def _load_skills_db(self) -> list:
-        """加载技能数据库"""
-        skills_db_path = Path(__file__).parent.parent.parent / "assets" / "json" / "skills_db.json"
-        try:
-            with open(skills_db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载技能数据库失败: {e}")
-            return []
+        """加载技能数据库（与其他页面共享同一份数据）"""
+        return get_game_catalog().skills()
     
     def _init_ui(self):
         """初始化UI"""
@@ -964,17 +953,18 @@ class EncyclopediaPage(QWidget):
         self.is_searching = True
         self.stats_label.setText("🔍 搜索中...")
         
-        # ✅ 根据类型选择数据源
-        if self.search_query["item_type"] == "skill":
-            source_db = self.skills_db
-        else:
-            source_db = self.items_db
-        
-        # 过滤逻辑
-        results = []
-        for item in source_db:
-            if self._match_item(item):
-                results.append(item)
+        # ✅ 根据类型选择数据源（物品库 / 技能库的筛选索引只构建一次，筛选只做集合运算）
+        index = get_game_catalog().encyclopedia_index(self.search_query["item_type"])
+        results = index.query(
+            keyword=self.search_query["keyword"],
+            item_type=self.search_query["item_type"],
+            size=self.search_query["size"],
+            start_tier=self.search_query["start_tier"],
+            hero=self.search_query["hero"],
+            tags=self.selected_tags,
+            hidden_tags=self.selected_hidden_tags,
+            match_mode=self.match_mode,
+        )
         
         self.search_results = results
         self.is_searching = False
@@ -985,223 +975,6 @@ class EncyclopediaPage(QWidget):
         # 更新结果显示
         self._update_results_display()
     
-    def _match_item(self, item: dict) -> bool:
-        """判断物品是否匹配搜索条件"""
-        # ✅ 技能数据结构不同，需要特殊处理
-        is_skill = self.search_query["item_type"] == "skill"
-        
-        # ✅ 过滤掉 name_cn 为空的技能
-        if is_skill:
-            name_cn = item.get("name_cn", "").strip()
-            if not name_cn:
-                return False
-        
-        # 关键词匹配
-        if self.search_query["keyword"]:
-            keyword = self.search_query["keyword"].lower()
-            
-            # ✅ 优先匹配名称
-            if is_skill:
-                name_match = (keyword in item.get("name_en", "").lower() or 
-                            keyword in item.get("name_cn", "").lower())
-            else:
-                name_match = (keyword in item.get("name", "").lower() or 
-                            keyword in item.get("name_cn", "").lower())
-            
-            # 如果名称匹配，直接返回（优先级最高）
-            if name_match:
-                pass  # 继续后续检查
-            else:
-                # ✅ 名称不匹配时，模糊搜索所有字段
-                content_match = False
-                
-                if is_skill:
-                    # 技能：搜索 description, descriptions 数组
-                    if keyword in item.get("description_en", "").lower():
-                        content_match = True
-                    elif keyword in item.get("description_cn", "").lower():
-                        content_match = True
-                    else:
-                        # 搜索 descriptions 数组
-                        descriptions = item.get("descriptions", [])
-                        for desc in descriptions:
-                            if isinstance(desc, dict):
-                                if keyword in desc.get("en", "").lower() or keyword in desc.get("cn", "").lower():
-                                    content_match = True
-                                    break
-                else:
-                    # 物品：搜索 skills, skills_passive 等所有文本字段
-                    # 1. 搜索 skills 数组
-                    skills = item.get("skills") or []  # ✅ 修复：确保是列表
-                    for skill in skills:
-                        if isinstance(skill, dict):
-                            en_text = skill.get("en") or ""  # ✅ 修复：处理 None
-                            cn_text = skill.get("cn") or ""  # ✅ 修复：处理 None
-                            if keyword in en_text.lower() or keyword in cn_text.lower():
-                                content_match = True
-                                break
-                        elif isinstance(skill, str) and keyword in skill.lower():
-                            content_match = True
-                            break
-                    
-                    # 2. 搜索 skills_passive 数组
-                    if not content_match:
-                        skills_passive = item.get("skills_passive") or []  # ✅ 修复
-                        for skill in skills_passive:
-                            if isinstance(skill, dict):
-                                en_text = skill.get("en") or ""  # ✅ 修复
-                                cn_text = skill.get("cn") or ""  # ✅ 修复
-                                if keyword in en_text.lower() or keyword in cn_text.lower():
-                                    content_match = True
-                                    break
-                            elif isinstance(skill, str) and keyword in skill.lower():
-                                content_match = True
-                                break
-                    
-                    # 3. 搜索 enchantments 数组
-                    if not content_match:
-                        enchantments = item.get("enchantments") or []  # ✅ 修复
-                        for ench in enchantments:
-                            if isinstance(ench, dict):
-                                en_text = ench.get("en") or ""  # ✅ 修复
-                                cn_text = ench.get("cn") or ""  # ✅ 修复
-                                if keyword in en_text.lower() or keyword in cn_text.lower():
-                                    content_match = True
-                                    break
-                    
-                    # 4. 搜索 quests 数组
-                    if not content_match:
-                        quests = item.get("quests") or []  # ✅ 修复：确保 quests 是列表而非 None
-                        for quest in quests:
-                            if isinstance(quest, dict):
-                                target_en = quest.get("en_target", "")
-                                target_cn = quest.get("cn_target", "")
-                                reward_en = quest.get("en_reward", "")
-                                reward_cn = quest.get("cn_reward", "")
-                                if (keyword in target_en.lower() or keyword in target_cn.lower() or
-                                    keyword in reward_en.lower() or keyword in reward_cn.lower()):
-                                    content_match = True
-                                    break
-                
-                # 如果名称和内容都不匹配，返回 False
-                if not content_match:
-                    return False
-        
-        # ✅ 技能不需要类型和尺寸匹配（已经通过数据源筛选）
-        if not is_skill:
-            # 类型匹配（仅物品）
-            if self.search_query["item_type"] != "all":
-                item_type = item.get("type", "").lower()
-                if self.search_query["item_type"] == "skill" and item_type != "skill":
-                    return False
-                elif self.search_query["item_type"] == "item" and item_type == "skill":
-                    return False
-            
-            # 尺寸匹配（仅物品）
-            if self.search_query["size"]:
-                size = item.get("size", "").split(" / ")[0].lower()
-                if size != self.search_query["size"]:
-                    return False
-        
-        # ✅ 品级匹配 - 使用starting_tier字段
-        if self.search_query["start_tier"]:
-            starting_tier_raw = item.get("starting_tier", "")
-            if starting_tier_raw:
-                # 解析 "Bronze / 青铜" 格式
-                tier = starting_tier_raw.split(" / ")[0].lower()
-                if tier != self.search_query["start_tier"]:
-                    return False
-            else:
-                return False
-        
-        # 英雄匹配
-        if self.search_query["hero"]:
-            heroes_raw = item.get("heroes", "")
-            
-            # ✅ 解析英雄字符串："Vanessa / 凡妮莎 | Mak / 马克" → ["Vanessa", "Mak"]
-            hero_keys = []
-            if isinstance(heroes_raw, str) and heroes_raw:
-                # 分割 | 获取各个英雄
-                hero_parts = [h.strip() for h in heroes_raw.split("|")]
-                for hero_part in hero_parts:
-                    # 提取英文部分 "Vanessa / 凡妮莎" -> "Vanessa"
-                    if " / " in hero_part:
-                        hero_key = hero_part.split(" / ")[0].strip()
-                        hero_keys.append(hero_key)
-                    else:
-                        hero_keys.append(hero_part.strip())
-            elif isinstance(heroes_raw, list):
-                # 如果是数组格式
-                for hero in heroes_raw:
-                    hero_key = hero.split(" / ")[0].strip() if isinstance(hero, str) else str(hero)
-                    hero_keys.append(hero_key)
-            
-            # 检查选中的英雄是否在列表中
-            if self.search_query["hero"] not in hero_keys:
-                return False
-        
-        # ✅ 标签匹配（普通标签） - 正确解析 "Weapon / 武器 | Friend / 伙伴" 格式
-        if self.selected_tags:
-            item_tags_raw = item.get("tags", "")
-            # 解析标签字符串
-            item_tag_keys = []
-            if isinstance(item_tags_raw, str) and item_tags_raw:
-                # 分割 | 获取各个标签
-                tag_parts = [t.strip() for t in item_tags_raw.split("|")]
-                for tag_part in tag_parts:
-                    # 提取英文部分 "Weapon / 武器" -> "Weapon"
-                    if " / " in tag_part:
-                        tag_key = tag_part.split(" / ")[0].strip()
-                        item_tag_keys.append(tag_key)
-                    else:
-                        item_tag_keys.append(tag_part.strip())
-            
-            if self.match_mode == "all":
-                # 所有选中的标签都必须在物品标签中
-                for tag in self.selected_tags:
-                    if tag not in item_tag_keys:
-                        return False
-            else:  # any
-                # 至少有一个选中的标签在物品标签中
-                has_any = False
-                for tag in self.selected_tags:
-                    if tag in item_tag_keys:
-                        has_any = True
-                        break
-                if not has_any:
-                    return False
-        
-        # ✅ 隐藏标签匹配 - 正确解析字符串格式
-        if self.selected_hidden_tags:
-            item_hidden_tags_raw = item.get("hidden_tags", "")
-            # 解析隐藏标签字符串
-            item_hidden_tag_keys = []
-            if isinstance(item_hidden_tags_raw, str) and item_hidden_tags_raw:
-                # 分割 | 获取各个标签
-                tag_parts = [t.strip() for t in item_hidden_tags_raw.split("|")]
-                for tag_part in tag_parts:
-                    # 提取英文部分
-                    if " / " in tag_part:
-                        tag_key = tag_part.split(" / ")[0].strip()
-                        item_hidden_tag_keys.append(tag_key)
-                    else:
-                        item_hidden_tag_keys.append(tag_part.strip())
-            
-            if self.match_mode == "all":
-                for tag in self.selected_hidden_tags:
-                    if tag not in item_hidden_tag_keys:
-                        return False
-            else:  # any
-                has_any = False
-                for tag in self.selected_hidden_tags:
-                    if tag in item_hidden_tag_keys:
-                        has_any = True
-                        break
-                if not has_any:
-                    return False
-        
-        return True
-    
     def _on_scroll(self, value):
         """滚动事件 - 实现懒加载"""
         scrollbar = self.sender()
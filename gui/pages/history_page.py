@@ -6,10 +6,10 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QCursor
 from typing import Dict
-import json
 from pathlib import Path
 
 from services.log_analyzer import LogAnalyzer
+from data_manager.game_catalog import get_game_catalog
 
 
 class HistoryPage(QWidget):
@@ -34,24 +34,8 @@ class HistoryPage(QWidget):
         self._show_click_to_load_message()
     
     def _load_items_db(self) -> dict:
-        """加载物品数据库"""
-        items_db_path = Path(__file__).parent.parent.parent / "assets" / "json" / "items_db.json"
-        
-        try:
-            with open(items_db_path, 'r', encoding='utf-8') as f:
-                items_list = json.load(f)
-            
-            # 转换为字典（以id为键）
-            items_dict = {}
-            for item in items_list:
-                item_id = item.get('id')
-                if item_id:
-                    items_dict[item_id] = item
-            
-            return items_dict
-        except Exception as e:
-            print(f"加载物品数据库失败: {e}")
-            return {}
+        """加载物品数据库（{id: 记录}，与其他页面共享同一份数据）"""
+        return get_game_catalog().items_by_id()
     
     def _init_ui(self):
         """初始化UI"""
@@ -589,12 +573,12 @@ class HistoryPage(QWidget):
     def _clear_cache(self):
         """清除会话缓存"""
         from services.log_analyzer import get_log_directory
-        log_dir = Path(get_log_directory())
-        cache_file = log_dir / "sessions_cache.json"
+        from services.session_store import get_session_store
+        store = get_session_store(Path(get_log_directory()))
         
         try:
-            if cache_file.exists():
-                cache_file.unlink()
+            if store.snapshot_file.exists() or store.journal_file.exists():
+                store.clear()
                 print("[HistoryPage] 缓存已清除")
                 
                 # 显示提示信息
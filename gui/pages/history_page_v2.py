@@ -6,10 +6,10 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QCursor
 from typing import Dict
-import json
 from pathlib import Path
 
 from services.log_analyzer import LogAnalyzer
+from data_manager.game_catalog import get_game_catalog
 from utils.image_loader import ImageLoader, CardSize
 
 
@@ -34,23 +34,8 @@ class HistoryPageV2(QWidget):
         self._show_click_to_load_message()
     
     def _load_items_db(self) -> dict:
-        """加载物品数据库"""
-        items_db_path = Path(__file__).parent.parent.parent / "assets" / "json" / "items_db.json"
-        
-        try:
-            with open(items_db_path, 'r', encoding='utf-8') as f:
-                items_list = json.load(f)
-            
-            items_dict = {}
-            for item in items_list:
-                item_id = item.get('id')
-                if item_id:
-                    items_dict[item_id] = item
-            
-            return items_dict
-        except Exception as e:
-            print(f"加载物品数据库失败: {e}")
-            return {}
+        """加载物品数据库（{id: 记录}，与其他页面共享同一份数据）"""
+        return get_game_catalog().items_by_id()
     
     def _init_ui(self):
         """初始化UI"""
@@ -27,13 +27,14 @@ class SettingsPage(QWidget):
     language_changed = Signal(str)  # 语言改变 (zh_CN / zh_TW / en_US)
     reset_overlay_pos_requested = Signal() # 请求重置悬浮窗位置
     
-    def __init__(self, parent=None):
+    def __init__(self, config_manager: ConfigManager, parent=None):
         super().__init__(parent)
         
         # ✅ 使用与主窗口相同的设置存储（统一使用 SidebarWindow）
         self.settings = QSettings("Reborn", "SidebarWindow")
-        # 配置文件管理器
-        self.config_manager = ConfigManager()
+        # 共享的配置文件管理器（其他模块或外部修改配置时同步控件状态）
+        self.config_manager = config_manager
+        self.config_manager.settings_changed.connect(self._on_config_changed)
         
         self._init_ui()
         self._load_settings()
@@ -371,6 +372,26 @@ class SettingsPage(QWidget):
     def _update_hotkey_text(self):
          current = self.config_manager.settings.get("detail_hotkey", "")
          self.hotkey_btn.setText(current if current else "点击设置...")
+
+    def _on_config_changed(self, changed: dict):
+        """配置变化时刷新控件（屏蔽控件信号，避免再次写回配置）"""
+        settings = self.config_manager.settings
+        checkboxes = {
+            "auto_scan_enabled": self.chk_auto_scan,
+            "overlay_enabled": self.chk_overlay,
+            "debug_mode": self.chk_debug,
+        }
+        for key, checkbox in checkboxes.items():
+            if key in changed:
+                checkbox.blockSignals(True)
+                checkbox.setChecked(bool(settings.get(key, False)))
+                checkbox.blockSignals(False)
+        if "hover_delay" in changed:
+            self.delay_spin.blockSignals(True)
+            self.delay_spin.setValue(int(settings.get("hover_delay", 200)))
+            self.delay_spin.blockSignals(False)
+        if "detail_hotkey" in changed:
+            self._update_hotkey_text()
         
     def _create_scale_section(self) -> QWidget:
         """创建 UI 缩放设置区域"""
@@ -10,8 +10,8 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QPixmap, QFont
 from utils.i18n import get_i18n
 from utils.image_loader import ImageLoader, CardSize
+from data_manager.game_catalog import get_game_catalog
 import os
-import json
 
 
 
@@ -138,16 +138,9 @@ class ItemDetailCard(QFrame):
             pass
     
     def _load_item_data(self) -> Dict:
-        """从数据库加载物品数据"""
+        """从数据库加载物品数据（✅ 共享目录的 id 索引，O(1) 查找）"""
         try:
-            db_path = "assets/json/skills_db.json" if self.item_type == "skill" else "assets/json/items_db.json"
-            
-            if os.path.exists(db_path):
-                with open(db_path, 'r', encoding='utf-8') as f:
-                    db = json.load(f)
-                    for item in db:
-                        if item.get("id") == self.item_id:
-                            return item
+            return get_game_catalog().get_record(self.item_id, self.item_type) or {}
         except Exception as e:
             print(f"Error loading {self.item_type} data: {e}")
         return {}
@@ -9,6 +9,7 @@ from PySide6.QtCore import Qt, Signal, QSize
 from PySide6.QtGui import QPixmap, QPainter, QPainterPath, QColor
 from pathlib import Path
 from utils.i18n import I18nManager
+from data_manager.game_catalog import get_game_catalog
 import json
 import re
 
@@ -27,10 +28,9 @@ class ItemDetailCard(QFrame):
         self.setAttribute(Qt.WA_DontShowOnScreen, True)  # 暂时不显示到屏幕
         self.setUpdatesEnabled(False)  # 禁用更新
         
-        # 兼容旧接口
+        # 兼容旧接口：只传了ID没传data时，从共享目录的 id 索引中查找（O(1)）
         if item_data is None and item_id:
-             # 如果只传了ID没传data (理论上现在都传data了)，留个空fallback
-             pass
+             item_data = get_game_catalog().get_record(item_id, item_type)
              
         self.item_data = item_data or {}
         self.content_scale = content_scale
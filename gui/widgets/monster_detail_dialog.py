@@ -12,8 +12,8 @@ from utils.i18n import get_i18n
 from gui.utils.frameless_helper import FramelessHelper
 from utils.image_loader import ImageLoader, CardSize
 from gui.widgets.item_detail_card import ItemDetailCard
+from data_manager.game_catalog import get_game_catalog
 import os
-import json
 
 
 class MonsterDetailDialog(QWidget):
@@ -256,18 +256,8 @@ class MonsterDetailDialog(QWidget):
         self.content_layout.addWidget(label)
     
     def _load_item_from_db(self, item_id: str) -> Dict:
-        """从 items_db.json 加载物品完整信息"""
-        try:
-            items_db_path = "assets/json/items_db.json"
-            if os.path.exists(items_db_path):
-                with open(items_db_path, 'r', encoding='utf-8') as f:
-                    items_db = json.load(f)
-                    for item in items_db:
-                        if item.get("id") == item_id:
-                            return item
-        except Exception as e:
-            print(f"Error loading item from DB: {e}")
-        return {}
+        """从共享的游戏数据目录按 id 查找物品完整信息"""
+        return get_game_catalog().get_item(item_id) or {}
     
     def _add_items_row(self, items: list):
         """添加物品行（横向排列，只显示图片）"""
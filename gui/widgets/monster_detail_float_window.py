@@ -3,11 +3,11 @@
 在主窗口旁边显示的独立悬浮窗口
 """
 import os
-import json
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QScrollArea, QWidgetItem
 from PySide6.QtCore import Qt, Signal, QTimer, QSize, QSettings
 from PySide6.QtGui import QPixmap
 from data_manager.monster_loader import Monster
+from data_manager.game_catalog import get_game_catalog
 from utils.i18n import get_i18n
 from utils.image_loader import ImageLoader, CardSize
 from gui.widgets.item_detail_card_v2 import ItemDetailCard
@@ -471,7 +471,7 @@ class MonsterDetailFloatWindow(QWidget):
              scale = self.content_scale
              # ✅ 优化：首次创建时完全脱离父窗口，避免触发重绘
              if self._item_card_cache is None:
-                 item_data = next((item for item in self.items_db if item.get("id") == self.current_item_id), {})
+                 item_data = self.items_db.get(self.current_item_id, {})
                  # 创建时不指定parent，完全独立
                  self._item_card_cache = ItemDetailCard(item_id=self.current_item_id, item_type="item",
                                             default_expanded=True, enable_tier_click=True, content_scale=scale,
@@ -480,7 +480,7 @@ class MonsterDetailFloatWindow(QWidget):
                  self._item_card_cache.setParent(self)
              else:
                  # ✅ 复用：只更新数据
-                 item_data = next((item for item in self.items_db if item.get("id") == self.current_item_id), {})
+                 item_data = self.items_db.get(self.current_item_id, {})
                  self._item_card_cache.item_data = item_data
                  self._item_card_cache.item_id = self.current_item_id
              
@@ -556,7 +556,7 @@ class MonsterDetailFloatWindow(QWidget):
                 # 检查缓存
                 if skill_id not in self._skill_cards_cache:
                     # 首次创建：不指定parent，完全独立
-                    skill_data = next((s for s in self.skills_db if s.get("id") == skill_id), {})
+                    skill_data = self.skills_db.get(skill_id, {})
                     skill_card = ItemDetailCard(skill_id, item_type="skill", current_tier=current_tier, 
                                                default_expanded=True, enable_tier_click=True, content_scale=scale,
                                                item_data=skill_data, parent=None)
@@ -648,24 +648,8 @@ class MonsterDetailFloatWindow(QWidget):
                 item_id = item.get('id', '')
                 current_tier = item.get('current_tier', 'bronze').lower()  # ✅ 转换为小写确保匹配
                 
-                # 从items_db.json加载物品数据以获取正确的size
-                try:
-                    item_db_path = "assets/json/items_db.json"
-                    if os.path.exists(item_db_path):
-                        with open(item_db_path, 'r', encoding='utf-8') as f:
-                            items_db = json.load(f)
-                            item_data = next((i for i in items_db if i.get('id') == item_id), None)
-                            if item_data:
-                                size_str = item_data.get('size', 'Medium / 中型')
-                                # 提取英文部分 "Large / 大型" -> "Large"
-                                size_key = size_str.split('/')[0].strip().lower()
-                            else:
-                                size_key = 'medium'
-                    else:
-                        size_key = 'medium'
-                except Exception as e:
-                    print(f"[InlineItem] Failed to load size for {item_id}: {e}")
-                    size_key = 'medium'
+                # 从物品库索引获取正确的size（"Large / 大型" -> "large"）
+                size_key = get_game_catalog().size_category(item_id)
                 
                 # 根据size确定CardSize
                 if 'large' in size_key:
@@ -866,24 +850,12 @@ class MonsterDetailFloatWindow(QWidget):
         self._update_content()
     
     def _load_items_db(self):
-        """加载物品数据库"""
-        try:
-            import json
-            with open("assets/json/items_db.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载物品数据库失败: {e}")
-            return []
+        """加载物品数据库 {id: 记录}（与其他窗口共享同一份索引）"""
+        return get_game_catalog().items_by_id()
     
     def _load_skills_db(self):
-        """加载技能数据库"""
-        try:
-            import json
-            with open("assets/json/skills_db.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载技能数据库失败: {e}")
-            return []
+        """加载技能数据库 {id: 记录}（与其他窗口共享同一份索引）"""
+        return get_game_catalog().skills_by_id()
 
     def _toggle_item_detail(self, item_id, current_tier, content_scale, monster_item_data):
         """
@@ -917,31 +889,11 @@ class MonsterDetailFloatWindow(QWidget):
         self._current_expanded_item_id = item_id
         
         # 合并物品数据（从 items_db 加载完整数据，保留 monster 数据中的 enchantment）
-        merged_item_data = None
-        if monster_item_data:
-            try:
-                items_db_path = "assets/json/items_db.json"
-                if os.path.exists(items_db_path):
-                    with open(items_db_path, 'r', encoding='utf-8') as f:
-                        items_db = json.load(f)
-                        db_item = next((i for i in items_db if i.get('id') == item_id), None)
-                        if db_item:
-                            merged_item_data = db_item.copy()
-                            if 'enchantment' in monster_item_data:
-                                merged_item_data['enchantment'] = monster_item_data['enchantment']
-            except Exception as e:
-                print(f"[ItemDetail] Error merging item data: {e}")
-        
-        # 如果没有合并数据，直接从 items_db 加载
-        if not merged_item_data:
-            try:
-                items_db_path = "assets/json/items_db.json"
-                if os.path.exists(items_db_path):
-                    with open(items_db_path, 'r', encoding='utf-8') as f:
-                        items_db = json.load(f)
-                        merged_item_data = next((i for i in items_db if i.get('id') == item_id), None)
-            except Exception as e:
-                print(f"[ItemDetail] Error loading item data: {e}")
+        merged_item_data = self.items_db.get(item_id)
+        if merged_item_data and monster_item_data and 'enchantment' in monster_item_data:
+            # 共享记录不能直接修改，先复制
+            merged_item_data = merged_item_data.copy()
+            merged_item_data['enchantment'] = monster_item_data['enchantment']
         
         # 创建物品详情卡片
         if merged_item_data:
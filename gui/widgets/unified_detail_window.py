@@ -14,7 +14,7 @@ from loguru import logger
 
 from gui.widgets.item_detail_card import ItemDetailCard
 from gui.widgets.monster_detail_content import MonsterDetailContent
-from data_manager.monster_loader import Monster, MonsterDatabase
+from data_manager.monster_loader import Monster, get_monster_db
 from gui.utils.frameless_helper import FramelessHelper
 from gui.styles import COLOR_GOLD
 
@@ -54,7 +54,7 @@ class UnifiedDetailWindow(QWidget):
         self.current_widget: Optional[QWidget] = None
         
         # Monster Database
-        self.monster_db = MonsterDatabase()
+        self.monster_db = get_monster_db()
         
         # UI 初始化
         self._init_ui()
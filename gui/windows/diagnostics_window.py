@@ -17,6 +17,7 @@ from data_manager.config_manager import ConfigManager
 class DiagWorker(QThread):
     log_signal = Signal(str)
     task_done_signal = Signal(str)
+    task_progress_signal = Signal(str, str) # task key, 进度文字
     result_signal = Signal(dict)
 
     def run(self):
@@ -53,7 +54,10 @@ class DiagWorker(QThread):
                 'Medium': cv2.imread('tests/assets/medium.png'),
                 'Large': cv2.imread('tests/assets/large.png')
             }
-            report['orb'] = diag.benchmark_matcher(test_samples)
+            report['orb'] = diag.benchmark_matcher(
+                test_samples,
+                progress=lambda label, done, total: self.task_progress_signal.emit(
+                    "orb", f"构建{label}特征库 {done}/{total}"))
             self.task_done_signal.emit("orb")
             
             test_img = cv2.imread(test_img_path)
@@ -72,8 +76,10 @@ class DiagnosticsWindow(QWidget):
     enter_main_requested = Signal()  # 新增：请求进入主界面的信号
     closed = Signal()  # 窗口关闭信号
     
-    def __init__(self):
+    def __init__(self, config_manager: ConfigManager):
         super().__init__()
+        # 共享的配置管理器：自检结果通过它保存，订阅方立即收到 settings_changed
+        self.config_manager = config_manager
         # 使用跨平台覆盖助手（自动处理 macOS 全屏支持）
         enable_overlay_mode(self, frameless=True, translucent=True)
         self.resize(1000, 650)
@@ -210,6 +216,8 @@ class DiagnosticsWindow(QWidget):
         # 保存引用以便后续更新
         container.status_indicator = status_indicator
         container.title_label = title_label
+        container.desc_label = desc_label
+        container.default_desc = desc
         
         return container
 
@@ -222,12 +230,14 @@ class DiagnosticsWindow(QWidget):
         for task_widget in self.tasks.values():
             task_widget.setProperty("status", "idle")
             task_widget.status_indicator.setText("○")
+            task_widget.desc_label.setText(task_widget.default_desc)
             task_widget.style().unpolish(task_widget)
             task_widget.style().polish(task_widget)
 
         self.worker = DiagWorker()
         self.worker.log_signal.connect(self.append_log)
         self.worker.task_done_signal.connect(self.mark_done)
+        self.worker.task_progress_signal.connect(self.update_task_progress)
         self.worker.result_signal.connect(self.finish)
         self.worker.start()
 
@@ -235,10 +245,14 @@ class DiagnosticsWindow(QWidget):
         self.console.append(html)
         self.console.moveCursor(QTextCursor.MoveOperation.End)
 
+    def update_task_progress(self, key, text):
+        self.tasks[key].desc_label.setText(text)
+
     def mark_done(self, key):
         task_widget = self.tasks[key]
         task_widget.setProperty("status", "done")
         task_widget.status_indicator.setText("●")
+        task_widget.desc_label.setText(task_widget.default_desc)
         task_widget.style().unpolish(task_widget)
         task_widget.style().polish(task_widget)
 
@@ -260,7 +274,7 @@ class DiagnosticsWindow(QWidget):
         orb_medium_ms = orb_results.get('Medium', {}).get('time_ms', 0)
         orb_small_ms = orb_results.get('Small', {}).get('time_ms', 0)
         
-        ConfigManager().save({
+        self.config_manager.save({
             "preferred_provider": yolo_provider,
             "best_ocr": ocr_engine
         })
@@ -14,14 +14,18 @@ from gui.pages.settings_page import SettingsPage
 from gui.pages.history_page_holographic import HistoryPageHolographic as HistoryPage
 from gui.pages.encyclopedia_page import EncyclopediaPage
 from gui.pages.current_items_page import CurrentItemsPage
+from data_manager.config_manager import ConfigManager
 from utils.i18n import get_i18n
 from loguru import logger
 
 class SidebarWindow(QWidget):
     collapse_to_island = Signal()  # 收起到灵动岛信号
     
-    def __init__(self):
+    def __init__(self, config_manager: ConfigManager = None):
         super().__init__()
+        # ✅ 共享的配置管理器（由主程序传入；单独运行侧边栏时自建一个）
+        self.config_manager = config_manager or ConfigManager()
+
         # 使用跨平台覆盖助手（自动处理 macOS 全屏支持）
         enable_overlay_mode(self, frameless=True, translucent=True)
         
@@ -75,6 +79,10 @@ class SidebarWindow(QWidget):
         self._init_pages()  # 初始化页面内容
         self._init_animations()  # 初始化动画
         self.update_ui_scale(1.0)
+
+        # ✅ 订阅配置变化（设置页、诊断窗口或手动编辑配置文件后同步导航状态）
+        self.config_manager.settings_changed.connect(self._on_config_changed)
+        self._update_scan_status()
         
         # ✅ 加载保存的窗口位置和大小
         self._load_window_geometry()
@@ -197,6 +205,9 @@ class SidebarWindow(QWidget):
             self.nav_buttons.append(btn)
             self.nav_button_group.addButton(btn, i)  # 添加到按钮组
         
+        # 卡牌识别按钮（提示文字显示自动扫描状态）
+        self.scanner_btn = self.nav_buttons[2]
+
         # 中间弹性空间
         nav_layout.addStretch()
         
@@ -251,7 +262,7 @@ class SidebarWindow(QWidget):
         self.content_stack.addWidget(self.encyclopedia_page)
         
         # 6. ✅ 设置页面（真实页面，替换占位符）
-        self.settings_page = SettingsPage()
+        self.settings_page = SettingsPage(self.config_manager)
         self.content_stack.addWidget(self.settings_page)
         
         # 绑定设置页面的信号
@@ -273,6 +284,16 @@ class SidebarWindow(QWidget):
         self.nav_rail.enterEvent = self._on_nav_enter
         self.nav_rail.leaveEvent = self._on_nav_leave
     
+    def _on_config_changed(self, changed: dict):
+        """配置变化时刷新导航栏上依赖配置的状态"""
+        if "auto_scan_enabled" in changed:
+            self._update_scan_status()
+
+    def _update_scan_status(self):
+        """卡牌识别按钮的提示文字显示自动扫描开关"""
+        enabled = bool(self.config_manager.settings.get("auto_scan_enabled", False))
+        self.scanner_btn.setToolTip(f"卡牌识别 - 自动扫描{'已开启' if enabled else '已关闭'}")
+
     def _on_nav_enter(self, event):
         """鼠标进入导航栏 - 展开"""
         target_w = int(styles.NAV_WIDTH_EXPANDED * self.current_scale)
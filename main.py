@@ -3,6 +3,7 @@ import sys
 import os
 import ctypes
 import json
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import QPropertyAnimation, QRect, QEasingCurve, QPoint
 from gui.windows.start_window import StartWindow
@@ -25,13 +26,14 @@ class BazaarApp:
         
         # 初始化日志 (根据配置决定是否开启调试模式)
         debug_mode = self.config_manager.settings.get("debug_mode", False)
-        self.logger = setup_logger(is_gui_app=True, debug_mode=debug_mode)
+        trace_mode = self.config_manager.settings.get("trace_mode", False)
+        self.logger = setup_logger(is_gui_app=True, debug_mode=debug_mode, trace_mode=trace_mode)
         self.logger.info(f"主程序启动... (Debug Mode: {debug_mode})")
 
         # 实例化窗口
         self.start_win = StartWindow()
-        self.diag_win = DiagnosticsWindow()
-        self.sidebar_win = SidebarWindow()
+        self.diag_win = DiagnosticsWindow(self.config_manager)
+        self.sidebar_win = SidebarWindow(self.config_manager)
         self.island_win = IslandWindow()  # 灵动岛
         self.debug_win = DebugOverlayWindow() # 调试窗口
         self.unified_detail_win = UnifiedDetailWindow() # 统一详情窗口（卡牌/技能/怪物）
@@ -61,8 +63,6 @@ class BazaarApp:
             self.sidebar_win.settings_page.reset_overlay_pos_requested.connect(
                 self.sidebar_win.monster_page.reset_detail_window_position
             )
-            # 共享 ConfigManager
-            self.sidebar_win.settings_page.config_manager = self.config_manager
 
         # 绑定信号
         self.start_win.entered.connect(self.on_start_enter)  # 启动助手
@@ -332,6 +332,9 @@ class BazaarApp:
         self.expand_anim = anim
 
 if __name__ == "__main__":
+    # 打包后的程序中，特征库构建的进程池子进程会重新执行入口，必须最先调用
+    multiprocessing.freeze_support()
+
     # macOS：在创建 QApplication 之前配置 NSApp（关键！）
     if sys.platform == "darwin":
         try:
@@ -2,6 +2,7 @@ import sys
 from platforms.interfaces.ocr import OCREngine
 from platforms.interfaces.window import WindowManager
 from platforms.interfaces.game_log import GameLogPathProvider
+from platforms.interfaces.file_watch import FileChangeNotifier
 from loguru import logger
 
 class PlatformAdapter:
@@ -137,6 +138,21 @@ class PlatformAdapter:
         from platforms.interfaces.game_log import NullGameLogPathProvider
         return NullGameLogPathProvider()
     
+    @staticmethod
+    def get_file_change_notifier(directory, filenames) -> FileChangeNotifier:
+        """
+        获取文件变化通知器：Linux（包括 Steam Deck）使用 inotify，其它平台回退到定时轮询
+        """
+        if sys.platform.startswith("linux"):
+            try:
+                from platforms.linux.file_watch import InotifyFileChangeNotifier
+                return InotifyFileChangeNotifier(directory, filenames)
+            except Exception as e:
+                logger.warning(f"inotify 不可用，回退到轮询: {e}")
+        
+        from platforms.common.file_watch import PollingFileChangeNotifier
+        return PollingFileChangeNotifier(directory, filenames)
+    
     @staticmethod
     def get_capture_tool():
         """
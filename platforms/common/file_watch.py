@@ -0,0 +1,29 @@
+"""
+通用文件变化通知实现：定时轮询（所有平台可用的回退方案）
+"""
+from pathlib import Path
+from threading import Event
+from typing import Iterable, Optional
+
+from platforms.interfaces.file_watch import FileChangeNotifier
+
+
+class PollingFileChangeNotifier(FileChangeNotifier):
+    """每隔 poll_interval 秒唤醒一次，由调用方 stat() 文件判断是否有增量"""
+
+    name = "Polling"
+
+    def __init__(self, directory: Path, filenames: Iterable[str], poll_interval: float = 1.0):
+        super().__init__(directory, filenames)
+        self.poll_interval = poll_interval
+        self._interrupted = Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        interval = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+        if self._interrupted.wait(interval):
+            self._interrupted.clear()
+            return False
+        return True
+
+    def interrupt(self):
+        self._interrupted.set()
@@ -1,7 +1,29 @@
+import numpy as np
 from rapidocr_onnxruntime import RapidOCR
 from platforms.interfaces.ocr import OCREngine
 from loguru import logger
 
+# 拼图中相邻图块之间的空白行数（避免检测框跨图块粘连）
+MOSAIC_GAP = 16
+
+
+def stitch_mosaic(images, gap=MOSAIC_GAP):
+    """
+    把多张图纵向拼成一张（右侧和图块之间用黑色填充）
+    :return: (拼图, 每个图块的 [起始 y, 结束 y))
+    """
+    width = max(img.shape[1] for img in images)
+    height = sum(img.shape[0] for img in images) + gap * (len(images) + 1)
+    mosaic = np.zeros((height, width, 3), dtype=np.uint8)
+    spans, y = [], gap
+    for img in images:
+        h, w = img.shape[:2]
+        mosaic[y:y + h, :w] = img if img.ndim == 3 else img[:, :, None]
+        spans.append((y, y + h))
+        y += h + gap
+    return mosaic, spans
+
+
 class CommonOCREngine(OCREngine):
     def __init__(self):
         try:
@@ -26,4 +48,44 @@ class CommonOCREngine(OCREngine):
         # 2. 按照 Y 坐标排序并拼接成标准格式返回
         # 这样 business layer (OCRService) 拿到的数据格式就统一了
         result.sort(key=lambda x: x[0][0][1])
-        return "\n".join([line[1] for line in result])
\ No newline at end of file
+        return "\n".join([line[1] for line in result])
+
+    def recognize_batch(self, images, single_line=False) -> list:
+        """
+        🔥 批量识别
+        - single_line: 每张图就是一行文字，跳过检测，所有图作为一批直接送入识别模型
+          (检测模型会把短边放大到 736，一条 40px 高的名字条放大后比整个详情框还慢)
+        - 否则：所有图纵向拼成一张，只跑一次检测 + 识别，再按文本框中心的 y 坐标分回各图块
+        """
+        texts = [""] * len(images)
+        valid = [i for i, img in enumerate(images) if img is not None and img.size > 0]
+        if not valid or self._engine is None:
+            return texts
+
+        if single_line:
+            rec_res, _ = self._engine.text_rec([images[i] for i in valid])
+            for i, (text, score) in zip(valid, rec_res):
+                if score >= self._engine.text_score:
+                    texts[i] = text
+            return texts
+
+        if len(valid) == 1:
+            texts[valid[0]] = self.recognize(images[valid[0]])
+            return texts
+
+        mosaic, spans = stitch_mosaic([images[i] for i in valid])
+        result, _ = self._engine(mosaic)
+        if not result:
+            return texts
+
+        lines = [[] for _ in valid]
+        for box, text, _score in result:
+            center_y = sum(p[1] for p in box) / len(box)
+            for tile, (top, bottom) in enumerate(spans):
+                if top - MOSAIC_GAP / 2 <= center_y < bottom + MOSAIC_GAP / 2:
+                    lines[tile].append((box[0][1], text))
+                    break
+        for tile, tile_lines in enumerate(lines):
+            tile_lines.sort(key=lambda x: x[0])
+            texts[valid[tile]] = "\n".join(text for _, text in tile_lines)
+        return texts
@@ -0,0 +1,39 @@
+"""
+文件变化通知接口定义
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+class FileChangeNotifier(ABC):
+    """监听目录中指定文件的变化（写入/创建/重命名/删除）"""
+
+    name = "BaseNotifier"
+
+    def __init__(self, directory: Path, filenames: Iterable[str]):
+        self.directory = Path(directory)
+        self.filenames = set(filenames)
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞直到被监听的文件可能发生变化
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            bool: True 表示文件可能已变化（调用方应检查增量），
+                  False 表示超时或被 interrupt() 唤醒
+        """
+        pass
+
+    @abstractmethod
+    def interrupt(self):
+        """从其他线程唤醒正在 wait() 的线程（用于停止监控）"""
+        pass
+
+    def close(self):
+        """释放底层资源"""
+        pass
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 import numpy as np
 
 class OCREngine(ABC):
@@ -12,6 +13,14 @@ class OCREngine(ABC):
         """
         pass
 
+    def recognize_batch(self, images: List[np.ndarray], single_line: bool = False) -> List[str]:
+        """
+        批量识别多张图像（默认逐张调用 recognize，支持批量识别的引擎可以重写）
+        :param single_line: 每张图只有一行文字（例如详情框名字区域），引擎可以跳过文字检测
+        :return: 与 images 一一对应的文本
+        """
+        return [self.recognize(image) if image is not None and image.size > 0 else "" for image in images]
+
 class NullOCREngine(OCREngine):
     name = "NullOCR"
     """一个空的 OCR 引擎实现，始终返回空字符串。防止系统崩溃。"""
@@ -0,0 +1,126 @@
+"""
+Linux 平台文件变化通知实现（包括 Steam Deck）
+通过 ctypes 直接调用 inotify，无需第三方依赖；游戏未运行时线程完全阻塞，没有定时唤醒
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+from pathlib import Path
+from typing import Iterable, Optional
+from loguru import logger
+
+from platforms.interfaces.file_watch import FileChangeNotifier
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# 监听目录而不是文件本身：Unity 启动时会把 Player.log 轮转为 Player-prev.log 并新建文件
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyFileChangeNotifier(FileChangeNotifier):
+    """基于 inotify 的事件驱动通知"""
+
+    name = "inotify"
+
+    def __init__(self, directory: Path, filenames: Iterable[str]):
+        super().__init__(directory, filenames)
+        self._fd = -1
+        self._wake_r, self._wake_w = -1, -1
+
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        wd = libc.inotify_add_watch(fd, os.fsencode(str(self.directory)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch 失败: {self.directory}")
+
+        self._fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        logger.debug(f"[inotify] 开始监听 {self.directory} -> {sorted(self.filenames)}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._fd < 0:
+            return False
+
+        try:
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        except InterruptedError:
+            return True
+
+        if self._wake_r in readable:
+            self._drain(self._wake_r)
+            return False
+
+        if self._fd in readable:
+            return self._read_events()
+
+        return False
+
+    def _read_events(self) -> bool:
+        """读取并解析所有待处理事件，只要有一个关心的文件发生变化就返回 True"""
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not buffer:
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buffer):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + name_len].rstrip(b"\0").decode("utf-8", errors="ignore")
+                offset += name_len
+
+                if mask & IN_Q_OVERFLOW or name in self.filenames:
+                    changed = True
+        return changed
+
+    @staticmethod
+    def _drain(fd: int):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def interrupt(self):
+        if self._wake_w >= 0:
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = self._wake_r = self._wake_w = -1
@@ -1,15 +1,16 @@
-from PySide6.QtCore import QThread, Signal, QRect, QTimer, QMutex
+from PySide6.QtCore import Qt, QThread, Signal, QRect, QTimer, QMutex
 from PySide6.QtWidgets import QApplication
 import sys
 import time
+import threading
 import cv2
 import numpy as np
 import os
-import json
 from loguru import logger
 import config
 
 from core.detectors.yolo_detector import YoloDetector
+from core.detectors.change_gate import ChangeGatedDetector
 # DXCamCapturer 仅在 Windows 上可用
 if sys.platform == "win32":
     from core.capturers.dxcam_capturer import DXCamCapturer
@@ -20,7 +21,12 @@ from core.comparators.feature_matcher import FeatureMatcher
 from utils.window_utils import get_window_rect, get_mouse_pos_relative, is_window_foreground, is_focus_valid, is_process_running
 
 from services.ocr_service import OCRService
+from services.ocr_engine_pool import get_ocr_engine_pool
+from services.scan_governor import FrameGovernor
+from services.recognition_cache import RecognitionCache
+from services.scan_pipeline import CaptureWorker, LatestSlot, RecognitionPool, StageStats
 from data_manager.config_manager import ConfigManager
+from data_manager.game_catalog import get_game_catalog
 
 # keyboard 和 mouse 库在 macOS 上可能导致段错误，仅在 Windows 上使用
 if sys.platform == "win32":
@@ -42,6 +48,7 @@ class AutoScanner(QThread):
     scan_results_updated = Signal(list) # list of detection dicts
     force_show_detail = Signal(str, str) # New signal for hotkey
     item_pre_detected = Signal(str, str, str) # type, id, name (Hover pre-detection)
+    pipeline_stats_updated = Signal(dict) # per-stage queue depth / latency
 
     def __init__(self, config_manager: ConfigManager):
         super().__init__()
@@ -57,71 +64,143 @@ class AutoScanner(QThread):
         self._last_hover_obj_box = None
         self._hover_recognized = False
         self._cached_result = None
+        self._hover_lock = threading.Lock()
+        self._hover_token = 0          # bumps whenever the hovered object changes
+        self._hover_start_perf = 0.0
+        self._hover_force = False      # hotkey pressed while recognition in flight -> show detail on arrival
+
+        # Pipeline stages (capture thread -> detection on this thread -> recognition pool)
+        self.stage_stats = {name: StageStats(name) for name in ("capture", "detect", "recognize", "hover")}
+        self.frame_slot = LatestSlot(self.stage_stats["detect"])
+        self.capture_worker = None
+        # Hovering back to an already identified crop returns the cached (type, id, name)
+        self.recognition_cache = RecognitionCache()
+        self.recognition_pool = None
+
+        # Frame pacing (target FPS from diagnostics' yolo_fps)
+        self.governor = FrameGovernor(
+            target_fps=self.config.settings.get("yolo_fps", 10),
+            cpu_budget=self.config.settings.get("scan_cpu_budget", 0.5))
+        # Settings are pushed on change instead of being re-read every frame
+        # (direct connection: applied in whichever thread refreshed/saved the config)
+        self.config.settings_changed.connect(self._on_settings_changed, Qt.DirectConnection)
+        self._last_detections = None
+        self._last_mouse = None
         
         # Paths
         self.model_path = config.MODEL_PATH
         self.monster_db = os.path.join("assets", "json", "monsters_db.json")
         self.item_db = os.path.join("assets", "json", "items_db.json")
 
-        # Load Name Maps
-        self.item_map = self._load_json_db(self.item_db)
+        # Load Name Maps (item names come precomputed from the shared catalog)
+        self.item_map = get_game_catalog().item_names()
         self.monster_map = self._load_json_db(self.monster_db)
 
         # Services (Lazy Init)
         self.yolo = None
+        self.detection_gate = None
         self.capturer = None
         self.matcher = None
-        self.ocr_monster = None
+        # Reads the name line of the DETAIL tooltip to confirm item/skill ORB matches
+        # (monster events have no name tooltip, so there is no monster OCR)
         self.ocr_card = None
+        # One OCR engine for the whole process, loaded in the background on first use, unloaded when idle
+        self.ocr_pool = get_ocr_engine_pool()
+        self.ocr_pool.set_idle_timeout(self.config.settings.get("ocr_idle_unload_seconds", 300))
 
     def _load_json_db(self, path):
-        """Load minimal ID->Name map"""
+        """Load minimal ID->Name map (parsed once per process by the shared catalog)"""
         data_map = {}
         try:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for item in data:
-                        if 'id' in item:
-                            # Prefer Chinese Name, fallback to English or ID
-                            name = item.get('name_cn') or item.get('name_en') or item.get('id')
-                            data_map[item['id']] = name
+            data = get_game_catalog().load_json(path, [])
+            for item in data:
+                if 'id' in item:
+                    # Prefer Chinese Name, fallback to English or ID
+                    name = item.get('name_cn') or item.get('name_en') or item.get('id')
+                    data_map[item['id']] = name
         except Exception as e:
             logger.error(f"Failed to load DB {path}: {e}")
         return data_map
 
+    def _on_settings_changed(self, changed: dict):
+        """Apply scan-related settings when the config changes"""
+        if "yolo_fps" in changed:
+            self.governor.set_target_fps(self.config.settings.get("yolo_fps", 10))
+        if "scan_cpu_budget" in changed:
+            self.governor.cpu_budget = self.config.settings.get("scan_cpu_budget", 0.5)
+        if "scan_roi_mode" in changed and self.detection_gate:
+            self.detection_gate.roi_enabled = self.config.settings.get("scan_roi_mode", False)
+        if "ocr_idle_unload_seconds" in changed:
+            self.ocr_pool.set_idle_timeout(self.config.settings.get("ocr_idle_unload_seconds", 300))
+
     def initialize_services(self):
         if not self.yolo:
             try:
                 self.yolo = YoloDetector(self.model_path, use_gpu=True)
             except Exception as e:
                 logger.error(f"Failed to load YOLO: {e}")
+
+        if self.yolo and not self.detection_gate:
+            # Skip inference on unchanged frames. ROI re-detection (changed regions + cursor area)
+            # stays opt-in until its agreement with full-frame YOLO is measured on recorded frames
+            self.detection_gate = ChangeGatedDetector(
+                self.yolo, roi_enabled=self.config.settings.get("scan_roi_mode", False))
         
-        if not self.capturer:
-            # Try DXCam first (Windows only), then MSS
-            if sys.platform == "win32" and DXCamCapturer is not None:
-                try:
-                    self.capturer = DXCamCapturer()
-                    if not self.capturer.camera: # DXCam might fail inside init
-                         raise Exception("DXCam init failed")
-                except:
-                    logger.warning("DXCam unavailable, using MSS")
-                    self.capturer = MSSCapturer()
-            else:
-                # macOS/Linux: 使用 MSS
-                logger.info("Using MSS capturer (non-Windows platform)")
-                self.capturer = MSSCapturer()
+        if not self.capture_worker:
+            # Capturer handles are thread-bound, so the capture thread creates its own
+            self.capture_worker = CaptureWorker(self._create_capturer, self.frame_slot,
+                                                stats=self.stage_stats["capture"])
+            self.capture_worker.start()
+            self.capture_worker.wait_ready()
+            self.capturer = self.capture_worker.capturer
+
+        if not self.recognition_pool:
+            self.recognition_pool = RecognitionPool(
+                max_workers=self.config.settings.get("scan_recognize_workers", 2),
+                stats=self.stage_stats["recognize"])
         
         if not self.matcher:
-            self.matcher = FeatureMatcher()
+            # Feature library is rebuilt incrementally when card images changed; show progress meanwhile
+            self.matcher = FeatureMatcher(
+                progress=lambda label, done, total: self._emit_status(True, f"Building {label} features {done}/{total}"))
 
-        # Disable OCR for memory optimization test
-        # if not self.ocr_monster:
-        #     self.ocr_monster = OCRService(self.monster_db)
-            
-        # if not self.ocr_card and os.path.exists(self.item_db):
-        #     # We reuse OCRService logic but different DB
-        #     self.ocr_card = OCRService(self.item_db)
+        # Uses the pooled OCR engine. engine_timeout=0: while the engine is still loading,
+        # OCR is skipped (the ORB result stands) instead of stalling the scan
+        if not self.ocr_card and os.path.exists(self.item_db):
+            self.ocr_card = OCRService(self.item_db, engine_pool=self.ocr_pool, engine_timeout=0)
+
+    def _create_capturer(self):
+        # Try DXCam first (Windows only), then MSS
+        if sys.platform == "win32" and DXCamCapturer is not None:
+            try:
+                capturer = DXCamCapturer()
+                if not capturer.camera: # DXCam might fail inside init
+                     raise Exception("DXCam init failed")
+                return capturer
+            except:
+                logger.warning("DXCam unavailable, using MSS")
+                return MSSCapturer()
+        # macOS/Linux: 使用 MSS
+        logger.info("Using MSS capturer (non-Windows platform)")
+        return MSSCapturer()
+
+    def pipeline_stats(self):
+        """Per-stage snapshot: count / dropped / queue depth / latency / cadence"""
+        depths = {
+            "detect": self.frame_slot.depth,
+            "recognize": self.recognition_pool.depth if self.recognition_pool else 0,
+        }
+        stats = {name: stats.snapshot(depths.get(name, 0)) for name, stats in self.stage_stats.items()}
+        stats["cache"] = self.recognition_cache.stats()
+        stats["ocr"] = self.ocr_pool.stats()
+        stats["ocr_cache"] = self.ocr_card.cache_stats() if self.ocr_card else {}
+        return stats
+
+    def _wait_state(self, state):
+        """Non-scanning state: stop capturing and back off"""
+        if self.capture_worker:
+            self.capture_worker.pause()
+        self.governor.wait(state)
 
     def _emit_status(self, active, msg):
         if self._last_status_msg != msg:
@@ -193,13 +272,12 @@ class AutoScanner(QThread):
         
         while self.running:
             try:
-                # Reload config occasionally to pick up UI changes
-                if int(time.time()) % 2 == 0:
-                    self.config.settings = self.config.load()
+                # Pick up external edits (rate-limited mtime check; no parsing unless the file changed)
+                self.config.refresh()
                 
                 if self.paused or not self.config.settings.get("auto_scan_enabled", False):
                     self._emit_status(False, "Paused / Disabled")
-                    time.sleep(1)
+                    self._wait_state("disabled")
                     continue
 
                 # Check if game process is running
@@ -208,7 +286,7 @@ class AutoScanner(QThread):
                         self.hide_detail.emit()
                         self._last_result = None
                     self._emit_status(True, "Waiting for Game Process...")
-                    time.sleep(2)
+                    self._wait_state("no_process")
                     continue
 
                 # 0. Check Focus
@@ -217,36 +295,50 @@ class AutoScanner(QThread):
                          self.hide_detail.emit()
                          self._last_result = None
                     self._emit_status(True, "Paused (Background)")
-                    time.sleep(0.5)
+                    self._wait_state("background")
                     continue
 
                 # 1. Check Window
                 win_rect = get_window_rect("The Bazaar") # Adjust title if needed
                 if not win_rect:
                     self._emit_status(True, "Waiting for Game Window...")
-                    time.sleep(2)
+                    self._wait_state("no_window")
                     continue
                 
-                self._emit_status(True, "Scanning Active")
+                if self.governor.report_due():
+                    self._emit_status(True, self.governor.status_text())
+                    stats = self.pipeline_stats()
+                    logger.debug(f"AutoScanner pipeline: {stats}")
+                    self.pipeline_stats_updated.emit(stats)
                 
-                # 2. Capture
-                self.capturer.set_region(win_rect) # (x, y, w, h)
-                frame = self.capturer.capture()
-                if frame is None:
-                    time.sleep(0.1)
+                # 2. Capture (capture thread keeps a steady cadence; we take the newest frame)
+                self.capture_worker.set_region(win_rect) # (x, y, w, h)
+                self.capture_worker.interval = self.governor.current_period()
+                self.capture_worker.resume()
+                packet = self.frame_slot.get(timeout=0.5)
+                if packet is None:
+                    self.governor.wait("no_frame")
                     continue
+                self.governor.begin_frame()
+                frame = packet.frame
+                win_rect = packet.region
+                t_detect = time.perf_counter()
+
+                # 3. Check Mouse
+                mx, my = get_mouse_pos_relative(win_rect[0], win_rect[1])
 
-                # 3. Detect
-                if self.yolo:
+                # 4. Detect (change-gated: unchanged frames reuse the last detections)
+                if self.detection_gate and self.config.settings.get("scan_change_gate", True):
+                    cursor = (mx, my) if 0 <= mx < frame.shape[1] and 0 <= my < frame.shape[0] else None
+                    detections = self.detection_gate.detect(frame, cursor)
+                elif self.yolo:
                     detections = self.yolo.detect_stream(frame)
                 else:
                     detections = []
+                self.stage_stats["detect"].record(time.perf_counter() - t_detect)
                 
                 # Emit detections for debug
                 self.scan_results_updated.emit(detections)
-
-                # 4. Check Mouse
-                mx, my = get_mouse_pos_relative(win_rect[0], win_rect[1])
                 
                 # 5. Process Detections & Overlaps
                 # Identify "Monster Events" (Event Box + Monster Icon inside)
@@ -289,6 +381,8 @@ class AutoScanner(QThread):
                         pass
                 
                 hit_obj = None
+                # Tooltips of the hovered item/skill (their name line confirms the ORB match)
+                details = [d for d in detections if d['class_id'] == config.CLS_MAP['DETAIL']]
                 
                 # Check Monster Events first (high priority)
                 for me in monster_events:
@@ -312,6 +406,11 @@ class AutoScanner(QThread):
                             break
                 
                 current_time = time.time()
+
+                # Idle = neither detections nor cursor changed since last frame
+                scene_changed = detections != self._last_detections or (mx, my) != self._last_mouse
+                self._last_detections = detections
+                self._last_mouse = (mx, my)
                 
                 # --- Hover Logic (Pre-detection) ---
                 if hit_obj:
@@ -327,55 +426,100 @@ class AutoScanner(QThread):
                     
                     if not is_same_obj:
                          self._last_hover_obj_box = hit_obj['box']
-                         self._hover_start_time = current_time
-                         self._hover_recognized = False
-                         self._cached_result = None
+                         self._reset_hover(current_time)
                     
                     # Check dwell time (200ms)
                     if not self._hover_recognized and (current_time - self._hover_start_time) > 0.2:
-                         # Trigger Pre-Recognition
-                         result = self._recognize_object(frame, hit_obj)
-                         if result:
-                             rtype, rid, rname = result
-                             self._cached_result = (rtype, rid)
-                             self._hover_recognized = True
-                             self.item_pre_detected.emit(rtype, rid, rname)
+                         # Trigger Pre-Recognition (async; result arrives via _on_recognized)
+                         self._recognize_async(frame, hit_obj, details, force=False)
                 else:
                     self._last_hover_obj_box = None
-                    self._hover_start_time = 0
-                    self._hover_recognized = False
-                    self._cached_result = None
+                    self._reset_hover(0)
+
+                # Hover dwell pending -> keep full frame rate so pre-recognition stays responsive
+                hover_pending = bool(hit_obj) and not self._hover_recognized
 
-                # Optimization: If hotkey not pressed, just sleep and continue
+                # Optimization: If hotkey not pressed, just sleep until the next frame
                 # But allow hover state to update (already done above)
                 if not hotkey_pressed:
-                    time.sleep(0.05)
+                    self.governor.end_frame(changed=scene_changed, responsive=hover_pending,
+                                            wake=lambda: self._mouse_moved(win_rect))
                     continue
 
+                debounce = 0.0
                 if hit_obj:
-                    # Hotkey Action (Sticky)
-                    # Use cached result if valid
-                    if self._cached_result and self._hover_recognized:
-                        rtype, rid = self._cached_result
-                        self.force_show_detail.emit(rtype, rid)
-                    else:
-                        # Recognize immediately
-                        result = self._recognize_object(frame, hit_obj)
-                        if result:
-                            rtype, rid, rname = result
-                            self._cached_result = (rtype, rid)
-                            self._hover_recognized = True
-                            self.force_show_detail.emit(rtype, rid)
+                    # Hotkey Action (Sticky): cached result is shown at once,
+                    # otherwise recognize now (or upgrade the in-flight hover recognition)
+                    self._recognize_async(frame, hit_obj, details, force=True)
                     
                     # Debounce
-                    time.sleep(0.3)
+                    debounce = 0.3
+
+                self.governor.end_frame(changed=True, hold=debounce)
 
             except Exception as e:
                 logger.error(f"AutoScanner error: {e}")
-                time.sleep(1)
+                self._wait_state("error")
+
+    def _reset_hover(self, start_time):
+        """New hover target (or none): drop cached result and orphan in-flight recognitions"""
+        with self._hover_lock:
+            self._hover_token += 1
+            self._hover_start_time = start_time
+            self._hover_start_perf = time.perf_counter()
+            self._hover_recognized = False
+            self._hover_force = False
+            self._cached_result = None
+
+    def _recognize_async(self, frame, hit_obj, details, force):
+        """
+        Recognize the hovered object on the pool: one task and one emitted result per hover target.
+        The loop calls this every frame while the dwell is pending, so an in-flight task is not
+        submitted again; a hotkey press only upgrades it to show the detail when it arrives
+        """
+        with self._hover_lock:
+            token = self._hover_token
+            cached = self._cached_result if self._hover_recognized else None
+            if force and not cached:
+                self._hover_force = True
+        if cached:
+            if force:
+                self.force_show_detail.emit(*cached)
+            return
+        key = ("hover", token)
+        if self.recognition_pool.in_flight(key):
+            return
+        self.recognition_pool.submit(
+            key, self._recognize_object, frame, hit_obj, details,
+            callback=lambda result: self._on_recognized(result, token))
+
+    def _on_recognized(self, result, token):
+        """Runs on a recognition worker; stale (hover moved on) or duplicate results are dropped"""
+        if not result:
+            return
+        rtype, rid, rname = result
+        with self._hover_lock:
+            if token != self._hover_token or self._hover_recognized:
+                return
+            self._cached_result = (rtype, rid)
+            self._hover_recognized = True
+            force, self._hover_force = self._hover_force, False
+            started = self._hover_start_perf
+        self.stage_stats["hover"].record(time.perf_counter() - started)
+        if force:
+            self.force_show_detail.emit(rtype, rid)
+        else:
+            self.item_pre_detected.emit(rtype, rid, rname)
+
+    def _mouse_moved(self, win_rect):
+        """Wake check for idle back-off: cursor moved since the last scanned frame"""
+        try:
+            return get_mouse_pos_relative(win_rect[0], win_rect[1]) != self._last_mouse
+        except Exception:
+            return True
     
-    def _recognize_object(self, frame, hit_obj):
-        """Helper to recognize object from a hit detection"""
+    def _recognize_object(self, frame, hit_obj, details=()):
+        """Helper to recognize object from a hit detection (ORB, confirmed by OCR of its tooltip)"""
         try:
             bx, by, bw, bh = hit_obj['box']
             h_img, w_img = frame.shape[:2]
@@ -386,38 +530,71 @@ class AutoScanner(QThread):
                 return None
                 
             crop = frame[by:by+bh, bx:bx+bw]
-            
-            result_id = None
-            result_type = None
-            result_name = "Unknown"
-
-            # Logic A: Monster Event
-            if hit_obj.get('_is_monster_event'):
-                results = self.matcher.match_monster_character(crop)
-                if results:
-                    result_id, score = results[0]
-                    result_type = 'monster'
-                    result_name = self.monster_map.get(result_id, "Monster")
-            
-            # Logic B: Item/Skill
-            else:
-                cls_id = hit_obj['class_id']
-                # Recalculate size cat for reliability
-                size_cat = self._get_size_category(bw, bh)
-                results = self.matcher.match(crop, size_cat)
-                if results:
-                    result_id = results[0][0]
-                    result_type = 'card'
-                    result_name = self.item_map.get(result_id, "Unknown Card")
-
-            if result_id:
-                logger.info(f"AutoScanner Identified: {result_name} ({result_id})")
-                return (result_type, result_id, result_name)
+
+            # Recalculate size cat for reliability
+            is_monster = bool(hit_obj.get('_is_monster_event'))
+            size_cat = None if is_monster else self._get_size_category(bw, bh)
+            category = 'monster' if is_monster else ('card', size_cat)
+            result = self.recognition_cache.get_or_compute(
+                crop, category, lambda: self._match_crop(crop, is_monster, size_cat))
+            if not is_monster and details:
+                result = self._confirm_with_ocr(frame, hit_obj['box'], details, result)
+            return result
         except Exception as e:
             logger.error(f"Recognition error: {e}")
         
         return None
 
+    def _confirm_with_ocr(self, frame, box, details, result):
+        """
+        OCR the name line of the tooltip nearest to the hovered card and let it decide:
+        the printed name is authoritative when ORB picked a look-alike or found nothing.
+        OCR not ready / no confident name match -> keep the ORB result
+        """
+        if not self.ocr_card:
+            return result
+        x, y, w, h = box
+        cx, cy = x + w / 2, y + h / 2
+        detail = min(details, key=lambda d: (d['box'][0] + d['box'][2] / 2 - cx) ** 2
+                                            + (d['box'][1] + d['box'][3] / 2 - cy) ** 2)
+        (_, ocr_id), = self.ocr_card.recognize_detail_boxes(frame, [detail])
+        if not ocr_id or (result and result[1] == ocr_id):
+            return result
+        name = self.item_map.get(ocr_id, "Unknown Card")
+        logger.info(f"AutoScanner OCR override: {result[2] if result else 'no ORB match'} -> {name} ({ocr_id})")
+        return ('card', ocr_id, name)
+
+    def _match_crop(self, crop, is_monster, size_cat):
+        """Full ORB match of a crop (cache miss path)"""
+        result_id = None
+        result_type = None
+        result_name = "Unknown"
+
+        # Logic A: Monster Event
+        if is_monster:
+            results = self.matcher.match_monster_character(crop)
+            if results:
+                result_id, score = results[0]
+                result_type = 'monster'
+                result_name = self.monster_map.get(result_id, "Monster")
+        
+        # Logic B: Item/Skill
+        else:
+            results = self.matcher.match(crop, size_cat)
+            if results:
+                result_id = results[0][0]
+                result_type = 'card'
+                result_name = self.item_map.get(result_id, "Unknown Card")
+
+        if result_id:
+            logger.info(f"AutoScanner Identified: {result_name} ({result_id})")
+            return (result_type, result_id, result_name)
+        return None
+
     def stop(self):
         self.running = False
+        if self.capture_worker:
+            self.capture_worker.stop()
+        if self.recognition_pool:
+            self.recognition_pool.shutdown()
         self.wait()
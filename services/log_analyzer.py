@@ -2,9 +2,24 @@
 游戏日志分析器
 用于解析Player.log和Player-prev.log，追踪游戏状态、物品购买和PVP信息
 """
+import os
 import re
-from typing import List, Dict, Optional
+import json
+import hashlib
+import tempfile
+from collections import deque
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+from loguru import logger
+
+from services.log_line_assembler import LogLineAssembler
+from services.session_events import (
+    SessionEvent, RunStarted, HeroPicked, CardPurchased, PvpStarted,
+    BoardSnapshot, PvpEnded, RunEnded, RunMerged
+)
+from services.session_store import get_session_store
+from data_manager.game_catalog import get_game_catalog
+from utils.logger import trace_enabled
 
 
 class GameSession:
@@ -40,6 +55,42 @@ class GameSession:
         hash_obj = hashlib.sha256(unique_str.encode())
         self.session_id = hash_obj.hexdigest()[:16]
     
+    def to_dict(self) -> Dict:
+        """序列化为可写入JSON的字典（缓存/检查点共用）"""
+        return {
+            'session_id': self.session_id,
+            'start_time': self.start_time,
+            'start_line': self.start_line,
+            'log_file_date': self.log_file_date,
+            'end_time': self.end_time,
+            'end_line': self.end_line,
+            'days': self.days,
+            'is_finished': self.is_finished,
+            'victory': self.victory,
+            'hero': self.hero,
+            'items': self.items,
+            'pvp_battles': self.pvp_battles
+        }
+    
+    @classmethod
+    def from_dict(cls, session_data: Dict) -> "GameSession":
+        """从to_dict()的结果重建GameSession对象"""
+        session = cls(
+            session_data['start_time'],
+            session_data['start_line'],
+            session_data.get('log_file_date')
+        )
+        session.session_id = session_data['session_id']
+        session.end_time = session_data.get('end_time')
+        session.end_line = session_data.get('end_line')
+        session.days = session_data.get('days', 1)
+        session.is_finished = session_data.get('is_finished', False)
+        session.victory = session_data.get('victory', False)
+        session.hero = session_data.get('hero')
+        session.items = session_data.get('items', {})
+        session.pvp_battles = session_data.get('pvp_battles', [])
+        return session
+    
     def get_full_start_datetime(self) -> str:
         """获取完整的开始日期时间"""
         if self.log_file_date:
@@ -82,9 +133,10 @@ class GameSession:
         # 游戏规则可能不是简单的10胜，还可能考虑其他因素
         self.victory = victory
         
-        # 🔥 DEBUG: 打印胜场数vs最终结果
-        win_count = sum(1 for b in self.pvp_battles if b.get('victory', False))
-        print(f"[DEBUG] Session结束: 胜场={win_count}, EndRun状态={'Victory' if victory else 'Defeat'}")
+        # 🔍 TRACE: 胜场数vs最终结果（关闭追踪时不计算）
+        if trace_enabled():
+            win_count = sum(1 for b in self.pvp_battles if b.get('victory', False))
+            logger.trace(f"[LogAnalyzer] Session结束: 胜场={win_count}, EndRun状态={'Victory' if victory else 'Defeat'}")
     
     def get_current_items(self) -> Dict[str, List[Dict]]:
         """获取当前物品分类"""
@@ -135,6 +187,33 @@ class LogAnalyzer:
     HERO_PATTERN = r'Hero: \[(\w+)\]'  # 提取英雄名称
     COMBAT_COMPLETED_PATTERN = r'\[CombatSimHandler\] Combat simulation completed in ([\d\.]+)s'  # 战斗耗时
     
+    # ✅ 预编译：行首 "[时间戳] [组件名]"，一次匹配即可决定交给哪个处理函数
+    LINE_HEADER_RE = re.compile(r'\[(\d{2}:\d{2}:\d{2}\.\d{3})\] \[(\w+)\] ')
+    STATE_CHANGE_RE = re.compile(STATE_CHANGE_PATTERN)
+    CARD_PURCHASED_RE = re.compile(CARD_PURCHASED_PATTERN)
+    CARDS_SPAWNED_RE = re.compile(CARDS_SPAWNED_PATTERN)
+    HERO_RE = re.compile(HERO_PATTERN)
+    COMBAT_COMPLETED_RE = re.compile(COMBAT_COMPLETED_PATTERN)
+    CARD_ENTRY_RE = re.compile(r'\[(\w+) \[(Player|Opponent)\] \[(\w+)\] \[Socket_(\d+)\]')
+    
+    # 组件名 -> 处理函数名
+    # 不在表中的组件（GameMessageHandler / NetMessageProcessor / Cmd 等，约占日志一半）
+    # 在一次字典查找后直接跳过，不再执行任何事件正则
+    LINE_HANDLERS = {
+        "GameInstance": "_on_game_instance_line",
+        "SocketBehavior": "_on_socket_behavior_line",
+        "AppState": "_on_app_state_line",
+        "BoardManager": "_on_board_manager_line",
+        "CombatSimHandler": "_on_combat_sim_line",
+        "GameSimHandler": "_on_game_sim_line",
+    }
+    
+    # 解析检查点：记录每个日志文件已解析到的字节偏移和状态机，冷启动时只解析新增尾部
+    CHECKPOINT_FILE = "analyzer_checkpoint.json"
+    CHECKPOINT_VERSION = 1
+    FINGERPRINT_BYTES = 4096  # 用文件头部N字节的hash识别日志轮转/重写
+    READ_CHUNK_SIZE = 1 << 20
+    
     def __init__(self, log_dir: str, items_db_path: Optional[str] = None):
         """
         初始化日志分析器
@@ -144,44 +223,217 @@ class LogAnalyzer:
             items_db_path: items_db.json文件路径，用于查询物品名称
         """
         self.log_dir = Path(log_dir)
-        self.sessions: List[GameSession] = []
-        self.current_session: Optional[GameSession] = None
-        self._in_pvp = False
-        self._last_pvp_start = None
-        self._pvp_player_items = []
-        self._pvp_opponent_items = []
-        self._pvp_duration = None  # PVP战斗耗时
-        
-        # ✅ 新增：缓存最近的几行日志，用于往回查找 "All exit tasks completed"
-        self._recent_lines = []  # 存储最近5行的内容
         self._recent_lines_max = 5
+        # 逐行/逐事件的TRACE输出开关，每次分析开始时从utils.logger刷新；关闭时热路径不构建任何消息
+        self._trace = trace_enabled()
+        self._reset_parse_state()
         
         # ✅ 当前正在解析的日志文件日期
         self._current_log_file_date: Optional[str] = None
         
-        # 加载物品数据库
+        # 加载物品数据库（{id: 记录}，由共享的游戏数据目录解析，进程内只加载一次）
         self.items_db = {}
         if items_db_path:
-            import json
-            try:
-                with open(items_db_path, 'r', encoding='utf-8') as f:
-                    items_list = json.load(f)
-                    # 将列表转换为字典，以id为key
-                    if isinstance(items_list, list):
-                        self.items_db = {item['id']: item for item in items_list if 'id' in item}
-                    else:
-                        self.items_db = items_list
-            except Exception as e:
-                print(f"Warning: Failed to load items_db.json: {e}")
+            self.items_db = get_game_catalog().records_by_id(items_db_path)
         
         # PVP结束回调函数列表
         self.pvp_end_callbacks: List = []
         
+        # 上次analyze()解析到的字节偏移 {文件名: offset}，供LogWatcher从同一位置开始增量读取
+        self.parsed_offsets: Dict[str, int] = {}
+        
+        # 解析过程中产生、尚未被取走的会话事件
+        self._pending_events = deque()
+        
         # 增量分析的临时状态
         self._incremental_mode = False
-        self._incremental_new_sessions = []
-        self._incremental_updated_sessions = []
-        self._incremental_pvp_completed = False  # 标记是否检测到PVP完成
+        
+        # 会话缓存（快照 + 追加写日志），增量分析时只追加变化的部分
+        self._session_store = get_session_store(self.log_dir)
+        # 上次写缓存之后发生过变化的会话ID（跨批累积，直到下一次保存）
+        self._dirty_session_ids = set()
+    
+    def _reset_parse_state(self):
+        """重置解析状态机（全量解析或从检查点恢复前调用）"""
+        self.sessions: List[GameSession] = []
+        self.current_session: Optional[GameSession] = None
+        self._in_pvp = False
+        self._last_pvp_start = None
+        self._pvp_player_items = []
+        self._pvp_opponent_items = []
+        self._pvp_duration = None  # PVP战斗耗时
+        self._pvp_just_ended = False
+        self._opponent_template_map = {}
+        
+        # ✅ 新增：缓存最近的几行日志，用于往回查找 "All exit tasks completed"
+        self._recent_lines = deque(maxlen=self._recent_lines_max)  # 存储最近5行的内容
+    
+    def _export_parse_state(self) -> Dict:
+        """导出状态机（会话列表 + PVP中间状态），用于写入检查点"""
+        current_index = None
+        if self.current_session is not None:
+            for index, session in enumerate(self.sessions):
+                if session is self.current_session:
+                    current_index = index
+                    break
+        
+        return {
+            "sessions": [s.to_dict() for s in self.sessions],
+            "current_session_index": current_index,
+            "in_pvp": self._in_pvp,
+            "last_pvp_start": self._last_pvp_start,
+            "pvp_player_items": self._pvp_player_items,
+            "pvp_opponent_items": self._pvp_opponent_items,
+            "pvp_duration": self._pvp_duration,
+            "pvp_just_ended": self._pvp_just_ended,
+            "opponent_template_map": self._opponent_template_map,
+            "recent_lines": list(self._recent_lines)
+        }
+    
+    def _import_parse_state(self, state: Dict):
+        """从检查点恢复状态机"""
+        self.sessions = [GameSession.from_dict(d) for d in state.get("sessions", [])]
+        current_index = state.get("current_session_index")
+        self.current_session = self.sessions[current_index] if current_index is not None else None
+        self._in_pvp = state.get("in_pvp", False)
+        self._last_pvp_start = state.get("last_pvp_start")
+        self._pvp_player_items = state.get("pvp_player_items", [])
+        self._pvp_opponent_items = state.get("pvp_opponent_items", [])
+        self._pvp_duration = state.get("pvp_duration")
+        self._pvp_just_ended = state.get("pvp_just_ended", False)
+        self._opponent_template_map = state.get("opponent_template_map", {})
+        self._recent_lines = deque(state.get("recent_lines", []), maxlen=self._recent_lines_max)
+    
+    def _file_fingerprint(self, log_file: Path, length: int) -> str:
+        """计算文件头部length字节的hash"""
+        with open(log_file, 'rb') as f:
+            return hashlib.sha256(f.read(length)).hexdigest()
+    
+    def _describe_log_file(self, log_file: Path, offset: int, line_count: int) -> Dict:
+        """生成单个日志文件的检查点记录"""
+        stat = log_file.stat()
+        fingerprint_len = min(self.FINGERPRINT_BYTES, offset)
+        return {
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "fingerprint_len": fingerprint_len,
+            "fingerprint": self._file_fingerprint(log_file, fingerprint_len),
+            "offset": offset,
+            "line_count": line_count
+        }
+    
+    def _restore_checkpoint(self, log_files: List[Path]) -> Dict[str, Tuple[int, int]]:
+        """
+        尝试从检查点恢复解析状态
+        
+        只有最后一个日志文件（Player.log）允许追加；任何文件被轮转、截断或重写，
+        或更早的文件发生变化，都放弃检查点做全量解析
+        
+        Returns:
+            {文件名: (字节偏移, 已解析行数)}，检查点无效时返回空字典
+        """
+        checkpoint_file = self.log_dir / self.CHECKPOINT_FILE
+        if not checkpoint_file.exists():
+            return {}
+        
+        try:
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            
+            if checkpoint.get("version") != self.CHECKPOINT_VERSION:
+                logger.info("[LogAnalyzer] 检查点版本不匹配，全量解析")
+                return {}
+            
+            files = checkpoint.get("files", {})
+            if list(files.keys()) != [f.name for f in log_files]:
+                logger.info("[LogAnalyzer] 日志文件集合已变化，全量解析")
+                return {}
+            
+            positions = {}
+            for index, log_file in enumerate(log_files):
+                record = files[log_file.name]
+                stat = log_file.stat()
+                is_last = index == len(log_files) - 1
+                
+                if stat.st_ino != record["inode"] or stat.st_size < record["offset"]:
+                    logger.info(f"[LogAnalyzer] {log_file.name} 已轮转或被截断，全量解析")
+                    return {}
+                if self._file_fingerprint(log_file, record["fingerprint_len"]) != record["fingerprint"]:
+                    logger.info(f"[LogAnalyzer] {log_file.name} 头部指纹不一致（已被重写），全量解析")
+                    return {}
+                if not is_last and stat.st_size != record["size"]:
+                    logger.info(f"[LogAnalyzer] {log_file.name} 在检查点之后发生变化，全量解析")
+                    return {}
+                
+                positions[log_file.name] = (record["offset"], record["line_count"])
+            
+            self._import_parse_state(checkpoint["state"])
+            logger.info(f"[LogAnalyzer] 从检查点恢复: {len(self.sessions)} 个会话, 偏移 {positions}")
+            return positions
+        except Exception as e:
+            logger.warning(f"[LogAnalyzer] 加载检查点失败，全量解析: {e}")
+            self._reset_parse_state()
+            return {}
+    
+    def _save_checkpoint(self, positions: Dict[Path, Tuple[int, int]]):
+        """保存检查点（临时文件 + 原子替换，避免写入中断导致文件损坏）"""
+        checkpoint_file = self.log_dir / self.CHECKPOINT_FILE
+        
+        try:
+            checkpoint = {
+                "version": self.CHECKPOINT_VERSION,
+                "files": {
+                    log_file.name: self._describe_log_file(log_file, offset, line_count)
+                    for log_file, (offset, line_count) in positions.items()
+                },
+                "state": self._export_parse_state()
+            }
+            
+            fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint_", suffix=".tmp", dir=str(self.log_dir))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(checkpoint, f, ensure_ascii=False)
+                os.replace(tmp_path, checkpoint_file)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"[LogAnalyzer] 保存检查点失败: {e}")
+    
+    def _emit(self, event: SessionEvent):
+        """记录一个会话事件，由stream()/analyze()/analyze_incremental()交给调用方"""
+        self._pending_events.append(event)
+    
+    def _drain_events(self) -> List[SessionEvent]:
+        """取走所有待处理的事件"""
+        events = list(self._pending_events)
+        self._pending_events.clear()
+        return events
+    
+    def stream(self, lines: Iterable[str], line_num: int = -1) -> Iterator[SessionEvent]:
+        """
+        逐行解析并按发生顺序产出会话事件（惰性生成器）
+        
+        Args:
+            lines: 日志行
+            line_num: 行号；增量模式下未知，固定为-1
+            
+        Yields:
+            SessionEvent子类：RunStarted / HeroPicked / CardPurchased / PvpStarted /
+            BoardSnapshot / PvpEnded / RunEnded
+        """
+        self._trace = trace_enabled()
+        for line in lines:
+            try:
+                self._process_line(line, line_num)
+            except Exception as e:
+                # 单行错误不应影响整体处理
+                logger.exception(f"[LogAnalyzer] 处理行时出错: {e}")
+            
+            while self._pending_events:
+                yield self._pending_events.popleft()
     
     def analyze_incremental(self, new_lines: List[str]) -> Dict:
         """
@@ -191,20 +443,14 @@ class LogAnalyzer:
             new_lines: 新增的日志行列表
             
         Returns:
-            包含新会话和更新会话的字典
+            包含新会话、更新会话以及本批事件（'events'）的字典
         """
         if not new_lines:
-            return {'new_sessions': [], 'updated_sessions': []}
+            return {'new_sessions': [], 'updated_sessions': [], 'events': []}
         
         # 标记为增量模式
         self._incremental_mode = True
-        self._incremental_new_sessions = []
-        self._incremental_updated_sessions = []
-        self._incremental_pvp_completed = False
-        
-        # 记录当前已知的会话和PVP战斗数
-        known_session_ids_before = {s.session_id for s in self.sessions}
-        pvp_counts_before = {s.session_id: len(s.pvp_battles) for s in self.sessions}
+        self._trace = trace_enabled()
         
         # 确保current_session指向最后一个未完成的会话（同一个对象实例）
         if self.sessions:
@@ -212,165 +458,81 @@ class LogAnalyzer:
             if not last_session.is_finished:
                 # 关键修复：直接修改列表中的session，而不是创建新引用
                 self.current_session = last_session
-                print(f"[LogAnalyzer] 增量分析: current_session设置为 {self.current_session.session_id}, days={self.current_session.days}, pvp_battles={len(self.current_session.pvp_battles)}, id={id(self.current_session)}")
-                print(f"[LogAnalyzer] 增量分析: sessions[-1] id={id(self.sessions[-1])}, 是否同一对象={id(self.current_session) == id(self.sessions[-1])}")
-            else:
-                print(f"[LogAnalyzer] 增量分析: 最后一个session已完成，current_session保持不变")
-        else:
-            print(f"[LogAnalyzer] 增量分析: sessions为空，current_session保持不变")
+                if self._trace:
+                    logger.trace(f"[LogAnalyzer] 增量分析: current_session设置为 {self.current_session.session_id}, days={self.current_session.days}, pvp_battles={len(self.current_session.pvp_battles)}")
         
         try:
-            # 逐行处理新增内容
-            for line in new_lines:
-                try:
-                    # 使用现有的_process_line方法处理每一行
-                    # line_num设为-1，因为我们不知道确切的行号
-                    self._process_line(line, -1)
-                    
-                    # 检测是否有duration（PVP战斗结束）
-                    if 'Combat simulation completed' in line:
-                        self._incremental_pvp_completed = True
-                        print(f"[LogAnalyzer] 增量分析检测到PVP完成")
-                        
-                except Exception as e:
-                    # 单行错误不应影响整体处理
-                    import traceback
-                    print(f"[LogAnalyzer] 处理行时出错: {e}")
-                    traceback.print_exc()
+            # 逐行处理新增内容（line_num为-1，因为我们不知道确切的行号）
+            events = list(self.stream(new_lines))
             
-            # 检测新会话
-            new_sessions = [s for s in self.sessions if s.session_id not in known_session_ids_before]
-            
-            # ✅ 合并因游戏重启而分裂的session（在检测更新之前）
-            merged_session = None
-            if new_sessions:
-                prev_count = len(self.sessions)
+            # ✅ 合并因游戏重启而分裂的session（只有本批出现新会话时才可能发生）
+            started = [e.session for e in events if isinstance(e, RunStarted)]
+            if started:
                 self._merge_restart_sessions()
-                # 如果sessions数量减少，说明发生了合并
-                if len(self.sessions) < prev_count:
-                    # 重新计算new_sessions（合并后新session已被删除）
-                    new_sessions = [s for s in self.sessions if s.session_id not in known_session_ids_before]
-                    # 被合并的session（倒数第一个，即prev_session）需要加入updated列表
-                    merged_session = self.sessions[-1] if self.sessions else None
-                    print(f"[LogAnalyzer] 合并完成，merged_session: {merged_session.session_id if merged_session else None}")
+                events.extend(self._drain_events())
             
-            # 只在检测到PVP完成时才返回更新的会话
-            updated_sessions = []
-            if self._incremental_pvp_completed:
-                for session in self.sessions:
-                    if session.session_id in known_session_ids_before:
-                        # 检查PVP战斗数是否增加
-                        old_pvp_count = pvp_counts_before.get(session.session_id, 0)
-                        new_pvp_count = len(session.pvp_battles)
-                        print(f"[LogAnalyzer] 检查session {session.session_id}: old_pvp_count={old_pvp_count}, new_pvp_count={new_pvp_count}, session_id={id(session)}")
-                        if self.current_session:
-                            print(f"[LogAnalyzer]   current_session.pvp_battles={len(self.current_session.pvp_battles)}, current_session_id={id(self.current_session)}")
-                        if new_pvp_count > old_pvp_count:
-                            updated_sessions.append(session)
-                            print(f"[LogAnalyzer] 检测到PVP战斗完成: {session.session_id}, 战斗数 {old_pvp_count} -> {new_pvp_count}, days={session.days}")
+            # 由事件直接得出新会话/更新会话，不再扫描整个会话列表
+            merged_away = {e.merged_session_id for e in events if isinstance(e, RunMerged)}
+            new_sessions = [s for s in started if s.session_id not in merged_away]
+            new_ids = {s.session_id for s in new_sessions}
             
-            # 如果发生了合并，将合并后的session加入updated列表
-            if merged_session and merged_session not in updated_sessions:
-                updated_sessions.append(merged_session)
-                print(f"[LogAnalyzer] 合并后的session加入更新列表: {merged_session.session_id}, days={merged_session.days}, pvp={len(merged_session.pvp_battles)}")
+            updated_sessions = []
+            updated_ids = set()
+            for event in events:
+                # PVP战斗完成的已知会话，以及合并后的会话需要更新
+                if isinstance(event, (PvpEnded, RunMerged)):
+                    session = event.session
+                    if session.session_id in new_ids or session.session_id in merged_away or session.session_id in updated_ids:
+                        continue
+                    updated_sessions.append(session)
+                    updated_ids.add(session.session_id)
+                    logger.debug(f"[LogAnalyzer] 会话更新: {session.session_id}, days={session.days}, pvp={len(session.pvp_battles)}")
             
-            # 保存缓存
-            if new_sessions or updated_sessions:
-                print(f"[LogAnalyzer] 准备保存缓存: new_sessions={len(new_sessions)}, updated_sessions={len(updated_sessions)}")
-                print(f"[LogAnalyzer] 当前self.sessions数量: {len(self.sessions)}")
-                if updated_sessions:
-                    for s in updated_sessions:
-                        print(f"[LogAnalyzer]   更新的session: {s.session_id}, days={s.days}, pvp_battles={len(s.pvp_battles)}")
-                self._save_sessions_cache()
-            else:
-                print(f"[LogAnalyzer] 无需保存缓存（无新会话或更新）")
+            # 保存缓存：只追加本批之前累积的变化（新会话、本场战斗、变化的字段）
+            self._dirty_session_ids.update(e.session.session_id for e in events)
+            if new_sessions or updated_sessions or any(isinstance(e, RunEnded) for e in events):
+                logger.debug(f"[LogAnalyzer] 准备保存缓存: new_sessions={len(new_sessions)}, updated_sessions={len(updated_sessions)}")
+                self._save_sessions_cache(self._dirty_session_ids, merged_away)
+                self._dirty_session_ids = set()
             
             return {
                 'new_sessions': new_sessions,
-                'updated_sessions': updated_sessions
+                'updated_sessions': updated_sessions,
+                'events': events
             }
             
         finally:
             # 恢复正常模式
             self._incremental_mode = False
-            self._incremental_new_sessions = []
-            self._incremental_updated_sessions = []
-            self._incremental_pvp_completed = False
     
     def _load_cached_sessions(self) -> List[GameSession]:
-        """从缓存加载已解析的会话"""
-        cache_file = self.log_dir / "sessions_cache.json"
-        
-        if not cache_file.exists():
-            return []
-        
+        """从缓存（快照 + 日志重放）加载已解析的会话"""
         try:
-            import json
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
+            # 重建 GameSession 对象
+            sessions = [GameSession.from_dict(session_data) for session_data in self._session_store.load()]
             
-            sessions = []
-            for session_data in cached_data:
-                # 重建 GameSession 对象
-                session = GameSession(
-                    session_data['start_time'],
-                    session_data['start_line'],
-                    session_data.get('log_file_date')
-                )
-                session.session_id = session_data['session_id']
-                session.end_time = session_data.get('end_time')
-                session.end_line = session_data.get('end_line')
-                session.days = session_data.get('days', 1)
-                session.is_finished = session_data.get('is_finished', False)
-                session.victory = session_data.get('victory', False)
-                session.hero = session_data.get('hero')
-                session.items = session_data.get('items', {})
-                session.pvp_battles = session_data.get('pvp_battles', [])
-                
-                sessions.append(session)
-            
-            print(f"[LogAnalyzer] 从缓存加载了 {len(sessions)} 个会话")
+            logger.info(f"[LogAnalyzer] 从缓存加载了 {len(sessions)} 个会话")
             return sessions
         except Exception as e:
-            print(f"[LogAnalyzer] 加载缓存失败: {e}")
+            logger.warning(f"[LogAnalyzer] 加载缓存失败: {e}")
             return []
     
-    def _save_sessions_cache(self):
-        """保存会话到缓存"""
-        cache_file = self.log_dir / "sessions_cache.json"
+    def _save_sessions_cache(self, touched_ids: Optional[Iterable[str]] = None, removed_ids: Iterable[str] = ()):
+        """
+        把会话变化追加到缓存
         
-        try:
-            import json
-            cached_data = []
-            
-            print(f"[LogAnalyzer] 开始保存缓存，当前sessions数量: {len(self.sessions)}")
-            
+        Args:
+            touched_ids: 可能发生变化的会话ID；为None时与全部会话比较（全量解析后）
+            removed_ids: 被合并掉的会话ID
+        """
+        if self._trace:
             for session in self.sessions:
-                print(f"[LogAnalyzer]   保存session: {session.session_id}, days={session.days}, pvp_battles={len(session.pvp_battles)}, is_finished={session.is_finished}")
-                session_data = {
-                    'session_id': session.session_id,
-                    'start_time': session.start_time,
-                    'start_line': session.start_line,
-                    'log_file_date': session.log_file_date,
-                    'end_time': session.end_time,
-                    'end_line': session.end_line,
-                    'days': session.days,
-                    'is_finished': session.is_finished,
-                    'victory': session.victory,
-                    'hero': session.hero,
-                    'items': session.items,
-                    'pvp_battles': session.pvp_battles
-                }
-                cached_data.append(session_data)
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cached_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"[LogAnalyzer] 已保存 {len(cached_data)} 个会话到缓存")
-        except Exception as e:
-            print(f"[LogAnalyzer] 保存缓存失败: {e}")
-            import traceback
-            traceback.print_exc()
+                if touched_ids is None or session.session_id in touched_ids:
+                    logger.trace(f"[LogAnalyzer]   保存session: {session.session_id}, days={session.days}, pvp_battles={len(session.pvp_battles)}, is_finished={session.is_finished}")
+        
+        appended = self._session_store.sync(self.sessions, touched_ids, removed_ids)
+        if appended:
+            logger.debug(f"[LogAnalyzer] 已向缓存追加 {appended} 条记录")
     
     def _merge_restart_sessions(self):
         """合并因游戏重启/崩溃而分裂的session
@@ -395,9 +557,9 @@ class LogAnalyzer:
             
             if should_merge:
                 merged_count += 1
-                print(f"[LogAnalyzer] 检测到游戏重启/崩溃，合并session {prev_session.session_id} 和 {curr_session.session_id}")
-                print(f"[LogAnalyzer]   prev: hero={prev_session.hero}, days={prev_session.days}, pvp={len(prev_session.pvp_battles)}, finished={prev_session.is_finished}")
-                print(f"[LogAnalyzer]   curr: hero={curr_session.hero}, days={curr_session.days}, pvp={len(curr_session.pvp_battles)}, finished={curr_session.is_finished}")
+                logger.info(f"[LogAnalyzer] 检测到游戏重启/崩溃，合并session {prev_session.session_id} 和 {curr_session.session_id}")
+                logger.debug(f"[LogAnalyzer]   prev: hero={prev_session.hero}, days={prev_session.days}, pvp={len(prev_session.pvp_battles)}, finished={prev_session.is_finished}")
+                logger.debug(f"[LogAnalyzer]   curr: hero={curr_session.hero}, days={curr_session.days}, pvp={len(curr_session.pvp_battles)}, finished={curr_session.is_finished}")
                 
                 # 将当前session的items合并到前一个
                 prev_session.items.update(curr_session.items)
@@ -412,7 +574,7 @@ class LogAnalyzer:
                 # 如果当前session有英雄信息且前一个没有，更新英雄
                 if curr_session.hero and not prev_session.hero:
                     prev_session.hero = curr_session.hero
-                    print(f"[LogAnalyzer]   更新英雄: {curr_session.hero}")
+                    logger.debug(f"[LogAnalyzer]   更新英雄: {curr_session.hero}")
                 
                 # ✅ 如果当前session已完成，将完成状态复制到前一个
                 if curr_session.is_finished:
@@ -420,21 +582,22 @@ class LogAnalyzer:
                     prev_session.victory = curr_session.victory
                     prev_session.end_time = curr_session.end_time
                     prev_session.end_line = curr_session.end_line
-                    print(f"[LogAnalyzer]   游戏已结束: victory={curr_session.victory}")
+                    logger.debug(f"[LogAnalyzer]   游戏已结束: victory={curr_session.victory}")
                 
                 # 删除当前session（因为它实际上是前一个session的继续）
                 self.sessions.pop()
+                self._emit(RunMerged(prev_session, curr_session.start_time, merged_session_id=curr_session.session_id))
                 
                 # 更新current_session指向合并后的session
                 self.current_session = prev_session
                 
-                print(f"[LogAnalyzer]   合并后: hero={prev_session.hero}, days={prev_session.days}, pvp={len(prev_session.pvp_battles)}, finished={prev_session.is_finished}")
+                logger.debug(f"[LogAnalyzer]   合并后: hero={prev_session.hero}, days={prev_session.days}, pvp={len(prev_session.pvp_battles)}, finished={prev_session.is_finished}")
             else:
                 # 不满足合并条件，退出循环
                 break
         
         if merged_count > 0:
-            print(f"[LogAnalyzer] 共合并了 {merged_count} 个重启session，当前sessions数量: {len(self.sessions)}")
+            logger.info(f"[LogAnalyzer] 共合并了 {merged_count} 个重启session，当前sessions数量: {len(self.sessions)}")
     
     def _get_cached_session_ids(self) -> set:
         """获取所有已缓存的会话ID"""
@@ -446,14 +609,18 @@ class LogAnalyzer:
         分析日志文件
         
         Returns:
-            分析结果，包含游戏数量、当前天数、当前物品等
+            分析结果，包含游戏数量、当前天数、当前物品、会话事件等
         """
-        # ✅ 暂时禁用缓存，强制重新解析（避免历史错误数据）
-        # cached_sessions = self._load_cached_sessions()
-        # cached_session_ids = {s.session_id for s in cached_sessions}
+        # ✅ 暂时禁用sessions_cache.json，会话由检查点（与解析偏移一致）恢复
         cached_sessions = []
         cached_session_ids = set()
         
+        # 每次分析都从干净的状态机开始，避免重复调用时会话被重复追加
+        self._reset_parse_state()
+        self._pending_events.clear()
+        self._dirty_session_ids = set()
+        self._trace = trace_enabled()
+        
         # 按顺序读取日志文件
         log_files = []
         prev_log = self.log_dir / "Player-prev.log"
@@ -472,12 +639,22 @@ class LogAnalyzer:
                 "current_day": 0,
                 "current_items": {"hand": [], "storage": []},
                 "sessions": cached_sessions,
+                "events": [],
                 "error": "No log files found" if not cached_sessions else None
             }
         
-        # 解析所有日志文件（只解析新的会话）
+        # 从检查点恢复，只解析上次之后追加的尾部；检查点无效时从字节0全量解析
+        resume_positions = self._restore_checkpoint(log_files)
+        
+        parsed_positions = {}
         for log_file in log_files:
-            self._parse_log_file(log_file)
+            start_offset, start_line = resume_positions.get(log_file.name, (0, 0))
+            parsed_positions[log_file] = self._parse_log_file(log_file, start_offset, start_line,
+                                                              final=log_file == prev_log)
+        
+        # 在排序/合并之前保存，检查点记录的是原始解析顺序的状态机
+        self._save_checkpoint(parsed_positions)
+        self.parsed_offsets = {log_file.name: offset for log_file, (offset, _) in parsed_positions.items()}
         
         # ✅ 合并缓存的会话和新解析的会话
         # 过滤掉已经缓存的会话（避免重复）
@@ -486,7 +663,6 @@ class LogAnalyzer:
         # 🔧 清理缓存中的错误finished状态
         # 之前的bug可能导致未真正结束的session被标记为finished
         # 重新设置所有缓存session为未完成，让它们有机会被重新检测或合并
-        print(f"[LogAnalyzer] 清理缓存中可能的错误finished状态...")
         for session in cached_sessions:
             if session.is_finished and session.session_id not in cached_session_ids:
                 # 这个判断永远不会执行，因为session在cached_sessions里
@@ -510,21 +686,20 @@ class LogAnalyzer:
         
         # ✅ 保存到缓存（包括新解析的会话）
         if new_sessions:
-            print(f"[LogAnalyzer] 发现 {len(new_sessions)} 个新会话")
+            logger.debug(f"[LogAnalyzer] 发现 {len(new_sessions)} 个新会话")
             self._save_sessions_cache()
         
-        # ========== 调试输出：列出所有session的详细信息 ==========
-        print(f"\n{'='*80}")
-        print(f"[LogAnalyzer] 分析完成，当前共有 {len(self.sessions)} 个session:")
-        for i, s in enumerate(self.sessions, 1):
-            # 计算胜负
-            wins = sum(1 for b in s.pvp_battles if b.get('victory', False))
-            losses = sum(1 for b in s.pvp_battles if b.get('victory') is False and b.get('victory') is not None)
-            pvp_result = f"{wins}胜{losses}负" if s.pvp_battles else "无PVP"
-            status = "✅已完成" if s.is_finished else "🔴进行中"
-            victory_text = "胜利" if s.victory else "失败" if s.is_finished else "进行中"
-            print(f"  [{i}] {s.session_id[:8]}... | {s.hero or '未知'} | 第{s.days}天 | {pvp_result} | {status} | {victory_text} | {s.start_time}")
-        print(f"{'='*80}\n")
+        logger.info(f"[LogAnalyzer] 分析完成，当前共有 {len(self.sessions)} 个session")
+        # ========== 追踪输出：列出所有session的详细信息 ==========
+        if self._trace:
+            for i, s in enumerate(self.sessions, 1):
+                # 计算胜负
+                wins = sum(1 for b in s.pvp_battles if b.get('victory', False))
+                losses = sum(1 for b in s.pvp_battles if b.get('victory') is False and b.get('victory') is not None)
+                pvp_result = f"{wins}胜{losses}负" if s.pvp_battles else "无PVP"
+                status = "✅已完成" if s.is_finished else "🔴进行中"
+                victory_text = "胜利" if s.victory else "失败" if s.is_finished else "进行中"
+                logger.trace(f"  [{i}] {s.session_id[:8]}... | {s.hero or '未知'} | 第{s.days}天 | {pvp_result} | {status} | {victory_text} | {s.start_time}")
         # ========================================================
         
         # 返回分析结果
@@ -543,113 +718,145 @@ class LogAnalyzer:
             "games_count": total_games,
             "current_day": current_day,
             "current_items": current_items,
-            "sessions": self.sessions
+            "sessions": self.sessions,
+            # 本次解析产生的事件（从检查点恢复时只包含新增尾部的事件）
+            "events": self._drain_events()
         }
     
-    def _parse_log_file(self, log_file: Path):
-        """解析单个日志文件"""
+    def _parse_log_file(self, log_file: Path, start_offset: int = 0, start_line: int = 0,
+                        final: bool = False) -> Tuple[int, int]:
+        """
+        解析单个日志文件
+        
+        以二进制分块读取，经LogLineAssembler只处理以换行结尾的完整行，偏移按字节精确记录；
+        换行规则与文本模式一致（\r、\n、\r\n），保证行号与全量解析相同
+        
+        Args:
+            log_file: 日志文件
+            start_offset: 开始解析的字节偏移（必须位于行首）
+            start_line: start_offset之前已解析的行数
+            final: 文件不会再增长（Player-prev.log），读到末尾时连同没有换行结尾的最后一行一起解析；
+                否则最后的半行留给增量读取，偏移停在最后一个换行处
+            
+        Returns:
+            (已解析到的字节偏移, 已解析行数)
+        """
+        assembler = LogLineAssembler(start_offset)
+        line_num = start_line
         try:
             # ✅ 从文件修改时间推断日期
-            import os
             from datetime import datetime
             
             file_mtime = os.path.getmtime(log_file)
             file_date = datetime.fromtimestamp(file_mtime)
             self._current_log_file_date = file_date.strftime("%Y-%m-%d")
             
-            print(f"[LogAnalyzer] 解析日志文件: {log_file.name}, 日期: {self._current_log_file_date}")
+            logger.debug(f"[LogAnalyzer] 解析日志文件: {log_file.name}, 日期: {self._current_log_file_date}, 起始偏移: {start_offset}")
             
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    try:
-                        self._process_line(line, line_num)
-                    except Exception as e:
-                        print(f"Error processing line {line_num} in {log_file.name}: {e}")
-                        print(f"Line content: {line[:100]}")
-                        import traceback
-                        traceback.print_exc()
+            with open(log_file, 'rb') as f:
+                f.seek(start_offset)
+                while True:
+                    block = f.read(self.READ_CHUNK_SIZE)
+                    if not block and not final:
+                        break
+                    
+                    for line in assembler.feed(block) if block else assembler.flush():
+                        line_num += 1
+                        try:
+                            self._process_line(line, line_num)
+                        except Exception as e:
+                            logger.exception(f"[LogAnalyzer] Error processing line {line_num} in {log_file.name}: {e} | {line[:100]}")
+                    if not block:
+                        break
         except Exception as e:
-            print(f"Error parsing {log_file}: {e}")
+            logger.error(f"[LogAnalyzer] Error parsing {log_file}: {e}")
+        
+        return assembler.offset, line_num
     
     def _process_line(self, line: str, line_num: int):
         """处理单行日志"""
-        # ✅ 将当前行加入缓存（保留最近5行）
+        # ✅ 将当前行加入缓存（deque自动只保留最近5行）
         self._recent_lines.append(line)
-        if len(self._recent_lines) > self._recent_lines_max:
-            self._recent_lines.pop(0)
         
-        # 提取时间戳
-        timestamp_match = re.search(self.TIMESTAMP_PATTERN, line)
-        if not timestamp_match:
+        # 一次预编译匹配同时提取时间戳和组件名
+        header = self.LINE_HEADER_RE.match(line)
+        if not header:
             return
         
-        timestamp = timestamp_match.group(1)
-        
-        # 检测游戏开始
-        if re.search(self.START_RUN_PATTERN, line):
-            self._handle_game_start(timestamp, line_num)
+        handler_name = self.LINE_HANDLERS.get(header.group(2))
+        if handler_name is None:
             return
         
-        # 如果没有活动会话，跳过
-        if not self.current_session:
+        getattr(self, handler_name)(line, header.group(1), line_num)
+    
+    def _on_game_instance_line(self, line: str, timestamp: str, line_num: int):
+        """[GameInstance]：检测游戏开始"""
+        if "Starting new run..." in line:
+            self._handle_game_start(timestamp, line_num)
+    
+    def _on_socket_behavior_line(self, line: str, timestamp: str, line_num: int):
+        """[SocketBehavior]：检测英雄选择（在会话存在时）"""
+        if not self.current_session or self.current_session.hero:
             return
-        
-        # 检测英雄选择（在会话存在时）
-        hero_match = re.search(self.HERO_PATTERN, line)
-        if hero_match and not self.current_session.hero:
+        hero_match = self.HERO_RE.search(line)
+        if hero_match:
             self.current_session.hero = hero_match.group(1)
+            self._emit(HeroPicked(self.current_session, timestamp, hero=self.current_session.hero))
+    
+    def _on_app_state_line(self, line: str, timestamp: str, line_num: int):
+        """[AppState]：检测状态变化"""
+        if not self.current_session:
             return
-        
-        # 检测状态变化
-        state_match = re.search(self.STATE_CHANGE_PATTERN, line)
+        state_match = self.STATE_CHANGE_RE.search(line)
         if state_match:
-            new_state = state_match.group(1)
-            self._handle_state_change(new_state, timestamp, line_num, line)
+            self._handle_state_change(state_match.group(1), timestamp, line_num, line)
+    
+    def _on_board_manager_line(self, line: str, timestamp: str, line_num: int):
+        """[BoardManager]：检测物品购买"""
+        if not self.current_session:
             return
-        
-        # 检测物品购买
-        purchase_match = re.search(self.CARD_PURCHASED_PATTERN, line)
-        if purchase_match:
-            instance_id = purchase_match.group(1)
-            template_id = purchase_match.group(2)
-            target = purchase_match.group(3)
-            section = purchase_match.group(4)
-            
-            # 追踪所有物品购买（包括对手的，用于后续映射）
-            if "Player" in target and not instance_id.startswith("pvp_"):
-                self.current_session.add_item(instance_id, template_id, target, section)
-            # 记录对手物品的template映射
-            elif "Opponent" in target:
-                # 临时存储对手物品映射
-                if not hasattr(self, '_opponent_template_map'):
-                    self._opponent_template_map = {}
-                self._opponent_template_map[instance_id] = template_id
+        purchase_match = self.CARD_PURCHASED_RE.search(line)
+        if not purchase_match:
             return
         
-        # 检测Cards Disposed（PVP前的清理）
-        disposed_match = re.search(self.CARDS_DISPOSED_PATTERN, line)
-        if disposed_match and self._in_pvp:
-            # PVP即将开始的清理阶段
-            pass
-        
-        # 检测Combat simulation completed（战斗耗时）
-        # 🔥 修复：移除 _in_pvp 条件，因为这一行可能出现在状态转换之前
-        combat_completed_match = re.search(self.COMBAT_COMPLETED_PATTERN, line)
+        instance_id, template_id, target, section = purchase_match.groups()
+        
+        # 追踪所有物品购买（包括对手的，用于后续映射）
+        if "Player" in target and not instance_id.startswith("pvp_"):
+            self.current_session.add_item(instance_id, template_id, target, section)
+            self._emit(CardPurchased(
+                self.current_session, timestamp,
+                instance_id=instance_id, template_id=template_id, target=target, section=section
+            ))
+        # 记录对手物品的template映射
+        elif "Opponent" in target:
+            # 临时存储对手物品映射
+            self._opponent_template_map[instance_id] = template_id
+    
+    def _on_combat_sim_line(self, line: str, timestamp: str, line_num: int):
+        """[CombatSimHandler]：检测Combat simulation completed（战斗耗时）"""
+        # 🔥 修复：不检查 _in_pvp，因为这一行可能出现在状态转换之前
+        if not self.current_session:
+            return
+        combat_completed_match = self.COMBAT_COMPLETED_RE.search(line)
         if combat_completed_match:
             duration = combat_completed_match.group(1)
             # ✅ 确保duration是浮点数格式
             try:
                 duration = float(duration)
                 self._pvp_duration = duration
-                print(f"[DEBUG] 捕获战斗耗时: {duration}s")
+                if self._trace:
+                    logger.trace(f"[LogAnalyzer] 捕获战斗耗时: {duration}s")
             except ValueError:
-                print(f"[DEBUG] 无法解析duration: {duration}")
-        
-        # 检测Cards Spawned（全量更新）
-        spawned_match = re.search(self.CARDS_SPAWNED_PATTERN, line)
+                logger.debug(f"[LogAnalyzer] 无法解析duration: {duration}")
+    
+    def _on_game_sim_line(self, line: str, timestamp: str, line_num: int):
+        """[GameSimHandler]：检测Cards Spawned（全量更新）"""
+        if not self.current_session:
+            return
+        spawned_match = self.CARDS_SPAWNED_RE.search(line)
         if spawned_match:
-            cards_str = spawned_match.group(1)
-            self._handle_cards_spawned(cards_str, timestamp, line)
+            self._handle_cards_spawned(spawned_match.group(1), timestamp, line)
     
     def _handle_game_start(self, timestamp: str, line_num: int):
         """处理游戏开始"""
@@ -664,15 +871,15 @@ class LogAnalyzer:
         # 创建新会话，传入日期信息
         self.current_session = GameSession(timestamp, line_num, self._current_log_file_date)
         self.sessions.append(self.current_session)
+        self._emit(RunStarted(self.current_session, timestamp))
         
-        print(f"[LogAnalyzer] 新游戏开始: {self.current_session.get_full_start_datetime()} (ID: {self.current_session.session_id})")
+        logger.debug(f"[LogAnalyzer] 新游戏开始: {self.current_session.get_full_start_datetime()} (ID: {self.current_session.session_id})")
     
     def _handle_cards_spawned(self, cards_str: str, timestamp: str, line: str):
         """处理Cards Spawned事件（全量更新）"""
         # 解析所有卡牌
         # 格式: [instance_id [Owner] [Location] [Socket] [Size] |
-        card_pattern = r'\[(\w+) \[(Player|Opponent)\] \[(\w+)\] \[Socket_(\d+)\]'
-        cards = re.findall(card_pattern, cards_str)
+        cards = self.CARD_ENTRY_RE.findall(cards_str)
         
         # 检查是否有Player的卡牌
         has_player = any(owner == "Player" for _, owner, _, _ in cards)
@@ -725,40 +932,47 @@ class LogAnalyzer:
                 
                 # 更新临时列表
                 self._pvp_opponent_items = opponent_items
+                self._emit(BoardSnapshot(
+                    self.current_session, timestamp,
+                    player_items=list(self._pvp_player_items), opponent_items=list(opponent_items)
+                ))
                 
-                # 输出PVP全量更新（对手物品更新后输出）
-                self._log_pvp_full_update(timestamp)
+                # 输出PVP全量更新（对手物品更新后输出；涉及名称查询和排序，只在追踪开启时执行）
+                if self._trace:
+                    self._log_pvp_full_update(timestamp)
     
     def _log_pvp_full_update(self, timestamp: str):
-        """输出PVP全量更新信息到日志"""
-        print(f"\n[{timestamp}] PVP全量更新:")
+        """输出PVP全量更新信息到日志（TRACE）"""
+        lines = [f"[{timestamp}] PVP全量更新:"]
         
         # 输出玩家物品
         player_hand = [i for i in self._pvp_player_items if i['location'] == 'Hand']
-        print(f"  玩家手牌 ({len(player_hand)}件):")
+        lines.append(f"  玩家手牌 ({len(player_hand)}件):")
         for item in sorted(player_hand, key=lambda x: int(x['socket'])):
             item_name = self._get_item_name(item['template_id'])
-            print(f"    槽位{item['socket']}: {item_name} ({item['instance_id']})")
+            lines.append(f"    槽位{item['socket']}: {item_name} ({item['instance_id']})")
         
         player_stash = [i for i in self._pvp_player_items if i['location'] == 'Stash']
         if player_stash:
-            print(f"  玩家仓库 ({len(player_stash)}件):")
+            lines.append(f"  玩家仓库 ({len(player_stash)}件):")
             for item in sorted(player_stash, key=lambda x: int(x['socket'])):
                 item_name = self._get_item_name(item['template_id'])
-                print(f"    槽位{item['socket']}: {item_name} ({item['instance_id']})")
+                lines.append(f"    槽位{item['socket']}: {item_name} ({item['instance_id']})")
         
         # 输出对手物品
         opponent_hand = [i for i in self._pvp_opponent_items if i['location'] == 'Hand']
-        print(f"  对手手牌 ({len(opponent_hand)}件):")
+        lines.append(f"  对手手牌 ({len(opponent_hand)}件):")
         for item in sorted(opponent_hand, key=lambda x: int(x['socket'])):
             # 对手物品无法获取template_id，只显示instance_id
-            print(f"    槽位{item['socket']}: {item['instance_id']}")
+            lines.append(f"    槽位{item['socket']}: {item['instance_id']}")
         
         opponent_stash = [i for i in self._pvp_opponent_items if i['location'] == 'Stash']
         if opponent_stash:
-            print(f"  对手仓库 ({len(opponent_stash)}件):")
+            lines.append(f"  对手仓库 ({len(opponent_stash)}件):")
             for item in sorted(opponent_stash, key=lambda x: int(x['socket'])):
-                print(f"    槽位{item['socket']}: {item['instance_id']}")
+                lines.append(f"    槽位{item['socket']}: {item['instance_id']}")
+        
+        logger.trace("\n".join(lines))
     
     def _get_item_name(self, template_id: str) -> str:
         """根据template_id获取物品中文名称"""
@@ -789,14 +1003,15 @@ class LogAnalyzer:
             self._pvp_duration = None  # 🔥 重置duration，防止旧数据污染
             if not hasattr(self, '_opponent_template_map'):
                 self._opponent_template_map = {}
+            self._emit(PvpStarted(self.current_session, timestamp, day=self.current_session.days))
         
         # 检测PVP结束进入ReplayState（战斗回放）
         elif new_state == "ReplayState" and self._in_pvp:
             # ✅ 新判断逻辑：往上数第3行，看是否有 "All exit tasks completed"
             victory = self._check_pvp_victory_from_recent_lines()
             
-            print(f"[DEBUG] PVP结束 → ReplayState，胜负判断: {'胜利' if victory else '失败'}")
-            print(f"[DEBUG] PVP耗时: {self._pvp_duration}")
+            if self._trace:
+                logger.trace(f"[LogAnalyzer] PVP结束 → ReplayState，胜负判断: {'胜利' if victory else '失败'}，耗时: {self._pvp_duration}")
             
             # 记录战斗信息
             if self._pvp_player_items or self._pvp_opponent_items:
@@ -807,18 +1022,23 @@ class LogAnalyzer:
                     victory=victory,
                     duration=self._pvp_duration
                 )
-                print(f"[DEBUG] 已添加PVP战斗记录，duration={self._pvp_duration}")
+                battle = self.current_session.pvp_battles[-1]
+                self._emit(PvpEnded(
+                    self.current_session, timestamp,
+                    battle=battle, victory=victory, duration=self._pvp_duration, day=battle["day"]
+                ))
                 
                 # 触发PVP结束回调
                 for callback in self.pvp_end_callbacks:
                     try:
                         callback(self.current_session, self._pvp_player_items, self._pvp_opponent_items)
                     except Exception as e:
-                        print(f"PVP回调函数执行失败: {e}")
+                        logger.error(f"[LogAnalyzer] PVP回调函数执行失败: {e}")
                 
                 # 每场PVP战斗后，天数都+1（进入下一天），不管输赢
                 self.current_session.days += 1
-                print(f"[DEBUG] PVP战斗后，天数更新: {self.current_session.days - 1} -> {self.current_session.days}")
+                if self._trace:
+                    logger.trace(f"[LogAnalyzer] PVP战斗后，天数更新: {self.current_session.days - 1} -> {self.current_session.days}")
             
             # 标记PVP已结束，清理数据
             self._in_pvp = False
@@ -838,6 +1058,7 @@ class LogAnalyzer:
             self._pvp_just_ended = False
             
             self.current_session.finish(timestamp, line_num, victory=True)
+            self._emit(RunEnded(self.current_session, timestamp, victory=True))
             self.current_session = None
         
         # 检测游戏失败结束
@@ -846,6 +1067,7 @@ class LogAnalyzer:
             self._pvp_just_ended = False
             
             self.current_session.finish(timestamp, line_num, victory=False)
+            self._emit(RunEnded(self.current_session, timestamp, victory=False))
             self.current_session = None
     
     def _check_pvp_victory_from_recent_lines(self) -> bool:
@@ -858,7 +1080,7 @@ class LogAnalyzer:
         """
         # 最近的行数应该 >= 4（当前行 + 往上3行）
         if len(self._recent_lines) < 4:
-            print(f"[DEBUG] 缓存行数不足：{len(self._recent_lines)}，默认判断为失败")
+            logger.debug(f"[LogAnalyzer] 缓存行数不足：{len(self._recent_lines)}，默认判断为失败")
             return False
         
         # _recent_lines[-1] = 当前行（ReplayState转换）
@@ -870,8 +1092,8 @@ class LogAnalyzer:
         # 检查是否包含 "All exit tasks completed"
         has_exit_tasks = "All exit tasks completed" in third_line_up
         
-        print(f"[DEBUG] 往上第3行内容: {third_line_up.strip()}")
-        print(f"[DEBUG] 是否包含 'All exit tasks completed': {has_exit_tasks}")
+        if self._trace:
+            logger.trace(f"[LogAnalyzer] 往上第3行内容: {third_line_up.strip()} | 包含 'All exit tasks completed': {has_exit_tasks}")
         
         return has_exit_tasks
 
@@ -0,0 +1,73 @@
+"""
+日志行组装器
+位于文件读取和 LogAnalyzer 之间：把任意切分的字节块拼成完整的日志行，
+只输出以换行结尾的行，未写完的半行留到下一次；偏移按字节精确记录
+"""
+import io
+from typing import List
+
+
+class LogLineAssembler:
+    """
+    增量行组装
+
+    换行规则与文本模式打开文件（newline=None）一致：\\r、\\n、\\r\\n 都视为行结束，
+    输出的行统一以 \\n 结尾，因此增量读取和全量解析看到的行完全相同
+    """
+
+    def __init__(self, offset: int = 0):
+        self.reset(offset)
+
+    def reset(self, offset: int = 0):
+        """
+        从指定字节偏移重新开始（丢弃缓冲的半行）
+
+        Args:
+            offset: 下一个输入字节在文件中的偏移（必须位于行首）
+        """
+        self._offset = offset
+        self._pending = b""
+
+    @property
+    def offset(self) -> int:
+        """已输出的完整行结束处的字节偏移，可直接用于 seek() 恢复"""
+        return self._offset
+
+    @property
+    def pending_bytes(self) -> int:
+        """缓冲中尚未组成完整行的字节数"""
+        return len(self._pending)
+
+    def feed(self, data: bytes) -> List[str]:
+        """
+        输入新读取的字节块，返回其中新凑齐的完整行
+
+        只在 \\n 处切分：\\r\\n 可能被切在两个块之间，且 UTF-8 多字节字符不含 0x0A，
+        所以切点之前的内容总能被完整解码
+        """
+        if not data:
+            return []
+
+        buffer = self._pending + data
+        cut = buffer.rfind(b"\n") + 1
+        if not cut:
+            self._pending = buffer
+            return []
+
+        self._pending = buffer[cut:]
+        self._offset += cut
+        text = buffer[:cut].decode('utf-8', errors='ignore')
+        return io.StringIO(text, newline=None).readlines()
+
+    def flush(self) -> List[str]:
+        """
+        输出缓冲中没有换行结尾的最后一行（文件已写完、不会再增长时调用）
+
+        与文本模式一致：最后一行不带换行符；偏移前进到缓冲末尾
+        """
+        if not self._pending:
+            return []
+        text = self._pending.decode('utf-8', errors='ignore')
+        self._offset += len(self._pending)
+        self._pending = b""
+        return io.StringIO(text, newline=None).readlines()
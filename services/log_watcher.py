@@ -2,18 +2,124 @@
 实时日志监控服务
 监控 Player.log 和 Player-prev.log 的变化，实时解析新增会话
 """
-import os
-import time
+import sys
 from pathlib import Path
 from threading import Thread, Event
 from PySide6.QtCore import QObject, Signal
 from loguru import logger
-from typing import Optional
+from typing import List, Optional
 
 from services.log_analyzer import LogAnalyzer
+from services.log_line_assembler import LogLineAssembler
 from platforms.adapter import PlatformAdapter
 
 
+class LogTail:
+    """
+    单个日志文件的增量读取器
+    
+    以二进制分块读取，交给LogLineAssembler组装：只输出以换行结尾的完整行，
+    末尾未写完的半行留在缓冲区，下次读取时与后续内容拼接；偏移按字节记录
+    """
+    
+    CHUNK_SIZE = 64 * 1024
+    # Windows 上持有句柄会阻止游戏启动时轮转 Player.log（默认打开方式不带 FILE_SHARE_DELETE），
+    # 因此只在 POSIX 平台跨读取保持句柄打开
+    KEEP_OPEN = sys.platform != "win32"
+    
+    def __init__(self, path: Path, predecessor: Optional["LogTail"] = None):
+        """
+        Args:
+            path: 日志文件路径
+            predecessor: 轮转时会被改名成本文件的日志（Player.log -> Player-prev.log）
+        """
+        self.path = path
+        self.predecessor = predecessor
+        self._assembler = LogLineAssembler()
+        self._read_pos = 0  # 文件读取位置（包含缓冲中的半行）
+        self._file = None
+        self._inode = None
+        self._retired = None  # 轮转前的 (inode, 已读完整行偏移)，供后继读取器接着读
+    
+    @property
+    def position(self) -> int:
+        """已交给分析器的完整行结束处的字节偏移"""
+        return self._assembler.offset
+    
+    def seek(self, position: int):
+        """从指定字节偏移开始读取（必须位于行首）"""
+        self._read_pos = position
+        self._assembler.reset(position)
+    
+    def start_at(self, position: int):
+        """从指定字节偏移开始跟踪当前的文件（记录其 inode，之后换成别的文件都按轮转处理）"""
+        self.close()
+        self._inode = self.path.stat().st_ino if self.path.exists() else None
+        self._retired = None
+        self.seek(position)
+    
+    def read_lines(self) -> List[str]:
+        """读取自上次以来新增的完整行"""
+        if not self.path.exists():
+            self.close()
+            return []
+        
+        stat = self.path.stat()
+        if self._inode is not None and stat.st_ino != self._inode:
+            # 文件被轮转（换成了另一个文件）
+            self._retired = (self._inode, self.position)
+            self.close()
+            self.seek(self._rotated_position(stat.st_ino, stat.st_size))
+            logger.info(f"[LogWatcher] {self.path.name} 已轮转，从 {self._read_pos} 继续读取")
+        elif stat.st_size < self._read_pos:
+            # 文件被重置（清空或重写），重新读取全文
+            logger.info(f"[LogWatcher] {self.path.name} 被重置，重新读取")
+            self.seek(0)
+        self._inode = stat.st_ino
+        
+        if stat.st_size == self._read_pos:
+            return []
+        
+        lines = []
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            self._file.seek(self._read_pos)
+            while True:
+                block = self._file.read(self.CHUNK_SIZE)
+                if not block:
+                    break
+                self._read_pos += len(block)
+                lines.extend(self._assembler.feed(block))
+        finally:
+            if not self.KEEP_OPEN:
+                self.close()
+        return lines
+    
+    def _rotated_position(self, inode: int, size: int) -> int:
+        """
+        轮转后从哪里开始读
+        - 没有前任：新建的文件（Player.log），从头读
+        - 前任改名过来的文件：之前的行已经由前任读过，从前任读到的位置继续
+        - 其它文件：内容已由初始化时的全量分析处理，跳到末尾
+        """
+        if self.predecessor is None:
+            return 0
+        known = [(self.predecessor._inode, self.predecessor.position), self.predecessor._retired]
+        for record in known:
+            if record is not None and record[0] == inode and record[1] <= size:
+                return record[1]
+        return size
+    
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
 class LogWatcher(QObject):
     """日志监控服务"""
     
@@ -21,9 +127,14 @@ class LogWatcher(QObject):
     new_session_detected = Signal(object)  # GameSession
     # 信号：会话更新（PVP完成）
     session_updated = Signal(object)  # GameSession
+    # 信号：细粒度会话事件（开局、选英雄、购买、PVP开始/结束、棋盘快照、结束），按发生顺序发出
+    session_event = Signal(object)  # services.session_events.SessionEvent
     # 信号：监控状态改变
     status_changed = Signal(bool, str)  # (is_running, status_message)
     
+    # 没有文件事件时的最长阻塞时间（秒），仅作为漏事件时的兜底检查
+    IDLE_TIMEOUT = 30.0
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -54,9 +165,16 @@ class LogWatcher(QObject):
         self.stop_event = Event()
         self.monitor_thread: Optional[Thread] = None
         
-        # 文件监控状态：记录上次读取的文件位置
-        self.last_player_log_pos = 0  # Player.log的读取位置
-        self.last_player_prev_log_pos = 0  # Player-prev.log的读取位置
+        # 文件监控状态：每个日志文件一个增量读取器（记录上次读取的字节位置）
+        # Player-prev.log 排在前面：游戏重启时 Player.log 被改名为 Player-prev.log，
+        # 旧文件剩下的行要先于新 Player.log 的行交给分析器
+        self._tails: List[LogTail] = []
+        player_tail = LogTail(self.player_log) if self.player_log else None
+        if self.player_prev_log:
+            self._tails.append(LogTail(self.player_prev_log, predecessor=player_tail))
+        if player_tail:
+            self._tails.append(player_tail)
+        self._notifier = None
         self.last_session_count = 0
         
         # 已知的会话ID集合（避免重复通知）
@@ -91,6 +209,8 @@ class LogWatcher(QObject):
         
         self.running = False
         self.stop_event.set()
+        if self._notifier:
+            self._notifier.interrupt()
         
         if self.monitor_thread:
             self.monitor_thread.join(timeout=2)
@@ -103,17 +223,28 @@ class LogWatcher(QObject):
         # 初始化：记录当前文件大小和会话数
         self._initialize_state()
         
-        while self.running and not self.stop_event.is_set():
-            try:
-                # 检查日志文件变化
-                self._check_log_changes()
-                
-                # 等待一段时间再检查（避免频繁IO）
-                self.stop_event.wait(1.0)  # 每秒检查一次
-                
-            except Exception as e:
-                logger.error(f"[LogWatcher] 监控循环错误: {e}")
-                time.sleep(5)  # 出错后等待5秒再继续
+        # 文件变化通知：Linux/Steam Deck 用 inotify（游戏未运行时不唤醒），其它平台每秒轮询
+        self._notifier = PlatformAdapter.get_file_change_notifier(
+            self.log_dir, [tail.path.name for tail in self._tails]
+        )
+        logger.info(f"[LogWatcher] 文件变化通知方式: {self._notifier.name}")
+        
+        try:
+            while self.running and not self.stop_event.is_set():
+                try:
+                    # 检查日志文件变化
+                    self._check_log_changes()
+                    
+                    # 阻塞直到文件变化（或兜底超时/被stop()唤醒）
+                    self._notifier.wait(self.IDLE_TIMEOUT)
+                    
+                except Exception as e:
+                    logger.error(f"[LogWatcher] 监控循环错误: {e}")
+                    self.stop_event.wait(5)  # 出错后等待5秒再继续
+        finally:
+            self._notifier.close()
+            for tail in self._tails:
+                tail.close()
     
     def _initialize_state(self):
         """初始化监控状态"""
@@ -123,23 +254,23 @@ class LogWatcher(QObject):
                 logger.error("[LogWatcher] 日志路径无效，无法初始化")
                 return
             
-            # 记录初始文件位置（移动到文件末尾）
-            if self.player_log.exists():
-                self.last_player_log_pos = self.player_log.stat().st_size
-            
-            if self.player_prev_log and self.player_prev_log.exists():
-                self.last_player_prev_log_pos = self.player_prev_log.stat().st_size
-            
             # 初次分析，获取所有已存在的会话
             result = self.analyzer.analyze()
             sessions = result.get('sessions', [])
             
+            # 增量读取从分析器解析结束的位置开始（未写完的半行留给增量读取），没有记录时移动到文件末尾
+            for tail in self._tails:
+                offset = self.analyzer.parsed_offsets.get(tail.path.name)
+                if offset is None:
+                    offset = tail.path.stat().st_size if tail.path.exists() else 0
+                tail.start_at(offset)
+            
             # 记录已知会话ID
             self.known_session_ids = {s.session_id for s in sessions}
             self.last_session_count = len(sessions)
             
             logger.info(f"[LogWatcher] 初始化完成，已有 {len(sessions)} 个会话")
-            logger.info(f"[LogWatcher] Player.log 位置: {self.last_player_log_pos}, Player-prev.log 位置: {self.last_player_prev_log_pos}")
+            logger.info(f"[LogWatcher] 读取位置: " + ", ".join(f"{t.path.name}={t.position}" for t in self._tails))
             
         except Exception as e:
             logger.error(f"[LogWatcher] 初始化失败: {e}")
@@ -149,43 +280,11 @@ class LogWatcher(QObject):
         try:
             new_lines = []  # 存储新增的所有行
             
-            # 检查 Player.log 的增量
-            if self.player_log.exists():
-                current_size = self.player_log.stat().st_size
-                if current_size > self.last_player_log_pos:
-                    # 文件增长，读取增量部分
-                    with open(self.player_log, 'r', encoding='utf-8', errors='ignore') as f:
-                        f.seek(self.last_player_log_pos)
-                        incremental_content = f.read()
-                        if incremental_content.strip():
-                            new_lines.extend(incremental_content.splitlines())
-                            logger.debug(f"[LogWatcher] Player.log 新增 {len(incremental_content.splitlines())} 行")
-                    self.last_player_log_pos = current_size
-                elif current_size < self.last_player_log_pos:
-                    # 文件被重置（清空或重写），重新读取全文
-                    logger.info(f"[LogWatcher] Player.log 被重置，重新读取")
-                    self.last_player_log_pos = 0
-                    with open(self.player_log, 'r', encoding='utf-8', errors='ignore') as f:
-                        new_lines.extend(f.read().splitlines())
-                    self.last_player_log_pos = current_size
-            
-            # 检查 Player-prev.log 的增量
-            if self.player_prev_log.exists():
-                current_size = self.player_prev_log.stat().st_size
-                if current_size > self.last_player_prev_log_pos:
-                    with open(self.player_prev_log, 'r', encoding='utf-8', errors='ignore') as f:
-                        f.seek(self.last_player_prev_log_pos)
-                        incremental_content = f.read()
-                        if incremental_content.strip():
-                            new_lines.extend(incremental_content.splitlines())
-                            logger.debug(f"[LogWatcher] Player-prev.log 新增 {len(incremental_content.splitlines())} 行")
-                    self.last_player_prev_log_pos = current_size
-                elif current_size < self.last_player_prev_log_pos:
-                    logger.info(f"[LogWatcher] Player-prev.log 被重置，重新读取")
-                    self.last_player_prev_log_pos = 0
-                    with open(self.player_prev_log, 'r', encoding='utf-8', errors='ignore') as f:
-                        new_lines.extend(f.read().splitlines())
-                    self.last_player_prev_log_pos = current_size
+            for tail in self._tails:
+                lines = tail.read_lines()
+                if lines:
+                    new_lines.extend(lines)
+                    logger.debug(f"[LogWatcher] {tail.path.name} 新增 {len(lines)} 行")
             
             # 如果有新内容，进行增量分析
             if new_lines:
@@ -207,6 +306,10 @@ class LogWatcher(QObject):
             new_sessions = result.get('new_sessions', [])
             updated_sessions = result.get('updated_sessions', [])
             
+            # 逐条转发会话事件，下游可以只处理增量
+            for event in result.get('events', []):
+                self.session_event.emit(event)
+            
             # 通知新会话
             for session in new_sessions:
                 logger.info(f"[LogWatcher] 检测到新会话: {session.session_id} (Day {session.days})")
@@ -1,21 +1,99 @@
 """
 战绩管理器
 用于保存和读取游戏战绩数据
+
+数据保存在 user_data/match_history.db（SQLite）：
+    matches      每局一行，按 match_id / game_date / hero / victory 建索引
+    battles      每场PVP一行，(match_id, idx) 为主键
+    board_items  PVP双方棋盘物品，每个物品一行
+单条更新（截图路径、字段修改、删除）只在一个事务内改动相关行，不再重写整个文件；
+首次启动时自动导入旧版 match_history.json（导入后重命名为 .imported）
 """
 import json
+import sqlite3
+import threading
 import uuid
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
+from loguru import logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    match_id TEXT NOT NULL UNIQUE,
+    hero TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    game_date TEXT,
+    days INTEGER,
+    victory INTEGER,
+    is_finished INTEGER,
+    created_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_matches_game_date ON matches(game_date);
+CREATE INDEX IF NOT EXISTS idx_matches_hero ON matches(hero);
+CREATE INDEX IF NOT EXISTS idx_matches_victory ON matches(victory);
+
+CREATE TABLE IF NOT EXISTS battles (
+    match_id TEXT NOT NULL REFERENCES matches(match_id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    day INTEGER,
+    start_time TEXT,
+    victory INTEGER,
+    duration REAL,
+    screenshot TEXT,
+    PRIMARY KEY (match_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_battles_day ON battles(match_id, day);
+
+CREATE TABLE IF NOT EXISTS board_items (
+    match_id TEXT NOT NULL,
+    battle_idx INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    instance_id TEXT,
+    template_id TEXT,
+    location TEXT,
+    socket,
+    extra TEXT,
+    PRIMARY KEY (match_id, battle_idx, side, position),
+    FOREIGN KEY (match_id, battle_idx) REFERENCES battles(match_id, idx) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# matches 表中有独立列的字段，其余字段存入 extra（JSON）
+MATCH_COLUMNS = ("hero", "start_time", "end_time", "game_date", "days", "victory", "is_finished", "created_at")
+BOOL_MATCH_COLUMNS = ("victory", "is_finished")
+ITEM_COLUMNS = ("instance_id", "template_id", "location", "socket")
+ITEM_SIDES = (("player", "player_items"), ("opponent", "opponent_items"))
+
+
+def _to_db_bool(value):
+    return None if value is None else int(bool(value))
+
+
+def _from_db_bool(value):
+    return None if value is None else bool(value)
 
 
 class MatchHistoryManager:
     """战绩历史管理器"""
-    
+
+    DB_FILE = "match_history.db"
+    LEGACY_FILE = "match_history.json"
+
     def __init__(self, data_dir: str = None):
         """
         初始化战绩管理器
-        
+
         Args:
             data_dir: 数据目录，默认为user_data
         """
@@ -23,73 +101,210 @@ class MatchHistoryManager:
             data_dir = Path(__file__).parent.parent / "user_data"
         else:
             data_dir = Path(data_dir)
-        
+
         self.data_dir = data_dir
-        self.history_file = self.data_dir / "match_history.json"
+        self.db_file = self.data_dir / self.DB_FILE
+        self.history_file = self.data_dir / self.LEGACY_FILE
         self.screenshot_dir = self.data_dir / "match_screenshots"
-        
+
         # 确保目录存在
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.screenshot_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 确保历史文件存在
+
+        # 日志监控线程和GUI线程都会访问，共用一个连接并加锁
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(SCHEMA)
+
+        self._import_legacy_json()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 旧版JSON导入
+    # ------------------------------------------------------------------
+
+    def _import_legacy_json(self):
+        """一次性导入旧版 match_history.json，成功后重命名，避免重复导入"""
         if not self.history_file.exists():
-            self._save_history({"matches": []})
-    
-    def _load_history(self) -> Dict:
-        """加载历史数据"""
-        try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading match history: {e}")
-            return {"matches": []}
-    
-    def _save_history(self, data: Dict):
-        """保存历史数据"""
+            return
+
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return
+
+            try:
+                with open(self.history_file, 'r', encoding='utf-8') as f:
+                    matches = json.load(f).get("matches", [])
+            except Exception as e:
+                logger.error(f"[MatchHistoryManager] 读取旧版战绩失败: {e}")
+                return
+
+            try:
+                with self._conn:
+                    # JSON中最新的记录在最前面，倒序插入以保持 id 越大越新
+                    for record in reversed(matches):
+                        if record.get("match_id"):
+                            self._insert_match(record)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta(key, value) VALUES ('json_imported', ?)",
+                        (datetime.now().isoformat(),)
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"[MatchHistoryManager] 导入旧版战绩失败: {e}")
+                return
+
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving match history: {e}")
-    
+            self.history_file.replace(self.history_file.with_name(self.LEGACY_FILE + ".imported"))
+        except OSError as e:
+            logger.warning(f"[MatchHistoryManager] 重命名旧版战绩文件失败: {e}")
+        logger.info(f"[MatchHistoryManager] 已从 {self.LEGACY_FILE} 导入 {len(matches)} 条战绩")
+
+    # ------------------------------------------------------------------
+    # 行 <-> 字典
+    # ------------------------------------------------------------------
+
+    def _insert_match(self, record: Dict) -> bool:
+        """插入一条完整的对局记录（需在事务中调用），已存在时返回False"""
+        extra = {k: v for k, v in record.items() if k not in MATCH_COLUMNS and k not in ("match_id", "pvp_battles")}
+        values = [record.get(column) for column in MATCH_COLUMNS]
+        for i, column in enumerate(MATCH_COLUMNS):
+            if column in BOOL_MATCH_COLUMNS:
+                values[i] = _to_db_bool(values[i])
+
+        cursor = self._conn.execute(
+            f"INSERT OR IGNORE INTO matches(match_id, {', '.join(MATCH_COLUMNS)}, extra) "
+            f"VALUES (?, {', '.join('?' * len(MATCH_COLUMNS))}, ?)",
+            (record["match_id"], *values, json.dumps(extra, ensure_ascii=False) if extra else None)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        self._insert_battles(record["match_id"], record.get("pvp_battles", []))
+        return True
+
+    def _insert_battles(self, match_id: str, battles: List[Dict], first_idx: int = 0):
+        battle_rows = []
+        item_rows = []
+        for idx, battle in enumerate(battles, first_idx):
+            battle_rows.append((
+                match_id, idx, battle.get("day"), battle.get("start_time"),
+                _to_db_bool(battle.get("victory")), battle.get("duration"), battle.get("screenshot")
+            ))
+            for side, key in ITEM_SIDES:
+                for position, item in enumerate(battle.get(key, [])):
+                    extra = {k: v for k, v in item.items() if k not in ITEM_COLUMNS}
+                    item_rows.append((
+                        match_id, idx, side, position,
+                        *(item.get(column) for column in ITEM_COLUMNS),
+                        json.dumps(extra, ensure_ascii=False) if extra else None
+                    ))
+
+        self._conn.executemany(
+            "INSERT INTO battles(match_id, idx, day, start_time, victory, duration, screenshot) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            battle_rows
+        )
+        self._conn.executemany(
+            f"INSERT INTO board_items(match_id, battle_idx, side, position, {', '.join(ITEM_COLUMNS)}, extra) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' * len(ITEM_COLUMNS))}, ?)",
+            item_rows
+        )
+
+    @staticmethod
+    def _match_from_row(row: sqlite3.Row) -> Dict:
+        match = {"match_id": row["match_id"]}
+        for column in MATCH_COLUMNS:
+            value = row[column]
+            match[column] = _from_db_bool(value) if column in BOOL_MATCH_COLUMNS else value
+        if row["extra"]:
+            match.update(json.loads(row["extra"]))
+        match["pvp_battles"] = []
+        return match
+
+    def _load_battles(self, matches: List[Dict], include_items: bool = True):
+        """为一批对局填充 pvp_battles（每张表一次查询）"""
+        if not matches:
+            return
+        by_id = {m["match_id"]: m for m in matches}
+        placeholders = ", ".join("?" * len(by_id))
+
+        battles = {}
+        for row in self._conn.execute(
+            f"SELECT * FROM battles WHERE match_id IN ({placeholders}) ORDER BY match_id, idx",
+            tuple(by_id)
+        ):
+            battle = {
+                "day": row["day"],
+                "start_time": row["start_time"],
+                "victory": _from_db_bool(row["victory"]),
+                "duration": row["duration"],
+                "player_items": [],
+                "opponent_items": [],
+                "screenshot": row["screenshot"]
+            }
+            if not include_items:
+                del battle["player_items"], battle["opponent_items"]
+            battles[(row["match_id"], row["idx"])] = battle
+            by_id[row["match_id"]]["pvp_battles"].append(battle)
+
+        if not include_items:
+            return
+
+        for row in self._conn.execute(
+            f"SELECT * FROM board_items WHERE match_id IN ({placeholders}) "
+            f"ORDER BY match_id, battle_idx, side, position",
+            tuple(by_id)
+        ):
+            item = {column: row[column] for column in ITEM_COLUMNS}
+            if row["extra"]:
+                item.update(json.loads(row["extra"]))
+            battles[(row["match_id"], row["battle_idx"])][f"{row['side']}_items"].append(item)
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+
     def add_match(self, session_data: Dict, hero: str = "Unknown") -> str:
         """
         添加一场对局记录
-        
+
         Args:
             session_data: 从LogAnalyzer获取的session数据（GameSession对象）
             hero: 使用的英雄名称
-            
+
         Returns:
             match_id: 对局唯一ID
         """
-        history = self._load_history()
-        
         # ✅ 使用session的唯一ID（基于日期+时间生成）
         if hasattr(session_data, 'session_id'):
             match_id = session_data.session_id
         else:
             # 降级方案：使用UUID
             match_id = str(uuid.uuid4())
-        
-        # ✅ 检查是否已存在（避免重复添加）
-        existing_ids = {m.get('match_id') for m in history.get('matches', [])}
-        if match_id in existing_ids:
-            print(f"[MatchHistoryManager] 会话 {match_id} 已存在，跳过")
+
+        # ✅ 检查是否已存在（避免重复添加），走 match_id 唯一索引
+        if self.has_match(match_id):
+            logger.debug(f"[MatchHistoryManager] 会话 {match_id} 已存在，跳过")
             return match_id
-        
+
         # ✅ 提取日期时间信息
         if hasattr(session_data, 'get_full_start_datetime'):
             start_datetime = session_data.get_full_start_datetime()
         else:
             start_datetime = session_data.get("start_time", "")
-        
+
         if hasattr(session_data, 'get_full_end_datetime'):
             end_datetime = session_data.get_full_end_datetime()
         else:
             end_datetime = session_data.get("end_time", "")
-        
+
         # ✅ 记录游戏日期（用于后续筛选）
         game_date = ""
         if hasattr(session_data, 'log_file_date'):
@@ -98,7 +313,7 @@ class MatchHistoryManager:
             # 尝试从start_datetime提取日期
             if " " in start_datetime:
                 game_date = start_datetime.split()[0]
-        
+
         # 构建对局数据
         match_record = {
             "match_id": match_id,
@@ -112,7 +327,7 @@ class MatchHistoryManager:
             "created_at": datetime.now().isoformat(),  # 记录添加到数据库的时间
             "pvp_battles": []
         }
-        
+
         # 添加PVP战斗记录
         pvp_battles = getattr(session_data, 'pvp_battles', []) if hasattr(session_data, 'pvp_battles') else session_data.get("pvp_battles", [])
         for pvp in pvp_battles:
@@ -126,71 +341,149 @@ class MatchHistoryManager:
                 "screenshot": None  # 截图路径，初始为None
             }
             match_record["pvp_battles"].append(battle_record)
-        
-        # 添加到历史记录
-        history["matches"].insert(0, match_record)  # 新记录插入到最前面
-        
-        # 保存
-        self._save_history(history)
-        
+
+        self.add_match_record(match_record)
         return match_id
-    
+
+    def add_match_record(self, match_record: Dict) -> bool:
+        """
+        直接添加一条已构建好的对局记录（格式同 get_match() 的返回值）
+
+        Returns:
+            是否新增（match_id 已存在时返回False）
+        """
+        try:
+            with self._lock, self._conn:
+                return self._insert_match(match_record)
+        except sqlite3.Error as e:
+            logger.error(f"[MatchHistoryManager] 保存对局失败: {e}")
+            return False
+
+    def has_match(self, match_id: str) -> bool:
+        """对局是否已存在"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM matches WHERE match_id = ?", (match_id,)).fetchone() is not None
+
     def get_all_matches(self) -> List[Dict]:
-        """获取所有对局记录"""
-        history = self._load_history()
-        return history.get("matches", [])
-    
+        """获取所有对局记录（最新的在前）"""
+        return self.query_matches()
+
+    def query_matches(self, hero: Optional[str] = None, victory: Optional[bool] = None,
+                      game_date: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+                      include_items: bool = True) -> List[Dict]:
+        """
+        按条件分页查询对局（最新的在前），筛选和分页都在数据库中完成
+
+        Args:
+            hero: 只返回该英雄的对局
+            victory: True/False 只返回胜利/失败的对局
+            game_date: 只返回该日期（YYYY-MM-DD）的对局
+            limit: 最多返回的条数，None表示不限
+            offset: 跳过的条数
+            include_items: 为False时战斗记录不带 player_items/opponent_items（列表页用）
+        """
+        where, params = self._build_filter(hero, victory, game_date)
+        sql = f"SELECT * FROM matches{where} ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+
+        with self._lock:
+            matches = [self._match_from_row(row) for row in self._conn.execute(sql, params)]
+            self._load_battles(matches, include_items)
+        return matches
+
+    def count_matches(self, hero: Optional[str] = None, victory: Optional[bool] = None,
+                      game_date: Optional[str] = None) -> int:
+        """按条件统计对局数量（用于分页）"""
+        where, params = self._build_filter(hero, victory, game_date)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM matches{where}", params).fetchone()[0]
+
+    @staticmethod
+    def _build_filter(hero, victory, game_date):
+        clauses, params = [], []
+        if hero is not None:
+            clauses.append("hero = ?")
+            params.append(hero)
+        if victory is not None:
+            clauses.append("victory = ?")
+            params.append(int(victory))
+        if game_date is not None:
+            clauses.append("game_date = ?")
+            params.append(game_date)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
     def get_match(self, match_id: str) -> Optional[Dict]:
         """获取指定对局记录"""
-        matches = self.get_all_matches()
-        for match in matches:
-            if match.get("match_id") == match_id:
-                return match
-        return None
-    
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+            if row is None:
+                return None
+            match = self._match_from_row(row)
+            self._load_battles([match])
+        return match
+
     def update_match(self, match_id: str, updates: Dict):
-        """更新对局记录"""
-        history = self._load_history()
-        matches = history.get("matches", [])
-        
-        for i, match in enumerate(matches):
-            if match.get("match_id") == match_id:
-                matches[i].update(updates)
-                self._save_history(history)
+        """更新对局记录（单个事务，只改动这一局相关的行）"""
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute("SELECT extra FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+                if row is None:
+                    return False
+
+                columns = [c for c in MATCH_COLUMNS if c in updates]
+                extra_updates = {k: v for k, v in updates.items() if k not in MATCH_COLUMNS and k not in ("match_id", "pvp_battles")}
+                if columns:
+                    values = [_to_db_bool(updates[c]) if c in BOOL_MATCH_COLUMNS else updates[c] for c in columns]
+                    self._conn.execute(
+                        f"UPDATE matches SET {', '.join(f'{c} = ?' for c in columns)} WHERE match_id = ?",
+                        (*values, match_id)
+                    )
+                if extra_updates:
+                    extra = json.loads(row["extra"]) if row["extra"] else {}
+                    extra.update(extra_updates)
+                    self._conn.execute(
+                        "UPDATE matches SET extra = ? WHERE match_id = ?",
+                        (json.dumps(extra, ensure_ascii=False), match_id)
+                    )
+                if "pvp_battles" in updates:
+                    # 整体替换战斗记录（board_items 随 battles 级联删除）
+                    self._conn.execute("DELETE FROM battles WHERE match_id = ?", (match_id,))
+                    self._insert_battles(match_id, updates["pvp_battles"])
                 return True
-        
-        return False
-    
+        except sqlite3.Error as e:
+            logger.error(f"[MatchHistoryManager] 更新对局失败: {e}")
+            return False
+
     def update_battle_screenshot(self, match_id: str, day: int, screenshot_path: str):
         """更新某一天的截图路径"""
-        history = self._load_history()
-        matches = history.get("matches", [])
-        
-        for match in matches:
-            if match.get("match_id") == match_id:
-                for battle in match.get("pvp_battles", []):
-                    if battle.get("day") == day:
-                        battle["screenshot"] = screenshot_path
-                        self._save_history(history)
-                        return True
-        
-        return False
-    
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE battles SET screenshot = ? WHERE match_id = ? AND idx = "
+                    "(SELECT MIN(idx) FROM battles WHERE match_id = ? AND day = ?)",
+                    (screenshot_path, match_id, match_id, day)
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"[MatchHistoryManager] 更新截图失败: {e}")
+            return False
+
     def delete_match(self, match_id: str) -> bool:
-        """删除对局记录"""
-        history = self._load_history()
-        matches = history.get("matches", [])
-        
-        # 查找并删除
-        new_matches = [m for m in matches if m.get("match_id") != match_id]
-        
-        if len(new_matches) < len(matches):
-            history["matches"] = new_matches
-            self._save_history(history)
-            return True
-        
-        return False
-    
+        """删除对局记录（战斗和棋盘物品级联删除）"""
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute("DELETE FROM matches WHERE match_id = ?", (match_id,))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"[MatchHistoryManager] 删除对局失败: {e}")
+            return False
+
     def get_screenshot_path(self, match_id: str, day: int) -> Path:
         """获取截图保存路径"""
         return self.screenshot_dir / f"{match_id}_day{day}.png"
@@ -0,0 +1,229 @@
+"""
+OCR 引擎池 (OCR Engine Pool)
+进程内共享的 OCR 引擎：RapidOCR 每次构造都要加载一遍 ONNX 模型，
+怪物和卡牌两个 OCRService 各建一个就是双份内存和双份启动耗时
+- 每种后端只有一个引擎实例，第一次使用时在后台线程加载（扫描线程不会卡住）
+- 同一引擎的识别调用串行执行（引擎内部状态不是线程安全的）
+- 空闲超过 idle_timeout 秒后卸载，下次使用时重新加载
+"""
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+from platforms.interfaces.ocr import OCREngine
+
+DEFAULT_BACKEND = "auto"
+# 加载失败后多久才重试（避免每次识别都重新尝试加载模型）
+RETRY_INTERVAL = 60.0
+
+
+def _default_factory(backend: str) -> OCREngine:
+    """auto: 由 PlatformAdapter 按平台选择（Windows 原生优先，回退 RapidOCR）"""
+    from platforms.adapter import PlatformAdapter
+    if backend != DEFAULT_BACKEND:
+        for engine in PlatformAdapter.get_all_ocr_engines():
+            if engine.name == backend:
+                return engine
+        logger.warning(f"OCREnginePool: 后端 {backend} 不可用，改用自动选择")
+    return PlatformAdapter.get_ocr_engine()
+
+
+class _Slot:
+    """一个后端的引擎及其状态"""
+
+    def __init__(self):
+        self.engine: Optional[OCREngine] = None
+        self.loading = False
+        self.ready = threading.Event()
+        self.use_lock = threading.Lock()     # 串行化识别调用
+        self.leases = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.failed_at = None                # 上次加载失败的时间
+
+
+class OCREnginePool:
+    """按后端名共享 OCR 引擎，懒加载 + 空闲卸载（线程安全）"""
+
+    def __init__(self, factory: Callable[[str], OCREngine] = _default_factory, idle_timeout: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            factory: factory(后端名) -> OCREngine，在后台线程中调用
+            idle_timeout: 空闲多少秒后卸载引擎（<= 0 表示不卸载）
+            clock: 时间源（测试用）
+        """
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._slots: Dict[str, _Slot] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._closed = False
+
+    def _slot(self, backend: str) -> _Slot:
+        slot = self._slots.get(backend)
+        if slot is None:
+            slot = self._slots[backend] = _Slot()
+        return slot
+
+    def prefetch(self, backend: str = DEFAULT_BACKEND):
+        """在后台线程加载引擎（已加载或正在加载时什么也不做）"""
+        with self._lock:
+            slot = self._slot(backend)
+            start = self._begin_load(slot)
+        if start:
+            self._spawn_load(backend, slot)
+
+    def _begin_load(self, slot: _Slot) -> bool:
+        """（持有 _lock 时调用）需要加载时把槽标记为加载中，返回是否要启动加载线程"""
+        if slot.engine is not None or slot.loading:
+            return False
+        if slot.failed_at is not None and self.clock() - slot.failed_at < RETRY_INTERVAL:
+            return False
+        slot.loading = True
+        slot.ready.clear()
+        return True
+
+    def _spawn_load(self, backend: str, slot: _Slot):
+        threading.Thread(target=self._load, args=(backend, slot), name=f"OCRLoad-{backend}", daemon=True).start()
+
+    def _load(self, backend: str, slot: _Slot):
+        start = time.perf_counter()
+        try:
+            engine = self.factory(backend)
+        except Exception as e:
+            logger.error(f"OCREnginePool: 加载 {backend} 引擎失败: {e}")
+            engine = None
+        with self._lock:
+            slot.engine = engine
+            slot.loading = False
+            slot.last_used = self.clock()
+            if engine is not None:
+                slot.loads += 1
+                slot.failed_at = None
+            else:
+                slot.failed_at = slot.last_used
+            slot.ready.set()
+        if engine is not None:
+            logger.info(f"OCREnginePool: {backend} 引擎已加载 ({getattr(engine, 'name', '?')}, "
+                        f"{(time.perf_counter() - start) * 1000:.0f}ms)")
+            self._ensure_reaper()
+
+    @contextmanager
+    def lease(self, backend: str = DEFAULT_BACKEND, timeout: Optional[float] = None) -> Iterator[Optional[OCREngine]]:
+        """
+        借用引擎（with 块内独占该引擎）
+
+        Args:
+            timeout: 引擎尚未加载时最多等待的秒数；None 一直等，0 不等待
+        Yields:
+            引擎；在 timeout 内没有加载完成或加载失败时为 None（调用方跳过本次 OCR）
+        """
+        # 计入租约和启动加载在同一次加锁内完成：中间如果放开锁，后台检查可能恰好卸载引擎，
+        # 而此时没有加载在进行，ready 永远不会再被置位
+        with self._lock:
+            slot = self._slot(backend)
+            slot.leases += 1
+            start = self._begin_load(slot)
+        if start:
+            self._spawn_load(backend, slot)
+        try:
+            ready = slot.ready.wait(timeout)
+            if not ready:
+                # 超时后再确认一次：加载可能恰好在超时边界完成
+                with self._lock:
+                    ready = slot.engine is not None
+            if ready:
+                with slot.use_lock:
+                    engine = slot.engine
+                    if engine is not None:
+                        yield engine
+                        return
+            yield None
+        finally:
+            with self._lock:
+                slot.leases -= 1
+                slot.last_used = self.clock()
+
+    def is_loaded(self, backend: str = DEFAULT_BACKEND) -> bool:
+        with self._lock:
+            slot = self._slots.get(backend)
+            return slot is not None and slot.engine is not None
+
+    def unload(self, backend: str) -> bool:
+        """卸载引擎（正在使用或正在加载时不卸载）"""
+        with self._lock:
+            slot = self._slots.get(backend)
+            if slot is None or slot.engine is None or slot.leases > 0 or slot.loading:
+                return False
+            slot.engine = None
+            slot.ready.clear()
+        # 释放 ONNX 会话占用的内存
+        gc.collect()
+        logger.info(f"OCREnginePool: {backend} 引擎已卸载")
+        return True
+
+    def release_idle(self, now: Optional[float] = None) -> list:
+        """卸载空闲超时的引擎，返回被卸载的后端名"""
+        if self.idle_timeout <= 0:
+            return []
+        now = self.clock() if now is None else now
+        with self._lock:
+            idle = [name for name, slot in self._slots.items()
+                    if slot.engine is not None and slot.leases == 0 and now - slot.last_used >= self.idle_timeout]
+        return [name for name in idle if self.unload(name)]
+
+    def set_idle_timeout(self, seconds: float):
+        self.idle_timeout = seconds
+        self._wakeup.set()
+
+    def _ensure_reaper(self):
+        with self._lock:
+            if self._reaper is not None or self._closed:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="OCRReaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            # 检查间隔随超时缩放，最长 30 秒
+            interval = min(30.0, self.idle_timeout / 4) if self.idle_timeout > 0 else 30.0
+            self._wakeup.wait(max(interval, 0.05))
+            self._wakeup.clear()
+            if not self._closed:
+                self.release_idle()
+
+    def shutdown(self):
+        """卸载全部引擎并停止后台检查"""
+        self._closed = True
+        self._wakeup.set()
+        for name in list(self._slots):
+            self.unload(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self.clock()
+            return {name: {"loaded": slot.engine is not None, "loading": slot.loading, "loads": slot.loads,
+                           "leases": slot.leases, "idle_s": round(now - slot.last_used, 1)}
+                    for name, slot in self._slots.items()}
+
+
+# 全局单例
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_engine_pool() -> OCREnginePool:
+    """获取进程内共享的 OCR 引擎池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OCREnginePool()
+    return _pool
@@ -2,25 +2,39 @@ import cv2
 from loguru import logger
 import config
 from utils.search_engine import FuzzySearcher
-from platforms.adapter import PlatformAdapter
+from services.ocr_engine_pool import DEFAULT_BACKEND, get_ocr_engine_pool
+from services.recognition_cache import OCRResultCache
 
 class OCRService:
-    def __init__(self, db_path):
+    def __init__(self, db_path, engine_pool=None, backend=DEFAULT_BACKEND, engine_timeout=None):
         """
         初始化 OCR 服务
         :param db_path: items_db.json 的路径
+        :param engine_pool: OCR 引擎池，默认使用进程内共享的引擎池（多个 OCRService 共用同一个引擎）
+        :param backend: 引擎后端名 ("auto" 按平台自动选择)
+        :param engine_timeout: 引擎尚未加载时最多等待的秒数；None 一直等，0 不等待（本次识别直接返回 None）
         """
+        self.engine_pool = engine_pool or get_ocr_engine_pool()
+        self.backend = backend
+        self.engine_timeout = engine_timeout
+        # 同一个详情框一直开着时，名字区域不变，直接返回上次解析出的 ID
+        self.result_cache = OCRResultCache(config.OCR_CACHE_SIZE, config.OCR_CACHE_TTL)
         try:
-            # 初始化 OCR 引擎
-            self.engine = PlatformAdapter.get_ocr_engine()
-            
-            # 初始化独立的模糊匹配引擎
+            # 初始化独立的模糊匹配引擎（每个数据库一份名字索引；OCR 引擎在第一次识别时才加载）
             self.searcher = FuzzySearcher(db_path)
             
-            logger.success("OCRService 初始化成功 (使用 RapidOCR + FuzzySearcher)")
+            logger.success("OCRService 初始化成功 (共享 OCR 引擎 + FuzzySearcher)")
         except Exception as e:
             logger.error(f"OCRService 初始化失败: {e}")
 
+    def _recognize(self, method, *args, **kwargs):
+        """借用共享引擎执行一次识别；引擎未就绪时返回 None"""
+        with self.engine_pool.lease(self.backend, self.engine_timeout) as engine:
+            if engine is None:
+                logger.debug("OCR 引擎尚未就绪，跳过本次识别")
+                return None
+            return getattr(engine, method)(*args, **kwargs)
+
     def _preprocess_for_ocr(self, img):
         """
         针对游戏详情框进行图像预处理
@@ -47,30 +61,65 @@ class OCRService:
         # RapidOCR 对黑白对比度敏感，我们确保文字是亮的
         return binary
 
+    @staticmethod
+    def crop_name_band(detail_crop):
+        """按 config.DETAIL_NAME_AREA 截取详情框顶部的名字区域"""
+        if detail_crop is None or detail_crop.size == 0:
+            return None
+        h, w = detail_crop.shape[:2]
+        area = config.DETAIL_NAME_AREA
+        band = detail_crop[int(h * area['top']):int(h * area['bottom']), int(w * area['left']):int(w * area['right'])]
+        return band if band.size > 0 else None
+
+    @staticmethod
+    def _first_line(raw_text):
+        """取 OCR 文本的第一行（详情框最顶部的文字），去掉空格，防止 OCR 识别出多余空格影响匹配"""
+        if not raw_text:
+            return None
+        lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
+        if not lines:
+            return None
+        return lines[0].replace(" ", "")
+
+    def _cache_key(self, detail_crop):
+        """名字区域经 _preprocess_for_ocr 二值化后的缩略图哈希；截不出名字区域时返回 None"""
+        band = self.crop_name_band(detail_crop)
+        if band is None:
+            return None
+        return self.result_cache.band_key(self._preprocess_for_ocr(band))
+
+    def cache_stats(self):
+        return self.result_cache.stats()
+
     def recognize_card_id(self, detail_crop):
         if detail_crop is None or detail_crop.size == 0:
             return None
 
         try:
-            # 1. 这里的 raw_text 已经是一个字符串了，例如 "港口\n费：3"
-            raw_text = self.engine.recognize(detail_crop)
+            # 0. 名字区域和上次完全相同：不再调用 OCR 引擎
+            key = self._cache_key(detail_crop)
+            if key is not None:
+                hit, item_id = self.result_cache.get(key)
+                if hit:
+                    return item_id
 
-            if not raw_text:
-                return None
-
-            # 2. 直接按行切分
-            lines = [line.strip() for line in raw_text.split("\n") if line.strip()]
-            
-            if not lines:
+            # 1. 这里的 raw_text 已经是一个字符串了，例如 "港口\n费：3"
+            raw_text = self._recognize("recognize", detail_crop)
+            if raw_text is None:
+                # 引擎尚未就绪，本次没有识别，不缓存
                 return None
 
-            # 3. 拿到第一行（也就是详情框最顶部的文字）
-            first_line = lines[0]
+            # 2. 直接按行切分，拿到第一行（也就是详情框最顶部的文字）
+            clean_name = self._first_line(raw_text)
+            item_id = None
+            if clean_name:
+                logger.info(f"🔍 OCR 确权目标文字: '{clean_name}'")
+                # 3. 执行模糊匹配
+                item_id = self.searcher.find_best_match(clean_name, threshold=config.FUZZY_MATCH_THRESHOLD)
 
-            clean_name = first_line.replace(" ", "")  # 去掉空格，防止 OCR 识别出多余空格影响匹配
-            logger.info(f"🔍 OCR 确权目标文字: '{clean_name}' (原始: '{first_line}')")
-            # 4. 执行模糊匹配
-            return self.searcher.find_best_match(clean_name, threshold=config.FUZZY_MATCH_THRESHOLD)
+            if key is not None:
+                self.result_cache.put(key, item_id)
+            return item_id
 
         except Exception as e:
             logger.error(f"OCRService 业务逻辑报错: {e}")
@@ -78,6 +127,60 @@ class OCRService:
             logger.error(traceback.format_exc()) # 打印详细堆栈方便定位
             return None
 
+    def recognize_card_ids(self, detail_crops):
+        """
+        🔥 批量确权：只截取每个详情框的名字区域（单行文字），整批交给引擎一次识别，
+        再用一次批量模糊匹配解析所有名字
+        :param detail_crops: 详情框截图列表
+        :return: 与 detail_crops 一一对应的 item_id 或 None
+        """
+        if not detail_crops:
+            return []
+        try:
+            results = [None] * len(detail_crops)
+            bands = [self.crop_name_band(crop) for crop in detail_crops]
+            # 命中缓存的名字区域不再送入 OCR 引擎
+            pending, keys = [], {}
+            for i, band in enumerate(bands):
+                if band is None:
+                    continue
+                keys[i] = self.result_cache.band_key(self._preprocess_for_ocr(band))
+                hit, item_id = self.result_cache.get(keys[i])
+                if hit:
+                    results[i] = item_id
+                else:
+                    pending.append(i)
+            if not pending:
+                return results
+
+            texts = self._recognize("recognize_batch", [bands[i] for i in pending], single_line=True)
+            if texts is None:
+                return results
+            names = [self._first_line(text) for text in texts]
+            logger.debug(f"🔍 OCR 批量确权目标文字: {names}")
+            matched = self.searcher.find_best_matches(
+                [name or "" for name in names], threshold=config.FUZZY_MATCH_THRESHOLD)
+            for i, item_id in zip(pending, matched):
+                results[i] = item_id
+                self.result_cache.put(keys[i], item_id)
+            return results
+        except Exception as e:
+            logger.error(f"OCRService 批量识别报错: {e}")
+            return [None] * len(detail_crops)
+
+    def recognize_detail_boxes(self, frame, detections):
+        """
+        一帧 YOLO 结果中的全部 DETAIL 框一次确权
+        :param detections: YOLO 检测结果 [{'class_id', 'box': (x, y, w, h)}, ...]
+        :return: [(box, item_id 或 None), ...]
+        """
+        boxes = [d['box'] for d in detections if d['class_id'] == config.CLS_MAP['DETAIL']]
+        crops = []
+        for x, y, w, h in boxes:
+            x, y = max(0, int(x)), max(0, int(y))
+            crops.append(frame[y:y + int(h), x:x + int(w)])
+        return list(zip(boxes, self.recognize_card_ids(crops)))
+
     def debug_save_ocr_step(self, detail_crop, filename="logs/ocr_debug.png"):
         """ 调试用：保存预处理后的图片，看看 OCR 引擎到底看到了什么 """
         processed = self._preprocess_for_ocr(detail_crop)
@@ -0,0 +1,187 @@
+"""
+识别结果缓存 (Recognition Cache)
+悬停识别的结果按截图块的感知哈希缓存：鼠标在已经识别过的几件物品之间来回移动时，
+直接返回上次的 (type, id, name)，不再做 ORB 提取和特征库比对
+
+- 键：截图块灰度缩放到 9x9 后的 dHash（128 位）+ 平均颜色，按 识别类别/尺寸 分区
+- 查找：同分区内 dHash 汉明距离 <= tolerance 且平均颜色接近即命中（容忍检测框的几个像素抖动）
+- LRU 淘汰，只缓存识别成功的结果
+
+OCRResultCache 是 OCR 确权用的精确缓存（名字区域二值化后的哈希 -> 物品 ID，带过期时间）
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def crop_signature(crop: np.ndarray) -> Tuple[int, Tuple[float, float, float]]:
+    """截图块的 (128 位 dHash, 平均 BGR 颜色)：灰度缩放到 9x9，水平和垂直相邻像素各比较一次"""
+    small = cv2.resize(crop, (9, 9), interpolation=cv2.INTER_AREA)
+    gray = (cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small).astype(np.int16)
+    bits = np.concatenate([(gray[:-1, 1:] > gray[:-1, :-1]).ravel(), (gray[1:, :-1] > gray[:-1, :-1]).ravel()])
+    dhash = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    mean = small.reshape(-1, small.shape[2]).mean(axis=0) if small.ndim == 3 else np.repeat(small.mean(), 3)
+    return dhash, tuple(float(c) for c in mean)
+
+
+class RecognitionCache:
+    """线程安全的感知哈希 LRU 缓存（识别线程池中多个线程同时使用）"""
+
+    def __init__(self, capacity: int = 256, tolerance: int = 16, color_tolerance: float = 12.0):
+        """
+        Args:
+            capacity: 最多缓存的截图块数
+            tolerance: dHash 汉明距离上限（128 位中最多允许不同的位数）
+                在随包 1066 张卡图上，不同卡牌落在 16 以内的只有画面几乎相同的重复卡图
+            color_tolerance: 平均颜色每个通道的最大差值
+        """
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.color_tolerance = color_tolerance
+        self._lock = threading.Lock()
+        # (dhash, 分区) -> (平均颜色, 结果)，按最近使用排序
+        self._entries: "OrderedDict[Tuple[int, Any], Tuple[Tuple[float, float, float], Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._hit_seconds = 0.0
+        self._miss_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, crop: np.ndarray, category) -> Tuple[Optional[Any], Tuple[int, Tuple[float, float, float]]]:
+        """
+        Returns:
+            (缓存的结果或 None, 截图块签名)；签名留给 put() 使用，避免重复计算
+        """
+        signature = crop_signature(crop)
+        dhash, color = signature
+        with self._lock:
+            best_key, best_distance = None, self.tolerance + 1
+            for key, (cached_color, _result) in self._entries.items():
+                if key[1] != category:
+                    continue
+                distance = bin(key[0] ^ dhash).count("1")
+                if distance < best_distance and \
+                        max(abs(a - b) for a, b in zip(color, cached_color)) <= self.color_tolerance:
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                return None, signature
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1], signature
+
+    def put(self, signature, category, result):
+        if result is None:
+            return
+        dhash, color = signature
+        with self._lock:
+            self._entries[(dhash, category)] = (color, result)
+            self._entries.move_to_end((dhash, category))
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, crop: np.ndarray, category, compute: Callable[[], Any]):
+        """命中直接返回缓存结果，否则调用 compute() 并缓存成功的结果；同时记录命中率和耗时"""
+        start = time.perf_counter()
+        result, signature = self.lookup(crop, category)
+        if result is not None:
+            with self._lock:
+                self.hits += 1
+                self._hit_seconds += time.perf_counter() - start
+            return result
+
+        result = compute()
+        self.put(signature, category, result)
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += time.perf_counter() - start
+        return result
+
+    def clear(self):
+        """特征库或名称表变化后清空"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "hit_ms": round(self._hit_seconds / self.hits * 1000, 3) if self.hits else 0.0,
+                "miss_ms": round(self._miss_seconds / self.misses * 1000, 2) if self.misses else 0.0,
+            }
+
+
+class OCRResultCache:
+    """
+    OCR 结果缓存：详情框一直开着时，每帧的名字区域像素完全相同，直接返回上次解析出的 ID
+    键是二值化缩略图的哈希（精确匹配），条目超过 ttl 秒过期，超过容量按 LRU 淘汰
+    """
+
+    def __init__(self, capacity: int = 64, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # 键 -> (写入时间, 结果)，按最近使用排序
+        self._entries: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def band_key(binary: np.ndarray, size: Tuple[int, int] = (128, 20)) -> bytes:
+        """二值图缩小到 size 后重新二值化、按位打包再取哈希（对重采样带来的个别像素差异不敏感）"""
+        small = cv2.resize(binary, size, interpolation=cv2.INTER_AREA) > 127
+        return hashlib.blake2b(np.packbits(small).tobytes(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Tuple[bool, Any]:
+        """
+        Returns:
+            (是否命中, 缓存的结果)；结果可以是 None（识别过但没有匹配到名字）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key: bytes, result: Any):
+        with self._lock:
+            self._entries[key] = (self.clock(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,190 @@
+"""
+扫描帧率调度器 (Frame Governor)
+按配置的 yolo_fps 调度 AutoScanner 循环：每帧的休眠时间扣除处理耗时，
+并用测得的处理耗时把平均 CPU 占用限制在预算内；画面闲置或游戏在后台时逐步退避
+"""
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+
+
+class FrameGovernor:
+    """
+    帧率调度
+
+    - 扫描帧：begin_frame() / end_frame()，目标周期 = max(1/目标帧率, 处理耗时/CPU预算)
+    - 检测结果和鼠标都没变化超过 idle_after 秒：降到 idle_fps，鼠标一动立即恢复
+    - 悬停识别进行中（responsive）：不做闲置退避
+    - 非扫描状态（暂停、等待进程/窗口、后台）：wait(state)，同一状态连续出现时间隔翻倍直到上限
+    """
+
+    # 非扫描状态的退避间隔：(初始, 上限) 秒
+    STATE_BACKOFF = {
+        "disabled": (0.5, 2.0),
+        "no_process": (1.0, 5.0),
+        "background": (0.25, 2.0),
+        "no_window": (0.5, 3.0),
+        "no_frame": (0.05, 0.5),
+        "error": (1.0, 5.0),
+    }
+
+    def __init__(self, target_fps: float = 10.0, cpu_budget: float = 0.5, idle_fps: float = 2.0,
+                 idle_after: float = 1.5, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            target_fps: 目标帧率（来自配置 yolo_fps）
+            cpu_budget: 扫描线程平均占用单核的比例上限 (0, 1]
+            idle_fps: 闲置时的帧率
+            idle_after: 连续无变化多少秒后进入闲置
+            clock / sleep: 时钟和休眠函数（测试时可替换）
+        """
+        self.cpu_budget = cpu_budget
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self._clock = clock
+        self._sleep = sleep
+        self.set_target_fps(target_fps)
+
+        self._frame_start = None
+        self._last_frame_start = None
+        self._cost_ema = None       # 每帧处理耗时（秒）
+        self._interval_ema = None   # 实际帧间隔（秒）
+        self._idle_since = None
+        self._backoff_state = None
+        self._backoff_interval = 0.0
+        self._last_report = 0.0
+
+    def set_target_fps(self, fps):
+        try:
+            fps = float(fps)
+        except (TypeError, ValueError):
+            fps = 10.0
+        self.target_fps = min(max(fps, 0.5), 60.0)
+
+    @property
+    def frame_cost(self) -> float:
+        """平滑后的每帧处理耗时（秒）"""
+        return self._cost_ema or 0.0
+
+    @property
+    def achieved_fps(self) -> float:
+        """平滑后的实际帧率"""
+        return 1.0 / self._interval_ema if self._interval_ema else 0.0
+
+    @property
+    def is_idle(self) -> bool:
+        return self._idle_since is not None and self._clock() - self._idle_since >= self.idle_after
+
+    # ------------------------------------------------------------------
+    # 扫描帧
+    # ------------------------------------------------------------------
+
+    def begin_frame(self):
+        now = self._clock()
+        if self._last_frame_start is not None:
+            self._interval_ema = self._ema(self._interval_ema, now - self._last_frame_start)
+        self._last_frame_start = now
+        self._frame_start = now
+        self._backoff_state = None
+
+    def end_frame(self, changed: bool = True, responsive: bool = False, hold: float = 0.0,
+                  wake: Optional[Callable[[], bool]] = None) -> float:
+        """
+        结束一帧并休眠到下一帧
+
+        Args:
+            changed: 本帧检测结果或鼠标位置是否有变化
+            responsive: 悬停识别进行中，保持目标帧率
+            hold: 最少休眠时间（例如热键防抖）
+            wake: 闲置退避期间定期调用，返回 True 时提前结束休眠（例如鼠标移动）
+
+        Returns:
+            实际休眠的秒数
+        """
+        now = self._clock()
+        cost = now - self._frame_start if self._frame_start is not None else 0.0
+        self._cost_ema = self._ema(self._cost_ema, cost)
+
+        if changed or responsive:
+            self._idle_since = None
+        elif self._idle_since is None:
+            self._idle_since = now
+
+        active_period = self._active_period()
+        delay = max(active_period - cost, hold, 0.0)
+        if delay > 0:
+            self._sleep(delay)
+
+        if not responsive and self.is_idle:
+            delay += self._idle_sleep(1.0 / self.idle_fps - active_period, active_period, wake)
+        return delay
+
+    def current_period(self) -> float:
+        """当前帧周期（闲置时为 1/idle_fps），供截图线程对齐节奏"""
+        period = self._active_period()
+        if self.is_idle:
+            period = max(period, 1.0 / self.idle_fps)
+        return period
+
+    def _active_period(self) -> float:
+        """目标帧周期：不低于 1/目标帧率，且保证 处理耗时/周期 <= CPU预算"""
+        period = 1.0 / self.target_fps
+        if self._cost_ema:
+            period = max(period, self._cost_ema / self.cpu_budget)
+        return period
+
+    def _idle_sleep(self, extra: float, slice_len: float, wake) -> float:
+        """闲置时额外休眠，按帧周期分片检查 wake，保证悬停响应不超过一个正常帧周期"""
+        slept = 0.0
+        while slept < extra:
+            if wake is not None and wake():
+                self._idle_since = None
+                break
+            step = min(slice_len, extra - slept)
+            self._sleep(step)
+            slept += step
+        return slept
+
+    # ------------------------------------------------------------------
+    # 非扫描状态
+    # ------------------------------------------------------------------
+
+    def wait(self, state: str) -> float:
+        """非扫描状态下休眠（同一状态连续出现时指数退避）"""
+        initial, maximum = self.STATE_BACKOFF.get(state, (1.0, 1.0))
+        if self._backoff_state != state:
+            self._backoff_state = state
+            self._backoff_interval = initial
+        else:
+            self._backoff_interval = min(self._backoff_interval * 2, maximum)
+        # 中断的帧间隔不计入实际帧率
+        self._last_frame_start = None
+        self._idle_since = None
+        self._sleep(self._backoff_interval)
+        return self._backoff_interval
+
+    # ------------------------------------------------------------------
+    # 状态报告
+    # ------------------------------------------------------------------
+
+    def report_due(self, interval: float = 1.0) -> bool:
+        """距离上次报告超过 interval 秒时返回 True"""
+        now = self._clock()
+        if now - self._last_report >= interval:
+            self._last_report = now
+            return True
+        return False
+
+    def status_text(self) -> str:
+        text = f"Scanning Active ({self.achieved_fps:.1f}/{self.target_fps:g} FPS"
+        if self.is_idle:
+            text += ", idle"
+        text += ")"
+        logger.trace(f"[FrameGovernor] {text} | 每帧耗时 {self.frame_cost * 1000:.1f}ms")
+        return text
+
+    @staticmethod
+    def _ema(current, sample, alpha: float = 0.2):
+        return sample if current is None else current + alpha * (sample - current)
@@ -0,0 +1,270 @@
+"""
+扫描流水线 (Scan Pipeline)
+把 AutoScanner 的 截图 → 检测 → 识别 拆成独立阶段：
+- CaptureWorker: 独立线程按固定节奏截图，写入"只保留最新一帧"的 LatestSlot
+- 检测阶段: AutoScanner 线程从 LatestSlot 取最新帧做 YOLO + 命中测试
+- RecognitionPool: ORB 识别线程池（OpenCV 计算时释放 GIL），慢识别不再阻塞截图和检测
+每个阶段都记录队列深度和耗时
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+@dataclass
+class FramePacket:
+    """一帧截图及其元数据"""
+    frame: np.ndarray
+    region: Tuple[int, int, int, int]  # 截图时的窗口区域 (x, y, w, h)
+    captured_at: float                 # time.perf_counter()
+    seq: int
+
+
+class StageStats:
+    """单个阶段的耗时/吞吐统计（线程安全）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.count = 0
+        self.dropped = 0
+        self.latency_ms = 0.0      # 平滑后的单次耗时
+        self.max_latency_ms = 0.0
+        self.interval_ms = 0.0     # 平滑后的相邻两次完成间隔
+        self.jitter_ms = 0.0       # 间隔的平滑绝对偏差
+        self._last_done = None
+
+    def record(self, latency_s: float, done_at: Optional[float] = None):
+        done_at = time.perf_counter() if done_at is None else done_at
+        latency_ms = latency_s * 1000
+        with self._lock:
+            self.count += 1
+            self.latency_ms = latency_ms if self.count == 1 else self.latency_ms + 0.2 * (latency_ms - self.latency_ms)
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+            if self._last_done is not None:
+                interval = (done_at - self._last_done) * 1000
+                if self.interval_ms:
+                    self.jitter_ms += 0.2 * (abs(interval - self.interval_ms) - self.jitter_ms)
+                    self.interval_ms += 0.2 * (interval - self.interval_ms)
+                else:
+                    self.interval_ms = interval
+            self._last_done = done_at
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def snapshot(self, depth: int = 0) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "dropped": self.dropped,
+                "depth": depth,
+                "latency_ms": round(self.latency_ms, 2),
+                "max_latency_ms": round(self.max_latency_ms, 2),
+                "interval_ms": round(self.interval_ms, 2),
+                "jitter_ms": round(self.jitter_ms, 2),
+            }
+
+
+class LatestSlot:
+    """
+    容量为 1 的"最新帧优先"队列
+
+    put() 总是覆盖旧帧（被覆盖且未被取走的帧计为丢弃），get() 阻塞直到有比上次取到的更新的帧
+    """
+
+    def __init__(self, stats: Optional[StageStats] = None):
+        self._cond = threading.Condition()
+        self._item = None
+        self._version = 0
+        self._taken = 0
+        self.stats = stats
+
+    @property
+    def depth(self) -> int:
+        return 1 if self._version > self._taken else 0
+
+    def put(self, item):
+        with self._cond:
+            if self._version > self._taken and self.stats:
+                self.stats.record_drop()
+            self._item = item
+            self._version += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None):
+        """取最新帧；超时返回 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._version > self._taken, timeout):
+                return None
+            self._taken = self._version
+            return self._item
+
+    def clear(self):
+        with self._cond:
+            self._item = None
+            self._taken = self._version
+
+
+class CaptureWorker(threading.Thread):
+    """
+    截图线程
+
+    截图器在本线程内创建（MSS/DXCam 的句柄与线程绑定），按 interval 固定节奏截图，
+    休眠时间扣除截图耗时；未激活（暂停、后台、无窗口）时不截图
+    """
+
+    def __init__(self, capturer_factory: Callable[[], Any], slot: LatestSlot,
+                 interval: float = 0.1, stats: Optional[StageStats] = None):
+        super().__init__(name="ScanCapture", daemon=True)
+        self._capturer_factory = capturer_factory
+        self.capturer = None
+        self.slot = slot
+        self._interval = interval
+        self.stats = stats or StageStats("capture")
+        self._region = None
+        self._active = threading.Event()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._seq = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, value: float):
+        # 节奏变快（例如闲置结束）时立即唤醒，不用等完上一个长间隔
+        if value < self._interval:
+            self._wake.set()
+        self._interval = value
+
+    def set_region(self, region: Tuple[int, int, int, int]):
+        self._region = tuple(region)
+
+    def resume(self):
+        self._active.set()
+
+    def pause(self):
+        if self._active.is_set():
+            self._active.clear()
+            self.slot.clear()
+
+    def stop(self):
+        self._stopped.set()
+        self._active.set()
+        self._wake.set()
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        """等待截图器在线程内初始化完成"""
+        return self._ready.wait(timeout)
+
+    def run(self):
+        try:
+            self.capturer = self._capturer_factory()
+        except Exception as e:
+            logger.error(f"[ScanPipeline] 截图器初始化失败: {e}")
+        finally:
+            self._ready.set()
+
+        while not self._stopped.is_set():
+            self._active.wait()
+            if self._stopped.is_set():
+                break
+            region = self._region
+            if self.capturer is None or region is None:
+                self._stopped.wait(self._interval)
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.capturer.set_region(region)
+                frame = self.capturer.capture()
+            except Exception as e:
+                logger.warning(f"[ScanPipeline] 截图失败: {e}")
+                frame = None
+            done = time.perf_counter()
+
+            if frame is not None:
+                self._seq += 1
+                self.slot.put(FramePacket(frame, region, done, self._seq))
+                self.stats.record(done - start, done)
+
+            delay = self._interval - (time.perf_counter() - start)
+            if delay > 0:
+                self._wake.wait(delay)
+            self._wake.clear()
+
+        release = getattr(self.capturer, "release", None)
+        if release:
+            try:
+                release()
+            except Exception:
+                pass
+
+
+class RecognitionPool:
+    """
+    识别线程池
+
+    同一个 key（悬停对象）同时只识别一次：重复提交会合并到进行中的任务，
+    所有提交者的回调在结果出来后依次调用（在线程池线程中）
+    """
+
+    def __init__(self, max_workers: int = 2, stats: Optional[StageStats] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ScanRecognize")
+        self._lock = threading.Lock()
+        self._pending: Dict[Any, list] = {}
+        self.stats = stats or StageStats("recognize")
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, key, fn: Callable, *args, callback: Optional[Callable[[Any], None]] = None) -> bool:
+        """
+        提交识别任务
+
+        Returns:
+            True 表示新建了任务；False 表示合并到了进行中的同 key 任务
+        """
+        with self._lock:
+            if key in self._pending:
+                if callback:
+                    self._pending[key].append(callback)
+                return False
+            self._pending[key] = [callback] if callback else []
+        self._executor.submit(self._run, key, fn, args)
+        return True
+
+    def _run(self, key, fn, args):
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            logger.error(f"[ScanPipeline] 识别失败: {e}")
+            result = None
+        self.stats.record(time.perf_counter() - start)
+
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"[ScanPipeline] 识别回调异常: {e}")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+"""
+游戏会话事件
+LogAnalyzer 在解析过程中按发生顺序产生这些事件，下游（战绩记录、浮窗、analytics）
+可以只处理增量，而不必每次对比整个会话列表
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from services.log_analyzer import GameSession
+
+
+@dataclass
+class SessionEvent:
+    """所有会话事件的基类"""
+    session: "GameSession"
+    timestamp: Optional[str]  # 日志时间戳，格式: HH:MM:SS.mmm
+
+
+@dataclass
+class RunStarted(SessionEvent):
+    """新的一局开始（[GameInstance] Starting new run...）"""
+
+
+@dataclass
+class HeroPicked(SessionEvent):
+    """识别到本局英雄"""
+    hero: str = ""
+
+
+@dataclass
+class CardPurchased(SessionEvent):
+    """玩家购买/获得物品"""
+    instance_id: str = ""
+    template_id: str = ""
+    target: str = ""
+    section: str = ""
+
+
+@dataclass
+class PvpStarted(SessionEvent):
+    """进入PVP战斗（PVPCombatState）"""
+    day: int = 1
+
+
+@dataclass
+class BoardSnapshot(SessionEvent):
+    """PVP中双方棋盘的全量更新（Cards Spawned）"""
+    player_items: List[Dict] = field(default_factory=list)
+    opponent_items: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class PvpEnded(SessionEvent):
+    """PVP战斗结束（进入ReplayState），battle 即追加到 session.pvp_battles 的记录"""
+    battle: Dict = field(default_factory=dict)
+    victory: bool = False
+    duration: Optional[float] = None
+    day: int = 1
+
+
+@dataclass
+class RunEnded(SessionEvent):
+    """整局结束（EndRunVictoryState / EndRunDefeatState）"""
+    victory: bool = False
+
+
+@dataclass
+class RunMerged(SessionEvent):
+    """游戏重启/崩溃导致分裂的会话被合并：merged_session_id 已并入 session 并从列表中移除"""
+    merged_session_id: str = ""
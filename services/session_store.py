@@ -0,0 +1,324 @@
+"""
+会话缓存存储
+快照（sessions_cache.json）+ 追加写日志（sessions_journal.jsonl）：
+每次PVP结束只追加本场战斗和变化的字段，而不是重写全部历史；
+日志超过快照大小时压缩为新快照（临时文件 + 原子替换）
+同一日志目录请通过 get_session_store() 取共享实例：各自维护视图的多个写入者会重复追加记录
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+
+class SessionStore:
+    """
+    会话缓存的持久化
+
+    日志记录（每行一个JSON，带递增的seq）:
+        {"seq": 1, "op": "put",   "session": {...}}        新会话（完整to_dict()）
+        {"seq": 2, "op": "set",   "id": "...", "fields": {...}}  标量字段变化（天数、结束状态、英雄等）
+        {"seq": 3, "op": "items", "id": "...", "items": {...}}   新增/变化的物品
+        {"seq": 4, "op": "pvp",   "id": "...", "battles": [...]} 新追加的PVP战斗
+        {"seq": 5, "op": "del",   "id": "..."}              会话被合并/移除
+
+    快照记录已包含的最大seq，加载时跳过 seq <= 快照seq 的日志记录，
+    所以"快照已替换、日志尚未清空"时崩溃也不会重复应用；
+    末尾写了一半的行（进程被杀）直接丢弃，之前的记录不受影响
+    """
+
+    SNAPSHOT_FILE = "sessions_cache.json"
+    JOURNAL_FILE = "sessions_journal.jsonl"
+    SNAPSHOT_VERSION = 2
+    # 日志超过 max(快照大小, 该值) 时压缩，摊还后每字节只重写常数次
+    COMPACT_MIN_BYTES = 256 * 1024
+
+    # 会随解析推进而变化的标量字段（session_id/start_time/start_line/log_file_date 创建后不变）
+    MUTABLE_FIELDS = ('end_time', 'end_line', 'days', 'is_finished', 'victory', 'hero')
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.snapshot_file = self.directory / self.SNAPSHOT_FILE
+        self.journal_file = self.directory / self.JOURNAL_FILE
+        # 已持久化的会话状态 {session_id: to_dict()形式}，用于计算增量
+        self._sessions: Dict[str, Dict] = {}
+        self._seq = 0
+        self._snapshot_bytes = 0
+        self._journal_bytes = 0
+        self._journal_torn = False
+        self._loaded = False
+        # 最近一次读/写后磁盘文件的状态；与磁盘不一致说明有其他写入者，写入前先重新加载
+        self._disk_state: Optional[Tuple] = None
+        # 分析器线程和历史页（清除缓存）可能同时访问
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def load(self) -> List[Dict]:
+        """读取快照并重放日志，返回按写入顺序排列的会话字典列表"""
+        with self._lock:
+            self._sessions = {}
+            self._seq = 0
+            self._snapshot_bytes = 0
+            snapshot_seq = 0
+
+            if self.snapshot_file.exists():
+                try:
+                    with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    # 旧版缓存是会话列表本身（indent=2全量重写的格式）
+                    if isinstance(data, list):
+                        sessions = data
+                    else:
+                        sessions = data.get('sessions', [])
+                        snapshot_seq = data.get('seq', 0)
+                    self._sessions = {s['session_id']: s for s in sessions}
+                    self._snapshot_bytes = self.snapshot_file.stat().st_size
+                except Exception as e:
+                    logger.warning(f"[SessionStore] 读取快照失败: {e}")
+                    self._sessions = {}
+                    self._snapshot_bytes = 0
+            self._seq = snapshot_seq
+            self._journal_bytes = 0
+            self._journal_torn = False
+
+            if self.journal_file.exists():
+                replayed = 0
+                try:
+                    with open(self.journal_file, 'rb') as f:
+                        for raw in f:
+                            self._journal_torn = not raw.endswith(b"\n")
+                            try:
+                                record = json.loads(raw)
+                            except ValueError:
+                                # 崩溃时写了一半的行，之后的追加会另起一行，所以只跳过这一行
+                                logger.warning(f"[SessionStore] 丢弃不完整的日志记录 ({len(raw)} 字节)")
+                                continue
+                            seq = record.get('seq', 0)
+                            if seq <= snapshot_seq:
+                                continue
+                            self._apply(record)
+                            self._seq = max(self._seq, seq)
+                            replayed += 1
+                    self._journal_bytes = self.journal_file.stat().st_size
+                except Exception as e:
+                    logger.warning(f"[SessionStore] 重放日志失败: {e}")
+                logger.debug(f"[SessionStore] 重放了 {replayed} 条日志记录")
+
+            self._loaded = True
+            self._disk_state = self._stat_files()
+            return list(self._sessions.values())
+
+    def _stat_files(self) -> Tuple:
+        """快照和日志文件的 (inode, 大小, 修改时间)，不存在为None"""
+        state = []
+        for path in (self.snapshot_file, self.journal_file):
+            try:
+                st = path.stat()
+                state.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def _refresh(self):
+        """未加载或磁盘文件被其他写入者改过时重新加载，保证增量基于最新状态计算"""
+        if not self._loaded or self._stat_files() != self._disk_state:
+            if self._loaded:
+                logger.debug("[SessionStore] 缓存文件已被其他写入者修改，重新加载")
+            self.load()
+
+    def _apply(self, record: Dict):
+        """把一条日志记录应用到内存状态（重放和写入共用，保证两者一致）"""
+        op = record.get('op')
+        if op == 'put':
+            session = record['session']
+            self._sessions[session['session_id']] = session
+            return
+
+        session = self._sessions.get(record.get('id'))
+        if session is None:
+            return
+        if op == 'set':
+            session.update(record['fields'])
+        elif op == 'items':
+            session.setdefault('items', {}).update(record['items'])
+        elif op == 'pvp':
+            session.setdefault('pvp_battles', []).extend(record['battles'])
+        elif op == 'del':
+            del self._sessions[record['id']]
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def sync(self, sessions: Iterable, touched_ids: Optional[Iterable[str]] = None,
+             removed_ids: Iterable[str] = ()) -> int:
+        """
+        把会话的变化追加到日志
+
+        Args:
+            sessions: 当前的GameSession列表
+            touched_ids: 本批可能发生变化的会话ID；为None时比较全部会话，
+                并删除sessions中已不存在的缓存会话
+            removed_ids: 已被合并掉、需要从缓存删除的会话ID
+
+        Returns:
+            追加的记录数
+        """
+        with self._lock:
+            self._refresh()
+
+            sessions = list(sessions)
+            records = []
+
+            if touched_ids is None:
+                current_ids = {s.session_id for s in sessions}
+                removed = [sid for sid in self._sessions if sid not in current_ids]
+                candidates = sessions
+            else:
+                touched = set(touched_ids)
+                removed = [sid for sid in removed_ids if sid in self._sessions]
+                candidates = [s for s in sessions if s.session_id in touched]
+
+            for session_id in removed:
+                records.append({'op': 'del', 'id': session_id})
+            for session in candidates:
+                records.extend(self._diff(session))
+
+            if not records:
+                return 0
+
+            try:
+                self._append(records)
+            except Exception as e:
+                logger.exception(f"[SessionStore] 追加日志失败: {e}")
+                return 0
+
+            if self._journal_bytes > max(self._snapshot_bytes, self.COMPACT_MIN_BYTES):
+                self.compact()
+            return len(records)
+
+    def _diff(self, session) -> List[Dict]:
+        """计算单个会话相对已持久化状态的增量记录"""
+        stored = self._sessions.get(session.session_id)
+        if stored is None:
+            return [{'op': 'put', 'session': session.to_dict()}]
+
+        records = []
+        fields = {
+            name: getattr(session, name)
+            for name in self.MUTABLE_FIELDS
+            if stored.get(name) != getattr(session, name)
+        }
+        if fields:
+            records.append({'op': 'set', 'id': session.session_id, 'fields': fields})
+
+        stored_items = stored.get('items', {})
+        if session.items != stored_items:
+            changed = {
+                instance_id: dict(item)
+                for instance_id, item in session.items.items()
+                if stored_items.get(instance_id) != item
+            }
+            if changed:
+                records.append({'op': 'items', 'id': session.session_id, 'items': changed})
+
+        persisted = len(stored.get('pvp_battles', []))
+        if len(session.pvp_battles) > persisted:
+            records.append({'op': 'pvp', 'id': session.session_id, 'battles': session.pvp_battles[persisted:]})
+        elif len(session.pvp_battles) < persisted:
+            # 战斗记录只会追加；变少说明会话被重新解析，整体替换
+            records = [{'op': 'put', 'session': session.to_dict()}]
+        return records
+
+    def _append(self, records: List[Dict]):
+        """给记录编号并追加到日志文件（整批一次write + fsync）"""
+        lines = []
+        for record in records:
+            self._seq += 1
+            lines.append(json.dumps({'seq': self._seq, **record}, ensure_ascii=False))
+        payload = ("\n".join(lines) + "\n").encode('utf-8')
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 上一次写入若在行中途被打断，先补一个换行，避免新记录和残行粘在一起
+        if self._journal_torn:
+            payload = b"\n" + payload
+        with open(self.journal_file, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_bytes += len(payload)
+        self._journal_torn = False
+        self._disk_state = self._stat_files()
+
+        # 记录写入成功后再更新内存状态；经过JSON往返，避免与分析器共享可变对象
+        for line in lines:
+            self._apply(json.loads(line))
+
+    def compact(self):
+        """把当前状态写成新快照（临时文件 + 原子替换），然后清空日志"""
+        with self._lock:
+            # 压缩前先合并其他写入者追加的记录，否则会用旧视图覆盖掉它们
+            self._refresh()
+            snapshot = {
+                'version': self.SNAPSHOT_VERSION,
+                'seq': self._seq,
+                'sessions': list(self._sessions.values())
+            }
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=".sessions_", suffix=".tmp", dir=str(self.directory))
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(snapshot, f, ensure_ascii=False)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.snapshot_file)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                self._snapshot_bytes = self.snapshot_file.stat().st_size
+
+                # 快照已包含全部记录，此时崩溃也只会留下会被跳过的旧记录
+                with open(self.journal_file, 'wb'):
+                    pass
+                self._journal_bytes = 0
+                self._journal_torn = False
+                self._disk_state = self._stat_files()
+                logger.debug(f"[SessionStore] 已压缩为快照: {len(self._sessions)} 个会话, seq={self._seq}")
+            except Exception as e:
+                logger.exception(f"[SessionStore] 压缩快照失败: {e}")
+
+    def clear(self):
+        """删除快照和日志"""
+        with self._lock:
+            for path in (self.snapshot_file, self.journal_file):
+                if path.exists():
+                    path.unlink()
+            self._sessions = {}
+            self._seq = 0
+            self._snapshot_bytes = 0
+            self._journal_bytes = 0
+            self._journal_torn = False
+            self._loaded = True
+            self._disk_state = self._stat_files()
+
+
+_stores: Dict[str, SessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_session_store(directory) -> SessionStore:
+    """获取日志目录对应的共享 SessionStore（同一目录在进程内只有一个实例）"""
+    key = os.path.normcase(str(Path(directory).resolve()))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SessionStore(directory)
+        return store
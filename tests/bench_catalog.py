@@ -0,0 +1,82 @@
+"""
+游戏数据加载启动基准测试
+对比启动时各模块各自 json.load（旧实现）与共享 GameCatalog 的耗时和常驻内存（tracemalloc）
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager.game_catalog import GameCatalog, JSON_DIR, ITEMS_FILE, SKILLS_FILE, MONSTERS_FILE
+
+# 启动时（主程序 + 侧边栏页面 + 详情窗口）各模块加载的数据库文件
+STARTUP_LOADS = [
+    ("AutoScanner.item_map", ITEMS_FILE),
+    ("AutoScanner.monster_map", MONSTERS_FILE),
+    ("HistoryPage.log_analyzer", ITEMS_FILE),
+    ("HistoryPage.items_db", ITEMS_FILE),
+    ("CurrentItemsPage.items_db", ITEMS_FILE),
+    ("EncyclopediaPage.items_db", ITEMS_FILE),
+    ("EncyclopediaPage.skills_db", SKILLS_FILE),
+    ("DataLoader.items", ITEMS_FILE),
+    ("DataLoader.skills", SKILLS_FILE),
+    ("DataLoader.monsters", MONSTERS_FILE),
+    ("MonsterDatabase (get_monster_db)", MONSTERS_FILE),
+    ("MonsterDatabase (UnifiedDetailWindow)", MONSTERS_FILE),
+    ("MonsterDetailFloatWindow.items_db", ITEMS_FILE),
+    ("MonsterDetailFloatWindow.skills_db", SKILLS_FILE),
+]
+
+
+def load_legacy():
+    """旧实现：每个加载点各自解析一次"""
+    held = []
+    for _, filename in STARTUP_LOADS:
+        with open(JSON_DIR / filename, 'r', encoding='utf-8') as f:
+            held.append(json.load(f))
+    return held
+
+
+def load_catalog():
+    """新实现：所有加载点共享同一个目录，按需要的视图取数据"""
+    catalog = GameCatalog()
+    held = []
+    for label, filename in STARTUP_LOADS:
+        if filename == ITEMS_FILE:
+            held.append(catalog.item_names() if label.startswith("AutoScanner") else catalog.items_by_id())
+        else:
+            held.append(catalog.load_json(JSON_DIR / filename))
+    return held
+
+
+def measure(loader):
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = loader()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return elapsed, current, peak
+
+
+def main():
+    print(f"启动加载点: {len(STARTUP_LOADS)}  ({JSON_DIR})")
+    results = {"before": measure(load_legacy), "after": measure(load_catalog)}
+
+    print("\n" + "=" * 64)
+    print(f"{'版本':<8} | {'耗时(ms)':<10} | {'常驻内存(MB)':<12} | {'峰值内存(MB)':<12}")
+    print("-" * 64)
+    for label, (elapsed, current, peak) in results.items():
+        print(f"{label:<8} | {elapsed * 1000:10.1f} | {current / 1e6:12.1f} | {peak / 1e6:12.1f}")
+    print("-" * 64)
+    before, after = results["before"], results["after"]
+    print(f"耗时: {before[0] / after[0]:.1f}x  常驻内存: {before[1] / after[1]:.1f}x")
+    print("=" * 64 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+物品详情卡片构建基准测试
+测量只传 item_id 构建 100 张 ItemDetailCard 的耗时：
+旧实现每张卡片各自 json.load 整个数据库再线性查找，新实现走共享目录的 id 索引
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication
+
+from data_manager.game_catalog import get_game_catalog
+from gui.widgets.item_detail_card import ItemDetailCard
+
+CARD_COUNT = 100
+
+
+def legacy_load_item_data(self):
+    """旧实现：每张卡片解析一次整个数据库"""
+    db_path = "assets/json/skills_db.json" if self.item_type == "skill" else "assets/json/items_db.json"
+    with open(db_path, 'r', encoding='utf-8') as f:
+        db = json.load(f)
+        for item in db:
+            if item.get("id") == self.item_id:
+                return item
+    return {}
+
+
+def build_cards(item_ids):
+    start = time.perf_counter()
+    cards = [ItemDetailCard(item_id=item_id, item_type="item") for item_id in item_ids]
+    elapsed = time.perf_counter() - start
+    for card in cards:
+        card.deleteLater()
+    return elapsed
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    items = get_game_catalog().items()
+    item_ids = [items[i % len(items)]["id"] for i in range(CARD_COUNT)]
+
+    catalog_load = ItemDetailCard._load_item_data
+    ItemDetailCard._load_item_data = legacy_load_item_data
+    try:
+        before = build_cards(item_ids)
+    finally:
+        ItemDetailCard._load_item_data = catalog_load
+    after = build_cards(item_ids)
+    app.processEvents()
+
+    print("\n" + "=" * 48)
+    print(f"构建 {CARD_COUNT} 张 ItemDetailCard")
+    print("-" * 48)
+    print(f"{'before':<8} | {before * 1000:10.1f} ms")
+    print(f"{'after':<8} | {after * 1000:10.1f} ms")
+    print(f"加速: {before / after:.1f}x")
+    print("=" * 48 + "\n")
+
+
+if __name__ == "__main__":
+    main()
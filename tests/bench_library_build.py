@@ -0,0 +1,79 @@
+"""
+特征库构建基准测试（使用随包附带的卡图）
+- 旧版：逐张串行解码 + ORB，每次全量重建
+- 新版全量：进程池并行提取（CPU 核数 - 1 个进程）
+- 新版增量：模拟补丁后新增 10 张卡图，只提取新增的
+- 启动检查：卡图没变化时的 stat 检查耗时
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.comparators.feature_matcher import ORB_PARAMS, card_image_sources
+from core.comparators.library_builder import LibraryBuilder, is_current
+
+NEW_CARDS = 10
+
+
+def legacy_build(sources):
+    """旧版 _build_static_library 的串行循环"""
+    orb = cv2.ORB_create(**ORB_PARAMS)
+    lib = {size: {} for size in sources}
+    for size, items in sources.items():
+        for cid, path in items:
+            img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            kp, des = orb.detectAndCompute(img, None)
+            if des is not None:
+                lib[size][cid] = {'orb_des': des, 'kp_count': len(kp)}
+    return lib
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    sources = card_image_sources()
+    total = sum(len(items) for items in sources.values())
+    print(f"卡图数量: {total}, CPU 核数: {os.cpu_count()}")
+
+    legacy_ms, legacy = timed(legacy_build, sources)
+
+    builder = LibraryBuilder(ORB_PARAMS)
+    full_ms, (buckets, stamps) = timed(builder.build, sources)
+
+    # 模拟补丁新增卡图：上一次的库里少了 NEW_CARDS 张
+    dropped = {size: set(cid for cid, _ in items[:NEW_CARDS // len(sources) + 1]) for size, items in sources.items()}
+    old_sources = {size: [(cid, p) for cid, p in items if cid not in dropped[size]] for size, items in sources.items()}
+    old_buckets, old_stamps = LibraryBuilder(ORB_PARAMS).build(old_sources)
+    incr_ms, (incr_buckets, _) = timed(builder.build, sources, old_buckets, old_stamps)
+    extracted = builder.stats["extracted"]
+
+    check_ms, current = timed(is_current, sources, stamps)
+
+    same = all(np.array_equal(buckets[size][cid]['orb_des'], legacy[size][cid]['orb_des'])
+               and np.array_equal(incr_buckets[size][cid]['orb_des'], legacy[size][cid]['orb_des'])
+               for size in sources for cid in legacy[size])
+
+    print("\n" + "=" * 60)
+    print(f"{'场景':<20} | {'耗时(ms)':>10} | {'提取张数':>8}")
+    print("-" * 60)
+    print(f"{'旧版串行全量':<20} | {legacy_ms:10.1f} | {total:8d}")
+    print(f"{f'新版全量 ({builder.max_workers} 进程)':<20} | {full_ms:10.1f} | {total:8d}")
+    print(f"{'新版增量 (补丁新增)':<20} | {incr_ms:10.1f} | {extracted:8d}")
+    print(f"{'启动检查 (无变化)':<20} | {check_ms:10.1f} | {0:8d}")
+    print("=" * 60)
+    print(f"描述子与旧版一致: {same}, 无变化判定: {current}\n")
+
+
+if __name__ == "__main__":
+    main()
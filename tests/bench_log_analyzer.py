@@ -0,0 +1,177 @@
+"""
+LogAnalyzer 解析吞吐基准测试
+1. 对比旧版逐条 re.search 的 _process_line 与按组件分派的新版，输出 lines/sec 并校验解析结果一致
+2. 对比全量重新解析时 TRACE 追踪关闭/开启的耗时
+使用仓库自带的 assets/logs/Player-prev.log + Player.log
+"""
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from services.log_analyzer import LogAnalyzer
+from utils.logger import set_trace_enabled
+
+LOG_DIR = Path(__file__).parent.parent / "assets" / "logs"
+ROUNDS = 3
+
+
+class LegacyLogAnalyzer(LogAnalyzer):
+    """旧版实现：每行最多 8 次未编译的 re.search + list.pop(0)，仅用作基准对照"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._recent_lines = []
+
+    def _process_line(self, line: str, line_num: int):
+        self._recent_lines.append(line)
+        if len(self._recent_lines) > self._recent_lines_max:
+            self._recent_lines.pop(0)
+
+        timestamp_match = re.search(self.TIMESTAMP_PATTERN, line)
+        if not timestamp_match:
+            return
+        timestamp = timestamp_match.group(1)
+
+        if re.search(self.START_RUN_PATTERN, line):
+            self._handle_game_start(timestamp, line_num)
+            return
+
+        if not self.current_session:
+            return
+
+        hero_match = re.search(self.HERO_PATTERN, line)
+        if hero_match and not self.current_session.hero:
+            self.current_session.hero = hero_match.group(1)
+            return
+
+        state_match = re.search(self.STATE_CHANGE_PATTERN, line)
+        if state_match:
+            self._handle_state_change(state_match.group(1), timestamp, line_num, line)
+            return
+
+        purchase_match = re.search(self.CARD_PURCHASED_PATTERN, line)
+        if purchase_match:
+            instance_id, template_id, target, section = purchase_match.groups()
+            if "Player" in target and not instance_id.startswith("pvp_"):
+                self.current_session.add_item(instance_id, template_id, target, section)
+            elif "Opponent" in target:
+                if not hasattr(self, '_opponent_template_map'):
+                    self._opponent_template_map = {}
+                self._opponent_template_map[instance_id] = template_id
+            return
+
+        re.search(self.CARDS_DISPOSED_PATTERN, line)
+
+        combat_completed_match = re.search(self.COMBAT_COMPLETED_PATTERN, line)
+        if combat_completed_match:
+            try:
+                self._pvp_duration = float(combat_completed_match.group(1))
+            except ValueError:
+                pass
+
+        spawned_match = re.search(self.CARDS_SPAWNED_PATTERN, line)
+        if spawned_match:
+            self._handle_cards_spawned(spawned_match.group(1), timestamp, line)
+
+
+def load_lines():
+    lines = []
+    for name in ("Player-prev.log", "Player.log"):
+        with open(LOG_DIR / name, 'r', encoding='utf-8', errors='ignore') as f:
+            lines.extend(f.readlines())
+    return lines
+
+
+def run_once(analyzer_cls, lines):
+    """只计时 _process_line 循环，屏蔽分析器内部的调试输出"""
+    analyzer = analyzer_cls(str(LOG_DIR))
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for line_num, line in enumerate(lines, 1):
+            analyzer._process_line(line, line_num)
+        elapsed = time.perf_counter() - start
+        analyzer._merge_restart_sessions()
+    return elapsed, analyzer.sessions
+
+
+def session_signature(sessions):
+    return [
+        (s.session_id, s.hero, s.days, s.is_finished, s.victory, s.items, s.pvp_battles)
+        for s in sessions
+    ]
+
+
+def bench_full_reparse(trace: bool) -> float:
+    """全量重新解析（每轮删除检查点）的最短耗时，日志输出到丢弃型 sink"""
+    logger.remove()
+    logger.add(lambda message: None, level="TRACE" if trace else "INFO")
+    set_trace_enabled(trace)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_bench_"))
+    try:
+        for name in ("Player-prev.log", "Player.log"):
+            shutil.copy(LOG_DIR / name, work_dir / name)
+        best = None
+        for _ in range(ROUNDS):
+            checkpoint = work_dir / LogAnalyzer.CHECKPOINT_FILE
+            if checkpoint.exists():
+                checkpoint.unlink()
+            analyzer = LogAnalyzer(str(work_dir))
+            start = time.perf_counter()
+            analyzer.analyze()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    finally:
+        set_trace_enabled(False)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    lines = load_lines()
+    print(f"日志行数: {len(lines)}  ({LOG_DIR})")
+
+    results = {}
+    for label, cls in (("before", LegacyLogAnalyzer), ("after", LogAnalyzer)):
+        best = None
+        sessions = None
+        for _ in range(ROUNDS):
+            elapsed, sessions = run_once(cls, lines)
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = (best, sessions)
+
+    print("\n" + "=" * 60)
+    print(f"{'版本':<10} | {'耗时(ms)':<10} | {'lines/sec':<12}")
+    print("-" * 60)
+    for label, (elapsed, _) in results.items():
+        print(f"{label:<10} | {elapsed * 1000:10.2f} | {len(lines) / elapsed:12.0f}")
+    speedup = results["before"][0] / results["after"][0]
+    print("-" * 60)
+    print(f"加速比: {speedup:.2f}x")
+
+    same = session_signature(results["before"][1]) == session_signature(results["after"][1])
+    print(f"解析结果一致: {'✅' if same else '❌'} ({len(results['after'][1])} 个会话)")
+    print("=" * 60 + "\n")
+
+    trace_off = bench_full_reparse(trace=False)
+    trace_on = bench_full_reparse(trace=True)
+    print("=" * 60)
+    print(f"{'全量重新解析':<10} | {'耗时(ms)':<10}")
+    print("-" * 60)
+    print(f"{'trace off':<10} | {trace_off * 1000:10.2f}")
+    print(f"{'trace on':<10} | {trace_on * 1000:10.2f}")
+    print("=" * 60 + "\n")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
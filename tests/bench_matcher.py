@@ -1,10 +1,34 @@
+import os
+import sys
+import time
+
 import cv2
 import json
 from loguru import logger
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from core.diagnostics import SystemDiagnostics
+from core.comparators.feature_matcher import FeatureMatcher
 from utils.logger import setup_logger
 import config
 
+
+def exhaustive_match(matcher, img, size):
+    """旧版全量比对：对子库每个模板（含用户记忆变体）逐个 knnMatch + Ratio Test"""
+    start = time.perf_counter()
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    t_kp, t_des = matcher.orb.detectAndCompute(gray, None)
+    best_id, best_score = None, 0.0
+    if t_des is not None:
+        for cid, static_data in matcher.static_lib[size].items():
+            sources = [static_data, *matcher.user_memory.variants(cid)]
+            score = max(matcher._ratio_score(t_des, len(t_kp), src) for src in sources)
+            if score >= config.ORB_MATCH_THRESHOLD and score > best_score:
+                best_id, best_score = cid, score
+    return (time.perf_counter() - start) * 1000, best_id, best_score
+
+
 def main():
     # 1. 强制初始化日志为 DEBUG 模式，这样你就能看到上面的 noisy 输出
     setup_logger(is_gui_app=False)
@@ -29,18 +53,25 @@ def main():
     diag = SystemDiagnostics()
     report = diag.benchmark_matcher(samples)
 
-    print("\n" + "="*60)
-    print(f"{'分类':<8} | {'耗时(ms)':<10} | {'匹配结果':<12} | {'匹配得分'}")
-    print("-" * 60)
-    
+    # 4. 对照：旧版全量暴力比对的耗时和得分
+    matcher = FeatureMatcher()
+    reference = {size: exhaustive_match(matcher, img, size) for size, img in samples.items() if img is not None}
+
+    print("\n" + "="*92)
+    print(f"{'分类':<8} | {'模板数':<6} | {'索引耗时(ms)':<10} | {'全量耗时(ms)':<10} | {'匹配结果':<12} | {'得分':<8} | {'全量得分'}")
+    print("-" * 92)
+
     for size, data in report.items():
         m_id = data['matched']
         name = id_to_name.get(m_id, "Unknown") if m_id else "None"
         score = data.get('score', 0.0)
-        
+        ref_ms, ref_id, ref_score = reference[size]
+        mark = "" if ref_id == m_id else "  ⚠️ 结果不一致"
+
         # 打印最终结果表格
-        print(f"{size:<10} | {data['time_ms']:10.2f} | {name:<12} | {score:.4f}")
-    print("="*60 + "\n")
+        print(f"{size:<10} | {len(matcher.static_lib[size]):8d} | {data['time_ms']:14.2f} | {ref_ms:14.2f} | "
+              f"{name:<12} | {score:.4f} | {ref_score:.4f}{mark}")
+    print("="*92 + "\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,11 +1,110 @@
 # tests/bench_ocr.py
-import cv2
 import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import psutil
 from loguru import logger
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
 from core.diagnostics import SystemDiagnostics
+from services.ocr_service import OCRService
 from utils.logger import setup_logger
 
+# detail_1.png 中“港口”详情框的位置 (x, y, w, h)
+DETAIL_BOX = (905, 60, 375, 242)
+
+
+class PeakRSS:
+    """后台采样进程常驻内存，记录运行期间相对起点的峰值增量 (MB)"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._proc = psutil.Process()
+
+    def __enter__(self):
+        self.base = self._proc.memory_info().rss
+        self.peak = self.base
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._proc.memory_info().rss)
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._proc.memory_info().rss)
+
+    @property
+    def delta_mb(self):
+        return (self.peak - self.base) / 1024 / 1024
+
+
+def compare_batch(img, counts=(1, 4, 8), rounds=2):
+    """逐个详情框整图识别 (recognize_card_id) vs 一帧全部详情框名字区域批量识别 (recognize_detail_boxes)"""
+    service = OCRService(config.ITEMS_DB_PATH)
+    # 吞吐对比时关闭结果缓存（同一张图反复识别会全部命中）
+    service.result_cache.capacity = 0
+    x, y, w, h = DETAIL_BOX
+    crop = img[y:y + h, x:x + w]
+    # 预热（模型首次推理会分配缓冲区）
+    service.recognize_card_id(crop)
+    service.recognize_detail_boxes(img, [{'class_id': config.CLS_MAP['DETAIL'], 'box': DETAIL_BOX}])
+
+    rows = []
+    for n in counts:
+        detections = [{'class_id': config.CLS_MAP['DETAIL'], 'box': DETAIL_BOX}] * n
+
+        with PeakRSS() as mem_batch:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                batch = [item_id for _box, item_id in service.recognize_detail_boxes(img, detections)]
+            batch_s = (time.perf_counter() - start) / rounds
+
+        with PeakRSS() as mem_single:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                single = [service.recognize_card_id(img[y:y + h, x:x + w]) for _ in range(n)]
+            single_s = (time.perf_counter() - start) / rounds
+
+        rows.append((n, n / single_s, mem_single.delta_mb, n / batch_s, mem_batch.delta_mb, single == batch))
+
+    print("\n" + "=" * 84)
+    print(f"{'详情框数':>8} | {'逐个(张/秒)':>12} | {'逐个内存峰值(MB)':>16} | {'批量(张/秒)':>12} | "
+          f"{'批量内存峰值(MB)':>16} | 结果一致")
+    print("-" * 84)
+    for n, single_rate, single_mb, batch_rate, batch_mb, same in rows:
+        print(f"{n:>8} | {single_rate:12.2f} | {single_mb:16.1f} | {batch_rate:12.2f} | {batch_mb:16.1f} | "
+              f"{'✅' if same else '❌'}")
+    print("=" * 84 + "\n")
+    return rows
+
+
+def bench_cache(img, frames=30):
+    """同一个详情框连续开着 frames 帧：结果缓存命中后不再调用 OCR 引擎"""
+    service = OCRService(config.ITEMS_DB_PATH)
+    x, y, w, h = DETAIL_BOX
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        service.recognize_card_id(img[y:y + h, x:x + w].copy())
+        timings.append((time.perf_counter() - start) * 1000)
+    stats = service.cache_stats()
+    print(f"结果缓存: 首帧 {timings[0]:.1f}ms, 之后平均 {np.mean(timings[1:]):.2f}ms/帧, "
+          f"命中率 {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})\n")
+    return stats
+
+
 def main():
     setup_logger(is_gui_app=False)
     
@@ -27,5 +126,8 @@ def main():
     if res:
         logger.success(f"诊断结论：最优 OCR 引擎为 {res['best_engine_name']}")
 
+    compare_batch(img)
+    bench_cache(img)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
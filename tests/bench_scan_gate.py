@@ -0,0 +1,104 @@
+"""
+变化门控检测回放基准测试
+按 AutoScanner 的节奏（20 帧/秒）回放一段帧序列，对比每帧整帧检测与变化门控检测：
+每秒推理次数，以及门控结果与整帧结果的一致度
+
+用法:
+    python tests/bench_scan_gate.py                 # 合成的"悬停闲置"序列（Steam Deck 分辨率）
+    python tests/bench_scan_gate.py --frames DIR    # 录制的帧序列（按文件名排序的 png/jpg），有模型时用 YOLO
+                                                    # （AutoScanner 的 scan_roi_mode 默认关闭，以此确认一致度后再开启）
+      DIR/cursor.txt 可选，每行 "x y" 对应一帧的鼠标位置
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core.detectors.change_gate import ChangeGatedDetector
+from tests.test_change_gate import CARDS, RectDetector, agreement, render_board
+
+FPS = 20
+
+
+def synthetic_idle_hover(seconds: int = 30):
+    """悬停闲置：大部分时间鼠标停在某张卡上，偶尔移到另一张卡，每 10 秒商店刷新一次"""
+    cards = list(CARDS)
+    frames = []
+    for i in range(seconds * FPS):
+        t = i / FPS
+        if i and i % (10 * FPS) == 0:
+            cards = [(x, y + 10 if y > 400 else y - 10, w, h) for x, y, w, h in cards]
+        hover = int(t // 3) % 7
+        x, y, w, h = cards[hover]
+        frames.append((render_board(cards=cards, hover=hover), (x + w // 2, y + h // 2)))
+    return frames
+
+
+def recorded_frames(directory: Path):
+    paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in (".png", ".jpg"))
+    cursors = [None] * len(paths)
+    cursor_file = directory / "cursor.txt"
+    if cursor_file.exists():
+        lines = cursor_file.read_text().split("\n")
+        for i, line in enumerate(lines[:len(paths)]):
+            if line.strip():
+                x, y = line.split()
+                cursors[i] = (int(x), int(y))
+    return [(cv2.imread(str(p)), c) for p, c in zip(paths, cursors)]
+
+
+def make_detector(use_yolo: bool):
+    model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config.MODEL_PATH)
+    if use_yolo and os.path.exists(model_path):
+        from core.detectors.yolo_detector import YoloDetector
+        return YoloDetector(model_path, use_gpu=False), "YOLO"
+    return RectDetector(), "RectDetector"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=Path, default=None)
+    parser.add_argument("--no-roi", action="store_true")
+    args = parser.parse_args()
+
+    frames = recorded_frames(args.frames) if args.frames else synthetic_idle_hover()
+    detector, detector_name = make_detector(use_yolo=args.frames is not None)
+    gate = ChangeGatedDetector(detector, roi_enabled=not args.no_roi)
+
+    full_time = gate_time = 0.0
+    scores = []
+    for i, (frame, cursor) in enumerate(frames):
+        start = time.perf_counter()
+        reference = detector.detect_stream(frame)
+        full_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        gated = gate.detect(frame, cursor=cursor, now=i / FPS)
+        gate_time += time.perf_counter() - start
+        scores.append(agreement(gated, reference))
+
+    seconds = len(frames) / FPS
+    stats = gate.stats
+    print("\n" + "=" * 60)
+    print(f"回放 {len(frames)} 帧 ({seconds:.0f}s @ {FPS}fps) | 检测器: {detector_name} | ROI: {not args.no_roi}")
+    print("-" * 60)
+    print(f"{'版本':<8} | {'推理/秒':<8} | {'每帧耗时(ms)':<12}")
+    print(f"{'full':<8} | {len(frames) / seconds:8.2f} | {full_time / len(frames) * 1000:12.2f}")
+    print(f"{'gated':<8} | {gate.inferences / seconds:8.2f} | {gate_time / len(frames) * 1000:12.2f}")
+    print("-" * 60)
+    print(f"跳过 {stats['skipped']} | ROI {stats['roi']} | 整帧 {stats['full']} | "
+          f"推理减少 {len(frames) / max(gate.inferences, 1):.1f}x")
+    print(f"一致度: 平均 {sum(scores) / len(scores):.4f} | 最低 {min(scores):.4f}")
+    if detector_name != "YOLO":
+        print("⚠️ 一致度来自轮廓检测替身，只验证门控逻辑；ROI 模式需用录制帧 + ONNX 模型（--frames）确认")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
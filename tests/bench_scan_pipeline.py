@@ -0,0 +1,150 @@
+"""
+扫描流水线基准测试
+对比旧版串行循环（截图 → 检测 → 识别 在同一线程）与流水线版本：
+- 截图节奏：相邻两次截图的平均间隔、抖动和最大间隔（识别期间是否被卡住）
+- 悬停到结果的延迟：鼠标移到新物品上 → 识别结果发出
+
+截图/检测用固定耗时模拟（MSS 和 ONNX Runtime 都会释放 GIL），
+识别用真实的 ORB 特征提取 + knnMatch（与 FeatureMatcher.match 相同的计算）
+"""
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scan_pipeline import CaptureWorker, LatestSlot, RecognitionPool
+
+CAPTURE_COST = 0.008
+DETECT_COST = 0.04
+FRAME_PERIOD = 0.05
+HOVER_DWELL = 0.2
+HOVER_SWITCH = 1.0   # 每秒换一个悬停物品
+DURATION = 8.0
+
+
+class SimCapturer:
+    """模拟截图器，记录每次截图完成的时间"""
+
+    def __init__(self):
+        self.times = []
+
+    def set_region(self, region):
+        pass
+
+    def capture(self):
+        time.sleep(CAPTURE_COST)
+        self.times.append(time.perf_counter())
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+class OrbRecognizer:
+    """与 FeatureMatcher.match 相同的计算：目标图 ORB 提取 + 对模板库逐个 knnMatch"""
+
+    def __init__(self, templates: int = 60):
+        rng = np.random.default_rng(0)
+        self.crop = cv2.GaussianBlur(rng.integers(0, 256, (260, 260), dtype=np.uint8), (3, 3), 0)
+        self.library = [rng.integers(0, 256, (500, 32), dtype=np.uint8) for _ in range(templates)]
+        self._local = threading.local()
+
+    def __call__(self, hover_id):
+        if not hasattr(self._local, "orb"):
+            self._local.orb = cv2.ORB_create(nfeatures=500)
+            self._local.bf = cv2.BFMatcher(cv2.NORM_HAMMING)
+        _, des = self._local.orb.detectAndCompute(self.crop, None)
+        for train in self.library:
+            self._local.bf.knnMatch(des, train, k=2)
+        return hover_id
+
+
+def hover_target(t: float) -> int:
+    return int(t // HOVER_SWITCH)
+
+
+def run_serial(recognize):
+    capturer = SimCapturer()
+    latencies = []
+    recognized = set()
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        frame_start = time.perf_counter()
+        capturer.capture()
+        time.sleep(DETECT_COST)
+        t = time.perf_counter() - start
+        target = hover_target(t)
+        if target not in recognized and t - target * HOVER_SWITCH > HOVER_DWELL:
+            recognize(target)
+            recognized.add(target)
+            latencies.append(time.perf_counter() - start - target * HOVER_SWITCH)
+        delay = FRAME_PERIOD - (time.perf_counter() - frame_start)
+        if delay > 0:
+            time.sleep(delay)
+    return capturer.times, latencies
+
+
+def run_pipelined(recognize):
+    slot = LatestSlot()
+    capturer = SimCapturer()
+    worker = CaptureWorker(lambda: capturer, slot, interval=FRAME_PERIOD)
+    pool = RecognitionPool(max_workers=2)
+    worker.start()
+    worker.wait_ready()
+    worker.set_region((0, 0, 4, 4))
+    worker.resume()
+
+    latencies = []
+    recognized = set()
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def on_result(target):
+        with lock:
+            recognized.add(target)
+            latencies.append(time.perf_counter() - start - target * HOVER_SWITCH)
+
+    while time.perf_counter() - start < DURATION:
+        packet = slot.get(timeout=0.5)
+        if packet is None:
+            continue
+        time.sleep(DETECT_COST)
+        t = time.perf_counter() - start
+        target = hover_target(t)
+        with lock:
+            pending = target not in recognized
+        if pending and t - target * HOVER_SWITCH > HOVER_DWELL:
+            pool.submit(("hover", target), recognize, target, callback=on_result)
+
+    worker.stop()
+    worker.join(1.0)
+    pool.shutdown()
+    return capturer.times, latencies
+
+
+def describe(captures):
+    gaps = np.diff(captures) * 1000
+    return gaps.mean(), gaps.std(), gaps.max()
+
+
+def main():
+    recognize = OrbRecognizer()
+    t = time.perf_counter()
+    recognize(0)
+    print(f"单次识别耗时: {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    results = {"serial": run_serial(recognize), "pipelined": run_pipelined(recognize)}
+
+    print("\n" + "=" * 72)
+    print(f"{'版本':<10} | {'截图间隔(ms)':<12} | {'抖动(ms)':<8} | {'最大间隔(ms)':<12} | {'悬停→结果(ms)':<12}")
+    print("-" * 72)
+    for label, (captures, latencies) in results.items():
+        mean, std, worst = describe(captures)
+        print(f"{label:<10} | {mean:12.1f} | {std:8.1f} | {worst:12.1f} | {np.mean(latencies) * 1000:12.1f}")
+    print("=" * 72 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+模糊搜索基准
+用真实物品名生成带噪声的 OCR 文本（错字、漏字、多字、前缀、费用后缀），对比：
+- 旧版：每次对全部名字 extractOne 两遍（WRatio + partial_ratio）
+- 新版：预处理名字 + 倒排索引召回候选，单条 find_best_match / 批量 find_best_matches
+并把名字表扩大到 4x / 16x（随机组合真实名字中的字），观察耗时随名字总数的增长
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from loguru import logger
+from rapidfuzz import process, fuzz, utils
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from utils.search_engine import FuzzySearcher
+
+PREFIXES = ["", "", "", "沉重", "黄金", "钻石", "寒冰"]
+SUFFIXES = ["", "", "", "：3", "费", " 2"]
+
+
+def legacy_match(searcher, query, threshold=60):
+    """旧版 find_best_match"""
+    res = process.extractOne(query, searcher.all_names, scorer=fuzz.WRatio, processor=utils.default_process)
+    if res and res[1] >= threshold:
+        partial_res = process.extractOne(query, searcher.all_names, scorer=fuzz.partial_ratio)
+        final_res = partial_res if partial_res[1] > res[1] else res
+        return searcher.name_to_id[final_res[0]]
+    return None
+
+
+def noisy_corpus(names, count, seed=0):
+    rng = random.Random(seed)
+    alphabet = sorted(set("".join(names)))
+    corpus = []
+    for _ in range(count):
+        chars = list(rng.choice(names))
+        for _ in range(rng.randint(0, 2)):
+            op = rng.random()
+            if op < 0.4:
+                chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+            elif op < 0.7 and len(chars) > 1:
+                del chars[rng.randrange(len(chars))]
+            else:
+                chars.insert(rng.randrange(len(chars) + 1), rng.choice(alphabet))
+        corpus.append(rng.choice(PREFIXES) + "".join(chars) + rng.choice(SUFFIXES))
+    return corpus
+
+
+def scaled_db(items, factor, seed=0):
+    """在真实物品之外追加随机组合的名字，总数约为 factor 倍"""
+    rng = random.Random(seed)
+    alphabet = sorted(set("".join(utils.default_process(i['name_cn']) for i in items if i.get('name_cn'))) - {" "})
+    extra = [{"id": f"synthetic-{n}", "name_cn": "".join(rng.choices(alphabet, k=rng.randint(2, 5)))}
+             for n in range(len(items) * (factor - 1))]
+    return items + extra
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    out = fn(queries)
+    return (time.perf_counter() - start) * 1000 / len(queries), out
+
+
+def main():
+    logger.remove()
+    with open(config.ITEMS_DB_PATH, encoding="utf-8") as f:
+        items = json.load(f)
+    real_names = [i['name_cn'] for i in items if i.get('name_cn') and i.get('id')]
+    queries = noisy_corpus(real_names, 1000)
+
+    print("\n" + "=" * 88)
+    print(f"{'名字数':>8} | {'旧版(ms/条)':>12} | {'索引单条(ms/条)':>16} | {'批量 cdist(ms/条)':>18} | {'结果不一致'}")
+    print("-" * 88)
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in (1, 4, 16):
+            path = os.path.join(tmp, f"items_{factor}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(scaled_db(items, factor), f, ensure_ascii=False)
+            searcher = FuzzySearcher(path)
+            sample = queries if factor == 1 else queries[:200]
+
+            legacy_ms, legacy = timed(lambda qs: [legacy_match(searcher, q) for q in qs], sample)
+            single_ms, single = timed(lambda qs: [searcher.find_best_match(q) for q in qs], sample)
+            batch_ms, batch = timed(lambda qs: searcher.find_best_matches(qs), sample)
+            diff = sum(a != b for a, b in zip(legacy, single))
+            assert single == batch
+            print(f"{len(searcher.all_names):>8} | {legacy_ms:12.3f} | {single_ms:16.3f} | {batch_ms:18.3f} | "
+                  f"{diff}/{len(sample)}")
+
+            start = time.perf_counter()
+            for q in sample[:100]:
+                searcher.search_wiki(q)
+            print(f"{'':>8}   百科搜索: {(time.perf_counter() - start) * 10:.3f} ms/条")
+    print("=" * 88 + "\n")
+
+
+if __name__ == "__main__":
+    main()
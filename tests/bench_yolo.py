@@ -21,6 +21,8 @@ def main():
             "preferred_provider": res['best_provider'],
             "yolo_fps": res['suggested_fps']
         })
+        for r in res['all']:
+            logger.info(f"{r['provider']}: 总计 {r['avg_ms']:.2f}ms | 后处理 {r['post_ms']:.2f}ms")
         logger.success(f"测试结束。建议 Provider: {res['best_provider']}, 建议 FPS: {res['suggested_fps']}")
 
 if __name__ == "__main__":
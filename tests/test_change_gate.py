@@ -0,0 +1,153 @@
+"""
+变化门控检测测试
+用合成的"牌桌"画面（纯色背景 + 彩色卡牌）和基于轮廓的简单检测器验证：
+1. 画面不变时跳过推理、复用结果；到整帧刷新间隔或分辨率变化时整帧检测
+2. 局部变化（悬停高亮、新卡牌出现）走 ROI 检测，结果与整帧检测一致
+3. ROI 裁剪补边后 letterbox 缩放比例与整帧检测相同（不放大）
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.detectors.change_gate import ChangeGatedDetector, _box_iou
+
+BOARD_SIZE = (1280, 800)  # Steam Deck 分辨率 (宽, 高)
+CARDS = [(80 + i * 150, 480, 120, 170) for i in range(7)] + [(200, 120, 180, 180), (800, 100, 240, 150)]
+PALETTE = [(40, 40, 200), (40, 160, 220), (60, 200, 60), (200, 160, 40), (200, 60, 60), (180, 40, 180)]
+
+
+class RectDetector:
+    """把高饱和度的色块当作物体（class 3）的检测器，用来代替 YOLO 验证门控逻辑"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_stream(self, frame):
+        self.calls += 1
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, (0, 120, 60), (180, 255, 255))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        detections = []
+        for c in contours:
+            x, y, w, h = cv2.boundingRect(c)
+            if w * h >= 400:
+                detections.append({'class_id': 3, 'confidence': 0.9, 'box': [x, y, w, h]})
+        return sorted(detections, key=lambda d: (d['box'][1], d['box'][0]))
+
+
+def render_board(cards=CARDS, hover=None, size=BOARD_SIZE):
+    """绘制牌桌：hover 为被悬停的卡牌下标（绘制金色描边，和游戏内悬停效果类似）"""
+    w, h = size
+    frame = np.full((h, w, 3), 40, dtype=np.uint8)
+    for i, (x, y, cw, ch) in enumerate(cards):
+        color = PALETTE[i % len(PALETTE)]
+        cv2.rectangle(frame, (x, y), (x + cw, y + ch), color, -1)
+        if i == hover:
+            cv2.rectangle(frame, (x - 6, y - 6), (x + cw + 6, y + ch + 6), (0, 200, 255), 4)
+    return frame
+
+
+def agreement(a, b, iou=0.5) -> float:
+    """两组检测结果的一致度（按类别 + IoU 匹配的 F1）"""
+    if not a and not b:
+        return 1.0
+    unmatched = list(b)
+    matched = 0
+    for det in a:
+        for other in unmatched:
+            if other['class_id'] == det['class_id'] and _box_iou(det['box'], other['box']) >= iou:
+                unmatched.remove(other)
+                matched += 1
+                break
+    return 2 * matched / (len(a) + len(b))
+
+
+def test_unchanged_frames_skip_inference():
+    detector = RectDetector()
+    gate = ChangeGatedDetector(detector, full_refresh_interval=2.0)
+    frame = render_board()
+
+    first = gate.detect(frame, cursor=(10, 10), now=0.0)
+    assert len(first) == len(CARDS)
+    for i in range(1, 20):
+        # 鼠标在空白处移动、画面不变：不推理
+        assert gate.detect(frame.copy(), cursor=(10 + i * 5, 10), now=i * 0.05) is first
+    assert detector.calls == 1 and gate.stats["skipped"] == 19
+
+    gate.detect(frame, now=2.0)
+    assert gate.stats["full"] == 2
+
+    gate.detect(render_board(size=(1920, 1080)), now=2.05)
+    assert gate.stats["full"] == 3
+
+
+def test_roi_detection_matches_full_frame():
+    detector = RectDetector()
+    gate = ChangeGatedDetector(detector, full_refresh_interval=60.0)
+    gate.detect(render_board(), now=0.0)
+
+    cards = list(CARDS)
+    frames = []
+    for i, card in enumerate(CARDS[:7]):
+        frames.append((render_board(hover=i), (card[0] + 60, card[1] + 80)))
+    cards.append((1100, 300, 100, 140))
+    frames.append((render_board(cards=cards), None))
+
+    for t, (frame, cursor) in enumerate(frames, start=1):
+        gated = gate.detect(frame, cursor=cursor, now=t * 0.05)
+        assert agreement(gated, RectDetector().detect_stream(frame)) == 1.0
+    assert gate.stats["roi"] == len(frames) and gate.stats["full"] == 1
+
+
+class LetterboxRecorder(RectDetector):
+    """带 input_shape 的检测器，记录每次输入按 YOLO letterbox 规则的缩放比例"""
+
+    input_shape = (640, 640)
+
+    def __init__(self):
+        super().__init__()
+        self.ratios = []
+
+    def detect_stream(self, frame):
+        h, w = frame.shape[:2]
+        self.ratios.append(min(self.input_shape[1] / w, self.input_shape[0] / h))
+        return super().detect_stream(frame)
+
+
+def test_roi_is_not_upscaled_beyond_full_frame():
+    for size in ((1280, 800), (1920, 1080), (800, 1280)):
+        detector = LetterboxRecorder()
+        gate = ChangeGatedDetector(detector, full_refresh_interval=60.0)
+        gate.detect(render_board(size=size), now=0.0)
+        for i, card in enumerate(CARDS[:7]):
+            frame = render_board(hover=i, size=size)
+            gated = gate.detect(frame, cursor=(card[0] + 60, card[1] + 80), now=(i + 1) * 0.05)
+            assert agreement(gated, RectDetector().detect_stream(frame)) == 1.0
+        full_ratio = detector.ratios[0]
+        assert gate.stats["roi"] >= 5
+        assert all(abs(ratio - full_ratio) < 1e-3 for ratio in detector.ratios[1:]), (size, detector.ratios)
+
+
+def test_large_change_falls_back_to_full_frame():
+    gate = ChangeGatedDetector(RectDetector(), full_refresh_interval=60.0)
+    gate.detect(render_board(), now=0.0)
+    shifted = [(x + 30, y - 40, w, h) for x, y, w, h in CARDS]
+    gate.detect(render_board(cards=shifted), now=0.05)
+    assert gate.stats["full"] == 2 and gate.stats["roi"] == 0
+
+    gate = ChangeGatedDetector(RectDetector(), roi_enabled=False, full_refresh_interval=60.0)
+    gate.detect(render_board(), now=0.0)
+    gate.detect(render_board(hover=0), now=0.05)
+    assert gate.stats["full"] == 2 and gate.stats["roi"] == 0
+
+
+if __name__ == "__main__":
+    test_unchanged_frames_skip_inference()
+    test_roi_detection_matches_full_frame()
+    test_roi_is_not_upscaled_beyond_full_frame()
+    test_large_change_falls_back_to_full_frame()
+    print("✅ 变化门控检测测试全部通过")
@@ -0,0 +1,96 @@
+"""
+ConfigManager 测试
+1. 检查间隔内 refresh() 不做任何 I/O
+2. 外部修改文件后按 mtime 重新加载，只广播变化的键
+3. save() 原子写入并广播，不会触发自身的重新加载
+"""
+import builtins
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager.config_manager import ConfigManager
+
+
+def _manager(tmp_dir, settings=None, **kwargs):
+    path = os.path.join(tmp_dir, "settings.json")
+    if settings is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(settings, f)
+    manager = ConfigManager(path, **kwargs)
+    events = []
+    manager.settings_changed.connect(events.append)
+    return manager, events, path
+
+
+def _count_opens(fn):
+    opened = []
+    real_open = builtins.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return real_open(*args, **kwargs)
+
+    builtins.open = counting_open
+    try:
+        fn()
+    finally:
+        builtins.open = real_open
+    return len(opened)
+
+
+def test_refresh_is_rate_limited():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, events, _ = _manager(tmp_dir, {"yolo_fps": 10}, min_check_interval=60)
+        # 模拟扫描循环 200 帧：不打开文件
+        assert _count_opens(lambda: [manager.refresh() for _ in range(200)]) == 0
+        # 文件没变：强制检查也只 stat，不解析
+        assert _count_opens(lambda: manager.refresh(force=True)) == 0
+        assert events == []
+
+
+def test_external_edit_reloads_changed_keys():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, events, path = _manager(tmp_dir, {"yolo_fps": 10, "hover_delay": 200}, min_check_interval=0)
+        before = manager.snapshot()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"yolo_fps": 15, "hover_delay": 200, "debug_mode": True}, f, indent=4)
+        assert manager.refresh()
+        assert events == [{"yolo_fps": 15, "debug_mode": True}]
+        # 旧快照不受影响（整体替换）
+        assert before["yolo_fps"] == 10 and manager.get("yolo_fps") == 15
+
+        # 写了一半的文件：保留旧配置
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"yolo_fps": ')
+        assert not manager.refresh()
+        assert manager.get("yolo_fps") == 15 and len(events) == 1
+
+
+def test_save_emits_without_self_reload():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, events, path = _manager(tmp_dir, min_check_interval=0)
+        manager.save({"auto_scan_enabled": True})
+        assert events == [{"auto_scan_enabled": True}]
+        manager.save({"auto_scan_enabled": True})
+        assert len(events) == 1
+        assert not manager.refresh()
+
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f)["auto_scan_enabled"] is True
+        assert not [name for name in os.listdir(tmp_dir) if name.endswith(".tmp")]
+
+        # 另一个实例（例如诊断窗口）写入后，按 mtime 发现变化
+        ConfigManager(path).save({"yolo_fps": 30})
+        assert manager.refresh()
+        assert events[-1] == {"yolo_fps": 30}
+
+
+if __name__ == "__main__":
+    test_refresh_is_rate_limited()
+    test_external_edit_reloads_changed_keys()
+    test_save_emits_without_self_reload()
+    print("✅ ConfigManager 测试全部通过")
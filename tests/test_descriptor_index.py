@@ -0,0 +1,68 @@
+"""
+堆叠描述子索引测试
+1. 投票候选中包含真实模板（目标图做了缩放和模糊），用户记忆变体归到同一模板
+2. 没有用户记忆变体时直接复用子库的连续描述子矩阵（不拷贝）
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.comparators.descriptor_index import DescriptorIndex
+from core.comparators.packed_library import pack_bucket
+
+ORB = cv2.ORB_create(nfeatures=500)
+
+
+def _template(seed):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (40, 40), dtype=np.uint8)
+    return cv2.resize(img, (240, 240), interpolation=cv2.INTER_NEAREST)
+
+
+def _entry(cid, img):
+    kp, des = ORB.detectAndCompute(img, None)
+    return cid, des, len(kp)
+
+
+def _library(count=30):
+    return pack_bucket(_entry(f"card-{i}", _template(i)) for i in range(count))
+
+
+def test_shortlist_finds_true_template():
+    lib = _library()
+    index = DescriptorIndex.from_bucket(lib)
+    assert len(index) == 30 and index.rows == sum(len(e['orb_des']) for e in lib.values())
+
+    for target in (3, 17, 29):
+        img = cv2.GaussianBlur(cv2.resize(_template(target), (220, 220)), (3, 3), 0)
+        _, t_des = ORB.detectAndCompute(img, None)
+        candidates = index.shortlist(t_des, k=3)
+        assert candidates[0][0] == f"card-{target}"
+        assert candidates[0][1] > 5 * max([v for _, v in candidates[1:]] or [1])
+
+    # 用户记忆变体：只存在于变体中的图也能投给对应模板
+    variant = _template(1000)
+    memory = pack_bucket([_entry("card-5", variant), _entry("unknown", _template(2000))])
+    index = DescriptorIndex.from_bucket(lib, memory)
+    assert index.rows == lib.descriptors.shape[0] + len(memory.variants("card-5")[0]['orb_des'])
+    _, t_des = ORB.detectAndCompute(variant, None)
+    assert index.shortlist(t_des, k=1)[0][0] == "card-5"
+    assert index.shortlist(None) == []
+
+
+def test_bucket_descriptors_shared():
+    lib = _library(5)
+    index = DescriptorIndex.from_bucket(lib)
+    assert np.shares_memory(index.descriptors, lib.descriptors)
+    assert index.labels.tolist() == np.repeat(np.arange(5), lib.entry_counts()).tolist()
+    assert DescriptorIndex.from_bucket(pack_bucket([])).shortlist(lib.descriptors[:5]) == []
+
+
+if __name__ == "__main__":
+    test_shortlist_finds_true_template()
+    test_bucket_descriptors_shared()
+    print("✅ 堆叠描述子索引测试全部通过")
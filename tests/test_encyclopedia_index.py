@@ -0,0 +1,338 @@
+"""
+百科筛选索引对照测试
+在真实的物品库 / 技能库上随机组合筛选条件（关键词、类型、尺寸、品级、英雄、标签、隐藏标签、ALL/ANY），
+EncyclopediaIndex.query 的结果必须与旧版逐条判断 (_match_item) 完全一致（包括顺序）
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager.encyclopedia_index import EncyclopediaIndex, _item_texts, _skill_texts
+from data_manager.game_catalog import get_game_catalog, split_keys
+
+
+def legacy_match(self, item: dict) -> bool:
+    """旧版 EncyclopediaPage._match_item（逐条判断，作为对照）"""
+    # ✅ 技能数据结构不同，需要特殊处理
+    is_skill = self.search_query["item_type"] == "skill"
+    
+    # ✅ 过滤掉 name_cn 为空的技能
+    if is_skill:
+        name_cn = item.get("name_cn", "").strip()
+        if not name_cn:
+            return False
+    
+    # 关键词匹配
+    if self.search_query["keyword"]:
+        keyword = self.search_query["keyword"].lower()
+        
+        # ✅ 优先匹配名称
+        if is_skill:
+            name_match = (keyword in item.get("name_en", "").lower() or 
+                        keyword in item.get("name_cn", "").lower())
+        else:
+            name_match = (keyword in item.get("name", "").lower() or 
+                        keyword in item.get("name_cn", "").lower())
+        
+        # 如果名称匹配，直接返回（优先级最高）
+        if name_match:
+            pass  # 继续后续检查
+        else:
+            # ✅ 名称不匹配时，模糊搜索所有字段
+            content_match = False
+            
+            if is_skill:
+                # 技能：搜索 description, descriptions 数组
+                if keyword in item.get("description_en", "").lower():
+                    content_match = True
+                elif keyword in item.get("description_cn", "").lower():
+                    content_match = True
+                else:
+                    # 搜索 descriptions 数组
+                    descriptions = item.get("descriptions", [])
+                    for desc in descriptions:
+                        if isinstance(desc, dict):
+                            if keyword in desc.get("en", "").lower() or keyword in desc.get("cn", "").lower():
+                                content_match = True
+                                break
+            else:
+                # 物品：搜索 skills, skills_passive 等所有文本字段
+                # 1. 搜索 skills 数组
+                skills = item.get("skills") or []  # ✅ 修复：确保是列表
+                for skill in skills:
+                    if isinstance(skill, dict):
+                        en_text = skill.get("en") or ""  # ✅ 修复：处理 None
+                        cn_text = skill.get("cn") or ""  # ✅ 修复：处理 None
+                        if keyword in en_text.lower() or keyword in cn_text.lower():
+                            content_match = True
+                            break
+                    elif isinstance(skill, str) and keyword in skill.lower():
+                        content_match = True
+                        break
+                
+                # 2. 搜索 skills_passive 数组
+                if not content_match:
+                    skills_passive = item.get("skills_passive") or []  # ✅ 修复
+                    for skill in skills_passive:
+                        if isinstance(skill, dict):
+                            en_text = skill.get("en") or ""  # ✅ 修复
+                            cn_text = skill.get("cn") or ""  # ✅ 修复
+                            if keyword in en_text.lower() or keyword in cn_text.lower():
+                                content_match = True
+                                break
+                        elif isinstance(skill, str) and keyword in skill.lower():
+                            content_match = True
+                            break
+                
+                # 3. 搜索 enchantments 数组
+                if not content_match:
+                    enchantments = item.get("enchantments") or []  # ✅ 修复
+                    for ench in enchantments:
+                        if isinstance(ench, dict):
+                            en_text = ench.get("en") or ""  # ✅ 修复
+                            cn_text = ench.get("cn") or ""  # ✅ 修复
+                            if keyword in en_text.lower() or keyword in cn_text.lower():
+                                content_match = True
+                                break
+                
+                # 4. 搜索 quests 数组
+                if not content_match:
+                    quests = item.get("quests") or []  # ✅ 修复：确保 quests 是列表而非 None
+                    for quest in quests:
+                        if isinstance(quest, dict):
+                            target_en = quest.get("en_target", "")
+                            target_cn = quest.get("cn_target", "")
+                            reward_en = quest.get("en_reward", "")
+                            reward_cn = quest.get("cn_reward", "")
+                            if (keyword in target_en.lower() or keyword in target_cn.lower() or
+                                keyword in reward_en.lower() or keyword in reward_cn.lower()):
+                                content_match = True
+                                break
+            
+            # 如果名称和内容都不匹配，返回 False
+            if not content_match:
+                return False
+    
+    # ✅ 技能不需要类型和尺寸匹配（已经通过数据源筛选）
+    if not is_skill:
+        # 类型匹配（仅物品）
+        if self.search_query["item_type"] != "all":
+            item_type = item.get("type", "").lower()
+            if self.search_query["item_type"] == "skill" and item_type != "skill":
+                return False
+            elif self.search_query["item_type"] == "item" and item_type == "skill":
+                return False
+        
+        # 尺寸匹配（仅物品）
+        if self.search_query["size"]:
+            size = item.get("size", "").split(" / ")[0].lower()
+            if size != self.search_query["size"]:
+                return False
+    
+    # ✅ 品级匹配 - 使用starting_tier字段
+    if self.search_query["start_tier"]:
+        starting_tier_raw = item.get("starting_tier", "")
+        if starting_tier_raw:
+            # 解析 "Bronze / 青铜" 格式
+            tier = starting_tier_raw.split(" / ")[0].lower()
+            if tier != self.search_query["start_tier"]:
+                return False
+        else:
+            return False
+    
+    # 英雄匹配
+    if self.search_query["hero"]:
+        heroes_raw = item.get("heroes", "")
+        
+        # ✅ 解析英雄字符串："Vanessa / 凡妮莎 | Mak / 马克" → ["Vanessa", "Mak"]
+        hero_keys = []
+        if isinstance(heroes_raw, str) and heroes_raw:
+            # 分割 | 获取各个英雄
+            hero_parts = [h.strip() for h in heroes_raw.split("|")]
+            for hero_part in hero_parts:
+                # 提取英文部分 "Vanessa / 凡妮莎" -> "Vanessa"
+                if " / " in hero_part:
+                    hero_key = hero_part.split(" / ")[0].strip()
+                    hero_keys.append(hero_key)
+                else:
+                    hero_keys.append(hero_part.strip())
+        elif isinstance(heroes_raw, list):
+            # 如果是数组格式
+            for hero in heroes_raw:
+                hero_key = hero.split(" / ")[0].strip() if isinstance(hero, str) else str(hero)
+                hero_keys.append(hero_key)
+        
+        # 检查选中的英雄是否在列表中
+        if self.search_query["hero"] not in hero_keys:
+            return False
+    
+    # ✅ 标签匹配（普通标签） - 正确解析 "Weapon / 武器 | Friend / 伙伴" 格式
+    if self.selected_tags:
+        item_tags_raw = item.get("tags", "")
+        # 解析标签字符串
+        item_tag_keys = []
+        if isinstance(item_tags_raw, str) and item_tags_raw:
+            # 分割 | 获取各个标签
+            tag_parts = [t.strip() for t in item_tags_raw.split("|")]
+            for tag_part in tag_parts:
+                # 提取英文部分 "Weapon / 武器" -> "Weapon"
+                if " / " in tag_part:
+                    tag_key = tag_part.split(" / ")[0].strip()
+                    item_tag_keys.append(tag_key)
+                else:
+                    item_tag_keys.append(tag_part.strip())
+        
+        if self.match_mode == "all":
+            # 所有选中的标签都必须在物品标签中
+            for tag in self.selected_tags:
+                if tag not in item_tag_keys:
+                    return False
+        else:  # any
+            # 至少有一个选中的标签在物品标签中
+            has_any = False
+            for tag in self.selected_tags:
+                if tag in item_tag_keys:
+                    has_any = True
+                    break
+            if not has_any:
+                return False
+    
+    # ✅ 隐藏标签匹配 - 正确解析字符串格式
+    if self.selected_hidden_tags:
+        item_hidden_tags_raw = item.get("hidden_tags", "")
+        # 解析隐藏标签字符串
+        item_hidden_tag_keys = []
+        if isinstance(item_hidden_tags_raw, str) and item_hidden_tags_raw:
+            # 分割 | 获取各个标签
+            tag_parts = [t.strip() for t in item_hidden_tags_raw.split("|")]
+            for tag_part in tag_parts:
+                # 提取英文部分
+                if " / " in tag_part:
+                    tag_key = tag_part.split(" / ")[0].strip()
+                    item_hidden_tag_keys.append(tag_key)
+                else:
+                    item_hidden_tag_keys.append(tag_part.strip())
+        
+        if self.match_mode == "all":
+            for tag in self.selected_hidden_tags:
+                if tag not in item_hidden_tag_keys:
+                    return False
+        else:  # any
+            has_any = False
+            for tag in self.selected_hidden_tags:
+                if tag in item_hidden_tag_keys:
+                    has_any = True
+                    break
+            if not has_any:
+                return False
+    
+    return True
+
+
+def _state(keyword="", item_type="item", size="", start_tier="", hero="", tags=(), hidden_tags=(), match_mode="all"):
+    return SimpleNamespace(
+        search_query={"keyword": keyword, "item_type": item_type, "size": size, "start_tier": start_tier, "hero": hero},
+        selected_tags=list(tags), selected_hidden_tags=list(hidden_tags), match_mode=match_mode)
+
+
+def _legacy_query(records, state):
+    return [r for r in records if legacy_match(state, r)]
+
+
+def _index_query(index, state):
+    q = state.search_query
+    return index.query(keyword=q["keyword"], item_type=q["item_type"], size=q["size"], start_tier=q["start_tier"],
+                       hero=q["hero"], tags=state.selected_tags, hidden_tags=state.selected_hidden_tags,
+                       match_mode=state.match_mode)
+
+
+def _random_keyword(rng, records, texts):
+    roll = rng.random()
+    if roll < 0.3:
+        return ""
+    if roll < 0.4:
+        return rng.choice(["", " ", "x", "Zz", "不存在的词", "伤害", "Damage", "SHIELD", "%", "1"])
+    # 从某条记录的文本中截取一段（随机大小写）
+    candidates = [t for t in texts(rng.choice(records)) if t]
+    if not candidates:
+        return ""
+    text = rng.choice(candidates)
+    start = rng.randrange(len(text))
+    word = text[start:start + rng.randint(1, 6)]
+    return word.upper() if rng.random() < 0.2 else word
+
+
+def _random_states(records, is_skill, count, seed):
+    rng = random.Random(seed)
+    texts = _skill_texts if is_skill else _item_texts
+    heroes = sorted({h for r in records for h in split_keys(r.get("heroes"))}) + ["Nobody"]
+    tags = sorted({t for r in records for t in split_keys(r.get("tags"))}) + ["NoSuchTag"]
+    hidden = sorted({t for r in records for t in split_keys(r.get("hidden_tags"))}) + ["NoSuchHidden"]
+    sizes, tiers = ["small", "medium", "large", "huge"], ["bronze", "silver", "gold", "diamond", "legendary", "iron"]
+
+    for _ in range(count):
+        yield _state(
+            keyword=_random_keyword(rng, records, texts),
+            item_type="skill" if is_skill else rng.choice(["item", "all"]),
+            size="" if is_skill or rng.random() < 0.6 else rng.choice(sizes),
+            start_tier="" if rng.random() < 0.6 else rng.choice(tiers),
+            hero="" if rng.random() < 0.5 else rng.choice(heroes),
+            tags=rng.sample(tags, rng.choice([0, 0, 1, 2, 3])),
+            hidden_tags=rng.sample(hidden, rng.choice([0, 0, 1, 2])),
+            match_mode=rng.choice(["all", "any"]),
+        )
+
+
+def _check_parity(records, is_skill, count, seed):
+    index = EncyclopediaIndex(records, is_skill=is_skill)
+    legacy_s = index_s = 0.0
+    for state in _random_states(records, is_skill, count, seed):
+        start = time.perf_counter()
+        expected = _legacy_query(records, state)
+        legacy_s += time.perf_counter() - start
+        start = time.perf_counter()
+        actual = _index_query(index, state)
+        index_s += time.perf_counter() - start
+        assert [id(r) for r in actual] == [id(r) for r in expected], \
+            f"{state.search_query} tags={state.selected_tags} hidden={state.selected_hidden_tags} {state.match_mode}"
+    return legacy_s * 1000 / count, index_s * 1000 / count
+
+
+def test_items_parity():
+    items = get_game_catalog().items()
+    assert items
+    _check_parity(items, False, 400, seed=1)
+
+    # 常见组合
+    index = get_game_catalog().encyclopedia_index("item")
+    assert index is get_game_catalog().encyclopedia_index("all")
+    for state in (_state(), _state(item_type="all"), _state(keyword="伤害"), _state(hero="Vanessa", tags=["Weapon"]),
+                  _state(tags=["Weapon", "Tool"], match_mode="any"), _state(tags=["NoSuchTag"], match_mode="any"),
+                  _state(size="large", start_tier="gold")):
+        assert _index_query(index, state) == _legacy_query(items, state)
+
+
+def test_skills_parity():
+    skills = get_game_catalog().skills()
+    assert skills
+    _check_parity(skills, True, 300, seed=2)
+    index = get_game_catalog().encyclopedia_index("skill")
+    state = _state(item_type="skill")
+    assert _index_query(index, state) == _legacy_query(skills, state)
+
+
+if __name__ == "__main__":
+    test_items_parity()
+    test_skills_parity()
+    for name, records, is_skill in (("物品", get_game_catalog().items(), False),
+                                    ("技能", get_game_catalog().skills(), True)):
+        start = time.perf_counter()
+        EncyclopediaIndex(records, is_skill)
+        build_ms = (time.perf_counter() - start) * 1000
+        legacy_ms, index_ms = _check_parity(records, is_skill, 300, seed=3)
+        print(f"{name}: 索引构建 {build_ms:.0f}ms, 逐条判断 {legacy_ms:.2f}ms/次, 索引查询 {index_ms:.3f}ms/次")
+    print("✅ 百科筛选索引对照测试全部通过")
@@ -0,0 +1,72 @@
+"""
+游戏数据目录测试
+验证并发访问时每个文件只解析一次，以及索引/规范化字段与原始数据一致
+"""
+import json
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_manager.game_catalog as game_catalog
+from data_manager.game_catalog import GameCatalog, JSON_DIR, ITEMS_FILE, split_keys
+
+
+def test_each_file_parsed_once_under_concurrency():
+    catalog = GameCatalog()
+    parsed = []
+    original_load = json.load
+
+    def counting_load(f, *args, **kwargs):
+        parsed.append(f.name)
+        return original_load(f, *args, **kwargs)
+
+    game_catalog.json.load = counting_load
+    try:
+        barrier = threading.Barrier(8)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append((catalog.items(), catalog.skills(), catalog.monsters(), catalog.items_by_id()))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        game_catalog.json.load = original_load
+
+    assert len(parsed) == 3
+    first = results[0]
+    assert all(all(a is b for a, b in zip(first, r)) for r in results)
+
+
+def test_indexes_and_views():
+    catalog = GameCatalog()
+    with open(JSON_DIR / ITEMS_FILE, 'r', encoding='utf-8') as f:
+        raw_items = json.load(f)
+
+    assert catalog.items() == raw_items
+    by_id = catalog.items_by_id()
+    assert len(by_id) == len({i['id'] for i in raw_items if i.get('id')})
+    # 相对路径/绝对路径指向同一文件时共享同一份数据
+    assert catalog.records_by_id(str(JSON_DIR / ITEMS_FILE)) is by_id
+
+    item = raw_items[0]
+    assert catalog.item_name(item['id']) == (item.get('name_cn') or item.get('name_en'))
+    assert catalog.size_category(item['id']) == item['size'].split('/')[0].strip().lower()
+    assert catalog.size_category("missing-id") == "medium"
+    assert GameCatalog.starting_tier(item) == item['starting_tier'].split('/')[0].strip().lower()
+
+    assert split_keys("Vanessa / 凡妮莎 | Mak / 马克") == ["Vanessa", "Mak"]
+    assert split_keys(["Weapon / 武器", "Friend"]) == ["Weapon", "Friend"]
+    assert split_keys("") == []
+
+
+if __name__ == "__main__":
+    test_each_file_parsed_once_under_concurrency()
+    test_indexes_and_views()
+    print("✅ 游戏数据目录测试全部通过")
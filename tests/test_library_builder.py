@@ -0,0 +1,99 @@
+"""
+特征库增量构建测试
+1. 首次全量提取；源图片不变时全部复用且不读文件
+2. 只改 mtime 的图按内容哈希复用；内容变化的图重新提取；删除的图移出子库
+3. 读图失败的图只留记录，文件不变不重试；进程池与进程内提取结果一致；进度回调
+"""
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.comparators.library_builder import LibraryBuilder, is_current
+
+PARAMS = {"nfeatures": 500}
+
+
+def _write_card(directory, name, seed):
+    rng = np.random.default_rng(seed)
+    img = cv2.resize(rng.integers(0, 256, (40, 40), dtype=np.uint8), (200, 200), interpolation=cv2.INTER_NEAREST)
+    path = os.path.join(directory, f"{name}.png")
+    cv2.imwrite(path, img)
+    return path
+
+
+def _sources(directory, count=6):
+    return {"Small": [(f"c{i}", _write_card(directory, f"c{i}", i)) for i in range(count)]}
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_incremental_rebuild():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = _sources(tmp_dir)
+        progress = []
+        builder = LibraryBuilder(PARAMS, progress=lambda done, total: progress.append((done, total)))
+        buckets, stamps = builder.build(sources)
+        assert builder.stats["extracted"] == 6 and len(buckets["Small"]) == 6
+        assert progress[0] == (0, 6) and progress[-1] == (6, 6)
+        assert is_current(sources, stamps)
+
+        # 不变：全部复用，不读文件
+        again, stamps2 = builder.build(sources, buckets, stamps)
+        assert builder.stats["reused"] == 6 and builder.stats["hashed"] == 0 and builder.stats["extracted"] == 0
+        assert np.array_equal(again["Small"].descriptors, buckets["Small"].descriptors)
+
+        # 只改 mtime：按哈希复用；改内容：重新提取；删除：移除
+        _bump_mtime(sources["Small"][0][1])
+        _write_card(tmp_dir, "c1", 100)
+        _bump_mtime(sources["Small"][1][1])
+        changed = {"Small": sources["Small"][:5]}
+        assert not is_current(changed, stamps2)
+        updated, stamps3 = builder.build(changed, again, stamps2)
+        assert builder.stats["hashed"] == 2 and builder.stats["reused"] == 4 and builder.stats["extracted"] == 1
+        assert list(updated["Small"]) == ["c0", "c1", "c2", "c3", "c4"]
+        assert not np.array_equal(updated["Small"]["c1"]['orb_des'], again["Small"]["c1"]['orb_des'])
+        assert is_current(changed, stamps3)
+
+
+def test_failed_image_not_retried():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = _sources(tmp_dir, 2)
+        broken = os.path.join(tmp_dir, "broken.png")
+        with open(broken, "wb") as f:
+            f.write(b"not an image")
+        sources["Small"].append(("broken", broken))
+
+        builder = LibraryBuilder(PARAMS)
+        buckets, stamps = builder.build(sources)
+        assert "broken" not in buckets["Small"] and "broken" in stamps["Small"]
+        assert is_current(sources, stamps)
+        builder.build(sources, buckets, stamps)
+        assert builder.stats["extracted"] == 0 and builder.stats["hashed"] == 0
+
+
+def test_process_pool_matches_inline():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sources = _sources(tmp_dir, 8)
+        inline, _ = LibraryBuilder(PARAMS, max_workers=1).build(sources)
+        progress = []
+        pooled_builder = LibraryBuilder(PARAMS, max_workers=2, parallel_threshold=1, chunk_size=3,
+                                        progress=lambda done, total: progress.append(done))
+        pooled, _ = pooled_builder.build(sources)
+        assert list(pooled["Small"]) == list(inline["Small"])
+        assert np.array_equal(pooled["Small"].descriptors, inline["Small"].descriptors)
+        assert progress[-1] == 8 and progress == sorted(progress)
+
+
+if __name__ == "__main__":
+    test_incremental_rebuild()
+    test_failed_image_not_retried()
+    test_process_pool_matches_inline()
+    print("✅ 特征库增量构建测试全部通过")
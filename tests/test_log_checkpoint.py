@@ -0,0 +1,159 @@
+"""
+LogAnalyzer 检查点测试
+把 assets/logs 复制到临时目录，模拟游戏持续写入 Player.log 以及日志轮转，
+验证从检查点恢复的结果与全量解析完全一致
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_analyzer import LogAnalyzer
+
+LOG_DIR = Path(__file__).parent.parent / "assets" / "logs"
+
+
+def _analyze(log_dir):
+    analyzer = LogAnalyzer(str(log_dir))
+    with redirect_stdout(io.StringIO()):
+        result = analyzer.analyze()
+    return analyzer, result
+
+
+def _signature(sessions):
+    return [
+        (s.session_id, s.hero, s.days, s.is_finished, s.victory, s.items, s.pvp_battles)
+        for s in sessions
+    ]
+
+
+def _make_log_dir(player_log_bytes):
+    tmp_dir = Path(tempfile.mkdtemp(prefix="bazaar_logs_"))
+    shutil.copy(LOG_DIR / "Player-prev.log", tmp_dir / "Player-prev.log")
+    with open(tmp_dir / "Player.log", 'wb') as f:
+        f.write(player_log_bytes)
+    return tmp_dir
+
+
+def test_resume_matches_full_parse():
+    full_bytes = (LOG_DIR / "Player.log").read_bytes()
+    reference_dir = _make_log_dir(full_bytes)
+    growing_dir = _make_log_dir(b"")
+    try:
+        _, reference = _analyze(reference_dir)
+
+        # 分三次写入（切点故意落在行中间），每次都用新的分析器实例冷启动
+        cuts = [len(full_bytes) // 3 + 7, len(full_bytes) * 2 // 3 + 13, len(full_bytes)]
+        written = 0
+        for cut in cuts:
+            with open(growing_dir / "Player.log", 'ab') as f:
+                f.write(full_bytes[written:cut])
+            written = cut
+            analyzer, result = _analyze(growing_dir)
+
+        assert _signature(result["sessions"]) == _signature(reference["sessions"])
+        assert result["current_day"] == reference["current_day"]
+        assert (growing_dir / LogAnalyzer.CHECKPOINT_FILE).exists()
+    finally:
+        shutil.rmtree(reference_dir, ignore_errors=True)
+        shutil.rmtree(growing_dir, ignore_errors=True)
+
+
+def test_resume_skips_parsed_bytes():
+    full_bytes = (LOG_DIR / "Player.log").read_bytes()
+    log_dir = _make_log_dir(full_bytes)
+    try:
+        _analyze(log_dir)
+
+        parsed = []
+        analyzer = LogAnalyzer(str(log_dir))
+        original = analyzer._parse_log_file
+
+        def tracking_parse(log_file, start_offset=0, start_line=0, final=False):
+            parsed.append((log_file.name, start_offset))
+            return original(log_file, start_offset, start_line, final)
+
+        analyzer._parse_log_file = tracking_parse
+        with redirect_stdout(io.StringIO()):
+            analyzer.analyze()
+
+        assert parsed == [
+            ("Player-prev.log", (LOG_DIR / "Player-prev.log").stat().st_size),
+            ("Player.log", len(full_bytes)),
+        ]
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def test_rotation_triggers_full_reparse():
+    full_bytes = (LOG_DIR / "Player.log").read_bytes()
+    log_dir = _make_log_dir(full_bytes)
+    try:
+        _analyze(log_dir)
+
+        # 模拟游戏重启：Player.log 被新内容覆盖（头部指纹改变）
+        prev_bytes = (LOG_DIR / "Player-prev.log").read_bytes()
+        with open(log_dir / "Player.log", 'wb') as f:
+            f.write(prev_bytes)
+
+        reference_dir = _make_log_dir(prev_bytes)
+        try:
+            _, reference = _analyze(reference_dir)
+            _, result = _analyze(log_dir)
+            assert _signature(result["sessions"]) == _signature(reference["sessions"])
+        finally:
+            shutil.rmtree(reference_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def test_prev_log_final_line_without_newline():
+    # Player-prev.log 不会再被写入，最后一行即使没有换行也要解析（与文本模式逐行读取一致）；
+    # Player.log 还会增长，末尾半行留给增量读取
+    prev_bytes = (LOG_DIR / "Player-prev.log").read_bytes().rstrip(b"\r\n")
+    full_bytes = (LOG_DIR / "Player.log").read_bytes()
+    last_newline = full_bytes.rstrip(b"\r\n").rfind(b"\n") + 1
+    log_dir = _make_log_dir(full_bytes.rstrip(b"\r\n"))
+    try:
+        with open(log_dir / "Player-prev.log", 'wb') as f:
+            f.write(prev_bytes)
+
+        analyzer = LogAnalyzer(str(log_dir))
+        processed = []
+        original = analyzer._process_line
+        analyzer._process_line = lambda line, line_num: (processed.append(line), original(line, line_num))
+        with redirect_stdout(io.StringIO()):
+            analyzer.analyze()
+
+        with open(log_dir / "Player-prev.log", 'r', encoding='utf-8', errors='ignore') as f:
+            expected_prev = f.readlines()
+        assert processed[:len(expected_prev)] == expected_prev
+        assert not expected_prev[-1].endswith("\n")
+        assert analyzer.parsed_offsets == {"Player-prev.log": len(prev_bytes), "Player.log": last_newline}
+
+        # 从检查点恢复时最后一行不会被重复解析
+        parsed = []
+        analyzer = LogAnalyzer(str(log_dir))
+        original = analyzer._parse_log_file
+        analyzer._parse_log_file = lambda *args, **kwargs: (parsed.append(args[:2]), original(*args, **kwargs))[1]
+        with redirect_stdout(io.StringIO()):
+            analyzer.analyze()
+        assert [(log_file.name, offset) for log_file, offset in parsed] == [
+            ("Player-prev.log", len(prev_bytes)),
+            ("Player.log", last_newline),
+        ]
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_resume_matches_full_parse()
+    test_resume_skips_parsed_bytes()
+    test_rotation_triggers_full_reparse()
+    test_prev_log_final_line_without_newline()
+    print("✅ 检查点测试全部通过")
@@ -0,0 +1,109 @@
+"""
+日志增量读取回放测试
+把 assets/logs/Player.log 按随机字节边界切块（模拟 Unity 写到一半时被读取），
+经 LogLineAssembler 组装后送入 LogAnalyzer.analyze_incremental，
+验证解析出的会话与一次性读入完全相同
+"""
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_analyzer import LogAnalyzer
+from services.log_line_assembler import LogLineAssembler
+
+LOG_FILE = Path(__file__).parent.parent / "assets" / "logs" / "Player.log"
+SEEDS = (1, 7, 2024)
+
+
+def _signature(sessions):
+    return [
+        (s.hero, s.days, s.is_finished, s.victory, s.items, s.pvp_battles)
+        for s in sessions
+    ]
+
+
+def _replay(data, chunk_sizes):
+    """按给定的块大小依次喂入数据，返回 (会话列表, 组装器, 输出行)"""
+    work_dir = tempfile.mkdtemp(prefix="bazaar_replay_")
+    try:
+        analyzer = LogAnalyzer(work_dir)
+        assembler = LogLineAssembler()
+        emitted = []
+        position = 0
+        with redirect_stdout(io.StringIO()):
+            for size in chunk_sizes:
+                lines = assembler.feed(data[position:position + size])
+                position += size
+                emitted.extend(lines)
+                analyzer.analyze_incremental(lines)
+        return analyzer.sessions, assembler, emitted
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _random_chunks(total, rng):
+    sizes = []
+    while total > 0:
+        # 大多是小块，偶尔出现 1~3 字节的块，专门切开 \r\n 和多字节字符
+        size = rng.choice((rng.randint(1, 3), rng.randint(64, 8192)))
+        size = min(size, total)
+        sizes.append(size)
+        total -= size
+    return sizes
+
+
+def test_assembler_matches_text_mode():
+    data = LOG_FILE.read_bytes()
+    with open(LOG_FILE, 'r', encoding='utf-8', errors='ignore') as f:
+        expected = f.readlines()
+
+    rng = random.Random(SEEDS[0])
+    assembler = LogLineAssembler()
+    lines = []
+    position = 0
+    for size in _random_chunks(len(data), rng):
+        lines.extend(assembler.feed(data[position:position + size]))
+        position += size
+
+    assert lines == expected
+    assert assembler.offset == len(data)
+    assert assembler.pending_bytes == 0
+
+
+def test_partial_line_is_held_back():
+    assembler = LogLineAssembler(offset=100)
+    assert assembler.feed(b"[21:18:51.349] [BoardManager] Card Purch") == []
+    assert assembler.offset == 100
+    lines = assembler.feed(b"ased: InstanceId: itm_x\r")
+    assert lines == []
+    lines = assembler.feed(b"\n[21:18:52.000] [App")
+    assert lines == ["[21:18:51.349] [BoardManager] Card Purchased: InstanceId: itm_x\n"]
+    assert assembler.offset == 100 + len(b"[21:18:51.349] [BoardManager] Card Purchased: InstanceId: itm_x\r\n")
+    assert assembler.pending_bytes == len(b"[21:18:52.000] [App")
+
+
+def test_random_chunk_replay_matches_single_read():
+    data = LOG_FILE.read_bytes()
+    reference_sessions, _, reference_lines = _replay(data, [len(data)])
+    assert reference_sessions
+
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        sessions, assembler, lines = _replay(data, _random_chunks(len(data), rng))
+        assert lines == reference_lines, f"seed={seed}"
+        assert _signature(sessions) == _signature(reference_sessions), f"seed={seed}"
+        assert assembler.offset == len(data)
+
+
+if __name__ == "__main__":
+    test_assembler_matches_text_mode()
+    test_partial_line_is_held_back()
+    test_random_chunk_replay_matches_single_read()
+    print("✅ 回放测试全部通过")
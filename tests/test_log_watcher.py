@@ -0,0 +1,106 @@
+"""
+LogTail 轮转测试
+模拟游戏重启时的日志轮转：Player.log 被改名为 Player-prev.log，随后新建 Player.log，
+验证每一行恰好交给分析器一次，且旧文件剩下的行排在新文件之前
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_watcher import LogTail
+
+
+def _lines(prefix, count):
+    return [f"[00:00:{i:02d}] [{prefix}] line {i}\n" for i in range(count)]
+
+
+def _append(path, text):
+    with open(path, 'ab') as f:
+        f.write(text.encode('utf-8'))
+
+
+def _setup():
+    log_dir = Path(tempfile.mkdtemp(prefix="bazaar_tail_"))
+    player, prev = log_dir / "Player.log", log_dir / "Player-prev.log"
+    _append(prev, "".join(_lines("older", 5)))
+    _append(player, "".join(_lines("old", 10)))
+
+    # 与 LogWatcher 相同：Player-prev.log 的前任是 Player.log
+    player_tail = LogTail(player)
+    prev_tail = LogTail(prev, predecessor=player_tail)
+    # 初始化时全量分析已读完这两个文件
+    prev_tail.start_at(prev.stat().st_size)
+    player_tail.start_at(player.stat().st_size)
+    return log_dir, player, prev, player_tail, prev_tail
+
+
+def _rotate(player, prev, new_text):
+    os.remove(prev)
+    os.rename(player, prev)
+    _append(player, new_text)
+
+
+def test_rename_rotation_resumes_from_player_offset():
+    log_dir, player, prev, player_tail, prev_tail = _setup()
+    try:
+        old = _lines("old", 20)
+        new = _lines("new", 6)
+        # 游戏继续写入（最后一行只写了一半），然后重启
+        _append(player, "".join(old[10:15]) + old[15][:12])
+        assert player_tail.read_lines() == old[10:15]
+        _append(player, old[15][12:] + "".join(old[16:]))
+        _rotate(player, prev, "".join(new))
+
+        # LogWatcher 的读取顺序：先 Player-prev.log 再 Player.log
+        lines = prev_tail.read_lines() + player_tail.read_lines()
+        assert lines == old[15:] + new
+        assert prev_tail.read_lines() == [] and player_tail.read_lines() == []
+    finally:
+        player_tail.close()
+        prev_tail.close()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def test_rotation_seen_by_player_tail_first():
+    log_dir, player, prev, player_tail, prev_tail = _setup()
+    try:
+        old = _lines("old", 14)
+        new = _lines("new", 3)
+        _append(player, "".join(old[10:]))
+        _rotate(player, prev, "".join(new))
+
+        # Player.log 先发现轮转时，Player-prev.log 仍能按轮转前的偏移接着读
+        assert player_tail.read_lines() == new
+        assert prev_tail.read_lines() == old[10:]
+    finally:
+        player_tail.close()
+        prev_tail.close()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def test_unrelated_prev_file_is_not_replayed():
+    log_dir, player, prev, player_tail, prev_tail = _setup()
+    try:
+        # Player-prev.log 被换成一个与 Player.log 无关的文件：不回放其内容
+        # （先写好再替换，避免新文件复用刚删除文件的 inode）
+        _append(log_dir / "other.log", "".join(_lines("unrelated", 8)))
+        os.replace(log_dir / "other.log", prev)
+        assert prev_tail.read_lines() == []
+        _append(prev, "".join(_lines("later", 2)))
+        assert prev_tail.read_lines() == _lines("later", 2)
+        assert player_tail.read_lines() == []
+    finally:
+        player_tail.close()
+        prev_tail.close()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_rename_rotation_resumes_from_player_offset()
+    test_rotation_seen_by_player_tail_first()
+    test_unrelated_prev_file_is_not_replayed()
+    print("✅ 日志轮转测试全部通过")
@@ -0,0 +1,134 @@
+"""
+战绩数据库测试
+把仓库自带的 user_data/match_history.json 复制到临时目录，验证：
+1. 一次性导入后 get_all_matches() 与旧JSON完全一致，且不会重复导入
+2. 单条更新/截图/删除/筛选分页的结果
+3. 与旧版"整文件读写"相比每次 add_match_record / get_match 的耗时
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.match_history_manager import MatchHistoryManager
+
+LEGACY_JSON = Path(__file__).parent.parent / "user_data" / "match_history.json"
+
+
+def _make_data_dir():
+    data_dir = Path(tempfile.mkdtemp(prefix="bazaar_history_"))
+    shutil.copy(LEGACY_JSON, data_dir / MatchHistoryManager.LEGACY_FILE)
+    return data_dir
+
+
+def _legacy_matches():
+    """旧JSON中的对局；早期记录缺少的字段（game_date、duration）从数据库读出为None"""
+    with open(LEGACY_JSON, 'r', encoding='utf-8') as f:
+        matches = json.load(f)["matches"]
+    for match in matches:
+        match.setdefault("game_date", None)
+        for battle in match["pvp_battles"]:
+            battle.setdefault("duration", None)
+    return matches
+
+
+def test_import_round_trip():
+    data_dir = _make_data_dir()
+    try:
+        manager = MatchHistoryManager(str(data_dir))
+        assert manager.get_all_matches() == _legacy_matches()
+        assert not (data_dir / MatchHistoryManager.LEGACY_FILE).exists()
+        manager.close()
+
+        # 再次打开（即使旧文件被放回）也不会重复导入
+        shutil.copy(LEGACY_JSON, data_dir / MatchHistoryManager.LEGACY_FILE)
+        manager = MatchHistoryManager(str(data_dir))
+        assert manager.count_matches() == len(_legacy_matches())
+        manager.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def test_single_row_updates_and_queries():
+    data_dir = _make_data_dir()
+    try:
+        manager = MatchHistoryManager(str(data_dir))
+        legacy = _legacy_matches()
+        target = legacy[0]
+        match_id = target["match_id"]
+        day = target["pvp_battles"][0]["day"]
+
+        assert manager.update_battle_screenshot(match_id, day, "shot.png")
+        assert manager.get_match(match_id)["pvp_battles"][0]["screenshot"] == "shot.png"
+        assert not manager.update_battle_screenshot("missing", day, "shot.png")
+
+        assert manager.update_match(match_id, {"victory": True, "note": "复盘"})
+        match = manager.get_match(match_id)
+        assert match["victory"] is True and match["note"] == "复盘"
+        assert match["pvp_battles"][0]["player_items"] == target["pvp_battles"][0]["player_items"]
+
+        hero = target["hero"]
+        by_hero = manager.query_matches(hero=hero)
+        assert [m["match_id"] for m in by_hero] == [m["match_id"] for m in legacy if m["hero"] == hero]
+        assert manager.count_matches(hero=hero) == len(by_hero)
+
+        page = manager.query_matches(limit=2, offset=1, include_items=False)
+        assert [m["match_id"] for m in page] == [m["match_id"] for m in legacy[1:3]]
+        assert all("player_items" not in b for m in page for b in m["pvp_battles"])
+
+        assert manager.delete_match(match_id)
+        assert manager.get_match(match_id) is None
+        assert manager.count_matches() == len(legacy) - 1
+        # 战斗和棋盘物品随对局级联删除
+        assert manager._conn.execute("SELECT COUNT(*) FROM board_items WHERE match_id = ?", (match_id,)).fetchone()[0] == 0
+        manager.close()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def bench_against_json(rounds: int = 50):
+    """对比旧版（每次整文件读写JSON）与数据库的 add_match_record + get_match 耗时"""
+    data_dir = _make_data_dir()
+    try:
+        legacy = _legacy_matches()
+        template = legacy[0]
+
+        json_file = data_dir / "bench.json"
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({"matches": legacy}, f, indent=2, ensure_ascii=False)
+        start = time.perf_counter()
+        for i in range(rounds):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+            history["matches"].insert(0, dict(template, match_id=f"bench_{i}"))
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(history, f, indent=2, ensure_ascii=False)
+            with open(json_file, 'r', encoding='utf-8') as f:
+                next(m for m in json.load(f)["matches"] if m["match_id"] == template["match_id"])
+        json_elapsed = time.perf_counter() - start
+
+        manager = MatchHistoryManager(str(data_dir))
+        start = time.perf_counter()
+        for i in range(rounds):
+            manager.add_match_record(dict(template, match_id=f"bench_{i}"))
+            manager.get_match(template["match_id"])
+        db_elapsed = time.perf_counter() - start
+        manager.close()
+
+        print(f"{'版本':<8} | {'每次add+get(ms)':<16}")
+        print(f"{'json':<8} | {json_elapsed / rounds * 1000:16.2f}")
+        print(f"{'sqlite':<8} | {db_elapsed / rounds * 1000:16.2f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_import_round_trip()
+    test_single_row_updates_and_queries()
+    print("✅ 战绩数据库测试全部通过")
+    bench_against_json()
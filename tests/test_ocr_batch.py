@@ -0,0 +1,224 @@
+"""
+批量 OCR 确权测试
+1. 名字区域按 DETAIL_NAME_AREA 截取；一帧中只有 DETAIL 框参与识别，结果与框一一对应
+2. 引擎只被调用一次 (single_line 批量)，名字用批量模糊匹配解析
+3. 拼图：图块位置与原图一致，图块之间留有空白
+4. 详情框一直开着（名字区域像素不变）时不再调用引擎，换了名字重新识别
+5. AutoScanner 悬停识别：离悬停卡牌最近的详情框的名字确认/纠正 ORB 结果，OCR 未就绪时保留 ORB 结果
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from platforms.interfaces.ocr import OCREngine
+from services.ocr_engine_pool import OCREnginePool
+from services.ocr_service import OCRService
+from services.recognition_cache import OCRResultCache
+
+
+class FakeEngine(OCREngine):
+    """按名字区域左上角像素值查表返回文字"""
+    name = "Fake"
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.batches = []
+
+    def recognize(self, image):
+        return self.texts.get(int(image[0, 0, 0]), "")
+
+    def recognize_batch(self, images, single_line=False):
+        self.batches.append((len(images), single_line))
+        return super().recognize_batch(images, single_line)
+
+
+class FakeSearcher:
+    def __init__(self, names):
+        self.names = names
+        self.calls = []
+
+    def find_best_match(self, query, threshold=60):
+        return self.names.get(query)
+
+    def find_best_matches(self, queries, threshold=60):
+        self.calls.append(list(queries))
+        return [self.names.get(q) for q in queries]
+
+
+def _service(texts, names):
+    engine = FakeEngine(texts)
+    service = OCRService.__new__(OCRService)
+    service.engine_pool = OCREnginePool(factory=lambda backend: engine)
+    service.backend = "fake"
+    service.engine_timeout = None
+    service.engine = engine
+    service.searcher = FakeSearcher(names)
+    service.result_cache = OCRResultCache()
+    return service
+
+
+def test_recognize_detail_boxes():
+    frame = np.zeros((400, 800, 3), dtype=np.uint8)
+    boxes = [(10, 10, 300, 200), (400, 20, 300, 200), (100, 250, 200, 100)]
+    for marker, (x, y, w, h) in enumerate(boxes, 1):
+        frame[y:y + h, x:x + w] = marker * 10
+        # 名字区域左上角之外的像素不同，确认截取位置正确
+        nx, ny = x + int(w * config.DETAIL_NAME_AREA['left']), y + int(h * config.DETAIL_NAME_AREA['top'])
+        frame[ny, nx] = marker
+    detections = [
+        {'class_id': config.CLS_MAP['DETAIL'], 'box': boxes[0]},
+        {'class_id': config.CLS_MAP['ITEM'], 'box': boxes[2]},
+        {'class_id': config.CLS_MAP['DETAIL'], 'box': boxes[1]},
+    ]
+    service = _service({1: "港口\n费：3", 2: " 冷 库 ", 3: "不应识别"}, {"港口": "harbor", "冷库": "freezer"})
+
+    result = service.recognize_detail_boxes(frame, detections)
+    assert result == [(boxes[0], "harbor"), (boxes[1], "freezer")]
+    assert service.engine.batches == [(2, True)]
+    assert service.searcher.calls == [["港口", "冷库"]]
+
+    assert service.recognize_card_ids([]) == []
+    assert service.recognize_card_ids([np.zeros((0, 0, 3), dtype=np.uint8)]) == [None]
+
+
+def _detail_with_name(stroke):
+    """名字区域里画几笔“文字”的详情框"""
+    crop = np.full((200, 300, 3), 40, dtype=np.uint8)
+    for x in stroke:
+        crop[12:30, 30 + x:34 + x] = 230
+    return crop
+
+
+class LookupEngine(FakeEngine):
+    """按“笔画”数量返回文字"""
+
+    def recognize(self, image):
+        strokes = int((image[:, :, 0] > 128).any(axis=0).sum()) // 4
+        return self.texts.get(strokes, "")
+
+
+def test_result_cache_skips_engine():
+    engine = LookupEngine({2: "港口", 3: "冷库"})
+    service = _service({}, {"港口": "harbor", "冷库": "freezer"})
+    service.engine_pool = OCREnginePool(factory=lambda backend: engine)
+    harbor, freezer = _detail_with_name([0, 20]), _detail_with_name([0, 20, 40])
+
+    # 同一个详情框连续 5 帧：只识别一次
+    for _ in range(5):
+        assert service.recognize_card_id(harbor.copy()) == "harbor"
+    assert service.cache_stats()["hits"] == 4 and service.cache_stats()["misses"] == 1
+
+    # 批量：已缓存的名字区域不送入引擎
+    assert service.recognize_card_ids([harbor, freezer]) == ["harbor", "freezer"]
+    assert engine.batches == [(1, True)]
+    assert service.recognize_card_ids([freezer, harbor]) == ["freezer", "harbor"]
+    assert engine.batches == [(1, True)]
+
+    # 识别过但没有匹配到名字的结果同样缓存
+    blank = _detail_with_name([])
+    assert service.recognize_card_id(blank) is None and service.recognize_card_id(blank) is None
+    stats = service.cache_stats()
+    assert stats["size"] == 3 and stats["hits"] == 8 and stats["misses"] == 3 and stats["hit_rate"] == round(8 / 11, 3)
+
+
+def test_name_band_and_mosaic():
+    crop = np.zeros((200, 300, 3), dtype=np.uint8)
+    band = OCRService.crop_name_band(crop)
+    area = config.DETAIL_NAME_AREA
+    assert band.shape[:2] == (int(200 * area['bottom']) - int(200 * area['top']),
+                              int(300 * area['right']) - int(300 * area['left']))
+    assert OCRService.crop_name_band(None) is None
+    assert OCRService._first_line("\n  港 口 \n费") == "港口" and OCRService._first_line("") is None
+
+    try:
+        from platforms.common.ocr import stitch_mosaic, MOSAIC_GAP
+    except ImportError:
+        # 没有安装 RapidOCR 时跳过拼图检查
+        return
+    tiles = [np.full((30, 100, 3), 50, np.uint8), np.full((40, 60), 90, np.uint8)]
+    mosaic, spans = stitch_mosaic(tiles)
+    assert spans == [(MOSAIC_GAP, MOSAIC_GAP + 30), (2 * MOSAIC_GAP + 30, 2 * MOSAIC_GAP + 70)]
+    assert mosaic.shape == (70 + 3 * MOSAIC_GAP, 100, 3)
+    assert (mosaic[spans[1][0]:spans[1][1], :60] == 90).all() and (mosaic[spans[1][0]:spans[1][1], 60:] == 0).all()
+    assert (mosaic[:MOSAIC_GAP] == 0).all()
+
+
+class FakeMatcher:
+    def __init__(self, result_id):
+        self.result_id = result_id
+        self.calls = 0
+
+    def match(self, crop, size_cat):
+        self.calls += 1
+        return [(self.result_id, 40)] if self.result_id else []
+
+    def match_monster_character(self, crop):
+        return [("dragon", 40)]
+
+
+def _scanner(service, orb_id):
+    from services.auto_scanner import AutoScanner
+    from services.recognition_cache import RecognitionCache
+    scanner = AutoScanner.__new__(AutoScanner)
+    scanner.recognition_cache = RecognitionCache()
+    scanner.matcher = FakeMatcher(orb_id)
+    scanner.item_map = {"harbor": "港口", "lookalike": "港湾"}
+    scanner.monster_map = {"dragon": "巨龙"}
+    scanner.ocr_card = service
+    return scanner
+
+
+def test_auto_scanner_confirms_with_tooltip():
+    frame = np.zeros((600, 1000, 3), dtype=np.uint8)
+    card, near, far = (100, 350, 150, 150), (260, 200, 300, 200), (650, 20, 300, 200)
+    frame[350:500, 100:250] = np.random.default_rng(0).integers(0, 256, (150, 150, 3), dtype=np.uint8)
+    for marker, (x, y, w, h) in ((1, near), (2, far)):
+        nx, ny = x + int(w * config.DETAIL_NAME_AREA['left']), y + int(h * config.DETAIL_NAME_AREA['top'])
+        frame[ny, nx] = marker
+    details = [{'class_id': config.CLS_MAP['DETAIL'], 'box': far}, {'class_id': config.CLS_MAP['DETAIL'], 'box': near}]
+    hit = {'class_id': config.CLS_MAP['ITEM'], 'box': card}
+
+    # ORB 选中了长得像的卡：以最近的详情框里的名字为准（远处的详情框不参与识别）
+    service = _service({1: "港口", 2: "冷库"}, {"港口": "harbor", "冷库": "freezer"})
+    scanner = _scanner(service, "lookalike")
+    assert scanner._recognize_object(frame, hit, details) == ('card', 'harbor', '港口')
+    assert service.engine.batches == [(1, True)]
+    # ORB 结果与 OCR 一致；再次悬停时名字区域命中 OCR 缓存
+    scanner.matcher.result_id = "harbor"
+    scanner.recognition_cache = type(scanner.recognition_cache)()
+    assert scanner._recognize_object(frame, hit, details) == ('card', 'harbor', '港口')
+    assert service.engine.batches == [(1, True)] and service.cache_stats()["hits"] == 1
+
+    # 名字没有匹配到 / 没有详情框：保留 ORB 结果
+    scanner = _scanner(_service({1: "看不清"}, {}), "lookalike")
+    assert scanner._recognize_object(frame, hit, details) == ('card', 'lookalike', '港湾')
+    scanner = _scanner(_service({1: "港口"}, {"港口": "harbor"}), "lookalike")
+    assert scanner._recognize_object(frame, hit, []) == ('card', 'lookalike', '港湾')
+    assert scanner.ocr_card.engine.batches == []
+
+    # ORB 没有结果时由 OCR 给出
+    scanner = _scanner(_service({1: "港口"}, {"港口": "harbor"}), None)
+    assert scanner._recognize_object(frame, hit, details) == ('card', 'harbor', '港口')
+
+    # 引擎还在加载（不等待）：保留 ORB 结果；怪物事件不走 OCR
+    service = _service({1: "港口"}, {"港口": "harbor"})
+    service.engine_pool = OCREnginePool(factory=lambda backend: threading.Event().wait(1) or service.engine)
+    service.engine_timeout = 0
+    scanner = _scanner(service, "lookalike")
+    assert scanner._recognize_object(frame, hit, details) == ('card', 'lookalike', '港湾')
+    monster = dict(hit, _is_monster_event=True)
+    assert scanner._recognize_object(frame, monster, details) == ('monster', 'dragon', '巨龙')
+    assert service.engine.batches == []
+
+
+if __name__ == "__main__":
+    test_recognize_detail_boxes()
+    test_result_cache_skips_engine()
+    test_name_band_and_mosaic()
+    test_auto_scanner_confirms_with_tooltip()
+    print("✅ 批量 OCR 确权测试全部通过")
@@ -0,0 +1,188 @@
+"""
+OCR 引擎池测试
+1. 两个 OCRService 共用同一个引擎（只加载一次），名字索引各自独立
+2. 后台加载：timeout=0 时不等待（返回 None），加载完成后可用
+3. 空闲超时卸载、使用中不卸载、卸载后再次使用重新加载；加载失败不会每次重试
+4. 借用与后台卸载并发：借用过程中任何时刻插入卸载都不会让 lease() 永远等待
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms.interfaces.ocr import OCREngine
+from services.ocr_engine_pool import OCREnginePool
+from services.ocr_service import OCRService
+
+
+class SlowEngine(OCREngine):
+    name = "Slow"
+
+    def recognize(self, image):
+        return "港口"
+
+
+class CountingFactory:
+    def __init__(self, gate=None, fail=False):
+        self.gate = gate
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, backend):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("模型文件缺失")
+        return SlowEngine()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _db(records):
+    tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+    with tmp:
+        json.dump(records, tmp, ensure_ascii=False)
+    return tmp.name
+
+
+def test_shared_engine_background_load():
+    gate = threading.Event()
+    factory = CountingFactory(gate)
+    pool = OCREnginePool(factory=factory, idle_timeout=0)
+    items, monsters = _db([{"id": "harbor", "name_cn": "港口"}]), _db([{"id": "dragon", "name_cn": "港口巨龙"}])
+    try:
+        card = OCRService(items, engine_pool=pool, engine_timeout=0)
+        monster = OCRService(monsters, engine_pool=pool, engine_timeout=0)
+        crop = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        # 引擎还在加载：不等待，直接跳过本次识别
+        assert card.recognize_card_id(crop) is None
+        assert card.recognize_card_ids([crop]) == [None]
+        assert pool.stats()["auto"]["loading"]
+
+        gate.set()
+        with pool.lease(timeout=5) as engine:
+            assert isinstance(engine, SlowEngine)
+        assert card.recognize_card_id(crop) == "harbor"
+        assert monster.recognize_card_id(crop) == "dragon"
+        assert factory.calls == 1 and pool.stats()["auto"]["loads"] == 1
+    finally:
+        pool.shutdown()
+        os.unlink(items)
+        os.unlink(monsters)
+
+
+def test_idle_unload_and_reload():
+    clock = FakeClock()
+    factory = CountingFactory()
+    pool = OCREnginePool(factory=factory, idle_timeout=60, clock=clock)
+    try:
+        with pool.lease() as engine:
+            assert engine is not None
+            # 使用中：即使超时也不卸载
+            clock.now += 120
+            assert pool.release_idle() == []
+        clock.now += 30
+        assert pool.release_idle() == [] and pool.is_loaded()
+        clock.now += 31
+        assert pool.release_idle() == ["auto"] and not pool.is_loaded()
+
+        with pool.lease() as engine:
+            assert engine is not None
+        assert factory.calls == 2
+
+        pool.set_idle_timeout(0)
+        clock.now += 10_000
+        assert pool.release_idle() == [] and pool.is_loaded()
+    finally:
+        pool.shutdown()
+    assert not pool.is_loaded()
+
+
+def test_failed_load_not_retried_immediately():
+    clock = FakeClock()
+    factory = CountingFactory(fail=True)
+    pool = OCREnginePool(factory=factory, clock=clock)
+    for _ in range(3):
+        with pool.lease() as engine:
+            assert engine is None
+    assert factory.calls == 1
+
+    clock.now += 61
+    factory.fail = False
+    with pool.lease() as engine:
+        assert engine is not None
+    assert factory.calls == 2
+    pool.shutdown()
+
+
+class UnloadAfterEveryRelease:
+    """替换池锁：每次释放后立刻尝试卸载空闲引擎（模拟后台检查插在任意两次加锁之间）"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.inner = threading.Lock()
+        self.armed = False
+        self.unloads = 0
+        self._busy = threading.local()
+
+    def __enter__(self):
+        self.inner.acquire()
+
+    def __exit__(self, *exc):
+        self.inner.release()
+        if self.armed and not getattr(self._busy, "value", False):
+            self._busy.value = True
+            try:
+                self.unloads += len(self.pool.release_idle(now=float("inf")))
+            finally:
+                self._busy.value = False
+
+
+def test_lease_survives_concurrent_unload():
+    factory = CountingFactory()
+    pool = OCREnginePool(factory=factory, idle_timeout=300)
+    lock = pool._lock = UnloadAfterEveryRelease(pool)
+    try:
+        with pool.lease(timeout=5) as engine:
+            assert isinstance(engine, SlowEngine)
+        lock.armed = True
+
+        # 引擎已空闲超时：借用开始时它可能被卸载，但必须重新加载而不是一直等
+        for _ in range(3):
+            result = []
+            worker = threading.Thread(target=lambda: result.append(_lease_once(pool)), daemon=True)
+            worker.start()
+            worker.join(5)
+            assert not worker.is_alive(), "lease() 在引擎被卸载后一直等待"
+            assert isinstance(result[0], SlowEngine)
+        # 借用期间确实发生过卸载和重新加载
+        assert lock.unloads >= 1 and factory.calls >= 2
+    finally:
+        lock.armed = False
+        pool.shutdown()
+
+
+def _lease_once(pool):
+    with pool.lease(timeout=None) as engine:
+        return engine
+
+
+if __name__ == "__main__":
+    test_shared_engine_background_load()
+    test_idle_unload_and_reload()
+    test_failed_load_not_retried_immediately()
+    test_lease_survives_concurrent_unload()
+    print("✅ OCR 引擎池测试全部通过")
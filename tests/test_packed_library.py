@@ -0,0 +1,88 @@
+"""
+紧凑特征库格式测试
+1. 写入 → memmap 读回：描述子/偏移/特征点数一致，子库条目是只读视图
+2. 同一 ID 多个变体
+3. 版本号不符、提取参数变化、缺少子库、文件截断时返回 None（由调用方重建）
+"""
+import os
+import struct
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.comparators import packed_library
+from core.comparators.packed_library import open_library, pack_bucket, write_library
+
+PARAMS = {"nfeatures": 500}
+
+
+def _descriptors(rng, rows):
+    return rng.integers(0, 256, (rows, 32), dtype=np.uint8)
+
+
+def _sample():
+    rng = np.random.default_rng(0)
+    small = [(f"s-{i}", _descriptors(rng, 50 + i), 60 + i) for i in range(4)]
+    memory = [("s-1", _descriptors(rng, 30), 31), ("s-1", _descriptors(rng, 20), 22), ("s-3", _descriptors(rng, 10), 12)]
+    return small, memory
+
+
+def test_round_trip_memmap():
+    small, memory = _sample()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "lib.orblib")
+        write_library(path, {"Small": pack_bucket(small), "Empty": pack_bucket([]),
+                             "Memory": pack_bucket(memory + [("none", None, 0)])}, PARAMS)
+        lib = open_library(path, PARAMS, required=("Small", "Memory"))
+        assert lib is not None and lib.header["version"] == packed_library.FORMAT_VERSION
+
+        bucket = lib["Small"]
+        assert list(bucket) == [cid for cid, _, _ in small]
+        assert isinstance(bucket.descriptors, np.memmap) and not bucket.descriptors.flags.writeable
+        for cid, des, kp_count in small:
+            entry = bucket[cid]
+            assert np.array_equal(entry['orb_des'], des) and entry['kp_count'] == kp_count
+            assert np.shares_memory(entry['orb_des'], bucket.descriptors)
+
+        assert len(lib["Empty"]) == 0 and lib["Empty"].descriptors.shape == (0, 32)
+        variants = lib["Memory"].variants("s-1")
+        assert [v['kp_count'] for v in variants] == [31, 22]
+        assert lib["Memory"].variants("s-0") == [] and "none" not in lib["Memory"]
+        lib.close()
+
+
+def test_stale_cache_detected():
+    small, _ = _sample()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "lib.orblib")
+        assert open_library(path, PARAMS) is None
+
+        write_library(path, {"Small": pack_bucket(small)}, PARAMS)
+        assert open_library(path, {"nfeatures": 1000}) is None
+        assert open_library(path, PARAMS, required=("Small", "Large")) is None
+
+        # 版本号不一致
+        with open(path, "r+b") as f:
+            f.seek(8)
+            f.write(struct.pack("<I", packed_library.FORMAT_VERSION + 1))
+        assert open_library(path, PARAMS) is None
+
+        # 写到一半被中断
+        write_library(path, {"Small": pack_bucket(small)}, PARAMS)
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) // 2)
+        assert open_library(path, PARAMS) is None
+
+        # 不是特征库文件（例如旧版 pickle 被改名）
+        with open(path, "wb") as f:
+            f.write(b"\x80\x04garbage")
+        assert open_library(path, PARAMS) is None
+
+
+if __name__ == "__main__":
+    test_round_trip_memmap()
+    test_stale_cache_detected()
+    print("✅ 紧凑特征库格式测试全部通过")
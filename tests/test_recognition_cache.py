@@ -0,0 +1,126 @@
+"""
+识别结果缓存测试
+1. 同一物品（检测框抖动几个像素、亮度略变）命中缓存，不再调用识别
+2. 不同物品、不同尺寸分区不命中；识别失败的结果不缓存
+3. LRU 淘汰，命中率/耗时统计
+4. OCR 结果缓存：二值图哈希精确命中，过期和容量淘汰
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.recognition_cache import OCRResultCache, RecognitionCache
+
+
+def _card(seed, size=(150, 150)):
+    """平滑的彩色卡面（低频图案，接近真实卡图）"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (6, 6, 3), dtype=np.uint8)
+    return cv2.resize(small, size, interpolation=cv2.INTER_CUBIC)
+
+
+def _board(cards):
+    board = np.zeros((200, 170 * len(cards) + 20, 3), dtype=np.uint8)
+    for i, card in enumerate(cards):
+        board[20:170, 20 + 170 * i:170 + 170 * i] = card
+    return board
+
+
+def _crop(board, index, dx=0, dy=0):
+    x, y = 20 + 170 * index + dx, 20 + dy
+    return board[y:y + 150, x:x + 150]
+
+
+class CountingRecognizer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, result):
+        self.calls += 1
+        return result
+
+
+def test_hover_back_and_forth_hits():
+    cache = RecognitionCache()
+    recognize = CountingRecognizer()
+    board = _board([_card(i) for i in range(3)])
+
+    # 在三件物品之间来回悬停 5 轮，检测框每次抖动 0~2 像素
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        for i in range(3):
+            dx, dy = rng.integers(0, 3, 2)
+            crop = _crop(board, i, dx, dy)
+            result = cache.get_or_compute(crop, ("card", "Medium"), lambda i=i: recognize(("card", f"id-{i}", f"物品{i}")))
+            assert result == ("card", f"id-{i}", f"物品{i}")
+    assert recognize.calls == 3
+
+    # 亮度略有变化（游戏内高亮）仍然命中
+    brighter = cv2.convertScaleAbs(_crop(board, 1), alpha=1.0, beta=5)
+    assert cache.get_or_compute(brighter, ("card", "Medium"), lambda: recognize(None))[1] == "id-1"
+
+    stats = cache.stats()
+    assert stats["hits"] == 13 and stats["misses"] == 3 and stats["hit_rate"] == round(13 / 16, 3)
+    assert stats["hit_ms"] < stats["miss_ms"] or stats["miss_ms"] == 0.0
+
+
+def test_misses_and_eviction():
+    cache = RecognitionCache(capacity=2)
+    recognize = CountingRecognizer()
+    a, b, c = _card(10), _card(11), _card(12)
+
+    cache.get_or_compute(a, ("card", "Small"), lambda: recognize(("card", "a", "A")))
+    # 同一截图块、不同尺寸分区：不命中
+    assert cache.get_or_compute(a, ("card", "Large"), lambda: recognize(("card", "a-large", "A"))) == ("card", "a-large", "A")
+    # 不同物品：不命中；识别失败不缓存
+    assert cache.get_or_compute(b, ("card", "Small"), lambda: recognize(None)) is None
+    assert cache.get_or_compute(b, ("card", "Small"), lambda: recognize(None)) is None
+    assert recognize.calls == 4 and len(cache) == 2
+
+    # 容量 2：加入 c 后最久未用的 a/Small 被淘汰
+    cache.get_or_compute(a, ("card", "Large"), lambda: recognize(None))
+    cache.get_or_compute(c, ("card", "Small"), lambda: recognize(("card", "c", "C")))
+    assert cache.get_or_compute(a, ("card", "Small"), lambda: recognize(("card", "a2", "A"))) == ("card", "a2", "A")
+    assert cache.lookup(a, ("card", "Large"))[0] is None
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ocr_result_cache():
+    now = [0.0]
+    cache = OCRResultCache(capacity=2, ttl=10.0, clock=lambda: now[0])
+    band = np.zeros((40, 280), dtype=np.uint8)
+    band[10:30, 20:60] = 255
+    other = band.copy()
+    other[10:30, 100:140] = 255
+    key, other_key = cache.band_key(band), cache.band_key(other)
+    assert key == cache.band_key(band.copy()) and key != other_key
+
+    assert cache.get(key) == (False, None)
+    cache.put(key, "harbor")
+    cache.put(other_key, None)
+    assert cache.get(key) == (True, "harbor")
+    assert cache.get(other_key) == (True, None)
+
+    # 过期
+    now[0] = 10.5
+    assert cache.get(key) == (False, None)
+    # 容量 2：最久未用的被淘汰
+    cache.put(key, "harbor")
+    cache.put(b"third", "freezer")
+    assert cache.get(other_key) == (False, None) and len(cache) == 2
+
+    stats = cache.stats()
+    assert stats == {"size": 2, "hits": 2, "misses": 3, "expired": 1, "hit_rate": 0.4}
+
+
+if __name__ == "__main__":
+    test_hover_back_and_forth_hits()
+    test_misses_and_eviction()
+    test_ocr_result_cache()
+    print("✅ 识别结果缓存测试全部通过")
@@ -0,0 +1,97 @@
+"""
+扫描帧率调度器测试
+用可控的时钟模拟每帧处理耗时，验证：
+1. 休眠时间扣除处理耗时，平均 CPU 占用不超过预算
+2. 闲置时退避到 idle_fps，鼠标移动/悬停识别时立即恢复
+3. 非扫描状态指数退避，实际帧率报告
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scan_governor import FrameGovernor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _governor(**kwargs):
+    clock = FakeClock()
+    return FrameGovernor(clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def _run_frame(governor, clock, cost, **kwargs):
+    governor.begin_frame()
+    clock.now += cost
+    return governor.end_frame(**kwargs)
+
+
+def test_sleep_subtracts_processing_time():
+    governor, clock = _governor(target_fps=10)
+    for _ in range(20):
+        delay = _run_frame(governor, clock, 0.02)
+    assert abs(delay - 0.08) < 1e-9
+    assert abs(governor.achieved_fps - 10) < 1e-6
+
+
+def test_cpu_budget_caps_frame_rate():
+    governor, clock = _governor(target_fps=30, cpu_budget=0.5)
+    start = clock.now
+    busy = 0.0
+    for _ in range(50):
+        _run_frame(governor, clock, 0.1)
+        busy += 0.1
+    assert busy / (clock.now - start) <= 0.5 + 1e-6
+    assert governor.achieved_fps < 5.1
+
+
+def test_idle_backoff_and_wake():
+    governor, clock = _governor(target_fps=10, idle_fps=2, idle_after=1.0)
+    for _ in range(12):
+        _run_frame(governor, clock, 0.01, changed=False)
+    assert governor.is_idle
+    assert abs(_run_frame(governor, clock, 0.01, changed=False) - 0.49) < 1e-9
+
+    # 悬停识别进行中：保持目标帧率
+    assert abs(_run_frame(governor, clock, 0.01, changed=False, responsive=True) - 0.09) < 1e-9
+
+    for _ in range(12):
+        _run_frame(governor, clock, 0.01, changed=False)
+    # 鼠标在退避期间移动：最多多等一个正常帧周期
+    moves = iter([False, True])
+    delay = _run_frame(governor, clock, 0.01, changed=False, wake=lambda: next(moves))
+    assert delay <= 0.09 + 0.1 + 1e-9
+    assert not governor.is_idle
+
+
+def test_state_backoff_and_reset():
+    governor, clock = _governor()
+    waits = [governor.wait("background") for _ in range(6)]
+    assert waits == [0.25, 0.5, 1.0, 2.0, 2.0, 2.0]
+    assert governor.wait("no_window") == 0.5
+
+    _run_frame(governor, clock, 0.01)
+    assert governor.wait("background") == 0.25
+
+    assert governor.report_due()
+    assert not governor.report_due()
+    assert "FPS" in governor.status_text()
+
+
+if __name__ == "__main__":
+    test_sleep_subtracts_processing_time()
+    test_cpu_budget_caps_frame_rate()
+    test_idle_backoff_and_wake()
+    test_state_backoff_and_reset()
+    print("✅ 扫描帧率调度器测试全部通过")
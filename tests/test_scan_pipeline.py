@@ -0,0 +1,186 @@
+"""
+扫描流水线测试
+1. LatestSlot：只保留最新帧，被覆盖的帧计为丢弃，超时返回 None
+2. RecognitionPool：同一悬停对象只识别一次，所有回调都能拿到结果
+3. CaptureWorker：识别线程忙时截图节奏保持稳定
+4. AutoScanner 悬停识别：识别进行中每帧重复触发、按住热键，结果也只发出一次
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scan_pipeline import CaptureWorker, LatestSlot, RecognitionPool, StageStats
+
+
+class FakeCapturer:
+    """模拟截图器：固定耗时，返回新数组"""
+
+    def __init__(self, cost=0.005):
+        self.cost = cost
+        self.region = None
+        self.thread = None
+
+    def set_region(self, region):
+        self.region = region
+
+    def capture(self):
+        self.thread = threading.current_thread().name
+        time.sleep(self.cost)
+        return np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+def test_latest_slot_keeps_newest():
+    stats = StageStats("detect")
+    slot = LatestSlot(stats)
+    assert slot.get(timeout=0.01) is None
+    for i in range(3):
+        slot.put(i)
+    assert slot.depth == 1
+    assert slot.get(timeout=0.01) == 2
+    assert slot.depth == 0 and stats.dropped == 2
+    # 已取走的帧不会被重复取到
+    assert slot.get(timeout=0.01) is None
+
+
+def test_recognition_pool_merges_same_key():
+    pool = RecognitionPool(max_workers=2)
+    calls, results = [], []
+    release = threading.Event()
+    done = threading.Event()
+
+    def recognize(x):
+        calls.append(x)
+        release.wait(1.0)
+        return x * 10
+
+    def collect(result):
+        results.append(result)
+        if len(results) == 2:
+            done.set()
+
+    assert pool.submit("hover-1", recognize, 4, callback=collect)
+    assert not pool.submit("hover-1", recognize, 4, callback=collect)
+    assert pool.in_flight("hover-1") and pool.depth == 1
+    release.set()
+    assert done.wait(1.0)
+    assert calls == [4] and results == [40, 40]
+    assert pool.stats.count == 1
+    pool.shutdown()
+
+
+def test_capture_cadence_steady_while_recognizing():
+    slot = LatestSlot()
+    capturer = FakeCapturer()
+    worker = CaptureWorker(lambda: capturer, slot, interval=0.02)
+    pool = RecognitionPool(max_workers=2)
+    worker.start()
+    assert worker.wait_ready()
+    worker.set_region((0, 0, 8, 8))
+    worker.resume()
+
+    # 识别任务在其他线程上阻塞 300ms，截图不受影响
+    pool.submit("slow", time.sleep, 0.3)
+    times = []
+    deadline = time.perf_counter() + 0.3
+    while time.perf_counter() < deadline:
+        packet = slot.get(timeout=0.1)
+        if packet is not None:
+            times.append(packet.captured_at)
+    worker.stop()
+    worker.join(1.0)
+    pool.shutdown()
+
+    gaps = np.diff(times)
+    assert capturer.thread == "ScanCapture"
+    assert len(times) >= 10
+    assert gaps.max() < 0.06
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def emit(self, *args):
+        self.calls.append(args)
+
+
+def _hover_scanner(release):
+    from services.auto_scanner import AutoScanner
+    scanner = AutoScanner.__new__(AutoScanner)
+    scanner._hover_lock = threading.Lock()
+    scanner._hover_token = 0
+    scanner.stage_stats = {"hover": StageStats("hover")}
+    scanner.recognition_pool = RecognitionPool(max_workers=2)
+    scanner.item_pre_detected, scanner.force_show_detail = Recorder(), Recorder()
+    scanner.recognized = 0
+
+    def recognize(frame, hit_obj, details):
+        scanner.recognized += 1
+        release.wait(1.0)
+        return ("card", "harbor", "港口")
+
+    scanner._recognize_object = recognize
+    scanner._reset_hover(time.time())
+    return scanner
+
+
+def _wait_recognized(scanner):
+    deadline = time.perf_counter() + 1.0
+    while not scanner._hover_recognized and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    time.sleep(0.02)
+
+
+def test_hover_result_emitted_once():
+    release = threading.Event()
+    scanner = _hover_scanner(release)
+    # 识别进行中，扫描循环每帧都会再次触发
+    for _ in range(10):
+        scanner._recognize_async(None, {}, [], force=False)
+    release.set()
+    _wait_recognized(scanner)
+    assert scanner.recognized == 1
+    assert scanner.item_pre_detected.calls == [("card", "harbor", "港口")]
+    assert scanner.force_show_detail.calls == [] and scanner.stage_stats["hover"].count == 1
+
+    # 已识别：按住热键每帧直接显示缓存结果，不再识别
+    scanner._recognize_async(None, {}, [], force=True)
+    assert scanner.force_show_detail.calls == [("card", "harbor")] and scanner.recognized == 1
+    scanner.recognition_pool.shutdown()
+
+
+def test_hotkey_upgrades_in_flight_hover():
+    release = threading.Event()
+    scanner = _hover_scanner(release)
+    scanner._recognize_async(None, {}, [], force=False)
+    # 识别还没完成时按住热键：不重复提交，结果到达时直接显示详情（只一次）
+    for _ in range(5):
+        scanner._recognize_async(None, {}, [], force=True)
+    release.set()
+    _wait_recognized(scanner)
+    assert scanner.recognized == 1
+    assert scanner.force_show_detail.calls == [("card", "harbor")]
+    assert scanner.item_pre_detected.calls == []
+
+    # 换了悬停对象：旧任务的结果被丢弃
+    release.clear()
+    scanner._recognize_async(None, {}, [], force=False)
+    scanner._reset_hover(time.time())
+    release.set()
+    time.sleep(0.05)
+    assert not scanner._hover_recognized and scanner.item_pre_detected.calls == []
+    scanner.recognition_pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_latest_slot_keeps_newest()
+    test_recognition_pool_merges_same_key()
+    test_capture_cadence_steady_while_recognizing()
+    test_hover_result_emitted_once()
+    test_hotkey_upgrades_in_flight_hover()
+    print("✅ 扫描流水线测试全部通过")
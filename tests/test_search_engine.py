@@ -0,0 +1,88 @@
+"""
+模糊搜索测试
+1. OCR 确权：带前缀、错字、费用后缀的文本命中正确物品；没有共同字符直接返回 None
+2. 批量 find_best_matches 与逐条 find_best_match 结果一致，且与旧版全量比对一致
+3. 百科搜索返回原始记录；怪物库 (dict) 同样可用
+"""
+import json
+import os
+import sys
+import tempfile
+
+from rapidfuzz import process, fuzz, utils
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search_engine import FuzzySearcher, ngrams
+
+ITEMS = [
+    {"id": "market", "name_cn": "农贸集市"},
+    {"id": "blender", "name_cn": "搅拌机"},
+    {"id": "noodles", "name_cn": "方便面"},
+    {"id": "freezer", "name_cn": "冷库"},
+    {"id": "robot", "name_cn": "爆炸机器人"},
+    {"id": "potion", "name_cn": "无敌药水"},
+    {"id": "katana", "name_cn": "武士刀"},
+    {"id": "lens", "name_cn": "Magnifying Glass"},
+] + [{"id": f"filler-{i}", "name_cn": f"杂物{chr(0x4e00 + i)}{chr(0x4e80 + i)}"} for i in range(200)]
+
+
+def _searcher(db):
+    tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+    with tmp:
+        json.dump(db, tmp, ensure_ascii=False)
+    try:
+        return FuzzySearcher(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+
+
+def _legacy(searcher, query, threshold=60):
+    res = process.extractOne(query, searcher.all_names, scorer=fuzz.WRatio, processor=utils.default_process)
+    if res and res[1] >= threshold:
+        partial_res = process.extractOne(query, searcher.all_names, scorer=fuzz.partial_ratio)
+        final_res = partial_res if partial_res[1] > res[1] else res
+        return searcher.name_to_id[final_res[0]]
+    return None
+
+
+def test_ngrams():
+    assert ngrams("农贸集市") == ["农贸", "贸集", "集市"]
+    assert ngrams("冷") == ["冷"]
+    assert ngrams("magnifying glass") == ["mag", "agn", "gni", "nif", "ify", "fyi", "yin", "ing",
+                                          "gla", "las", "ass"]
+
+
+def test_find_best_match():
+    searcher = _searcher(ITEMS)
+    queries = ["沉重农贸集市", "搅伴机", "方便面：3", "冷库费", "爆炸机器", "无敌药水水", "magnifying glas",
+               "完全无关", "", "杂物丁"]
+    expected = ["market", "blender", "noodles", "freezer", "robot", "potion", "lens", None, None]
+    singles = [searcher.find_best_match(q) for q in queries]
+    assert singles[:9] == expected
+    assert singles == [_legacy(searcher, q) if q else None for q in queries]
+    assert searcher.find_best_matches(queries) == singles
+    assert searcher.find_best_matches(queries, workers=1) == singles
+    assert searcher.find_best_matches([]) == []
+
+    # 候选数有上限（共同字“杂物”命中全部 200 条填充名字）
+    assert len(searcher.candidates(utils.default_process("杂物"))) == FuzzySearcher.MAX_CANDIDATES
+
+
+def test_search_wiki():
+    searcher = _searcher(ITEMS)
+    results = searcher.search_wiki("农贸")
+    assert results[0] is searcher.id_to_record["market"] and results[0]["name_cn"] == "农贸集市"
+    assert searcher.search_wiki("武士", limit=1) == [searcher.id_to_record["katana"]]
+    assert searcher.search_wiki("") == [] and searcher.search_wiki("？？") == []
+
+    monsters = _searcher({"jungle_queen": {"name_zh": "丛林女王"}, "dragon": {"name_zh": "巨龙"}})
+    assert monsters.find_best_match("丛林女玉") == "jungle_queen"
+    assert monsters.search_wiki("巨龙") == [{"name_zh": "巨龙"}]
+
+
+if __name__ == "__main__":
+    test_ngrams()
+    test_find_best_match()
+    test_search_wiki()
+    print("✅ 模糊搜索测试全部通过")
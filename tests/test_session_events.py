@@ -0,0 +1,90 @@
+"""
+会话事件流测试
+验证 LogAnalyzer 产出的事件与解析得到的会话一致，且增量分析的结果可以完全由事件推导
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_analyzer import LogAnalyzer
+from services.log_line_assembler import LogLineAssembler
+from services.session_events import (
+    RunStarted, HeroPicked, CardPurchased, PvpStarted, BoardSnapshot, PvpEnded, RunEnded, RunMerged
+)
+
+LOG_FILE = Path(__file__).parent.parent / "assets" / "logs" / "Player.log"
+
+
+def _lines():
+    return LogLineAssembler().feed(LOG_FILE.read_bytes())
+
+
+def test_stream_events_match_sessions():
+    work_dir = tempfile.mkdtemp(prefix="bazaar_events_")
+    try:
+        analyzer = LogAnalyzer(work_dir)
+        with redirect_stdout(io.StringIO()):
+            events = list(analyzer.stream(_lines()))
+
+        started = [e for e in events if isinstance(e, RunStarted)]
+        assert [e.session for e in started] == analyzer.sessions
+
+        for session in analyzer.sessions:
+            own = [e for e in events if e.session is session]
+            ended = [e for e in own if isinstance(e, PvpEnded)]
+            assert [e.battle for e in ended] == session.pvp_battles
+            assert len([e for e in own if isinstance(e, PvpStarted)]) >= len(ended)
+            assert {e.instance_id for e in own if isinstance(e, CardPurchased)} == set(session.items)
+
+            heroes = [e.hero for e in own if isinstance(e, HeroPicked)]
+            assert heroes == ([session.hero] if session.hero else [])
+
+            finished = [e for e in own if isinstance(e, RunEnded)]
+            assert len(finished) == (1 if session.is_finished else 0)
+            if finished:
+                assert finished[0].victory == session.victory
+
+        snapshots = [e for e in events if isinstance(e, BoardSnapshot)]
+        assert snapshots and all(e.opponent_items for e in snapshots)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_incremental_result_derived_from_events():
+    work_dir = tempfile.mkdtemp(prefix="bazaar_events_")
+    try:
+        analyzer = LogAnalyzer(work_dir)
+        lines = _lines()
+        notified_new = []
+        notified_updated = []
+        all_events = []
+        with redirect_stdout(io.StringIO()):
+            for start in range(0, len(lines), 500):
+                result = analyzer.analyze_incremental(lines[start:start + 500])
+                notified_new.extend(s.session_id for s in result['new_sessions'])
+                notified_updated.extend(s.session_id for s in result['updated_sessions'])
+                all_events.extend(result['events'])
+
+        merged_away = {e.merged_session_id for e in all_events if isinstance(e, RunMerged)}
+        surviving = [s.session_id for s in analyzer.sessions]
+
+        # 每个最终存在的会话都被通知为新会话恰好一次；被合并掉的会话不会残留
+        assert sorted(set(notified_new) - merged_away) == sorted(surviving)
+        # 每场PVP结束都会让所属（已通知过的）会话出现在更新列表中
+        for event in all_events:
+            if isinstance(event, PvpEnded) and event.session.session_id in surviving:
+                assert event.session.session_id in notified_new or event.session.session_id in notified_updated
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_stream_events_match_sessions()
+    test_incremental_result_derived_from_events()
+    print("✅ 会话事件测试全部通过")
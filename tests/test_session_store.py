@@ -0,0 +1,198 @@
+"""
+会话缓存存储测试
+1. 把 Player.log 逐块送入 analyze_incremental，验证快照 + 日志重放得到的会话与内存中完全一致
+2. 每场PVP追加的字节数只与本场战斗有关，不随历史增长
+3. 写了一半的记录、压缩中途崩溃都不会丢失之前的会话
+4. 同一目录的多个写入者不会写出重复的seq/战斗，也不会在压缩时丢掉对方的记录
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.log_analyzer import LogAnalyzer, GameSession
+from services.log_line_assembler import LogLineAssembler
+from services.session_events import PvpEnded
+from services.session_store import SessionStore, get_session_store
+
+LOG_FILE = Path(__file__).parent.parent / "assets" / "logs" / "Player.log"
+LEGACY_CACHE = Path(__file__).parent.parent / "assets" / "logs" / "sessions_cache.json"
+CHUNK_SIZE = 64 * 1024
+
+
+def _dicts(sessions):
+    return {s.session_id: json.loads(json.dumps(s.to_dict())) for s in sessions}
+
+
+def _replay_into(work_dir):
+    """按块增量解析，返回 (分析器, 每场PVP结束那一批追加的日志字节数)"""
+    analyzer = LogAnalyzer(str(work_dir))
+    assembler = LogLineAssembler()
+    journal = work_dir / SessionStore.JOURNAL_FILE
+    data = LOG_FILE.read_bytes()
+    pvp_appends = []
+    for position in range(0, len(data), CHUNK_SIZE):
+        before = journal.stat().st_size if journal.exists() else 0
+        result = analyzer.analyze_incremental(assembler.feed(data[position:position + CHUNK_SIZE]))
+        after = journal.stat().st_size if journal.exists() else 0
+        if any(isinstance(e, PvpEnded) for e in result['events']) and after > before:
+            pvp_appends.append(after - before)
+    return analyzer, pvp_appends
+
+
+def test_journal_replay_matches_memory():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        analyzer, pvp_appends = _replay_into(work_dir)
+        assert analyzer.sessions and pvp_appends
+
+        loaded = {d['session_id']: d for d in SessionStore(work_dir).load()}
+        assert loaded == _dicts(analyzer.sessions)
+
+        # 同样的内容再同步一次不应写入任何记录
+        assert SessionStore(work_dir).sync(analyzer.sessions) == 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_pvp_append_is_independent_of_history():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        analyzer, _ = _replay_into(work_dir)
+        session = analyzer.sessions[-1]
+        battle = session.pvp_battles[-1]
+
+        store = SessionStore(work_dir)
+        store.load()
+        journal = work_dir / SessionStore.JOURNAL_FILE
+        sizes = []
+        for _ in range(20):
+            session.pvp_battles.append(dict(battle))
+            session.days += 1
+            before = journal.stat().st_size
+            store.sync([session], touched_ids={session.session_id})
+            sizes.append(journal.stat().st_size - before)
+
+        # 每场追加的字节数基本恒定（只差seq/天数的位数），约等于一场战斗的JSON大小
+        assert max(sizes) - min(sizes) < 16
+        assert sizes[0] < len(json.dumps(battle, ensure_ascii=False).encode('utf-8')) + 512
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_torn_write_keeps_earlier_sessions():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        analyzer, _ = _replay_into(work_dir)
+        expected = _dicts(analyzer.sessions)
+
+        # 模拟进程在写最后一条记录时被杀
+        journal = work_dir / SessionStore.JOURNAL_FILE
+        with open(journal, 'ab') as f:
+            f.write(b'{"seq": 999999, "op": "pvp", "id": "')
+
+        store = SessionStore(work_dir)
+        assert {d['session_id']: d for d in store.load()} == expected
+
+        # 之后的追加另起一行，残行不会吞掉新记录
+        session = analyzer.sessions[-1]
+        session.days += 1
+        assert store.sync([session], touched_ids={session.session_id}) == 1
+        expected[session.session_id]['days'] = session.days
+        assert {d['session_id']: d for d in SessionStore(work_dir).load()} == expected
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_compaction_and_crash_before_journal_truncate():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        analyzer, _ = _replay_into(work_dir)
+        expected = _dicts(analyzer.sessions)
+        journal = work_dir / SessionStore.JOURNAL_FILE
+        journal_copy = journal.read_bytes()
+
+        store = SessionStore(work_dir)
+        store.load()
+        store.compact()
+        assert journal.stat().st_size == 0
+        assert {d['session_id']: d for d in SessionStore(work_dir).load()} == expected
+
+        # 快照已替换但日志还没清空时崩溃：旧记录的seq都不大于快照seq，不会被重复应用
+        journal.write_bytes(journal_copy)
+        assert {d['session_id']: d for d in SessionStore(work_dir).load()} == expected
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def test_legacy_cache_is_readable():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        shutil.copy(LEGACY_CACHE, work_dir / SessionStore.SNAPSHOT_FILE)
+        with open(LEGACY_CACHE, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+
+        sessions = [GameSession.from_dict(d) for d in SessionStore(work_dir).load()]
+        assert [s.session_id for s in sessions] == [d['session_id'] for d in legacy]
+        # 没有变化时不追加任何记录
+        assert SessionStore(work_dir).sync(sessions) == 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _journal_seqs(work_dir):
+    with open(work_dir / SessionStore.JOURNAL_FILE, 'rb') as f:
+        return [json.loads(line)['seq'] for line in f if line.strip()]
+
+
+def test_two_writers_share_one_journal():
+    work_dir = Path(tempfile.mkdtemp(prefix="bazaar_store_"))
+    try:
+        # 同一进程内的分析器共享同一个存储
+        assert LogAnalyzer(str(work_dir))._session_store is LogAnalyzer(str(work_dir / "."))._session_store
+        assert get_session_store(work_dir) is get_session_store(str(work_dir))
+
+        # 两个独立的写入者（例如另一个进程）从同一状态开始
+        session = GameSession("10:00:00.000", 1, "2026-01-01")
+        session.pvp_battles.append({'day': 1})
+        writer_a, writer_b = SessionStore(work_dir), SessionStore(work_dir)
+        assert writer_a.sync([session]) == 1
+        writer_b.load()
+
+        # A 先追加第2场；B 随后同步同样的内容，不能再追加一遍
+        session.pvp_battles.append({'day': 2})
+        assert writer_a.sync([session], touched_ids=[session.session_id]) == 1
+        assert writer_b.sync([session], touched_ids=[session.session_id]) == 0
+        seqs = _journal_seqs(work_dir)
+        assert len(seqs) == len(set(seqs))
+        loaded = SessionStore(work_dir).load()
+        assert [b['day'] for b in loaded[0]['pvp_battles']] == [1, 2]
+
+        # A 再追加第3场后，B 压缩也必须保留 A 的记录
+        session.pvp_battles.append({'day': 3})
+        assert writer_a.sync([session], touched_ids=[session.session_id]) == 1
+        writer_b.compact()
+        loaded = SessionStore(work_dir).load()
+        assert [b['day'] for b in loaded[0]['pvp_battles']] == [1, 2, 3]
+
+        # 压缩后 A 继续追加，seq 接在快照之后
+        session.pvp_battles.append({'day': 4})
+        assert writer_a.sync([session], touched_ids=[session.session_id]) == 1
+        loaded = SessionStore(work_dir).load()
+        assert [b['day'] for b in loaded[0]['pvp_battles']] == [1, 2, 3, 4]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_journal_replay_matches_memory()
+    test_pvp_append_is_independent_of_history()
+    test_torn_write_keeps_earlier_sessions()
+    test_compaction_and_crash_before_journal_truncate()
+    test_legacy_cache_is_readable()
+    test_two_writers_share_one_journal()
+    print("✅ 会话缓存存储测试全部通过")
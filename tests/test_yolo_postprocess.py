@@ -0,0 +1,113 @@
+"""
+YOLO 向量化后处理测试
+1. 与旧版逐行循环的后处理逐项对比（合成输出 + 有模型时的 tests/assets/yolo_test.png）
+2. 直接运行时输出两种实现的后处理耗时
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core.detectors.yolo_detector import YoloDetector
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_IMAGE = os.path.join(ROOT, "tests", "assets", "yolo_test.png")
+
+
+def legacy_postprocess(detector, output, ratio, pad):
+    """旧实现：逐行遍历所有锚点"""
+    output = output[0].T
+    boxes, scores, class_ids = [], [], []
+
+    for row in output:
+        confidence = row[4:].max()
+        if confidence >= detector.confidence_thresh:
+            cx, cy, w, h = row[:4]
+            x1 = int((cx - w / 2 - pad[0]) / ratio)
+            y1 = int((cy - h / 2 - pad[1]) / ratio)
+            boxes.append([x1, y1, int(w / ratio), int(h / ratio)])
+            scores.append(float(confidence))
+            class_ids.append(int(row[4:].argmax()))
+
+    indices = cv2.dnn.NMSBoxes(boxes, scores, detector.confidence_thresh, detector.nms_thresh)
+
+    detections = []
+    if len(indices) > 0:
+        for i in indices.flatten():
+            detections.append({'class_id': class_ids[i], 'confidence': scores[i], 'box': boxes[i]})
+    return detections
+
+
+def _bare_detector():
+    """不加载模型，只用于后处理"""
+    detector = YoloDetector.__new__(YoloDetector)
+    detector.confidence_thresh = 0.5
+    detector.nms_thresh = 0.4
+    return detector
+
+
+def _synthetic_output(num_classes=7, anchors=8400, seed=0):
+    """模拟 [1, 4+类别数, 锚点数] 的输出：大部分锚点低置信度，少量目标簇"""
+    rng = np.random.default_rng(seed)
+    pred = np.zeros((4 + num_classes, anchors), dtype=np.float32)
+    pred[0] = rng.uniform(0, 640, anchors)
+    pred[1] = rng.uniform(80, 560, anchors)
+    pred[2] = rng.uniform(10, 200, anchors)
+    pred[3] = rng.uniform(10, 200, anchors)
+    pred[4:] = rng.uniform(0, 0.3, (num_classes, anchors))
+    hits = rng.choice(anchors, 300, replace=False)
+    pred[4 + rng.integers(0, num_classes, hits.size), hits] = rng.uniform(0.4, 1.0, hits.size)
+    return pred[np.newaxis]
+
+
+def test_matches_legacy_on_synthetic_output():
+    detector = _bare_detector()
+    ratio, pad = 640 / 1920, (0.0, 140.0)
+    for seed in range(5):
+        output = _synthetic_output(seed=seed)
+        assert detector._postprocess_stream(output, ratio, pad) == legacy_postprocess(detector, output, ratio, pad)
+        assert detector._postprocess(output, ratio, pad) == legacy_postprocess(detector, output, ratio, pad)
+
+    empty = np.zeros((1, 11, 8400), dtype=np.float32)
+    assert detector._postprocess_stream(empty, ratio, pad) == []
+
+
+def test_matches_legacy_on_test_image():
+    if not os.path.exists(os.path.join(ROOT, config.MODEL_PATH)):
+        pytest.skip(f"模型不存在，跳过真实图片对比: {config.MODEL_PATH}")
+    detector = YoloDetector(os.path.join(ROOT, config.MODEL_PATH), use_gpu=False)
+    img = cv2.imread(TEST_IMAGE)
+    input_tensor, ratio, pad = detector._preprocess(img)
+    outputs = detector.session.run(detector.output_names, {detector.input_name: input_tensor})
+    detections = detector._postprocess_stream(outputs[0], ratio, pad)
+    assert detections
+    assert detections == legacy_postprocess(detector, outputs[0], ratio, pad)
+
+
+def bench_postprocess(rounds: int = 50):
+    detector = _bare_detector()
+    output = _synthetic_output()
+    ratio, pad = 640 / 1920, (0.0, 140.0)
+
+    for label, fn in (("loop", lambda: legacy_postprocess(detector, output, ratio, pad)),
+                      ("numpy", lambda: detector._postprocess_stream(output, ratio, pad))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        print(f"{label:<8} | {(time.perf_counter() - start) / rounds * 1000:8.2f} ms/帧")
+
+
+if __name__ == "__main__":
+    test_matches_legacy_on_synthetic_output()
+    try:
+        test_matches_legacy_on_test_image()
+    except pytest.skip.Exception as e:
+        print(f"⚠️ {e}")
+    print("✅ YOLO 后处理测试全部通过")
+    bench_postprocess()
@@ -0,0 +1,247 @@
+"""
+YOLO 预处理零分配测试
+1. 复用缓冲区的 letterbox 结果与旧版（resize + copyMakeBorder + blobFromImage）一致
+2. tracemalloc 验证稳态下每帧预处理（以及有模型时的整条 detect_stream 推理路径）不再分配帧大小的内存
+3. 用临时生成的小 ONNX 模型（Identity）验证 IO Binding：复用输出缓冲区、非 CPU 后端每帧重绑输入、
+   动态输出和不支持 IO Binding 时的回退
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from core.detectors.yolo_detector import YoloDetector
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_IMAGE = os.path.join(ROOT, "tests", "assets", "yolo_test.png")
+FRAME_SHAPES = [(1080, 1920), (768, 1366), (1440, 2560), (601, 799), (900, 500)]
+
+
+def legacy_preprocess(image, input_shape=(640, 640)):
+    """旧实现：每帧分配缩放图、填充图和 blob"""
+    img_h, img_w = image.shape[:2]
+    input_h, input_w = input_shape
+
+    ratio = min(input_w / img_w, input_h / img_h)
+    new_w, new_h = int(img_w * ratio), int(img_h * ratio)
+    dw, dh = (input_w - new_w) / 2, (input_h - new_h) / 2
+
+    resized_img = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    padded_img = cv2.copyMakeBorder(resized_img, int(dh), int(dh) + (input_h - new_h) % 2,
+                                    int(dw), int(dw) + (input_w - new_w) % 2,
+                                    cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+    blob = cv2.dnn.blobFromImage(padded_img, 1 / 255.0, (input_w, input_h), swapRB=True, crop=False)
+    return blob, ratio, (dw, dh)
+
+
+def _bare_detector():
+    """不加载模型，只用于预处理"""
+    detector = YoloDetector.__new__(YoloDetector)
+    detector.input_shape = (640, 640)
+    detector._allocate_buffers()
+    return detector
+
+
+def _frame(h, w, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, 3), dtype=np.uint8)
+
+
+def _peak_allocation(fn, frames: int = 20) -> int:
+    """稳态（预热后）每帧的峰值新增分配字节数"""
+    for _ in range(3):
+        fn()
+    tracemalloc.start()
+    worst = 0
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - base)
+    tracemalloc.stop()
+    return worst
+
+
+def test_matches_legacy_letterbox():
+    detector = _bare_detector()
+    images = [cv2.imread(TEST_IMAGE)] + [_frame(h, w, i) for i, (h, w) in enumerate(FRAME_SHAPES)]
+    # 来回切换尺寸，验证画布灰边会被正确重刷
+    for image in images + images[::-1]:
+        tensor, ratio, pad = detector._preprocess(image)
+        expected, expected_ratio, expected_pad = legacy_preprocess(image)
+        assert tensor.shape == expected.shape and tensor.dtype == expected.dtype
+        assert ratio == expected_ratio and pad == expected_pad
+        np.testing.assert_allclose(tensor, expected, rtol=0, atol=1e-6)
+    # 布局缓存有上限（ROI 裁剪每帧尺寸都不同，不能无限增长）
+    assert len(detector._layouts) == YoloDetector.LAYOUT_CACHE_SIZE
+
+
+def test_preprocess_steady_state_allocations():
+    detector = _bare_detector()
+    image = _frame(1080, 1920)
+    first = detector._preprocess(image)[0]
+    assert detector._preprocess(image)[0] is first
+
+    reused = _peak_allocation(lambda: detector._preprocess(image))
+    legacy = _peak_allocation(lambda: legacy_preprocess(image))
+    print(f"预处理每帧峰值分配: 旧版 {legacy / 1e6:.2f} MB | 复用缓冲区 {reused / 1e3:.1f} KB")
+    # 输入张量本身 4.9 MB；稳态下只剩 ufunc 内部的小块临时缓冲
+    assert reused < 256 * 1024
+    assert legacy > 4 * 1024 * 1024
+
+
+def test_detect_stream_steady_state_allocations():
+    model_path = os.path.join(ROOT, config.MODEL_PATH)
+    if not os.path.exists(model_path):
+        pytest.skip(f"模型不存在，跳过推理路径分配测试: {config.MODEL_PATH}")
+    detector = YoloDetector(model_path, use_gpu=False)
+    image = cv2.imread(TEST_IMAGE)
+
+    def preprocess_and_infer():
+        tensor, _, _ = detector._preprocess(image)
+        detector._infer(tensor)
+
+    peak = _peak_allocation(preprocess_and_infer)
+    print(f"预处理+推理每帧峰值分配: {peak / 1e3:.1f} KB")
+    assert peak < 256 * 1024
+
+
+# ---------- 临时生成的小模型（不依赖 onnx 包，直接按 protobuf 线格式编码 ModelProto） ----------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, value = value & 0x7F, value >> 7
+        out.append(byte | 0x80 if value else byte)
+        if not value:
+            return bytes(out)
+
+
+def _field(num: int, value) -> bytes:
+    """整数按 varint 编码，字符串/子消息按长度前缀编码"""
+    if isinstance(value, int):
+        return _varint(num << 3) + _varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return _varint(num << 3 | 2) + _varint(len(value)) + value
+
+
+def _value_info(name: str, elem_type: int, dims) -> bytes:
+    """ValueInfoProto；dims 中的字符串是动态维度（dim_param）"""
+    shape = b"".join(_field(1, _field(1, d) if isinstance(d, int) else _field(2, d)) for d in dims)
+    return _field(1, name) + _field(2, _field(1, _field(1, elem_type) + _field(2, shape)))
+
+
+def _tiny_model(size: int = 32, dynamic_output: bool = False) -> str:
+    """
+    images [1,3,size,size] --Identity--> output0（形状固定，可预分配）
+    dynamic_output 时再加一个 Shape 输出（int64，交给 ORT 分配）
+    """
+    float_type, int64_type = 1, 7
+    nodes = _field(1, _field(1, "images") + _field(2, "output0") + _field(4, "Identity"))
+    outputs = _field(12, _value_info("output0", float_type, [1, 3, size, size]))
+    if dynamic_output:
+        nodes += _field(1, _field(1, "images") + _field(2, "shape") + _field(4, "Shape"))
+        outputs += _field(12, _value_info("shape", int64_type, [4]))
+    graph = nodes + _field(2, "tiny") + _field(11, _value_info("images", float_type, [1, 3, size, size])) + outputs
+    model = _field(1, 7) + _field(8, _field(2, 13)) + _field(7, graph)
+
+    fd, path = tempfile.mkstemp(prefix="tiny_yolo_", suffix=".onnx")
+    with os.fdopen(fd, 'wb') as f:
+        f.write(model)
+    return path
+
+
+def _tiny_detector(**kwargs):
+    path = _tiny_model(**kwargs)
+    try:
+        return YoloDetector(path, use_gpu=False)
+    finally:
+        os.remove(path)
+
+
+def _expected_tensor(image):
+    return legacy_preprocess(image, input_shape=(32, 32))[0]
+
+
+def test_io_binding_reuses_output_buffers():
+    detector = _tiny_detector()
+    assert detector._io_binding is not None and detector._output_buffers is not None
+    assert not detector._rebind_input
+
+    first = None
+    for seed in range(3):
+        image = _frame(48, 64, seed)
+        outputs = detector._infer(detector._preprocess(image)[0])
+        # 输出写进预分配的缓冲区，每帧返回同一个数组
+        first = first or outputs
+        assert outputs is first and outputs[0] is detector._output_buffers[0]
+        np.testing.assert_allclose(outputs[0], _expected_tensor(image), rtol=0, atol=1e-6)
+
+    # 不是复用的输入张量时走 session.run
+    other = _expected_tensor(_frame(48, 64, 9))
+    outputs = detector._infer(other)
+    assert outputs[0] is not detector._output_buffers[0]
+    np.testing.assert_allclose(outputs[0], other)
+
+
+def test_io_binding_rebinds_input_on_device_providers():
+    detector = _tiny_detector()
+    # 模拟 GPU 后端：输入每帧都要重新绑定（由 ORT 拷贝到设备）
+    detector.actual_provider = 'DmlExecutionProvider'
+    detector._setup_io_binding()
+    assert detector._rebind_input
+
+    binding = detector._io_binding
+    calls = []
+    bind_cpu_input = binding.bind_cpu_input
+    binding.bind_cpu_input = lambda name, array: (calls.append(name), bind_cpu_input(name, array))
+    for seed in range(2):
+        image = _frame(40, 40, seed)
+        outputs = detector._infer(detector._preprocess(image)[0])
+        np.testing.assert_allclose(outputs[0], _expected_tensor(image), rtol=0, atol=1e-6)
+    assert calls == [detector.input_name] * 2
+
+
+def test_io_binding_dynamic_output_and_fallback():
+    # 有输出不能预分配：输出交给 ORT 分配，每帧拷回 CPU
+    detector = _tiny_detector(dynamic_output=True)
+    assert detector._io_binding is not None and detector._output_buffers is None
+    image = _frame(32, 32)
+    outputs = detector._infer(detector._preprocess(image)[0])
+    np.testing.assert_allclose(outputs[0], _expected_tensor(image), rtol=0, atol=1e-6)
+    assert list(outputs[1]) == [1, 3, 32, 32]
+
+    # 会话不支持 IO Binding：回退到 session.run
+    detector = _tiny_detector()
+
+    def unsupported():
+        raise RuntimeError("io binding unsupported")
+
+    detector.session.io_binding = unsupported
+    detector._setup_io_binding()
+    assert detector._io_binding is None and detector._output_buffers is None
+    image = _frame(64, 32)
+    outputs = detector._infer(detector._preprocess(image)[0])
+    np.testing.assert_allclose(outputs[0], _expected_tensor(image), rtol=0, atol=1e-6)
+
+
+if __name__ == "__main__":
+    test_matches_legacy_letterbox()
+    test_preprocess_steady_state_allocations()
+    try:
+        test_detect_stream_steady_state_allocations()
+    except pytest.skip.Exception as e:
+        print(f"⚠️ {e}")
+    test_io_binding_reuses_output_buffers()
+    test_io_binding_rebinds_input_on_device_providers()
+    test_io_binding_dynamic_output_and_fallback()
+    print("✅ YOLO 预处理测试全部通过")
@@ -1,14 +1,17 @@
 """
 添加测试用历史战绩数据
 """
-import json
+import sys
 from pathlib import Path
 from datetime import datetime
 import uuid
 
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.match_history_manager import MatchHistoryManager
+
 # 初始化路径
 user_data_dir = Path(__file__).parent.parent / "user_data"
-match_history_path = user_data_dir / "match_history.json"
 
 # 创建测试数据
 test_match = {
@@ -72,21 +75,11 @@ for day in range(1, 14):
     }
     test_match["pvp_battles"].append(battle)
 
-# 读取现有数据
-try:
-    with open(match_history_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-except Exception:
-    data = {"matches": []}
-
-# 添加测试数据
-data["matches"].append(test_match)
-
-# 保存
-with open(match_history_path, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+# 写入战绩数据库
+manager = MatchHistoryManager(str(user_data_dir))
+manager.add_match_record(test_match)
 
-print(f"✓ 已添加测试战绩数据到 {match_history_path}")
+print(f"✓ 已添加测试战绩数据到 {manager.db_file}")
 print(f"  对局ID: {test_match['match_id']}")
 print(f"  英雄: {test_match['hero']}")
 print(f"  天数: {test_match['days']}")
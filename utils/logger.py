@@ -93,6 +93,27 @@ class QtLogHandler(QObject):
 # 全局handler引用（防止被垃圾回收）
 _qt_handler = None
 
+# 🔍 TRACE 级别追踪开关（日志解析等热路径的逐事件输出）
+# 热路径代码先检查 trace_enabled() 再构建消息，关闭时不做任何格式化/排序
+_trace_enabled = False
+
+
+def trace_enabled() -> bool:
+    """
+    热路径的 TRACE 追踪开关（由 set_trace_enabled 设置的全局标志）
+    不检查 handler 级别：开关打开但 handler 不接收 TRACE 时，消息照常构建后被丢弃
+    """
+    return _trace_enabled
+
+
+def set_trace_enabled(enabled: bool):
+    """
+    开关 TRACE 追踪
+    注意：只改变热路径是否产生 TRACE 消息，是否输出仍取决于 handler 级别
+    """
+    global _trace_enabled
+    _trace_enabled = enabled
+
 def add_qt_log_handler(text_edit, debug_mode: bool = False):
     """添加Qt日志处理器到loguru"""
     if QTextEdit is None or text_edit is None:
@@ -123,18 +144,22 @@ def add_qt_log_handler(text_edit, debug_mode: bool = False):
     _qt_handler.handler_id = handler_id
 
 
-def setup_logger(is_gui_app: bool = True, debug_mode: bool = False):
+def setup_logger(is_gui_app: bool = True, debug_mode: bool = False, trace_mode: bool = False):
     """
     配置日志输出。
     :param is_gui_app: 是否为 GUI 应用 (默认为 True，控制台只输出 INFO)
     :param debug_mode: 是否强制开启调试模式 (若为 True，控制台输出 DEBUG)
+    :param trace_mode: 是否开启 TRACE 追踪 (日志解析的逐事件输出，默认关闭且零开销)
     """
     logger.remove() # 清除默认配置
+    set_trace_enabled(trace_mode)
 
     # --- Console Handler ---
     # 如果是 GUI 应用且未开启调试模式，只显示 INFO
     # 如果是非 GUI 应用 (如测试) 或者 强制开启调试模式，显示 DEBUG
     console_level = "WARNING" if is_gui_app and not debug_mode else "DEBUG"
+    if trace_mode:
+        console_level = "TRACE"
     
     # 稍微调整控制台输出格式，使其更紧凑
     console_format = "<green>{time:HH:mm:ss}</green> | <level>{level: <7}</level> | <cyan>{module}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
@@ -147,7 +172,7 @@ def setup_logger(is_gui_app: bool = True, debug_mode: bool = False):
         "logs/app_{time:YYYY-MM-DD}.log", 
         rotation=FILE_ROTATION, 
         retention=RETENTION, 
-        level="DEBUG", 
+        level="TRACE" if trace_mode else "DEBUG", 
         format=LOG_FORMAT,
         colorize=False, # 文件日志不需要颜色
         backtrace=True, 
@@ -156,6 +181,8 @@ def setup_logger(is_gui_app: bool = True, debug_mode: bool = False):
     
     if debug_mode:
         logger.info("🔧 调试模式已开启 (Debug Mode Enabled)")
+    if trace_mode:
+        logger.info("🔍 TRACE 追踪已开启 (Trace Mode Enabled)")
 
     logger.info("日志系统配置完成。")
     # 记录运行环境信息
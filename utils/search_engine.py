@@ -1,19 +1,51 @@
-import json
+import re
+from collections import defaultdict
+from typing import List, Optional, Sequence
+
+import numpy as np
 from rapidfuzz import process, fuzz, utils
 from loguru import logger
 
+from data_manager.game_catalog import get_game_catalog
+
+# 中日韩字符按双字切分，其余（英文、数字）按三字符切分
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def ngrams(text: str) -> List[str]:
+    """
+    字符 n-gram（对已经 default_process 过的字符串）
+    中文名通常只有 2~5 个字，按双字切分；英文按三字符切分；不足 n 的片段整体作为一个 gram
+    """
+    grams = []
+    for token in text.split():
+        n = 2 if _CJK.search(token) else 3
+        if len(token) <= n:
+            grams.append(token)
+        else:
+            grams.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return grams
+
+
 class FuzzySearcher:
+    # 候选过多时只对 n-gram 重合度最高的这么多条名字做 RapidFuzz 打分
+    MAX_CANDIDATES = 64
+
     def __init__(self, items_db_path):
         """
         初始化搜索引擎
         :param items_db_path: JSON 数据库路径
         """
         try:
-            with open(items_db_path, 'r', encoding='utf-8') as f:
-                self.items_db = json.load(f)
-            
+            # 与其他模块共享同一份解析结果（进程内只加载一次）
+            self.items_db = get_game_catalog().load_json(items_db_path)
+            if self.items_db is None:
+                raise FileNotFoundError(items_db_path)
+
             self.name_to_id = {}
-            
+            # ✅ ID -> 原始记录，百科搜索直接按 ID 取记录，不再线性扫描 items_db
+            self.id_to_record = {}
+
             # 判断数据库类型
             if isinstance(self.items_db, list):
                 # 物品数据库 (List of Dicts)
@@ -23,7 +55,8 @@ class FuzzySearcher:
                     item_id = item.get('id', '')
                     if name and item_id:
                         self.name_to_id[name] = item_id
-            
+                        self.id_to_record.setdefault(item_id, item)
+
             elif isinstance(self.items_db, dict):
                 # 怪物数据库 (Dict of Dicts)
                 # key (中文名) -> key (作为ID)
@@ -32,14 +65,75 @@ class FuzzySearcher:
                     name = data.get('name_zh', key)
                     # 对于怪物，我们用 key 作为唯一标识符
                     self.name_to_id[name] = key
+                    self.id_to_record[key] = data
 
             # 提取所有可搜索的名字列表
             self.all_names = list(self.name_to_id.keys())
-            
+            self._build_index()
+
             logger.info(f"FuzzySearcher 初始化成功，已加载 {len(self.all_names)} 条条目")
         except Exception as e:
             logger.error(f"FuzzySearcher 加载数据库失败: {e}")
             self.all_names = []
+            self._build_index()
+
+    def _build_index(self):
+        """
+        🔥 预处理名字并建立倒排索引（只在初始化时做一次）
+        - processed_names: default_process 后的名字（打分时不再逐条处理）
+        - _gram_postings: n-gram -> 名字下标数组，用于按重合度排序候选
+        - _char_postings: 单字 -> 名字下标数组；没有任何共同字符的名字相似度必然为 0，
+          因此按单字召回不会漏掉任何得分大于 0 的名字
+        """
+        self.processed_names = [utils.default_process(name) for name in self.all_names]
+        grams, chars = defaultdict(set), defaultdict(set)
+        for idx, name in enumerate(self.processed_names):
+            for gram in ngrams(name):
+                grams[gram].add(idx)
+            for ch in name.replace(" ", ""):
+                chars[ch].add(idx)
+        self._gram_postings = {g: np.fromiter(ids, dtype=np.int32) for g, ids in grams.items()}
+        self._char_postings = {c: np.fromiter(ids, dtype=np.int32) for c, ids in chars.items()}
+
+    def candidates(self, processed_query: str, limit: Optional[int] = None) -> np.ndarray:
+        """
+        倒排索引召回候选名字下标（按 n-gram 重合度、共同字数从高到低）
+        耗时只与查询中各字符的倒排表长度有关，与名字总数无关
+        """
+        limit = limit or self.MAX_CANDIDATES
+        hits = [self._char_postings[ch] for ch in set(processed_query.replace(" ", "")) if ch in self._char_postings]
+        if not hits:
+            return np.zeros(0, dtype=np.int32)
+        ids, char_votes = np.unique(np.concatenate(hits), return_counts=True)
+        if len(ids) <= limit:
+            return ids
+
+        gram_hits = [self._gram_postings[g] for g in set(ngrams(processed_query)) if g in self._gram_postings]
+        gram_votes = np.zeros(len(ids), dtype=np.int64)
+        if gram_hits:
+            gram_ids, counts = np.unique(np.concatenate(gram_hits), return_counts=True)
+            gram_votes[np.searchsorted(ids, gram_ids)] = counts
+        # 先按 n-gram 重合数，再按共同字数排序
+        order = np.lexsort((-char_votes, -gram_votes))[:limit]
+        return ids[np.sort(order)]
+
+    def _score(self, query, candidate_ids):
+        """
+        在候选中取最佳匹配
+        1. fuzz.WRatio: 综合评估相似度 (对错别字容忍度高)，查询和名字都已 default_process
+        2. fuzz.partial_ratio: 部分匹配 (用于解决 "沉重农贸集市" 包含 "农贸集市" 的情况)
+        :return: (名字, WRatio 分数, 最终分数)
+        """
+        processed = utils.default_process(query)
+        choices = [self.processed_names[i] for i in candidate_ids]
+        res = process.extractOne(processed, choices, scorer=fuzz.WRatio, processor=None)
+        if not res:
+            return None
+        partial = process.extractOne(query, [self.all_names[i] for i in candidate_ids], scorer=fuzz.partial_ratio)
+        # 如果部分匹配得分极高 (比如 100)，说明它是带前缀的正确答案
+        if partial and partial[1] > res[1]:
+            return self.all_names[candidate_ids[partial[2]]], res[1], partial[1]
+        return self.all_names[candidate_ids[res[2]]], res[1], res[1]
 
     def find_best_match(self, query, threshold=60):
         """
@@ -51,31 +145,65 @@ class FuzzySearcher:
         if not query or not self.all_names:
             return None
 
-        # 核心算法说明：
-        # 1. fuzz.WRatio: 综合评估相似度 (对错别字容忍度高)
-        # 2. fuzz.partial_ratio: 部分匹配 (用于解决 "沉重农贸集市" 包含 "农贸集市" 的情况)
-        
-        # 尝试直接匹配
-        res = process.extractOne(
-            query, 
-            self.all_names, 
-            scorer=fuzz.WRatio,
-            processor=utils.default_process # 自动转小写、去标点
-        )
+        candidate_ids = self.candidates(utils.default_process(query))
+        if len(candidate_ids) == 0:
+            return None
+        best = self._score(query, candidate_ids)
 
-        if res and res[1] >= threshold:
-            # 检查是否有更精准的部分匹配 (针对前缀)
-            partial_res = process.extractOne(query, self.all_names, scorer=fuzz.partial_ratio)
-            
-            # 如果部分匹配得分极高 (比如 100)，说明它是带前缀的正确答案
-            final_res = partial_res if partial_res[1] > res[1] else res
-            
-            matched_name = final_res[0]
-            logger.debug(f"模糊匹配命中: {query} -> {matched_name} (Score: {final_res[1]})")
+        if best and best[1] >= threshold:
+            matched_name = best[0]
+            logger.debug(f"模糊匹配命中: {query} -> {matched_name} (Score: {best[2]})")
             return self.name_to_id[matched_name]
-        
+
         return None
 
+    def find_best_matches(self, queries: Sequence[str], threshold=60, workers: int = -1) -> List[Optional[str]]:
+        """
+        批量 OCR 确权：查询按候选并集大小分组，每组用 process.cdist 一次打分（多线程）
+        :return: 与 queries 一一对应的 item_id 或 None
+        """
+        results: List[Optional[str]] = [None] * len(queries)
+        if not self.all_names:
+            return results
+
+        processed = [utils.default_process(q) if q else "" for q in queries]
+        group, union = [], set()
+        for qi, p in enumerate(processed):
+            ids = self.candidates(p) if p else np.zeros(0, dtype=np.int32)
+            if len(ids) == 0:
+                continue
+            # 并集过大时 cdist 会给每个查询打很多无关名字的分，先结算当前这组
+            if group and len(union | set(ids.tolist())) > self.MAX_CANDIDATES * 2:
+                self._score_group(queries, processed, group, union, threshold, workers, results)
+                group, union = [], set()
+            group.append((qi, ids))
+            union.update(ids.tolist())
+        if group:
+            self._score_group(queries, processed, group, union, threshold, workers, results)
+        return results
+
+    def _score_group(self, queries, processed, group, union, threshold, workers, results):
+        union = np.array(sorted(union), dtype=np.int32)
+        w_scores = process.cdist([processed[qi] for qi, _ in group], [self.processed_names[i] for i in union],
+                                 scorer=fuzz.WRatio, processor=None, score_cutoff=threshold, workers=workers)
+        passed = []
+        for row, (qi, ids) in enumerate(group):
+            # 只看该查询自己的候选，保证与 find_best_match 的结果一致
+            cols = np.searchsorted(union, ids)
+            w_best = cols[int(np.argmax(w_scores[row, cols]))]
+            if w_scores[row, w_best] >= threshold:
+                passed.append((row, qi, cols, w_best))
+        if not passed:
+            return
+
+        # 部分匹配只对过了门槛的查询计算
+        p_scores = process.cdist([queries[qi] for _, qi, _, _ in passed], [self.all_names[i] for i in union],
+                                 scorer=fuzz.partial_ratio, workers=workers)
+        for p_row, (row, qi, cols, w_best) in enumerate(passed):
+            p_best = cols[int(np.argmax(p_scores[p_row, cols]))]
+            best = p_best if p_scores[p_row, p_best] > w_scores[row, w_best] else w_best
+            results[qi] = self.name_to_id[self.all_names[int(union[best])]]
+
     def search_wiki(self, query, limit=10):
         """
         搜索百科 (用于用户手动输入搜索)
@@ -86,21 +214,27 @@ class FuzzySearcher:
         if not query:
             return []
 
+        processed = utils.default_process(query)
+        candidate_ids = self.candidates(processed, limit=max(self.MAX_CANDIDATES, limit))
+        if len(candidate_ids) == 0:
+            return []
+
         # 获取前 N 个最相似的名字
         results = process.extract(
-            query, 
-            self.all_names, 
-            scorer=fuzz.WRatio, 
+            processed,
+            [self.processed_names[i] for i in candidate_ids],
+            scorer=fuzz.WRatio,
+            processor=None,
             limit=limit
         )
 
         matched_items = []
-        for name, score, index in results:
+        for _name, score, index in results:
             if score > 30: # 百科搜索门槛可以设低一点，让结果更丰富
-                item_id = self.name_to_id[name]
+                item_id = self.name_to_id[self.all_names[candidate_ids[index]]]
                 # 找到原始 item 数据
-                item_data = next((i for i in self.items_db if i['id'] == item_id), None)
+                item_data = self.id_to_record.get(item_id)
                 if item_data:
                     matched_items.append(item_data)
-        
-        return matched_items
\ No newline at end of file
+
+        return matched_items